@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     User, StudentProfile, StaffProfile, Teacher, Student,
-    Subject, Semester, ClassGroup, Section, Schedule, Attendance, Grade
+    Subject, Semester, ClassGroup, Section, Schedule, Attendance, Grade,
+    AssessmentWeight, TermSummary, Job
 )
 
 # ----------------------------
@@ -51,6 +52,33 @@ class StudentAdmin(admin.ModelAdmin):
     list_display = ('user', 'student_id', 'program', 'level', 'current_semester', 'gpa')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'student_id', 'program')
     list_filter = ('program', 'level', 'current_semester')
+    readonly_fields = ('gpa',)  # computed by api.term_results
+
+# ----------------------------
+# Assessment weights / term results
+# ----------------------------
+@admin.register(AssessmentWeight)
+class AssessmentWeightAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'semester', 'grade_type', 'weight')
+    list_filter = ('grade_type', 'semester')
+    search_fields = ('subject__name', 'subject__code')
+
+@admin.register(TermSummary)
+class TermSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'semester', 'section', 'gpa', 'credit_hours', 'average_percentage', 'class_rank')
+    list_filter = ('semester',)
+    search_fields = ('student__username', 'student__first_name', 'student__last_name')
+    readonly_fields = [f.name for f in TermSummary._meta.fields]
+
+# ----------------------------
+# Background jobs
+# ----------------------------
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'progress', 'attempts', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'requested_by__username')
+    readonly_fields = [f.name for f in Job._meta.fields]
 from django.contrib import admin
 from .models import Wereda
 
@@ -71,7 +99,7 @@ class WeredaAdmin(admin.ModelAdmin):
     list_filter = ('status', 'manager')
     search_fields = ('name', 'manager__username', 'manager__first_name', 'manager__last_name')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('number_of_schools', 'number_of_students', 'number_of_teachers', 'created_at', 'updated_at')
 
     fieldsets = (
         (None, {
@@ -103,5 +131,5 @@ class SchoolAdmin(admin.ModelAdmin):
     )
     list_filter = ("level", "type", "manager", "supervisor")
     search_fields = ("name", "code", "manager__username", "supervisor__username")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("student_count", "teacher_count", "created_at", "updated_at")
     ordering = ("name",)
@@ -0,0 +1,140 @@
+"""
+Academic-year archival of Grade and Attendance.
+
+Once every semester of an academic year has ended, `manage.py
+archive_academic_year` moves that year's grades and attendance into
+GradeArchive / AttendanceArchive and stamps the semesters' archived_at.
+The live tables then only hold open years, so everyday teacher and student
+queries never touch history.
+
+Archived years stay readable through the same endpoints: pass
+`academic_year=2024/25` and grades_for() / attendance_for() switch to the
+archive tables. The archive models keep Grade's and Attendance's field
+names, so filters and serializers carry over unchanged.
+
+The archive tables are ordinary tables indexed by academic_year first; on
+PostgreSQL they can be converted to tables partitioned by academic_year
+without changing this module.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Grade, Attendance, GradeArchive, AttendanceArchive, Semester
+from .sharding import academic_databases
+
+ARCHIVED_YEARS_CACHE_KEY = 'archive:archived_years'
+ARCHIVED_YEARS_CACHE_TTL = 300
+
+GRADE_FIELDS = [
+    'school_id', 'student_id', 'subject_id', 'section_id', 'teacher_id', 'semester_id',
+    'academic_year', 'grade_type', 'score', 'full_mark', 'date_recorded',
+]
+ATTENDANCE_FIELDS = ['school_id', 'student_id', 'section_id', 'subject_id', 'date', 'status', 'taken_by_id']
+
+
+# -----------------------------
+# READING
+# -----------------------------
+def archived_years():
+    """Academic years whose records live in the archive tables."""
+    years = cache.get(ARCHIVED_YEARS_CACHE_KEY)
+    if years is None:
+        years = set(
+            Semester.objects.filter(archived_at__isnull=False)
+            .values_list('academic_year', flat=True).distinct()
+        )
+        cache.set(ARCHIVED_YEARS_CACHE_KEY, years, ARCHIVED_YEARS_CACHE_TTL)
+    return years
+
+
+def is_archived(academic_year):
+    return bool(academic_year) and academic_year in archived_years()
+
+
+def year_bounds(academic_year):
+    """(first day, last day) of an academic year, from its semesters."""
+    bounds = Semester.objects.filter(academic_year=academic_year).aggregate(
+        start=Min('start_date'), end=Max('end_date')
+    )
+    return bounds['start'], bounds['end']
+
+
+def grades_for(academic_year=None):
+    """Grade queryset for a year: the archive for archived years, the live table otherwise."""
+    if is_archived(academic_year):
+        return GradeArchive.objects.filter(academic_year=academic_year)
+    if academic_year:
+        return Grade.objects.filter(academic_year=academic_year)
+    return Grade.objects.all()
+
+
+def attendance_for(academic_year=None):
+    """Attendance queryset for a year: the archive for archived years, the live table otherwise."""
+    if is_archived(academic_year):
+        return AttendanceArchive.objects.filter(academic_year=academic_year)
+    if academic_year:
+        start, end = year_bounds(academic_year)
+        if start is None:
+            return Attendance.objects.none()
+        return Attendance.objects.filter(date__gte=start, date__lte=end)
+    return Attendance.objects.all()
+
+
+# -----------------------------
+# ARCHIVING
+# -----------------------------
+def closed_years(today=None):
+    """Academic years whose semesters have all ended and are not archived yet."""
+    today = today or timezone.localdate()
+    years = Semester.objects.filter(archived_at__isnull=True).values('academic_year').annotate(
+        last_day=Max('end_date')
+    )
+    return sorted(row['academic_year'] for row in years if row['last_day'] < today)
+
+
+def _move(source, archive_model, fields, alias, academic_year, batch_size):
+    rows = source.using(alias).order_by('pk').values('pk', *fields)
+    moved = 0
+    while True:
+        batch = list(rows[:batch_size])
+        if not batch:
+            return moved
+        ids = [row.pop('pk') for row in batch]
+        with transaction.atomic(using=alias):
+            archive_model.objects.using(alias).bulk_create([
+                archive_model(original_id=pk, **{**row, 'academic_year': academic_year})
+                for pk, row in zip(ids, batch)
+            ])
+            # _raw_delete skips the per-row delete signals: the records still
+            # exist, so rollups built from them stay valid.
+            source.model._base_manager.using(alias).filter(pk__in=ids)._raw_delete(alias)
+        moved += len(batch)
+
+
+def archive_year(academic_year, batch_size=1000):
+    """
+    Move one academic year's grades and attendance to the archive tables on
+    every academic database. Returns (grades moved, attendance moved).
+    """
+    semester_ids = list(Semester.objects.filter(academic_year=academic_year).values_list('id', flat=True))
+    start, end = year_bounds(academic_year)
+    if start is None:
+        return 0, 0
+
+    grades = attendance = 0
+    for alias in academic_databases():
+        grades += _move(
+            Grade.objects.filter(semester_id__in=semester_ids),
+            GradeArchive, GRADE_FIELDS, alias, academic_year, batch_size,
+        )
+        attendance += _move(
+            Attendance.objects.filter(date__gte=start, date__lte=end),
+            AttendanceArchive, ATTENDANCE_FIELDS, alias, academic_year, batch_size,
+        )
+
+    Semester.objects.filter(academic_year=academic_year).update(archived_at=timezone.now())
+    cache.delete(ARCHIVED_YEARS_CACHE_KEY)
+    return grades, attendance
@@ -0,0 +1,158 @@
+"""
+Attendance bitmaps: a per-term summary of Attendance, so term statistics
+don't scan the daily rows.
+
+One AttendanceBitmap row per (student, section, subject, semester) holds
+two packed bitsets over the semester's days (recorded and present) plus
+their popcounts. Term statistics (present_days, attendance_percentage)
+then read one row per student and subject instead of counting ~150
+Attendance rows, and day-level questions decode the bitsets with NumPy
+(api.bitsets).
+
+Attendance stays the source of truth and keeps every row, so the bitmaps
+add storage rather than save it; what they cut is the scan cost of term
+statistics. With ATTENDANCE_BITMAPS on, signals update the bitmap of every
+saved or deleted Attendance row; `manage.py build_attendance_bitmaps`
+rebuilds whole semesters (after turning the setting on, or after bulk
+writes that skipped signals).
+Bitmaps are not touched by archive_academic_year, so archived years keep
+their term statistics.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from . import bitsets
+from .archive import attendance_for
+from .models import AttendanceBitmap, Semester
+from .sharding import academic_databases
+
+BATCH_SIZE = 1000
+
+
+def enabled():
+    return getattr(settings, 'ATTENDANCE_BITMAPS', False)
+
+
+def semester_for(day):
+    """The semester a day belongs to (the earliest one if semesters overlap)."""
+    return Semester.objects.filter(start_date__lte=day, end_date__gte=day).order_by('start_date').first()
+
+
+# -----------------------------
+# MAINTENANCE
+# -----------------------------
+def record(student_id, section_id, subject_id, day, status, using='default'):
+    """Set (status 'present'/'absent') or clear (None) one day of a student's bitmap."""
+    semester = semester_for(day)
+    if semester is None:
+        return
+    key = dict(student_id=student_id, section_id=section_id, subject_id=subject_id, semester_id=semester.pk)
+    with transaction.atomic(using=using):
+        bitmaps = AttendanceBitmap.objects.using(using).select_for_update()
+        if status is None:
+            bitmap = bitmaps.filter(**key).first()
+            if bitmap is None:
+                return
+        else:
+            bitmap, _ = bitmaps.get_or_create(**key, defaults={'start_date': semester.start_date})
+        bitmap.mark(day, status)
+        bitmap.save(using=using)
+
+
+def _rows(semester, section_ids, alias):
+    """Attendance of a semester ordered by bitmap key, from the live or archive table."""
+    rows = attendance_for(semester.academic_year).using(alias).filter(
+        date__gte=semester.start_date, date__lte=semester.end_date,
+    )
+    if section_ids is not None:
+        rows = rows.filter(section_id__in=section_ids)
+    return rows.order_by('student_id', 'section_id', 'subject_id', 'date').values_list(
+        'school_id', 'student_id', 'section_id', 'subject_id', 'date', 'status',
+    )
+
+
+def _bitmap(semester, key, school_id, days):
+    recorded = bitsets.pack(index for index, _ in days)
+    present = bitsets.pack(index for index, status in days if status == 'present')
+    student_id, section_id, subject_id = key
+    return AttendanceBitmap(
+        school_id=school_id, student_id=student_id, section_id=section_id, subject_id=subject_id,
+        semester_id=semester.pk, start_date=semester.start_date, recorded=recorded, present=present,
+        total_days=bitsets.popcount(recorded), present_days=bitsets.popcount(present),
+    )
+
+
+def rebuild(semester, section_ids=None):
+    """
+    Replace a semester's bitmaps (optionally only some sections') with
+    bitmaps packed from its Attendance rows. Returns the number of bitmaps.
+    """
+    count = 0
+    for alias in academic_databases():
+        with transaction.atomic(using=alias):
+            existing = AttendanceBitmap.objects.using(alias).filter(semester_id=semester.pk)
+            if section_ids is not None:
+                existing = existing.filter(section_id__in=section_ids)
+            existing.delete()
+
+            batch, key, school_id, days = [], None, None, []
+            for row_school_id, *row_key, day, status in _rows(semester, section_ids, alias).iterator(chunk_size=5000):
+                row_key = tuple(row_key)
+                if row_key != key:
+                    if days:
+                        batch.append(_bitmap(semester, key, school_id, days))
+                    key, school_id, days = row_key, row_school_id, []
+                days.append(((day - semester.start_date).days, status))
+                if len(batch) >= BATCH_SIZE:
+                    AttendanceBitmap.objects.using(alias).bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            if days:
+                batch.append(_bitmap(semester, key, school_id, days))
+            AttendanceBitmap.objects.using(alias).bulk_create(batch)
+            count += len(batch)
+    return count
+
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def _stats(total, present):
+    total, present = total or 0, present or 0
+    return {
+        'total_days': total,
+        'present_days': present,
+        'absent_days': total - present,
+        'attendance_percentage': round(present * 100 / total, 2) if total else 0,
+    }
+
+
+def summary(bitmaps):
+    """Term statistics of a bitmap queryset, shaped like the Attendance-based ones."""
+    totals = bitmaps.aggregate(total=Sum('total_days'), present=Sum('present_days'))
+    return _stats(totals['total'], totals['present'])
+
+
+def by_student(bitmaps):
+    """{student_id: term statistics} summed over each student's sections/subjects."""
+    rows = bitmaps.values('student_id').annotate(total=Sum('total_days'), present=Sum('present_days'))
+    return {row['student_id']: _stats(row['total'], row['present']) for row in rows}
+
+
+def daily_counts(semester, bitmaps):
+    """
+    [{date, present, total}] for every day of a semester with attendance,
+    summed over the bitmaps (e.g. one section's students) in two vectorized passes.
+    """
+    rows = list(bitmaps.filter(semester_id=semester.pk).values_list('recorded', 'present'))
+    length = (semester.end_date - semester.start_date).days + 1
+    recorded = bitsets.column_sums([bytes(r) for r, _ in rows], length)
+    present = bitsets.column_sums([bytes(p) for _, p in rows], length)
+    return [
+        {'date': semester.start_date + timedelta(days=i), 'present': int(present[i]), 'total': int(recorded[i])}
+        for i in range(length) if recorded[i]
+    ]
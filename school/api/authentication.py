@@ -0,0 +1,181 @@
+"""
+Authentication helpers.
+
+RoleProfileJWTAuthentication resolves the user together with their role
+profile (Teacher, StudentProfile or StaffProfile) once per request and keeps
+both in a short-lived cache, so the views no longer need their own
+Teacher.objects.get(user=request.user) lookup. Use get_role_profile() /
+get_teacher() to read the profile that was resolved for the request.
+
+StatelessRoleJWTAuthentication goes one step further for tokens issued by
+SchoolRefreshToken: the user is rebuilt from the signed claims and checked
+against the in-memory revocation list, so authentication needs no query.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Teacher, StudentProfile, StaffProfile, ClaimsUser
+from .tokens import ROLE_CLAIM, PROFILE_ID_CLAIM, SCHOOL_ID_CLAIM, revocation_list
+from .sharding import pin_user_school
+
+User = get_user_model()
+
+ROLE_PROFILE_CACHE_TTL = getattr(settings, 'ROLE_PROFILE_CACHE_TTL', 60)
+
+# Which model holds the profile for a role; every other role that has a
+# profile at all uses StaffProfile.
+ROLE_PROFILE_MODELS = {
+    'teacher': Teacher,
+    'student': StudentProfile,
+}
+
+_NOT_LOADED = object()
+
+
+# -----------------------------
+# CACHE KEYS
+# -----------------------------
+def _version_key(user_id):
+    return f"role_profile_version:{user_id}"
+
+
+def role_profile_cache_key(user_id):
+    """Cache key for a user's profile, bumped whenever the user or profile changes."""
+    version = cache.get(_version_key(user_id), 0)
+    return f"role_profile:{user_id}:{version}"
+
+
+def invalidate_role_profile(user_id):
+    """Make every cached copy of this user's profile stale."""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), 1, None)
+
+
+# -----------------------------
+# LOADING
+# -----------------------------
+def _profile_model_for(user):
+    return ROLE_PROFILE_MODELS.get(user.role, StaffProfile)
+
+
+def _load_from_db(user_id):
+    user = User.objects.get(pk=user_id)
+    profile = (
+        _profile_model_for(user).objects
+        .select_related('user')
+        .filter(user_id=user.pk)
+        .first()
+    )
+    if profile is not None:
+        # select_related primes the reverse accessor, so user.teacher /
+        # user.student_profile / user.staff_profile work without a query.
+        user = profile.user
+    return user, profile
+
+
+def load_user_with_profile(user_id):
+    """Return (user, profile) for user_id, from cache when possible."""
+    key = role_profile_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is None:
+        cached = _load_from_db(user_id)
+        cache.set(key, cached, ROLE_PROFILE_CACHE_TTL)
+    user, profile = cached
+    user._role_profile = profile
+    return user, profile
+
+
+def claims_user(user_id, role):
+    """ClaimsUser with only id and role loaded; other fields load lazily in one query."""
+    field_names = [
+        f.attname for f in ClaimsUser._meta.concrete_fields
+        if f.attname in ('id', 'role', 'is_active')
+    ]
+    known = {'id': user_id, 'role': role, 'is_active': True}
+    return ClaimsUser.from_db('default', field_names, [known[name] for name in field_names])
+
+
+def get_role_profile(user):
+    """
+    Role profile of an authenticated user (Teacher, StudentProfile,
+    StaffProfile) or None. Resolved at most once per user object.
+    """
+    profile = getattr(user, '_role_profile', _NOT_LOADED)
+    if profile is _NOT_LOADED:
+        _, profile = load_user_with_profile(user.pk)
+        user._role_profile = profile
+    return profile
+
+
+def get_teacher(user):
+    """Teacher profile of the user; raises Teacher.DoesNotExist like Teacher.objects.get()."""
+    profile = get_role_profile(user)
+    if not isinstance(profile, Teacher):
+        raise Teacher.DoesNotExist("Teacher matching query does not exist.")
+    return profile
+
+
+# -----------------------------
+# DRF AUTHENTICATION CLASS
+# -----------------------------
+class RoleProfileJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that loads the user and role profile through the profile cache."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            pin_user_school(result[0])
+        return result
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user, _profile = load_user_with_profile(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class StatelessRoleJWTAuthentication(RoleProfileJWTAuthentication):
+    """
+    Builds request.user from the role claims without a database query.
+    Tokens issued before the claims existed fall back to the cached lookup.
+    """
+
+    def get_user(self, validated_token):
+        if revocation_list.is_revoked(validated_token):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if ROLE_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = claims_user(user_id, validated_token[ROLE_CLAIM])
+        user.profile_id = validated_token.get(PROFILE_ID_CLAIM)
+        user.school_id = validated_token.get(SCHOOL_ID_CLAIM)
+        return user
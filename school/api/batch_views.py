@@ -0,0 +1,145 @@
+"""
+Batch API - runs several read-only API calls in one HTTP round trip.
+
+The teacher dashboard needs dashboard_summary, my_schedule, my_classes and
+my_subjects on every load. Instead of four requests (four JWT decodes, four
+round trips on slow links) the client can POST them to /api/batch/:
+
+    {"requests": [
+        {"id": "summary", "path": "/api/teacher-self/dashboard_summary/"},
+        {"id": "schedule", "path": "/api/teacher-self/my_schedule/"}
+    ]}
+
+Every sub-request reuses the already authenticated user object, so the token
+is decoded once and anything cached on the user during one sub-request is
+visible to the next. Sub-requests run on the caller's database connection
+unless the backend supports concurrent connections, in which case they are
+fanned out to a small thread pool. Worker threads run in a copy of the
+caller's context, so the shard pin (api.sharding) and a pending
+invalidation batch (api.invalidation) carry over. A sub-request that raises
+gets a 500 entry of its own instead of failing the whole batch.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, Resolver404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+BATCH_MAX_REQUESTS = getattr(settings, 'BATCH_MAX_REQUESTS', 10)
+BATCH_MAX_WORKERS = getattr(settings, 'BATCH_MAX_WORKERS', 4)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchAPIView(APIView):
+    """
+    Execute several GET sub-requests and return one combined JSON body.
+    Each entry of the response carries the sub-request id, its HTTP status
+    and its decoded body.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        entries = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "'requests' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > BATCH_MAX_REQUESTS:
+            return Response(
+                {"error": f"A batch may contain at most {BATCH_MAX_REQUESTS} requests."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        calls = []
+        for index, entry in enumerate(entries):
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            if not isinstance(entry, dict) or not entry.get('path'):
+                return Response({"error": f"Request #{index} has no 'path'."}, status=status.HTTP_400_BAD_REQUEST)
+            if entry.get('method', 'GET').upper() != 'GET':
+                return Response({"error": f"Request #{index}: only GET is allowed in a batch."}, status=status.HTTP_400_BAD_REQUEST)
+            calls.append((entry.get('id', index), entry['path']))
+
+        if self._can_run_concurrently(len(calls)):
+            with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(calls))) as pool:
+                # One context copy per call: a Context can't be entered by two threads at once
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._run_in_thread, request, *call)
+                    for call in calls
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [self._run(request, *call) for call in calls]
+
+        return Response({"responses": results}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _can_run_concurrently(count):
+        # SQLite serialises access anyway and an open transaction can only be
+        # seen from its own connection, so those cases stay on this thread.
+        return (
+            count > 1
+            and BATCH_MAX_WORKERS > 1
+            and connection.vendor != 'sqlite'
+            and not connection.in_atomic_block
+        )
+
+    def _run_in_thread(self, request, call_id, path):
+        try:
+            return self._run(request, call_id, path)
+        finally:
+            # Worker threads get their own connection; don't leak it.
+            connection.close()
+
+    def _run(self, request, call_id, path):
+        url = urlsplit(path)
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return {"id": call_id, "status": status.HTTP_404_NOT_FOUND, "body": {"error": "Not found."}}
+        if getattr(match.func, 'view_class', None) is BatchAPIView:
+            return {"id": call_id, "status": status.HTTP_400_BAD_REQUEST, "body": {"error": "Batches cannot be nested."}}
+
+        sub_request = self._build_sub_request(request, url)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Batch sub-request %s failed', path)
+            return {"id": call_id, "status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"error": "Internal server error."}}
+
+        if hasattr(response, 'data'):
+            body = response.data
+        else:
+            body = {"error": "Endpoint did not return JSON data."}
+        return {"id": call_id, "status": response.status_code, "body": body}
+
+    @staticmethod
+    def _build_sub_request(request, url):
+        outer = request._request
+        sub_request = HttpRequest()
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.META = outer.META.copy()
+        sub_request.META['REQUEST_METHOD'] = 'GET'
+        sub_request.META['PATH_INFO'] = url.path
+        sub_request.META['QUERY_STRING'] = url.query
+        sub_request.META.pop('CONTENT_TYPE', None)
+        sub_request.META.pop('CONTENT_LENGTH', None)
+        sub_request.GET = QueryDict(url.query)
+        sub_request.COOKIES = outer.COOKIES
+        # Hand the authenticated user straight to DRF so the JWT is not
+        # decoded again for every sub-request.
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        sub_request._dont_enforce_csrf_checks = True
+        return sub_request
@@ -0,0 +1,22 @@
+"""
+Helpers shared by the benchmark and load-test management commands.
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(timings):
+    """p50/p95/p99 and max of a list of millisecond timings, rounded for reports."""
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'max_ms': round(max(timings), 2) if timings else 0,
+    }
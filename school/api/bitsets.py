@@ -0,0 +1,78 @@
+"""
+Packed day bitmaps for AttendanceBitmap.
+
+Bit i (least significant bit first within each byte) stands for day
+start + i. A term of ~150 school days fits in 19 bytes per bitmap.
+
+NumPy, when installed, decodes whole bitmaps (and stacks of them) in one
+call; the pure Python fallback returns the same values as lists.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def set_bit(data, index, value):
+    """Copy of `data` with bit `index` set or cleared, grown as needed."""
+    data = bytearray(data)
+    byte, bit = divmod(index, 8)
+    if byte >= len(data):
+        if not value:
+            return bytes(data)
+        data.extend(bytes(byte + 1 - len(data)))
+    if value:
+        data[byte] |= 1 << bit
+    else:
+        data[byte] &= ~(1 << bit) & 0xFF
+    return bytes(data.rstrip(b'\x00'))
+
+
+def get_bit(data, index):
+    byte, bit = divmod(index, 8)
+    return byte < len(data) and bool(data[byte] >> bit & 1)
+
+
+def popcount(data):
+    return int.from_bytes(data, 'little').bit_count()
+
+
+def pack(indexes):
+    """Bitmap with the given bit indexes set."""
+    value = 0
+    for index in indexes:
+        value |= 1 << index
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def unpack(data, length=None):
+    """Bits of `data` as booleans (a NumPy array when available), padded or cut to `length`."""
+    length = len(data) * 8 if length is None else length
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8), bitorder='little').astype(bool)
+        if len(bits) < length:
+            bits = np.concatenate([bits, np.zeros(length - len(bits), dtype=bool)])
+        return bits[:length]
+    return [get_bit(data, i) for i in range(length)]
+
+
+def indexes(data):
+    """Indexes of the set bits."""
+    if np is not None:
+        return np.flatnonzero(unpack(data)).tolist()
+    return [i for i in range(len(data) * 8) if get_bit(data, i)]
+
+
+def column_sums(bitmaps, length):
+    """Per-bit count of set bits over many bitmaps of the same layout."""
+    if np is not None:
+        if not bitmaps:
+            return np.zeros(length, dtype=np.int64)
+        return np.stack([unpack(data, length) for data in bitmaps]).sum(axis=0)
+    sums = [0] * length
+    for data in bitmaps:
+        for i in indexes(data):
+            if i < length:
+                sums[i] += 1
+    return sums
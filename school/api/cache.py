@@ -0,0 +1,293 @@
+"""
+Shared cache layer: namespaced, versioned keys, stampede protection and
+hit/miss metrics on top of Django's cache framework.
+
+The backend comes from CACHES (see CACHE_URL in settings): a per-process
+local-memory cache in development, Redis in production. Only get, get_many,
+set, add, incr and delete are used, and add/incr are atomic on both, so the
+locks and versions below hold across worker processes whenever the backend
+is shared. A local-memory backend never sees other processes'
+invalidations, so there entries live at most LOCAL_CACHE_MAX_TTL seconds.
+
+    reference = Namespace('reference', timeout=3600)
+    subjects = reference.get_or_set('subjects', load_subjects, scope=school_id)
+    reference.invalidate(scope=school_id)    # every key of that school
+    reference.invalidate()                   # every key in the namespace
+
+Versions: a key embeds the version of its namespace and of its scope.
+Invalidating bumps one of them with a single incr; the old entries become
+unreachable and expire on their own. A version key that is evicted comes
+back at a fresh time-based value, never at one an old entry was written
+under.
+
+Stampedes: when a popular key expires, one caller recomputes it. Threads
+of the same process wait for that computation; other processes see its lock
+(cache.add) and poll the cache until the value shows up, computing it
+themselves only if the lock holder takes longer than CACHE_LOCK_TIMEOUT.
+
+Metrics: hits, misses, coalesced (misses answered by another caller's
+computation), computes and compute time are counted per namespace in each
+process and added to shared counters in the cache every
+CACHE_METRICS_FLUSH_SECONDS; `manage.py cache_stats` reports them.
+"""
+
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+CACHE_LOCK_TIMEOUT = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+CACHE_LOCK_POLL_SECONDS = getattr(settings, 'CACHE_LOCK_POLL_SECONDS', 0.05)
+CACHE_METRICS_FLUSH_SECONDS = getattr(settings, 'CACHE_METRICS_FLUSH_SECONDS', 10)
+LOCAL_CACHE_MAX_TTL = getattr(settings, 'LOCAL_CACHE_MAX_TTL', 60)
+
+METRIC_EVENTS = ('hits', 'misses', 'coalesced', 'computes', 'compute_ms')
+METRICS_NAMESPACES_KEY = 'cache_metrics:namespaces'
+
+_MISSING = object()
+
+# Every Namespace created in this process, by name
+namespaces = {}
+
+
+def _key_part(value):
+    # Scopes and parts may hold spaces ("Grade 10A"), which some backends reject
+    return quote(str(value), safe='')
+
+
+def _fresh_version():
+    # Milliseconds: later than any version handed out before an eviction
+    return int(time.time() * 1000)
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+def _metric_key(namespace, event):
+    return f'cache_metrics:{namespace}:{event}'
+
+
+class Metrics:
+    """Per-process counters, added to shared counters in the cache now and then."""
+
+    def __init__(self, flush_seconds, alias='default'):
+        self._flush_seconds = flush_seconds
+        self._alias = alias
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._totals = Counter()
+        self._flushed_at = time.monotonic()
+
+    def record(self, namespace, event, amount=1):
+        with self._lock:
+            self._pending[namespace, event] += amount
+            self._totals[namespace, event] += amount
+            due = time.monotonic() - self._flushed_at >= self._flush_seconds
+        if due:
+            self.flush()
+
+    def local(self):
+        """{namespace: {event: count}} counted by this process since it started."""
+        with self._lock:
+            return _by_namespace(self._totals)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        cache = caches[self._alias]
+        for (namespace, event), amount in pending.items():
+            key = _metric_key(namespace, event)
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, int(amount))
+            except ValueError:
+                cache.set(key, int(amount), None)
+        names = set(cache.get(METRICS_NAMESPACES_KEY, ()))
+        new = {namespace for namespace, _ in pending} - names
+        if new:
+            cache.set(METRICS_NAMESPACES_KEY, sorted(names | new), None)
+
+    def shared(self):
+        """{namespace: {event: count}} flushed by every process sharing the cache."""
+        cache = caches[self._alias]
+        names = cache.get(METRICS_NAMESPACES_KEY, ())
+        keys = {_metric_key(namespace, event): (namespace, event) for namespace in names for event in METRIC_EVENTS}
+        return _by_namespace(Counter({keys[key]: value for key, value in cache.get_many(keys).items()}))
+
+    def reset(self):
+        cache = caches[self._alias]
+        names = cache.get(METRICS_NAMESPACES_KEY, ())
+        cache.delete_many([_metric_key(namespace, event) for namespace in names for event in METRIC_EVENTS])
+        cache.delete(METRICS_NAMESPACES_KEY)
+        with self._lock:
+            self._pending.clear()
+            self._totals.clear()
+
+
+def _by_namespace(counts):
+    result = {}
+    for (namespace, event), amount in sorted(counts.items()):
+        result.setdefault(namespace, dict.fromkeys(METRIC_EVENTS, 0))[event] = amount
+    return result
+
+
+metrics = Metrics(CACHE_METRICS_FLUSH_SECONDS)
+
+
+# -----------------------------
+# REQUEST COALESCING
+# -----------------------------
+class _Flight:
+    """One computation of a key that other threads of the process wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+# -----------------------------
+# NAMESPACES
+# -----------------------------
+class Namespace:
+    """
+    A family of cache keys sharing a version, optionally split by scope
+    (a school id, a user id, ...) with a version of its own.
+    """
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT, alias='default'):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+        namespaces[name] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_keys(self, scope):
+        keys = [f'cache_version:{self.name}']
+        if scope is not None:
+            keys.append(f'cache_version:{self.name}:{_key_part(scope)}')
+        return keys
+
+    def version(self, scope=None):
+        """Version token of the namespace (and scope); changes on every invalidation."""
+        keys = self._version_keys(scope)
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                versions[key] = self._start_version(key)
+        return '.'.join(str(versions[key]) for key in keys)
+
+    def _start_version(self, key):
+        fresh = _fresh_version()
+        if self.cache.add(key, fresh, None):
+            return fresh
+        # Somebody else started it first; a write that isn't visible yet just means one miss
+        return self.cache.get(key) or fresh
+
+    def key(self, parts, scope=None):
+        """Full cache key for `parts` (a string or a tuple of strings) in the current version."""
+        if not isinstance(parts, (tuple, list)):
+            parts = (parts,)
+        scope_part = '*' if scope is None else _key_part(scope)
+        return f"{self.name}:{self.version(scope)}:{scope_part}:{':'.join(_key_part(part) for part in parts)}"
+
+    def _timeout(self, timeout):
+        timeout = self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+        if isinstance(self.cache, LocMemCache) and LOCAL_CACHE_MAX_TTL:
+            if timeout is None or timeout is DEFAULT_TIMEOUT or timeout > LOCAL_CACHE_MAX_TTL:
+                timeout = LOCAL_CACHE_MAX_TTL
+        return timeout
+
+    def invalidate(self, scope=None):
+        """Make every key of the scope (or, without one, of the whole namespace) stale."""
+        key = self._version_keys(scope)[-1]
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, _fresh_version(), None)
+
+    def get(self, parts, default=None, scope=None):
+        value = self.cache.get(self.key(parts, scope), _MISSING)
+        metrics.record(self.name, 'misses' if value is _MISSING else 'hits')
+        return default if value is _MISSING else value
+
+    def set(self, parts, value, scope=None, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(self.key(parts, scope), value, self._timeout(timeout))
+
+    def get_or_set(self, parts, compute, scope=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Cached value of `parts`, or compute() stored under it. Concurrent
+        misses on the same key share one computation.
+        """
+        return self.fetch(self.key(parts, scope), compute, timeout)
+
+    def fetch(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        """get_or_set() for a key already built with key()."""
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            metrics.record(self.name, 'hits')
+            return value
+        metrics.record(self.name, 'misses')
+
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = _Flight()
+        if not leader:
+            flight.done.wait(CACHE_LOCK_TIMEOUT)
+            if flight.value is not _MISSING:
+                metrics.record(self.name, 'coalesced')
+                return flight.value
+            # The leader failed or is too slow: take our own turn at the shared lock
+            return self._compute(key, compute, timeout)
+
+        try:
+            flight.value = self._compute(key, compute, timeout)
+            return flight.value
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.done.set()
+
+    def _compute(self, key, compute, timeout):
+        """compute() and store it, unless another process holding the key's lock stores it first."""
+        timeout = self._timeout(timeout)
+        lock = f'{key}:lock'
+        owned = self.cache.add(lock, 1, CACHE_LOCK_TIMEOUT)
+        if not owned:
+            deadline = time.monotonic() + CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(CACHE_LOCK_POLL_SECONDS)
+                value = self.cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    metrics.record(self.name, 'coalesced')
+                    return value
+                owned = self.cache.add(lock, 1, CACHE_LOCK_TIMEOUT)
+                if owned:
+                    # The holder gave up without storing anything: our turn
+                    break
+        try:
+            started = time.perf_counter()
+            value = compute()
+            metrics.record(self.name, 'computes')
+            metrics.record(self.name, 'compute_ms', (time.perf_counter() - started) * 1000)
+            self.cache.set(key, value, timeout)
+            return value
+        finally:
+            if owned:
+                self.cache.delete(lock)
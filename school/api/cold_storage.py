@@ -0,0 +1,287 @@
+"""
+Columnar cold storage for historical records.
+
+`manage.py export_cold_storage` writes closed months of grades, attendance
+and borrow records to compressed Parquet files under COLD_STORAGE_DIR,
+partitioned Hive-style:
+
+    <COLD_STORAGE_DIR>/grades/year=2025/month=03/data.parquet
+
+Each dataset keeps a JSON watermark (the last exported month), so
+scheduled runs only export months that closed since the previous run. A
+month is closed COLD_STORAGE_GRACE_DAYS after it ends; late edits to an
+exported month need `--rebuild`. Grades and attendance are read from both
+the live and archive tables on every academic database.
+
+load() reads the files back with pyarrow's vectorized readers, only
+opening the partitions inside the requested range, so ministry analytics
+never query the OLTP database.
+
+Needs pyarrow (optional): pip install pyarrow
+"""
+
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import Grade, GradeArchive, Attendance, AttendanceArchive, BorrowRecord
+from .sharding import academic_databases
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pa_dataset = pq = None
+
+COLD_STORAGE_DIR = Path(getattr(settings, 'COLD_STORAGE_DIR', settings.BASE_DIR / 'cold_storage'))
+COLD_STORAGE_COMPRESSION = getattr(settings, 'COLD_STORAGE_COMPRESSION', 'zstd')
+COLD_STORAGE_GRACE_DAYS = getattr(settings, 'COLD_STORAGE_GRACE_DAYS', 7)
+CHUNK_SIZE = 5000
+
+# date_column partitions the files; sources are (model, field exported as
+# record_id); academic sources are read on every academic database.
+DATASETS = {
+    'grades': {
+        'date_column': 'date_recorded',
+        'sources': [(Grade, 'id'), (GradeArchive, 'original_id')],
+        'academic': True,
+        'columns': {
+            'record_id': 'int64', 'school_id': 'int64', 'student_id': 'int64', 'subject_id': 'int64',
+            'section_id': 'int64', 'teacher_id': 'int64', 'semester_id': 'int64',
+            'academic_year': 'string', 'grade_type': 'string', 'score': 'float64',
+            'full_mark': 'float64', 'date_recorded': 'timestamp',
+        },
+    },
+    'attendance': {
+        'date_column': 'date',
+        'sources': [(Attendance, 'id'), (AttendanceArchive, 'original_id')],
+        'academic': True,
+        'columns': {
+            'record_id': 'int64', 'school_id': 'int64', 'student_id': 'int64', 'section_id': 'int64',
+            'subject_id': 'int64', 'taken_by_id': 'int64', 'date': 'date', 'status': 'string',
+        },
+    },
+    'borrow_records': {
+        'date_column': 'borrow_date',
+        'sources': [(BorrowRecord, 'id')],
+        'academic': False,
+        'columns': {
+            'record_id': 'int64', 'book_id': 'int64', 'borrower_type': 'string',
+            'borrower_teacher_id': 'int64', 'borrower_student_id': 'int64', 'borrow_date': 'date',
+            'expected_return_date': 'date', 'actual_return_date': 'date', 'returned': 'bool',
+        },
+    },
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError('Cold storage needs pyarrow: pip install pyarrow')
+
+
+def _arrow_schema(dataset):
+    types = {
+        'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'bool': pa.bool_(),
+        'date': pa.date32(), 'timestamp': pa.timestamp('us', tz='UTC'),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in DATASETS[dataset]['columns'].items()])
+
+
+# -----------------------------
+# MONTHS AND WATERMARKS
+# -----------------------------
+def _next_month(month):
+    year, m = month
+    return (year + 1, 1) if m == 12 else (year, m + 1)
+
+
+def _month_range(month):
+    """First day of `month` and first day of the month after."""
+    return date(*month, 1), date(*_next_month(month), 1)
+
+
+def last_closed_month(today=None):
+    today = (today or timezone.localdate()) - timedelta(days=COLD_STORAGE_GRACE_DAYS)
+    return (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+
+
+def _watermark_path(dataset):
+    return COLD_STORAGE_DIR / dataset / '_watermark.json'
+
+
+def read_watermark(dataset):
+    """Last exported (year, month) of a dataset, or None."""
+    try:
+        with open(_watermark_path(dataset)) as f:
+            year, month = json.load(f)['exported_through'].split('-')
+        return int(year), int(month)
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+
+def write_watermark(dataset, month):
+    path = _watermark_path(dataset)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'exported_through': f'{month[0]:04d}-{month[1]:02d}', 'updated_at': timezone.now().isoformat()}, f)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def _databases(dataset):
+    return academic_databases() if DATASETS[dataset]['academic'] else ['default']
+
+
+def _is_timestamp(dataset):
+    spec = DATASETS[dataset]
+    return spec['columns'][spec['date_column']] == 'timestamp'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _date_filter(dataset, start, end):
+    """Lookup for start <= date < end, in local days for timestamp columns."""
+    if _is_timestamp(dataset):
+        start, end = _day_start(start), _day_start(end)
+    column = DATASETS[dataset]['date_column']
+    return {f'{column}__gte': start, f'{column}__lt': end}
+
+
+def first_month(dataset):
+    """Month of the oldest record of a dataset, or None when it is empty."""
+    column = DATASETS[dataset]['date_column']
+    oldest = []
+    for model, _ in DATASETS[dataset]['sources']:
+        for alias in _databases(dataset):
+            value = model._base_manager.using(alias).aggregate(first=Min(column))['first']
+            if value is not None:
+                oldest.append(timezone.localdate(value) if isinstance(value, datetime) else value)
+    if not oldest:
+        return None
+    first = min(oldest)
+    return first.year, first.month
+
+
+def _rows(dataset, month):
+    """Yield chunks of row dicts for one month from every source table and database."""
+    spec = DATASETS[dataset]
+    columns = [name for name in spec['columns'] if name != 'record_id']
+    start, end = _month_range(month)
+    for model, id_field in spec['sources']:
+        fields = [name for name in columns if name in {f.attname for f in model._meta.concrete_fields}]
+        for alias in _databases(dataset):
+            queryset = (
+                model._base_manager.using(alias)
+                .filter(**_date_filter(dataset, start, end))
+                .values(*fields, record_id=F(id_field))
+                .order_by(id_field)
+            )
+            chunk = []
+            for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+                chunk.append(row)
+                if len(chunk) >= CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+
+def _to_batch(dataset, schema, chunk):
+    arrays = []
+    for name, kind in DATASETS[dataset]['columns'].items():
+        values = [row.get(name) for row in chunk]
+        if kind == 'float64':
+            values = [float(v) if isinstance(v, Decimal) else v for v in values]
+        arrays.append(values)
+    return pa.RecordBatch.from_arrays([pa.array(v, type=schema.field(i).type) for i, v in enumerate(arrays)], schema=schema)
+
+
+def partition_dir(dataset, month):
+    return COLD_STORAGE_DIR / dataset / f'year={month[0]:04d}' / f'month={month[1]:02d}'
+
+
+def export_month(dataset, month):
+    """Write one month of a dataset to its partition; returns the number of rows."""
+    require_pyarrow()
+    schema = _arrow_schema(dataset)
+    directory = partition_dir(dataset, month)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp, target = directory / 'data.parquet.tmp', directory / 'data.parquet'
+
+    count = 0
+    with pq.ParquetWriter(tmp, schema, compression=COLD_STORAGE_COMPRESSION) as writer:
+        for chunk in _rows(dataset, month):
+            writer.write_batch(_to_batch(dataset, schema, chunk))
+            count += len(chunk)
+    os.replace(tmp, target)
+    return count
+
+
+def export_dataset(dataset, through=None, rebuild=False):
+    """
+    Export every closed month after the watermark (from the first record
+    with rebuild=True) up to `through`. Returns [(month, rows)].
+    """
+    require_pyarrow()
+    through = through or last_closed_month()
+    watermark = None if rebuild else read_watermark(dataset)
+    month = _next_month(watermark) if watermark else first_month(dataset)
+    exported = []
+    while month is not None and month <= through:
+        exported.append((month, export_month(dataset, month)))
+        write_watermark(dataset, month)
+        month = _next_month(month)
+    return exported
+
+
+# -----------------------------
+# QUERY
+# -----------------------------
+def load(dataset, start=None, end=None, columns=None, filter=None):
+    """
+    Read a dataset between two dates (inclusive) as a pyarrow Table.
+    Only partitions that overlap the range are opened; `filter` is an
+    optional extra pyarrow.dataset expression, e.g.
+    pyarrow.dataset.field('school_id') == 3. Use .to_pandas() on the
+    result for DataFrame analytics.
+    """
+    require_pyarrow()
+    root = COLD_STORAGE_DIR / dataset
+    first = (start.year, start.month) if start else None
+    last = (end.year, end.month) if end else None
+    files = []
+    for path in sorted(root.glob('year=*/month=*/data.parquet')):
+        month = (int(path.parent.parent.name[5:]), int(path.parent.name[6:]))
+        if (first is None or month >= first) and (last is None or month <= last):
+            files.append(str(path))
+    schema = _arrow_schema(dataset)
+    if not files:
+        return schema.empty_table()
+
+    date_column = DATASETS[dataset]['date_column']
+    field, arrow_type = pa_dataset.field(date_column), schema.field(date_column).type
+    conditions = [filter] if filter is not None else []
+    if start:
+        conditions.append(field >= pa.scalar(_day_start(start) if _is_timestamp(dataset) else start, type=arrow_type))
+    if end:
+        if _is_timestamp(dataset):
+            conditions.append(field < pa.scalar(_day_start(end + timedelta(days=1)), type=arrow_type))
+        else:
+            conditions.append(field <= pa.scalar(end, type=arrow_type))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    return pa_dataset.dataset(files, schema=schema, format='parquet').to_table(columns=columns, filter=expression)
@@ -0,0 +1,75 @@
+"""
+Read-only "compact" serializers for the hot list endpoints.
+
+A full StudentSerializer row builds a nested UserSerializer, resolves the
+photo URL and runs every field's to_representation; TeacherSerializer also
+queries the subjects of each teacher. For a list of a thousand rows that is
+most of the request. The serializers below read the listed columns with
+one queryset.values() call (plus one query per to-many field) and return
+plain dicts, so no model instance or DRF field is built per row.
+
+Clients opt in per request with ?view=compact on list actions of viewsets
+using CompactListMixin; everything else keeps the full serializers.
+"""
+
+from collections import defaultdict
+
+from rest_framework.response import Response
+
+from .models import Teacher
+
+
+class CompactSerializer:
+    """
+    fields maps output keys to ORM lookups read with values(); many maps
+    output keys to (through model, owner fk, value lookup) and is filled
+    with one extra query per key.
+    """
+    fields = {}
+    many = {}
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def data(self):
+        names, lookups = zip(*self.fields.items())
+        rows = [dict(zip(names, values)) for values in self.queryset.values_list(*lookups)]
+        for key, (through, owner, lookup) in self.many.items():
+            related = defaultdict(list)
+            pks = [row['id'] for row in rows]
+            for pk, value in through.objects.filter(**{f'{owner}__in': pks}).values_list(owner, lookup):
+                related[pk].append(value)
+            for row in rows:
+                row[key] = related.get(row['id'], [])
+        return rows
+
+
+class CompactStudentSerializer(CompactSerializer):
+    fields = {
+        'id': 'id', 'user': 'user_id', 'username': 'user__username', 'first_name': 'user__first_name',
+        'last_name': 'user__last_name', 'email': 'user__email', 'national_id': 'user__national_id',
+        'school': 'school_id', 'admission_no': 'admission_no', 'student_id': 'student_id',
+        'class_section': 'class_section', 'year': 'year', 'gender': 'gender',
+        'academic_status': 'academic_status',
+    }
+
+
+class CompactTeacherSerializer(CompactSerializer):
+    fields = {
+        'id': 'id', 'user': 'user_id', 'first_name': 'user__first_name', 'last_name': 'user__last_name',
+        'email': 'user__email', 'school': 'school_id', 'employee_id': 'employee_id',
+        'department': 'department', 'hire_date': 'hire_date', 'academic_rank': 'academic_rank',
+    }
+    many = {'subject_names': (Teacher.subjects.through, 'teacher_id', 'subject__name')}
+
+
+class CompactListMixin:
+    """list() answers ?view=compact with compact_serializer_class."""
+    compact_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('view') == 'compact' and self.compact_serializer_class:
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response(self.compact_serializer_class(queryset).data)
+        return super().list(request, *args, **kwargs)
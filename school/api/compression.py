@@ -0,0 +1,193 @@
+"""
+Response compression (gzip, and brotli when the package is installed).
+
+Roster lists and reports run to hundreds of KB of JSON, which compress
+5-10x; on the slow links most schools are on that is most of the response
+time. CompressionMiddleware picks the best encoding the client accepts
+(Accept-Encoding, honouring q=0), and leaves alone:
+
+- bodies shorter than COMPRESSION_MIN_SIZE, where the headers cost more
+  than the saving;
+- content types outside COMPRESSION_CONTENT_TYPES (PDFs and zip archives
+  are compressed already);
+- responses that already carry a Content-Encoding.
+
+Streaming responses are compressed chunk by chunk and each chunk is flushed,
+so clients still receive rows as they are produced.
+
+Compressing is the expensive part for the responses everyone asks for and
+that rarely change (announcement feeds, subject and section lists), so the
+compressed bodies of COMPRESSION_CACHE_PATHS, and of any response with an
+ETag, are kept in the COMPRESSION_CACHE_ALIAS cache. The key is a digest of
+the uncompressed body and the encoding: each version of a body is
+compressed once, a changed body simply misses, and a user can only hit an
+entry for a body they were served anyway.
+
+Like Django's GZipMiddleware, gzip output carries a few random header bytes
+against BREACH-style length attacks; a cached body keeps the same ones.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+COMPRESSION_CONTENT_TYPES = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', (
+    'application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml',
+)))
+COMPRESSION_GZIP_RANDOM_BYTES = getattr(settings, 'COMPRESSION_GZIP_RANDOM_BYTES', 100)
+COMPRESSION_BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+COMPRESSION_CACHE_PATHS = tuple(getattr(settings, 'COMPRESSION_CACHE_PATHS', ()))
+COMPRESSION_CACHE_ALIAS = getattr(settings, 'COMPRESSION_CACHE_ALIAS', 'default')
+COMPRESSION_CACHE_TIMEOUT = getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 600)
+
+_accept_token = _lazy_re_compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def available():
+    """Whether brotli can be offered as well as gzip."""
+    return brotli is not None
+
+
+def encodings():
+    """Supported encodings, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """The supported encoding the client ranks highest in Accept-Encoding, or None."""
+    weights = {}
+    for token in accept_encoding.split(','):
+        match = _accept_token.match(token)
+        if match:
+            try:
+                weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+            except ValueError:
+                continue
+    best, best_weight = None, 0
+    for encoding in encodings():
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+# -----------------------------
+# ENCODERS
+# -----------------------------
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return compress_string(body, max_random_bytes=COMPRESSION_GZIP_RANDOM_BYTES)
+
+
+def _brotli_stream(sequence):
+    compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _abrotli_stream(sequence):
+    compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _agzip_stream(sequence):
+    # Like GZipMiddleware: one gzip member per chunk, which clients decode as one body
+    async for chunk in sequence:
+        yield compress_string(chunk, max_random_bytes=COMPRESSION_GZIP_RANDOM_BYTES)
+
+
+def compress_stream(sequence, encoding, is_async=False):
+    if encoding == 'br':
+        return _abrotli_stream(sequence) if is_async else _brotli_stream(sequence)
+    if is_async:
+        return _agzip_stream(sequence)
+    return compress_sequence(sequence, max_random_bytes=COMPRESSION_GZIP_RANDOM_BYTES)
+
+
+# -----------------------------
+# CACHE
+# -----------------------------
+def is_cacheable(request, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return False
+    if 'no-store' in response.get('Cache-Control', ''):
+        return False
+    return response.has_header('ETag') or request.path.startswith(COMPRESSION_CACHE_PATHS)
+
+
+def cached_compress(body, encoding):
+    """compress(), through the cache: each distinct body is compressed once per encoding."""
+    cache = caches[COMPRESSION_CACHE_ALIAS]
+    key = f'compressed:{encoding}:{hashlib.blake2b(body, digest_size=20).hexdigest()}'
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(body, encoding)
+        cache.set(key, compressed, COMPRESSION_CACHE_TIMEOUT)
+    return compressed
+
+
+# -----------------------------
+# MIDDLEWARE
+# -----------------------------
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSION_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+
+        # The body now depends on Accept-Encoding, whether or not this client gets it compressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding, response.is_async)
+            del response.headers['Content-Length']
+        else:
+            if is_cacheable(request, response):
+                compressed = cached_compress(response.content, encoding)
+            else:
+                compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names the exact bytes, which are now different
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,120 @@
+"""
+Precomputed rollup counters on School and Wereda.
+
+School.student_count / teacher_count and Wereda.number_of_schools /
+number_of_students / number_of_teachers are kept current by the signal
+handlers in api.signals, which call the functions below whenever a student,
+teacher or school is created, moved or deleted. Every change is a single
+UPDATE ... SET x = x + n, so concurrent enrolments never lose an increment
+and dashboards read the numbers straight off the row instead of counting.
+
+Writes that skip signals (bulk_create, queryset.update/delete, raw SQL)
+leave the counters stale; run `manage.py reconcile_rollup_counters` after
+them, or periodically to catch any other drift.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .models import School, Wereda
+
+
+def _bump(field, delta):
+    # Never go below zero: the columns are unsigned and a missed increment
+    # must not turn into an IntegrityError on a later decrement.
+    return Greatest(F(field) + delta, Value(0))
+
+
+# -----------------------------
+# INCREMENTAL UPDATES
+# -----------------------------
+def adjust_school(school_id, students=0, teachers=0):
+    """Add `students` / `teachers` to a school and to its wereda."""
+    if not school_id or not (students or teachers):
+        return
+    school_updates, wereda_updates = {}, {}
+    if students:
+        school_updates['student_count'] = _bump('student_count', students)
+        wereda_updates['number_of_students'] = _bump('number_of_students', students)
+    if teachers:
+        school_updates['teacher_count'] = _bump('teacher_count', teachers)
+        wereda_updates['number_of_teachers'] = _bump('number_of_teachers', teachers)
+
+    with transaction.atomic():
+        School.objects.filter(pk=school_id).update(**school_updates)
+        Wereda.objects.filter(school__pk=school_id).update(**wereda_updates)
+
+
+def move_member(old_school_id, new_school_id, students=0, teachers=0):
+    """A student or teacher changed school (either side may be None)."""
+    if old_school_id == new_school_id:
+        return
+    with transaction.atomic():
+        adjust_school(old_school_id, students=-students, teachers=-teachers)
+        adjust_school(new_school_id, students=students, teachers=teachers)
+
+
+def adjust_wereda(wereda_id, schools, students, teachers):
+    """Add school/student/teacher deltas to a wereda."""
+    if not wereda_id:
+        return
+    Wereda.objects.filter(pk=wereda_id).update(
+        number_of_schools=_bump('number_of_schools', schools),
+        number_of_students=_bump('number_of_students', students),
+        number_of_teachers=_bump('number_of_teachers', teachers),
+    )
+
+
+def move_school(old_wereda_id, new_wereda_id, students=0, teachers=0):
+    """A school with the given counts was created, deleted or moved to another wereda."""
+    if old_wereda_id == new_wereda_id:
+        return
+    with transaction.atomic():
+        adjust_wereda(old_wereda_id, -1, -students, -teachers)
+        adjust_wereda(new_wereda_id, 1, students, teachers)
+
+
+# -----------------------------
+# RECONCILIATION
+# -----------------------------
+def reconcile(dry_run=False):
+    """
+    Recount every counter from the source tables and fix the rows that
+    drifted. Returns (schools_fixed, weredas_fixed).
+    """
+    schools = School.objects.annotate(
+        real_students=Count('students', distinct=True),
+        real_teachers=Count('teachers', distinct=True),
+    ).only('id', 'wereda_id', 'student_count', 'teacher_count')
+
+    schools_fixed = []
+    totals = {}  # wereda_id -> [schools, students, teachers]
+    for school in schools.iterator():
+        if school.wereda_id:
+            row = totals.setdefault(school.wereda_id, [0, 0, 0])
+            row[0] += 1
+            row[1] += school.real_students
+            row[2] += school.real_teachers
+        if (school.student_count, school.teacher_count) != (school.real_students, school.real_teachers):
+            school.student_count = school.real_students
+            school.teacher_count = school.real_teachers
+            schools_fixed.append(school)
+
+    weredas_fixed = []
+    weredas = Wereda.objects.only('id', 'number_of_schools', 'number_of_students', 'number_of_teachers')
+    for wereda in weredas.iterator():
+        real = tuple(totals.get(wereda.pk, (0, 0, 0)))
+        if (wereda.number_of_schools, wereda.number_of_students, wereda.number_of_teachers) != real:
+            wereda.number_of_schools, wereda.number_of_students, wereda.number_of_teachers = real
+            weredas_fixed.append(wereda)
+
+    if not dry_run:
+        with transaction.atomic():
+            School.objects.bulk_update(schools_fixed, ['student_count', 'teacher_count'], batch_size=500)
+            Wereda.objects.bulk_update(
+                weredas_fixed,
+                ['number_of_schools', 'number_of_students', 'number_of_teachers'],
+                batch_size=500,
+            )
+    return schools_fixed, weredas_fixed
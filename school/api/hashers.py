@@ -0,0 +1,109 @@
+"""
+Password hashing policy and the login hashing pool.
+
+The hashers below read their cost parameters from settings so the policy can
+be tuned per deployment (PASSWORD_HASHER_POLICY picks which one new hashes
+use). LoginHashPool runs password verification on a small bounded pool: a
+login storm at exam time queues there instead of starving every request
+thread, and once the queue is full further logins are refused immediately
+with LoginBusy so the caller can answer 503.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, Argon2PasswordHasher,
+    get_hasher, identify_hasher, make_password,
+)
+
+
+# -----------------------------
+# TUNABLE HASHERS
+# -----------------------------
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the iteration count taken from PASSWORD_PBKDF2_ITERATIONS."""
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with time/memory/parallelism taken from PASSWORD_ARGON2_PARAMS (needs argon2-cffi)."""
+    _params = getattr(settings, 'PASSWORD_ARGON2_PARAMS', {})
+    time_cost = _params.get('time_cost', Argon2PasswordHasher.time_cost)
+    memory_cost = _params.get('memory_cost', Argon2PasswordHasher.memory_cost)
+    parallelism = _params.get('parallelism', Argon2PasswordHasher.parallelism)
+
+
+# -----------------------------
+# LOGIN HASHING POOL
+# -----------------------------
+class LoginBusy(Exception):
+    """Raised when the login hashing pool has no room for another request."""
+
+
+class LoginHashPool:
+    """
+    Bounded executor for password hashing. At most `workers` hashes run at a
+    time and at most `queue_size` more may wait; anything beyond that is
+    rejected instead of piling up.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._timeout = timeout
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise LoginBusy()
+
+
+login_hash_pool = LoginHashPool(
+    workers=getattr(settings, 'LOGIN_HASH_WORKERS', 4),
+    queue_size=getattr(settings, 'LOGIN_HASH_QUEUE_SIZE', 64),
+    timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT', 10),
+)
+
+
+def _verify(password, encoded):
+    """Return (valid, new_hash); new_hash is set when the stored hash is outdated."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, None
+    if not hasher.verify(password, encoded):
+        return False, None
+    preferred = get_hasher('default')
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, make_password(password)
+    return True, None
+
+
+def verify_login_password(user, password):
+    """
+    Check `password` for `user` (None when the email is unknown) on the
+    hashing pool. Outdated hashes are upgraded to the current policy on a
+    successful login. Raises LoginBusy when the pool is saturated.
+    """
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        login_hash_pool.run(make_password, password)
+        return False
+
+    valid, new_hash = login_hash_pool.run(_verify, password, user.password)
+    if valid and new_hash:
+        user.password = new_hash
+        user.save(update_fields=['password'])
+    return valid
@@ -0,0 +1,190 @@
+"""
+Invalidation bus: cache namespaces (api.cache) declare the models they are
+built from, and every write to those models bumps the affected versions.
+
+    reference = Namespace('reference', timeout=24 * 3600)
+    depends(reference, Subject)                          # any subject: the whole namespace
+    depends(reference, Section, scope='school_id')       # a section: its school's keys
+    depends(rosters, StudentProfile, scope=('school_id', 'class_section'))
+    depends(teaching, Teacher.subjects.through, scope='teacher_id')
+
+scope says which scope of the namespace a row belongs to and must match
+the scope its get_or_set() calls use: None for the whole namespace, a field
+(attname) or a tuple of fields (scopes "1:Grade 10A"), or a function of the
+instance. A scope that comes out None bumps the whole namespace.
+
+Hooks: post_save and post_delete bump the scope of the row. For field
+scopes pre_save also reads the stored values, so a row that moves (a
+student changing section) bumps its old scope as well; a function scope
+only sees the new state. m2m_changed on a registered through model bumps
+the scope of every link added, removed or cleared.
+
+Bulk writes (bulk_create, bulk_update, queryset.update(), raw SQL) send no
+signals: call changed(model, objs) after them, or changed(model) when the
+rows aren't at hand. api.sample_data and create_sample_data do.
+
+Declarations must run when the app loads (a module imported from
+ApiConfig.ready(), like api.reference_data), or management commands
+writing in bulk won't know about them.
+
+Bumps inside a transaction are repeated when it commits, so a request
+that refilled the cache from the old rows in between can't leave a stale
+entry behind. Inside batch(), each (namespace, scope) is bumped once on
+the way out however many rows touched it.
+"""
+
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+# model -> [(namespace, scope)]
+_dependencies = defaultdict(list)
+
+_pending = contextvars.ContextVar('invalidation_pending', default=None)
+
+
+def depends(namespace, model, scope=None):
+    """Declare that keys of `namespace` (in `scope`) are built from rows of `model`."""
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    first = model not in _dependencies
+    _dependencies[model].append((namespace, scope))
+    if first:
+        uid = f'invalidation:{model._meta.label}'
+        pre_save.connect(_remember_scopes, sender=model, dispatch_uid=uid)
+        post_save.connect(_saved, sender=model, dispatch_uid=uid)
+        post_delete.connect(_deleted, sender=model, dispatch_uid=uid)
+        # Only sent when `model` is the through model of a ManyToManyField
+        m2m_changed.connect(_links_changed, sender=model, dispatch_uid=uid)
+
+
+def dependencies(model):
+    return list(_dependencies.get(model, ()))
+
+
+def _fields(scope):
+    if isinstance(scope, str):
+        return (scope,)
+    if isinstance(scope, tuple):
+        return scope
+    return ()
+
+
+def scope_of(scope, obj):
+    """The scope `obj` falls in under a depends() scope declaration."""
+    if scope is None:
+        return None
+    if callable(scope):
+        return scope(obj)
+    values = [getattr(obj, field) for field in _fields(scope)]
+    return None if any(value is None for value in values) else ':'.join(str(value) for value in values)
+
+
+# -----------------------------
+# BUMPING
+# -----------------------------
+def _bump(namespace, scope, using='default'):
+    pending = _pending.get()
+    if pending is not None:
+        pending.add((namespace, scope, using))
+        return
+    namespace.invalidate(scope)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: namespace.invalidate(scope), using=using)
+
+
+@contextmanager
+def batch():
+    """Collect bumps and make each distinct one once on exit (nested batches join the outer one)."""
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set(set())
+    try:
+        yield
+    finally:
+        pending = _pending.get()
+        _pending.reset(token)
+        for namespace, scope, using in pending:
+            _bump(namespace, scope, using)
+
+
+def changed(model, objs=None, using='default'):
+    """
+    Rows of `model` were written without signals. With `objs`, bump their
+    scopes; without, every namespace built from the model.
+    """
+    for namespace, scope in _dependencies.get(model, ()):
+        if objs is None or scope is None:
+            _bump(namespace, None, using)
+            continue
+        for value in {scope_of(scope, obj) for obj in objs}:
+            _bump(namespace, value, using)
+
+
+# -----------------------------
+# SIGNAL HANDLERS
+# -----------------------------
+def _remember_scopes(sender, instance, update_fields=None, using=None, **kwargs):
+    instance._invalidation_old = None
+    if instance._state.adding:
+        return
+    fields = {field for _, scope in _dependencies[sender] for field in _fields(scope)}
+    fields.discard(sender._meta.pk.attname)
+    if update_fields is not None:
+        fields &= {sender._meta.get_field(name).attname for name in update_fields}
+    if fields:
+        instance._invalidation_old = (
+            sender._base_manager.using(using or 'default').filter(pk=instance.pk).values(*fields).first()
+        )
+
+
+def _instance_changed(sender, instance, using, old=None):
+    for namespace, scope in _dependencies[sender]:
+        value = scope_of(scope, instance)
+        _bump(namespace, value, using)
+        fields = _fields(scope)
+        if old and fields and any(field in old for field in fields):
+            stored = SimpleNamespace(**{field: old.get(field, getattr(instance, field)) for field in fields})
+            if scope_of(scope, stored) != value:
+                _bump(namespace, scope_of(scope, stored), using)
+
+
+def _saved(sender, instance, using, **kwargs):
+    _instance_changed(sender, instance, using, getattr(instance, '_invalidation_old', None))
+
+
+def _deleted(sender, instance, using, **kwargs):
+    _instance_changed(sender, instance, using)
+
+
+def _link_fields(through, instance, model):
+    """(fk to `instance`'s model, fk to the other side) of an m2m through model."""
+    own = type(instance)._meta.concrete_model
+    fks = [field for field in through._meta.concrete_fields if field.is_relation]
+    source = next(field for field in fks if field.related_model._meta.concrete_model is own)
+    target = next(field for field in fks if field is not source and field.related_model is model)
+    return source, target
+
+
+def _links_changed(sender, instance, action, model, pk_set, using, **kwargs):
+    if action == 'pre_clear':
+        source, target = _link_fields(sender, instance, model)
+        instance._invalidation_cleared = set(
+            sender._base_manager.using(using).filter(**{source.attname: instance.pk})
+            .values_list(target.attname, flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_invalidation_cleared', set())
+    source, target = _link_fields(sender, instance, model)
+    links = [sender(**{source.attname: instance.pk, target.attname: pk}) for pk in pk_set]
+    if links:
+        changed(sender, links, using=using)
@@ -0,0 +1,102 @@
+"""
+Background job status (see api.jobs).
+
+Heavy actions take ?async=1 and answer 202 with the queued job instead of
+doing the work inside the request:
+
+    GET  /api/students/export_csv/?async=1
+    POST /api/students/import_csv/?async=1          (multipart "file")
+    GET  /api/teacher-self/reports/?type=grades&async=1
+
+    GET  /api/jobs/                  the user's jobs, newest first
+    GET  /api/jobs/{id}/             status, progress, result, error
+    GET  /api/jobs/{id}/download/    the result file, once succeeded (only once for
+                                     single_download tasks such as imported passwords)
+    POST /api/jobs/{id}/cancel/      only while still queued
+"""
+
+import io
+
+from django.http import FileResponse
+from django.urls import reverse
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .jobs import TASKS
+from .models import Job
+
+
+def wants_async(request):
+    return request.query_params.get('async', '').lower() in ('1', 'true', 'yes')
+
+
+def accepted(job):
+    """202 response pointing the client at the queued job."""
+    return Response({
+        "job_id": job.pk,
+        "task": job.task,
+        "status": job.status,
+        "status_url": reverse('jobs-detail', args=[job.pk]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'status', 'progress', 'message', 'attempts', 'max_attempts', 'result',
+            'download_url', 'error', 'created_at', 'started_at', 'finished_at', 'run_after',
+        ]
+
+    def get_download_url(self, obj):
+        return reverse('jobs-download', args=[obj.pk]) if obj.result_file else None
+
+
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        jobs = Job.objects.all()
+        if self.request.user.is_superuser:
+            return jobs
+        return jobs.filter(requested_by_id=self.request.user.pk)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        single_download = getattr(TASKS.get(job.task), 'single_download', False)
+        if job.status != 'succeeded' or not job.result_file:
+            if job.status == 'succeeded' and single_download:
+                return Response({"error": "The result file has already been downloaded"}, status=status.HTTP_410_GONE)
+            return Response(
+                {"error": f"No result file (status: {job.status})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        name = job.result_file.name
+        filename = name.rsplit('/', 1)[-1].split('_', 1)[-1]
+        if not single_download:
+            return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename)
+
+        # Handed out once: whoever clears the field first gets the file, which is then deleted
+        with job.result_file.open('rb') as result:
+            content = result.read()
+        if not Job.objects.filter(pk=job.pk, result_file=name).update(result_file=''):
+            return Response({"error": "The result file has already been downloaded"}, status=status.HTTP_410_GONE)
+        job.result_file.storage.delete(name)
+        return FileResponse(io.BytesIO(content), as_attachment=True, filename=filename)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not Job.objects.filter(pk=job.pk, status='queued').update(status='cancelled'):
+            return Response(
+                {"error": f"Only queued jobs can be cancelled (status: {job.status})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
@@ -0,0 +1,194 @@
+"""
+Background jobs, queued in the database.
+
+Heavy work (CSV exports and imports, teacher reports, report cards,
+management commands) is registered as a task and queued as a Job row:
+
+    @jobs.task('students.export_csv')
+    def export_students(job, user_id):
+        ...
+        job_progress(job, done, total)
+        save_result_file(job, 'students.csv', content)
+        return {'rows': n}            # stored in Job.result
+
+    job = jobs.enqueue('students.export_csv', user=request.user, user_id=request.user.pk)
+
+`manage.py run_workers` claims queued jobs (a conditional UPDATE, so two
+workers never run the same job), runs them and stores the result, or the
+error and a retry time (a result that can't be stored as JSON counts as
+an error): a failed job is queued again after
+JOB_RETRY_DELAY * 2**(attempts - 1) seconds until it has failed
+max_attempts times. A running job whose heartbeat (written with every
+progress update) is older than JOB_STALE_SECONDS belongs to a dead worker
+and is queued again.
+
+A job runs pinned to its school, so sharded academic rows are read from
+that school's shard as they would be in a request.
+
+Tasks live in api.tasks, imported when the app is ready so every process
+has the registry.
+"""
+
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import sharding
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_MAX_ATTEMPTS = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+JOB_RETRY_DELAY = getattr(settings, 'JOB_RETRY_DELAY', 30)
+JOB_STALE_SECONDS = getattr(settings, 'JOB_STALE_SECONDS', 3600)
+JOB_POLL_INTERVAL = getattr(settings, 'JOB_POLL_INTERVAL', 2)
+
+TASKS = {}
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(name, max_attempts=None, single_download=False):
+    """
+    Register `func(job, **kwargs)` as the task `name`. The result file of a
+    single_download task (passwords, say) is deleted once it has been downloaded.
+    """
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts or JOB_MAX_ATTEMPTS
+        func.single_download = single_download
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, /, user=None, school_id=None, run_after=None, **kwargs):
+    """Queue a run of task `name` with JSON-serializable kwargs; returns the Job."""
+    if name not in TASKS:
+        raise UnknownTask(name)
+    return Job.objects.create(
+        task=name, kwargs=kwargs, requested_by=user, school_id=school_id,
+        max_attempts=TASKS[name].max_attempts, run_after=run_after or timezone.now(),
+    )
+
+
+# -----------------------------
+# INSIDE A TASK
+# -----------------------------
+def job_progress(job, done, total=None, message=''):
+    """Record progress (done of total, or a percentage when total is None) and refresh the heartbeat."""
+    progress = round(done * 100 / total, 1) if total else round(float(done), 1)
+    job.progress, job.heartbeat_at = min(progress, 100.0), timezone.now()
+    fields = {'progress': job.progress, 'heartbeat_at': job.heartbeat_at}
+    if message:
+        job.message = fields['message'] = message[:255]
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def save_result_file(job, filename, content):
+    """Store `content` (bytes or str) as the job's downloadable result, in private storage."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if job.result_file:
+        job.result_file.delete(save=False)
+    job.result_file.save(f'{job.pk}_{filename}', ContentFile(content), save=False)
+    Job.objects.filter(pk=job.pk).update(result_file=job.result_file.name)
+
+
+# -----------------------------
+# WORKERS
+# -----------------------------
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale():
+    """Queue again running jobs whose worker stopped sending heartbeats."""
+    cutoff = timezone.now() - timedelta(seconds=JOB_STALE_SECONDS)
+    return Job.objects.filter(status='running', heartbeat_at__lt=cutoff).update(
+        status='queued', worker='', error='Worker stopped responding',
+    )
+
+
+def claim(worker):
+    """The next due job, marked running for `worker`, or None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run(job):
+    """Run a claimed job and record its outcome; returns the final status."""
+    func = TASKS.get(job.task)
+    job.attempts += 1
+    Job.objects.filter(pk=job.pk).update(attempts=job.attempts)
+    try:
+        if func is None:
+            raise UnknownTask(job.task)
+        # Academic rows of the job's school live on its shard
+        token = sharding._pinned_school.set(job.school_id)
+        try:
+            result = func(job, **job.kwargs)
+        finally:
+            sharding._pinned_school.reset(token)
+        finished_at = timezone.now()
+        # Inside the try (and its own atomic block): a result that can't be
+        # stored fails the job instead of the worker
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk, status='running').update(
+                status='succeeded', result=result, progress=100.0, finished_at=finished_at, error='',
+            )
+    except Exception as exc:
+        job.error = ''.join(traceback.format_exception(exc))[-10000:]
+        if func is not None and job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(seconds=JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status, job.finished_at = 'failed', timezone.now()
+        logger.warning('Job %s (%s) failed on attempt %s: %s', job.pk, job.task, job.attempts, exc)
+        Job.objects.filter(pk=job.pk).update(
+            status=job.status, error=job.error, run_after=job.run_after, finished_at=job.finished_at,
+        )
+        return job.status
+
+    job.status, job.result, job.progress, job.finished_at = 'succeeded', result, 100.0, finished_at
+    return job.status
+
+
+def work(worker=None, once=False, poll_interval=None, stop=None):
+    """
+    Claim and run jobs until `stop()` is true; with once=True, until the
+    queue has no due job. Returns the number of jobs run.
+    """
+    worker = worker or worker_name()
+    poll_interval = JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    count = 0
+    requeue_stale()
+    while not (stop and stop()):
+        close_old_connections()
+        job = claim(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            requeue_stale()
+            continue
+        run(job)
+        count += 1
+    return count
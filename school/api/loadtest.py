@@ -0,0 +1,360 @@
+"""
+HTTP load generation against a running server, with role-based traffic.
+
+`manage.py loadtest` starts one thread per virtual user. Each thread logs
+in through /api/login/ as one of the synthetic users made by
+`create_sample_data --schools` and then runs its scenario's step in a loop
+until the test ends, with random think time between steps:
+
+    attendance_burst   teachers POST a section roster to attendance_management
+                       (the 8am burst: everyone at once, no ramp-up)
+    exam_results       students read my_grades, my_results and academic_summary
+    report_cards       school managers request a batch of report cards and poll
+                       it until a worker (run_workers) has generated it
+    mixed              all of the above, weighted like a school morning
+
+Only urllib and threads are used, so the harness runs anywhere the server
+does. The database is read once, before the test, to pick users and build
+request bodies; during the test everything goes over HTTP. Every request is
+recorded by label ("GET my_grades") with its status and latency, and the
+Recorder reports throughput and latency percentiles per time window and
+per label. A request type whose error rate is above the command's
+--max-error-rate fails the run, so a broken endpoint can't pass as fast.
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+
+from .benchmarking import latency_summary
+from .models import School, Schedule, Section, Semester, StudentProfile, User
+
+POLL_INTERVAL = 1.0
+LOGIN_RETRIES = 5
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+class Session:
+    """One virtual user's connection to the server: JSON requests with its access token."""
+
+    def __init__(self, base_url, recorder, timeout=30, deadline=None):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.deadline = deadline  # perf_counter() time the test ends
+        self.token = None
+        self.credentials = None
+
+    def _send(self, method, path, body=None, params=None):
+        url = f'{self.base_url}{path}'
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method)
+        request.add_header('Accept', 'application/json')
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            # Refused, reset or timed out: recorded as status 0
+            status, content = 0, b''
+        elapsed = (time.perf_counter() - start) * 1000
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = None
+        return status, elapsed, payload
+
+    def login(self, email, password):
+        self.credentials = (email, password)
+        for attempt in range(LOGIN_RETRIES):
+            status, elapsed, payload = self._send('POST', '/api/login/', {'email': email, 'password': password})
+            self.recorder.record('POST login', status, elapsed)
+            if status == 200:
+                self.token = payload['access_token']
+                with self.recorder.lock:
+                    self.recorder.logged_in += 1
+                return True
+            if status not in (0, 429, 503):
+                return False
+            time.sleep(0.5 * 2 ** attempt)
+        return False
+
+    def request(self, label, method, path, body=None, params=None):
+        """Send and record one request; logs in again once if the token expired. Returns (status, payload)."""
+        status, elapsed, payload = self._send(method, path, body, params)
+        if status == 401 and self.credentials and self.login(*self.credentials):
+            status, elapsed, payload = self._send(method, path, body, params)
+        self.recorder.record(label, status, elapsed)
+        return status, payload
+
+
+# -----------------------------
+# RESULTS
+# -----------------------------
+class Recorder:
+    """Thread-safe request log with per-window and per-label summaries."""
+
+    def __init__(self, interval=5):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.samples = []  # (seconds since start, label, status, ms)
+        self.logged_in = 0
+
+    def record(self, label, status, elapsed):
+        with self.lock:
+            self.samples.append((time.perf_counter() - self.started, label, status, elapsed))
+
+    @staticmethod
+    def summarize(samples, seconds):
+        # Latency of every answered request; refused or timed-out ones (status 0) only count as errors
+        timings = [ms for _, _, status, ms in samples if status]
+        codes = defaultdict(int)
+        for _, _, status, _ in samples:
+            codes[status] += 1
+        return {
+            'requests': len(samples),
+            'errors': sum(count for status, count in codes.items() if not 200 <= status < 400),
+            'rps': round(len(samples) / seconds, 1) if seconds else 0,
+            'statuses': dict(sorted(codes.items())),
+            **latency_summary(timings),
+        }
+
+    def window(self, index):
+        """Summary of window `index` (seconds [index * interval, (index + 1) * interval))."""
+        start, end = index * self.interval, (index + 1) * self.interval
+        with self.lock:
+            samples = [s for s in self.samples if start <= s[0] < end]
+        return self.summarize(samples, self.interval)
+
+    def report(self, duration):
+        with self.lock:
+            samples = list(self.samples)
+        by_label = defaultdict(list)
+        for sample in samples:
+            by_label[sample[1]].append(sample)
+        windows = int(duration // self.interval) + (duration % self.interval > 0)
+        return {
+            'total': self.summarize(samples, duration),
+            'labels': {label: self.summarize(rows, duration) for label, rows in sorted(by_label.items())},
+            'windows': [{'t': i * self.interval, **self.window(i)} for i in range(windows)],
+        }
+
+
+def over_error_rate(report, max_rate):
+    """{label: error percentage} of the request types whose errors exceed `max_rate` percent of their requests."""
+    rates = {
+        label: round(summary['errors'] * 100 / summary['requests'], 1)
+        for label, summary in report['labels'].items() if summary['requests']
+    }
+    return {label: rate for label, rate in rates.items() if rate > max_rate}
+
+
+# -----------------------------
+# SCENARIOS
+# -----------------------------
+class Scenario:
+    """Traffic of one role. prepare() reads the database once; step() is one user action."""
+    role = None
+
+    def __init__(self, rng, sample_seed=None, day=None):
+        self.rng = rng
+        self.sample_seed = sample_seed
+        self.day = day
+
+    def users(self, count):
+        users = User.objects.filter(role=self.role, is_active=True, email__endswith='@sample.local')
+        if self.sample_seed is not None:
+            users = users.filter(username__startswith=f'sd{self.sample_seed}_')
+        ids = list(users.order_by('pk').values_list('pk', flat=True))
+        chosen = self.rng.sample(ids, min(count, len(ids)))
+        return list(User.objects.filter(pk__in=chosen).values('pk', 'email', 'role'))
+
+    def prepare(self, users):
+        """Per-user state (keyed by user pk) for step()."""
+        return {user['pk']: {} for user in users}
+
+    def step(self, session, state):
+        raise NotImplementedError
+
+
+class AttendanceBurst(Scenario):
+    """Teachers mark attendance for a whole section, one taught (section, subject) at a time."""
+    role = 'teacher'
+
+    def prepare(self, users):
+        slots = defaultdict(list)
+        for row in (Schedule.objects.filter(teacher_id__in=[u['pk'] for u in users])
+                    .values('teacher_id', 'section_id', 'subject_id').distinct().order_by('section_id', 'subject_id')):
+            slots[row['teacher_id']].append((row['section_id'], row['subject_id']))
+
+        sections = {
+            row['pk']: row for row in Section.objects.filter(
+                pk__in={section_id for rows in slots.values() for section_id, _ in rows}
+            ).values('pk', 'name', 'school_id', 'class_group__name')
+        }
+        # Students belong to a section through their profile's class_section, e.g. "Grade 10A"
+        rosters = defaultdict(list)
+        for row in StudentProfile.objects.filter(school_id__in={s['school_id'] for s in sections.values()}).values(
+            'user_id', 'school_id', 'class_section'
+        ):
+            rosters[(row['school_id'], row['class_section'])].append(row['user_id'])
+
+        state = {}
+        for user in users:
+            teacher_slots = [
+                (section_id, subject_id, rosters[(s['school_id'], f"{s['class_group__name']}{s['name']}")])
+                for section_id, subject_id in slots[user['pk']]
+                for s in [sections[section_id]]
+            ]
+            state[user['pk']] = {'slots': [slot for slot in teacher_slots if slot[2]], 'next': 0}
+        return state
+
+    def step(self, session, state):
+        if not state['slots']:
+            return
+        # Once every slot has been marked for a day, move on to the day before.
+        section_id, subject_id, students = state['slots'][state['next'] % len(state['slots'])]
+        day = self.day - timedelta(days=state['next'] // len(state['slots']))
+        state['next'] += 1
+        session.request('POST attendance_management', 'POST', '/api/teacher-self/attendance_management/', [
+            {'student': student_id, 'section': section_id, 'subject': subject_id, 'date': day.isoformat(),
+             'status': 'present' if self.rng.random() < 0.9 else 'absent'}
+            for student_id in students
+        ])
+
+
+class ExamResults(Scenario):
+    """Students checking their results."""
+    role = 'student'
+    ENDPOINTS = [('my_grades', 7), ('my_results', 2), ('academic_summary', 1)]
+
+    def step(self, session, state):
+        name = self.rng.choices([n for n, _ in self.ENDPOINTS], [w for _, w in self.ENDPOINTS])[0]
+        session.request(f'GET {name}', 'GET', f'/api/student-self/{name}/')
+
+
+class ReportCards(Scenario):
+    """School managers generating the term's report cards and waiting for them."""
+    role = 'school'
+
+    def prepare(self, users):
+        schools = dict(School.objects.filter(manager_id__in=[u['pk'] for u in users]).values_list('manager_id', 'pk'))
+        semester = Semester.objects.order_by('-start_date').values_list('pk', flat=True).first()
+        return {user['pk']: {'school': schools.get(user['pk']), 'semester': semester} for user in users}
+
+    def step(self, session, state):
+        if not state['school'] or not state['semester']:
+            return
+        started = time.perf_counter()
+        status, batch = session.request('POST report-cards', 'POST', '/api/report-cards/', {
+            'semester': state['semester'], 'school': state['school'],
+        })
+        if status != 201:
+            return
+        while True:
+            time.sleep(POLL_INTERVAL)
+            if time.perf_counter() >= session.deadline:
+                return  # unfinished when the test ended: not a sample
+            status, batch = session.request('GET report-cards/<id>', 'GET', f"/api/report-cards/{batch['id']}/")
+            if status != 200 or batch['status'] in ('done', 'failed'):
+                break
+        # The whole run as one sample: 200 when the cards were generated
+        ok = status == 200 and batch['status'] == 'done'
+        session.recorder.record('report card batch', 200 if ok else 500, (time.perf_counter() - started) * 1000)
+
+
+class Mixed(Scenario):
+    """A school morning: mostly students, some teachers, the odd report-card run."""
+    MIX = [(ExamResults, 0.7), (AttendanceBurst, 0.25), (ReportCards, 0.05)]
+
+    def __init__(self, rng, sample_seed=None, day=None):
+        super().__init__(rng, sample_seed, day)
+        self.parts = [(cls(rng, sample_seed, day), share) for cls, share in self.MIX]
+
+    def users(self, count):
+        return [user for part, share in self.parts for user in part.users(max(1, round(count * share)))]
+
+    def prepare(self, users):
+        by_role = defaultdict(list)
+        for user in users:
+            by_role[user['role']].append(user)
+        state = {}
+        for part, _ in self.parts:
+            for pk, part_state in part.prepare(by_role[part.role]).items():
+                state[pk] = {**part_state, 'scenario': part}
+        return state
+
+    def step(self, session, state):
+        state['scenario'].step(session, state)
+
+
+SCENARIOS = {
+    'attendance_burst': AttendanceBurst,
+    'exam_results': ExamResults,
+    'report_cards': ReportCards,
+    'mixed': Mixed,
+}
+
+
+# -----------------------------
+# RUNNER
+# -----------------------------
+def virtual_user(scenario, user, state, session_args, password, deadline, start_at, think, rng):
+    session = Session(*session_args, deadline=deadline)
+    delay = start_at - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+    if not session.login(user['email'], password):
+        return
+    while time.perf_counter() < deadline:
+        scenario.step(session, state)
+        if think:
+            time.sleep(min(rng.expovariate(1 / think), max(0, deadline - time.perf_counter())))
+
+
+def run(scenario, users, state, base_url, password, duration, ramp_up=0, think=1.0, interval=5,
+        timeout=30, seed=1, on_window=None):
+    """
+    Run `scenario` for `duration` seconds with one thread per user, starting
+    them evenly over `ramp_up` seconds. `on_window(index, summary)` is called
+    as each reporting window closes. Returns the Recorder.
+    """
+    recorder = Recorder(interval)
+    now = time.perf_counter()
+    deadline = now + duration
+    threads = [
+        threading.Thread(
+            target=virtual_user, daemon=True,
+            args=(scenario, user, state[user['pk']], (base_url, recorder, timeout), password, deadline,
+                  now + (ramp_up * i / len(users) if ramp_up else 0), think, random.Random(f'{seed}:{i}')),
+        )
+        for i, user in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+
+    index = 0
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(0.2)
+        if on_window and recorder.started + (index + 1) * interval <= time.perf_counter():
+            on_window(index, recorder.window(index))
+            index += 1
+    return recorder
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.archive import archive_year, archived_years, closed_years
+from api.models import Semester
+
+
+class Command(BaseCommand):
+    help = (
+        'Move grades and attendance of closed academic years into the archive tables. '
+        'Without --year every year whose semesters have all ended is archived (safe to schedule).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help='Academic year to archive, e.g. 2024/25')
+        parser.add_argument('--force', action='store_true', help='Archive --year even if a semester is still open')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only list the years that would be archived')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year:
+            semesters = Semester.objects.filter(academic_year=year)
+            if not semesters.exists():
+                raise CommandError(f'No semesters for academic year {year}.')
+            if year in archived_years():
+                raise CommandError(f'{year} is already archived.')
+            if not options['force'] and semesters.filter(end_date__gte=timezone.localdate()).exists():
+                raise CommandError(f'{year} still has an open semester; pass --force to archive anyway.')
+            years = [year]
+        else:
+            years = closed_years()
+
+        if not years:
+            self.stdout.write('Nothing to archive.')
+            return
+
+        for year in years:
+            if options['dry_run']:
+                self.stdout.write(f'  would archive {year}')
+                continue
+            grades, attendance = archive_year(year, batch_size=options['batch_size'])
+            self.stdout.write(f'  {year}: {grades} grades, {attendance} attendance records archived')
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archived {len(years)} academic years'))
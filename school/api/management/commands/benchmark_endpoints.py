@@ -0,0 +1,271 @@
+from contextlib import ExitStack
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+import json
+import logging
+import platform
+import re
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import get_resolver, reverse
+from django.urls.resolvers import URLResolver
+
+from api import jobs, sample_data
+from api.benchmarking import latency_summary
+from api.models import ReportCardBatch, Schedule, School, StudentProfile, Teacher, Wereda
+
+ROLES = ['student', 'teacher', 'school', 'wereda_office']
+
+DEFAULT_OUTPUT = Path(settings.BASE_DIR) / 'benchmarks' / 'endpoints.json'
+
+
+def api_routes():
+    """(url name, url kwarg names, router basename) of every GET route in api.urls, suffix variants left out."""
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            else:
+                yield pattern
+
+    routes = []
+    for pattern in walk(get_resolver('api.urls').url_patterns):
+        callback = pattern.callback
+        params = set(getattr(pattern.pattern, 'converters', {})) or set(pattern.pattern.regex.groupindex)
+        if 'format' in params or not pattern.name:
+            continue
+        actions = getattr(callback, 'actions', None)
+        view_class = getattr(callback, 'cls', None)
+        methods = set(actions) if actions else {m for m in view_class.http_method_names if hasattr(view_class, m)}
+        if 'get' in methods:
+            basename = (getattr(callback, 'initkwargs', None) or {}).get('basename')
+            routes.append((pattern.name, sorted(params), basename))
+    return routes
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every GET route in api/urls.py as a student, teacher, school manager and '
+        'wereda officer on a seeded throwaway database: p50/p95 latency, SQL queries and peak '
+        'Python memory per request. Results are written as a JSON baseline; with --compare the '
+        'run fails when an endpoint got slower than --threshold percent, runs more queries or '
+        'changed status.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schools', type=int, default=2, help='Schools in the seeded dataset')
+        parser.add_argument('--students', type=int, default=200, help='Students per school')
+        parser.add_argument('--attendance-days', type=int, default=20, help='Attendance days per semester')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint and role')
+        parser.add_argument('--roles', nargs='+', choices=ROLES, default=ROLES)
+        parser.add_argument('--filter', help='Only URL names matching this regular expression')
+        parser.add_argument('--output', help=f'Write results here (default {DEFAULT_OUTPUT}, or nowhere with --compare)')
+        parser.add_argument('--compare', help='Baseline JSON to check this run against')
+        parser.add_argument('--threshold', type=float, default=20.0, help='Allowed p50 slowdown in percent (default 20)')
+        parser.add_argument('--min-delta', type=float, default=2.0,
+                            help='Ignore slowdowns smaller than this many ms, which are noise (default 2)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        # 4xx responses for roles without access are expected and recorded.
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            started = time.perf_counter()
+            ids = self.seed(options)
+            self.stdout.write(f'Seeded dataset in {time.perf_counter() - started:.0f}s')
+            results = self.run_benchmarks(ids, options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connections['default'].vendor,
+                'dataset': {key: options[key] for key in ('schools', 'students', 'attendance_days', 'seed')},
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        output = options['output'] or (None if baseline else DEFAULT_OUTPUT)
+        if output:
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f'Wrote {len(results)} results to {output}')
+
+        if baseline is not None:
+            self.check_regressions(baseline, report, options['threshold'], options['min_delta'])
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(results)} endpoint/role pairs'))
+
+    # -----------------------------
+    # DATASET
+    # -----------------------------
+    def seed(self, options):
+        """Generate the dataset with api.sample_data; returns the ids the routes and roles need."""
+        seed = options['seed']
+        shared = sample_data.create_shared(1, seed, books=100)
+        weredas = sample_data.create_weredas(options['schools'], seed)
+        for index in range(options['schools']):
+            sample_data.create_school(
+                index, seed, weredas[index // sample_data.SCHOOLS_PER_WEREDA], options['students'],
+                options['attendance_days'], shared,
+            )
+        call_command('compute_term_results', stdout=StringIO())
+        call_command('build_rollups', days=7, stdout=StringIO())
+
+        school = School.objects.select_related('manager').get(code=f'SD{seed}-0')
+        schedule = Schedule.objects.filter(section__school=school).order_by('pk').first()
+        teacher = Teacher.objects.select_related('user').get(user_id=schedule.teacher_id)
+        student = StudentProfile.objects.filter(school=school).select_related('user').order_by('pk').first()
+        wereda = Wereda.objects.select_related('manager').get(pk=school.wereda_id)
+        semester_id = shared['semesters'][-1]['id']
+        section_id = schedule.section_id
+
+        users = {'student': student.user, 'teacher': teacher.user, 'school': school.manager, 'wereda_office': wereda.manager}
+        batch = ReportCardBatch.objects.create(
+            semester_id=semester_id, school=school, requested_by=school.manager, format='html',
+        )
+        own_jobs = {
+            role: jobs.enqueue('students.export_csv', user=user, user_id=user.pk).pk
+            for role, user in users.items()
+        }
+        return {
+            'users': users,
+            # Detail-route pks by router basename; a dict means one object per role.
+            'pks': {
+                'students': student.pk, 'student-self': student.pk,
+                'teachers': teacher.pk, 'teacher-self': teacher.pk,
+                'wereda': wereda.pk, 'school': school.pk,
+                'register_school_manager': school.manager_id, 'wereda_office': wereda.manager_id,
+                'report-cards': batch.pk, 'jobs': own_jobs,
+            },
+            'params': {
+                'teacher-self-grade-analytics': {'section': section_id, 'semester': semester_id},
+                'rollups-drilldown': {'node_type': 'wereda', 'node_id': wereda.pk},
+                'rollups-series': {'node_type': 'school', 'node_id': school.pk},
+            },
+        }
+
+    # -----------------------------
+    # MEASUREMENT
+    # -----------------------------
+    def login(self, user):
+        response = Client().post('/api/login/', {'email': user.email, 'password': sample_data.DEFAULT_PASSWORD},
+                                 content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f'Login as {user.email} failed: {response.status_code} {response.content[:200]}')
+        # A 500 is a result to record, not a reason to stop the run.
+        return Client(raise_request_exception=False, HTTP_AUTHORIZATION=f"Bearer {response.json()['access_token']}")
+
+    def url_for(self, name, params, basename, role, ids):
+        kwargs = {}
+        if params:
+            pk = ids['pks'].get(basename)
+            pk = pk.get(role) if isinstance(pk, dict) else pk
+            if params != ['pk'] or pk is None:
+                return None
+            kwargs['pk'] = pk
+        return reverse(name, kwargs=kwargs)
+
+    def measure(self, client, url, query, repeat):
+        client.get(url, query)  # warm-up: caches, lazy imports, first-query costs
+        timings, queries = [], 0
+        for _ in range(repeat):
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                start = time.perf_counter()
+                response = client.get(url, query)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, sum(len(c.captured_queries) for c in captured))
+
+        # Measured separately: tracemalloc slows everything it traces.
+        tracemalloc.start()
+        client.get(url, query)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        summary = latency_summary(timings)
+        return {
+            'status': response.status_code, 'p50_ms': summary['p50_ms'], 'p95_ms': summary['p95_ms'],
+            'queries': queries, 'peak_kib': round(peak / 1024, 1),
+        }
+
+    def run_benchmarks(self, ids, options):
+        pattern = re.compile(options['filter']) if options['filter'] else None
+        routes = [route for route in api_routes() if not pattern or pattern.search(route[0])]
+        results = {}
+        for role in options['roles']:
+            client = self.login(ids['users'][role])
+            self.stdout.write(f'\n{role}')
+            for name, params, basename in routes:
+                url = self.url_for(name, params, basename, role, ids)
+                if url is None:
+                    continue
+                result = self.measure(client, url, ids['params'].get(name, {}), options['repeat'])
+                results[f'{name} [{role}]'] = {'path': url, **result}
+                self.stdout.write(
+                    f"  {name:<42} {result['status']}  p50={result['p50_ms']:7.1f}ms  "
+                    f"p95={result['p95_ms']:7.1f}ms  queries={result['queries']:<4} peak={result['peak_kib']:,.0f}KiB"
+                )
+        return results
+
+    # -----------------------------
+    # REGRESSION CHECK
+    # -----------------------------
+    def check_regressions(self, baseline, report, threshold, min_delta):
+        if baseline.get('meta', {}).get('dataset') != report['meta']['dataset']:
+            self.stdout.write(self.style.WARNING('Baseline was recorded on a different dataset; timings may not compare'))
+
+        old, new = baseline.get('results', {}), report['results']
+        problems = []
+        for key in sorted(old.keys() & new.keys()):
+            before, after = old[key], new[key]
+            if after['status'] != before['status']:
+                problems.append(f"{key}: status {before['status']} -> {after['status']}")
+            if after['queries'] > before['queries']:
+                problems.append(f"{key}: {before['queries']} -> {after['queries']} queries")
+            slower = after['p50_ms'] - before['p50_ms']
+            if slower > min_delta and after['p50_ms'] > before['p50_ms'] * (1 + threshold / 100):
+                problems.append(
+                    f"{key}: p50 {before['p50_ms']:.1f}ms -> {after['p50_ms']:.1f}ms "
+                    f"(+{slower / before['p50_ms'] * 100 if before['p50_ms'] else 100:.0f}%)"
+                )
+
+        for key in sorted(new.keys() - old.keys()):
+            self.stdout.write(f'  new: {key}')
+        for key in sorted(old.keys() - new.keys()):
+            self.stdout.write(f'  not measured: {key}')
+
+        if problems:
+            for problem in problems:
+                self.stderr.write(f'  {problem}')
+            raise CommandError(f'{len(problems)} endpoint regressions against the baseline')
+        self.stdout.write(self.style.SUCCESS(
+            f'No regressions in {len(old.keys() & new.keys())} endpoint/role pairs '
+            f'(threshold {threshold:g}%, queries, status)'
+        ))
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api import gradebook
+from api.models import User, ClassGroup, Section, Subject, Semester, Grade
+from api.teacher_views import TeacherSelfViewSet
+
+# Grade is unique per (student, subject, semester, grade_type): 5 subjects x 5 types
+GRADES_PER_STUDENT = 25
+GRADE_TYPES = [choice for choice, _ in Grade.GRADE_TYPE_CHOICES]
+
+
+# -----------------------------
+# CURRENT IMPLEMENTATION
+# -----------------------------
+def legacy_statistics(grades):
+    """grade_management statistics as computed with ORM aggregates."""
+    avg_score = grades.aggregate(avg=models.Avg('score'))['avg'] or 0
+    return {
+        'total_grades': grades.count(),
+        'average_score': round(avg_score, 2),
+        'grade_distribution': {
+            'A': grades.filter(score__gte=90).count(),
+            'B': grades.filter(score__gte=80, score__lt=90).count(),
+            'C': grades.filter(score__gte=70, score__lt=80).count(),
+            'D': grades.filter(score__gte=60, score__lt=70).count(),
+            'F': grades.filter(score__lt=60).count(),
+        },
+    }
+
+
+def legacy_report(grades):
+    """reports?type=grades per-student loop over Decimal (with select_related, so no N+1)."""
+    student_grades = defaultdict(list)
+    for grade in grades.select_related('student', 'subject'):
+        student_grades[grade.student.get_full_name()].append({
+            'subject': grade.subject.name,
+            'percentage': round((float(grade.score) / float(grade.full_mark)) * 100, 1),
+        })
+    return [
+        {
+            'student': student,
+            'average_percentage': round(sum(g['percentage'] for g in rows) / len(rows), 1),
+            'highest_score': max(g['percentage'] for g in rows),
+            'lowest_score': min(g['percentage'] for g in rows),
+        }
+        for student, rows in student_grades.items()
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark api.gradebook against the previous ORM/loop implementation on a '
+        'throwaway test database (default sizes: 1k, 100k and 1M grades in one section). '
+        '"statistics" is the single-query summarize(), "stats-numpy" the same numbers from arrays.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is reported')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if not gradebook.available():
+            raise CommandError('numpy is not installed: pip install numpy')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            rng = random.Random(options['seed'])
+            students = self.create_students(max(options['sizes']) // GRADES_PER_STUDENT + 1)
+            subjects = [
+                Subject.objects.create(name=f'Subject {i}', code=f'BENCH{i}', credit_hours=3) for i in range(5)
+            ]
+            group = ClassGroup.objects.create(name='Benchmark', level='Secondary', academic_program='General')
+
+            self.stdout.write(f"{'grades':>9}  {'measure':<12} {'current':>10} {'new':>10} {'speedup':>8}")
+            for size in options['sizes']:
+                section = Section.objects.create(class_group=group, name=f'B{size}')
+                semester = Semester.objects.create(
+                    name=f'Benchmark {size}', academic_year='2025/26',
+                    start_date=date(2025, 9, 1), end_date=date(2026, 1, 31),
+                )
+                self.create_grades(section, students[:size // GRADES_PER_STUDENT + 1], subjects, semester, size, rng)
+                grades = Grade.objects.filter(section=section)
+                view = TeacherSelfViewSet()
+                for measure, current, vectorized in (
+                    ('statistics', lambda: legacy_statistics(grades), lambda: gradebook.summarize(grades)),
+                    ('stats-numpy', lambda: legacy_statistics(grades),
+                     lambda: gradebook.GradeBook.from_queryset(grades).summary()),
+                    ('report', lambda: legacy_report(grades), lambda: view._grade_report(grades)),
+                    ('analytics', None,
+                     lambda: gradebook.section_report(gradebook.GradeBook.from_queryset(grades))),
+                ):
+                    new = self.best(vectorized, options['repeat'])
+                    old = self.best(current, options['repeat']) if current else None
+                    self.stdout.write(
+                        f'{size:>9}  {measure:<12} '
+                        + (f'{old * 1000:>8.1f}ms' if old else f"{'-':>10}")
+                        + f' {new * 1000:>8.1f}ms '
+                        + (f'{old / new:>7.1f}x' if old else f"{'-':>8}")
+                    )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def create_students(self, count):
+        User.objects.bulk_create([
+            User(username=f'bench{i}', email=f'bench{i}@example.com', role='student',
+                 first_name='Student', last_name=str(i), national_id=f'{100000 + i}', password='!')
+            for i in range(count)
+        ], batch_size=5000)
+        return list(User.objects.filter(username__startswith='bench').order_by('id'))
+
+    def create_grades(self, section, students, subjects, semester, size, rng):
+        batch = []
+        for i in range(size):
+            batch.append(Grade(
+                student=students[i // GRADES_PER_STUDENT], subject=subjects[i % GRADES_PER_STUDENT // 5],
+                section=section, semester=semester, academic_year='2025/26',
+                grade_type=GRADE_TYPES[i % 5],
+                score=Decimal(rng.randint(300, 1000)) / 10, full_mark=Decimal(100),
+            ))
+            if len(batch) == 10000:
+                Grade.objects.bulk_create(batch)
+                batch = []
+        Grade.objects.bulk_create(batch)
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers, make_password
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import statistics
+import time
+
+from api.benchmarking import percentile
+
+User = get_user_model()
+
+PASSWORD = 'Benchmark#123'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark password hashers and the /api/login/ endpoint under a login burst'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hash-rounds', type=int, default=5, help='Hashes per hasher when timing hashers')
+        parser.add_argument('--logins', type=int, default=200, help='Login requests to send in the burst')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients in the burst')
+        parser.add_argument('--skip-endpoint', action='store_true', help='Only time the hashers')
+
+    def handle(self, *args, **options):
+        self.benchmark_hashers(options['hash_rounds'])
+        if not options['skip_endpoint']:
+            self.benchmark_endpoint(options['logins'], options['concurrency'])
+
+    # -----------------------------
+    # HASHERS
+    # -----------------------------
+    def benchmark_hashers(self, rounds):
+        self.stdout.write(f'Policy: {settings.PASSWORD_HASHER_POLICY}  (rounds per hasher: {rounds})')
+        for hasher in get_hashers():
+            try:
+                hasher.encode(PASSWORD, hasher.salt())
+            except (ValueError, ImportError) as e:
+                self.stdout.write(f'  {hasher.algorithm:<16} skipped ({e})')
+                continue
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                hasher.encode(PASSWORD, hasher.salt())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'  {hasher.algorithm:<16} {statistics.mean(timings):8.1f} ms/hash  '
+                f'~{1000 / statistics.mean(timings):6.1f} hashes/s per core'
+            )
+
+    # -----------------------------
+    # LOGIN ENDPOINT
+    # -----------------------------
+    def benchmark_endpoint(self, logins, concurrency):
+        # Rejected logins are expected here; don't log every 503.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            encoded = make_password(PASSWORD)
+            users = User.objects.bulk_create([
+                User(username=f'bench{i}', email=f'bench{i}@example.com', role='student',
+                     national_id=f'{100000 + i}', password=encoded)
+                for i in range(logins)
+            ])
+
+            def login(user):
+                client = Client()
+                start = time.perf_counter()
+                response = client.post('/api/login/', {'email': user.email, 'password': PASSWORD},
+                                       content_type='application/json')
+                elapsed = (time.perf_counter() - start) * 1000
+                connection.close()
+                return response.status_code, elapsed
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(login, users))
+            wall = time.perf_counter() - started
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        latencies = [elapsed for code, elapsed in results if code == 200]
+        codes = {}
+        for code, _ in results:
+            codes[code] = codes.get(code, 0) + 1
+
+        self.stdout.write(f'\nLogin burst: {logins} logins, {concurrency} concurrent clients')
+        self.stdout.write(f'  workers={settings.LOGIN_HASH_WORKERS} queue={settings.LOGIN_HASH_QUEUE_SIZE}')
+        self.stdout.write(f'  status codes: {codes}')
+        self.stdout.write(f'  throughput: {len(latencies) / wall:.1f} successful logins/s ({wall:.2f}s wall)')
+        if latencies:
+            self.stdout.write(
+                f'  latency ms: p50={percentile(latencies, 50):.0f} '
+                f'p95={percentile(latencies, 95):.0f} p99={percentile(latencies, 99):.0f}'
+            )
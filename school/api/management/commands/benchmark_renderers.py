@@ -0,0 +1,112 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api import renderers, sample_data
+from api.models import School, Teacher
+from api.renderers import ORJSONParser, ORJSONRenderer
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def decimal_rows(count):
+    """Grade-like rows of raw Decimals, dates and UUIDs, as views build for aggregates."""
+    now = timezone.now()
+    return [
+        {
+            'id': n, 'uuid': uuid.UUID(int=n), 'score': Decimal(f'{n % 100}.{n % 97:02d}'), 'full_mark': Decimal('100.00'),
+            'date': (now - timedelta(days=n % 365)).date(), 'recorded': now - timedelta(minutes=n), 'name': f'Student {n}',
+        }
+        for n in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF\'s JSONRenderer/JSONParser with api.renderers (orjson) on the heaviest '
+        'responses (grade_management, the teacher grade report, the student list) from a seeded '
+        'throwaway database, plus raw Decimal/date rows. Checks both produce the same JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000, help='Students in the seeded school')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows in the raw Decimal payload')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement; the best is reported')
+
+    def handle(self, *args, **options):
+        if not renderers.available():
+            raise CommandError('orjson is not installed: pip install orjson')
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            payloads = self.payloads(options['students'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+        payloads.append(('raw Decimal rows', decimal_rows(options['rows'])))
+
+        repeat = options['repeat']
+        stdlib_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        self.stdout.write(
+            f"{'payload':<28} {'size':>9} {'render':>9} {'orjson':>9} {'speedup':>8} "
+            f"{'parse':>9} {'orjson':>9} {'speedup':>8}  same output"
+        )
+        for name, data in payloads:
+            expected, actual = stdlib_renderer.render(data), fast_renderer.render(data)
+            same = 'yes' if actual == expected else ('equivalent' if json.loads(actual) == json.loads(expected) else 'NO')
+
+            render_std = best_of(repeat, stdlib_renderer.render, data)
+            render_fast = best_of(repeat, fast_renderer.render, data)
+            parse_std = best_of(repeat, lambda: JSONParser().parse(BytesIO(expected)))
+            parse_fast = best_of(repeat, lambda: ORJSONParser().parse(BytesIO(expected)))
+            self.stdout.write(
+                f'{name:<28} {len(expected) / 1024:>7.0f}KB {render_std:>7.2f}ms {render_fast:>7.2f}ms '
+                f'{render_std / render_fast:>7.1f}x {parse_std:>7.2f}ms {parse_fast:>7.2f}ms '
+                f'{parse_std / parse_fast:>7.1f}x  {same}'
+            )
+            if same == 'NO':
+                raise CommandError(f'{name}: orjson output differs from JSONRenderer')
+        self.stdout.write(self.style.SUCCESS(f'Best of {repeat} runs per measurement'))
+
+    def payloads(self, students):
+        """response.data of the heaviest endpoints, for one seeded school."""
+        shared = sample_data.create_shared(1, 1, books=50)
+        wereda = sample_data.create_weredas(1, 1)[0]
+        sample_data.create_school(0, 1, wereda, students, 10, shared)
+        school = School.objects.select_related('manager').get(code='SD1-0')
+        teacher = max(Teacher.objects.filter(school=school).select_related('user'),
+                      key=lambda t: t.user.schedule_set.count())
+
+        client = APIClient()
+        data = []
+        for label, user, path in [
+            ('grade_management', teacher.user, '/api/teacher-self/grade_management/'),
+            ('teacher grade report', teacher.user, '/api/teacher-self/reports/?type=grades'),
+            ('students list', school.manager, '/api/students/'),
+        ]:
+            client.force_authenticate(user)
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f'{path} answered {response.status_code}')
+            data.append((label, response.data))
+        return data
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.attendance_bitmaps import enabled, rebuild
+from api.models import Semester
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild AttendanceBitmap rows from Attendance. Without options every semester '
+        'that has started is rebuilt; run once after turning ATTENDANCE_BITMAPS on.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, action='append', help='Semester id to rebuild (repeatable)')
+        parser.add_argument('--section', type=int, action='append', help='Only rebuild these section ids')
+
+    def handle(self, *args, **options):
+        if not enabled():
+            self.stdout.write(self.style.WARNING(
+                'ATTENDANCE_BITMAPS is off: bitmaps will not follow later attendance changes.'
+            ))
+
+        semesters = Semester.objects.order_by('start_date')
+        if options['semester']:
+            semesters = semesters.filter(pk__in=options['semester'])
+            missing = set(options['semester']) - set(semesters.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown semester ids: {', '.join(map(str, sorted(missing)))}")
+        else:
+            semesters = semesters.filter(start_date__lte=timezone.localdate())
+
+        total = 0
+        for semester in semesters:
+            count = rebuild(semester, section_ids=options['section'])
+            self.stdout.write(f'  {semester}: {count} bitmaps')
+            total += count
+
+        self.stdout.write(self.style.SUCCESS(f'Built {total} attendance bitmaps'))
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.rollups import process_dirty, rebuild_range
+
+
+class Command(BaseCommand):
+    help = (
+        'Build hierarchy rollups. Without options only the section/days marked dirty '
+        'since the last run are rebuilt (run every few minutes); --days/--start/--end '
+        'rebuild whole days from scratch (run nightly, e.g. --days 7).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Fully rebuild the last N days, ending today')
+        parser.add_argument('--start', help='First day to fully rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to fully rebuild (YYYY-MM-DD, default today)')
+        parser.add_argument('--limit', type=int, help='Process at most this many dirty marks')
+
+    def handle(self, *args, **options):
+        if options['days'] or options['start']:
+            try:
+                end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+                start = (
+                    date.fromisoformat(options['start']) if options['start']
+                    else end - timedelta(days=options['days'] - 1)
+                )
+            except ValueError as e:
+                raise CommandError(f'Invalid date: {e}')
+            if start > end:
+                raise CommandError('--start must not be after --end')
+            days = rebuild_range(start, end)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {days} days ({start} to {end})'))
+            return
+
+        marks = process_dirty(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {marks} dirty section/days'))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Hit/miss counts of the api.cache namespaces, as flushed by the server processes to the '
+        'shared cache (only meaningful with a shared backend such as Redis; see CACHE_URL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Backend: {settings.CACHES['default']['BACKEND']}")
+        stats = metrics.shared()
+        self.stdout.write(
+            f"{'namespace':<20} {'hits':>9} {'misses':>9} {'hit rate':>9} {'coalesced':>10} "
+            f"{'computes':>9} {'avg compute':>12}"
+        )
+        for namespace, counts in stats.items():
+            lookups = counts['hits'] + counts['misses']
+            hit_rate = counts['hits'] / lookups * 100 if lookups else 0
+            average = counts['compute_ms'] / counts['computes'] if counts['computes'] else 0
+            self.stdout.write(
+                f"{namespace:<20} {counts['hits']:>9} {counts['misses']:>9} {hit_rate:>8.1f}% "
+                f"{counts['coalesced']:>10} {counts['computes']:>9} {average:>10.1f}ms"
+            )
+        if options['reset']:
+            metrics.reset()
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(stats)} namespaces" + (', counters reset' if options['reset'] else '')
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import School, Semester
+from api.term_results import compute
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute term results, GPA and class ranks from grades. Without --semester every '
+        'started, unarchived semester is recomputed. Grade saves keep results current; run '
+        'this after changing AssessmentWeight policies or bulk grade imports.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, action='append', help='Semester id (repeatable)')
+        parser.add_argument('--school', type=int, action='append', help='Only these school ids (repeatable)')
+
+    def handle(self, *args, **options):
+        semesters = Semester.objects.order_by('start_date')
+        if options['semester']:
+            semesters = semesters.filter(pk__in=options['semester'])
+            missing = set(options['semester']) - set(semesters.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown semester ids: {', '.join(map(str, sorted(missing)))}")
+        else:
+            semesters = semesters.filter(start_date__lte=timezone.localdate(), archived_at__isnull=True)
+
+        schools = options['school'] or [None]
+        if options['school']:
+            missing = set(schools) - set(School.objects.filter(pk__in=schools).values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown school ids: {', '.join(map(str, sorted(missing)))}")
+
+        total = 0
+        for semester in semesters:
+            for school_id in schools:
+                count = compute(semester, school_id=school_id)
+                scope = f' school {school_id}' if school_id else ''
+                self.stdout.write(f'  {semester}{scope}: {count} term results')
+                total += count
+
+        self.stdout.write(self.style.SUCCESS(f'Computed {total} term results'))
@@ -1,28 +1,54 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.db import connections
 from api.models import (
     StudentProfile, Subject, Semester, Grade, Attendance, 
-    Book, BorrowRecord, ClassGroup, Section, Teacher, Schedule
+    Book, BorrowRecord, ClassGroup, Section, Teacher, Schedule, School
 )
+from api import invalidation, sample_data
+from api.counters import reconcile
+from collections import Counter
 from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+import os
 import random
+import time
 
 User = get_user_model()
 
+# Students of the legacy (no --schools) dataset, cleared and recreated on every run
+SAMPLE_STUDENTS = ('john_student', 'jane_student', 'alex_student', 'maria_student')
+
 class Command(BaseCommand):
-    help = 'Create sample data for testing student functionality'
+    help = (
+        'Create sample data for testing student functionality. With --schools, generate a '
+        'deterministic national-scale dataset instead (see api.sample_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schools', type=int, help='Generate this many schools (scale mode)')
+        parser.add_argument('--students-per-school', type=int, default=500)
+        parser.add_argument('--years', type=int, default=1, help='Academic years of grades and attendance')
+        parser.add_argument('--seed', type=int, default=1, help='Same seed, same data')
+        parser.add_argument('--attendance-days', type=int, default=40, help='Attendance days per semester')
+        parser.add_argument('--books', type=int, default=500, help='Size of the shared book catalogue')
+        parser.add_argument('--workers', type=int, help='Processes generating schools (default: one per CPU; 1 on SQLite)')
 
     def handle(self, *args, **options):
+        if options['schools']:
+            return self.create_at_scale(options)
+
         self.stdout.write('Creating comprehensive sample data...')
         
-        # Clear existing sample data to avoid conflicts
+        # Clear the sample students from an earlier run (and only them) to avoid conflicts
         self.stdout.write('Clearing existing sample data...')
-        Grade.objects.filter(academic_year='2024/2025').delete()
-        Attendance.objects.filter(date__gte=date(2024, 9, 1)).delete()
-        BorrowRecord.objects.filter(borrower_type='student').delete()
-        
-        # Clear existing students
-        User.objects.filter(role='student').delete()
+        sample_students = list(
+            User.objects.filter(role='student', username__in=SAMPLE_STUDENTS).values_list('pk', flat=True)
+        )
+        Grade.objects.filter(student_id__in=sample_students, academic_year='2024/2025').delete()
+        Attendance.objects.filter(student_id__in=sample_students, date__gte=date(2024, 9, 1)).delete()
+        BorrowRecord.objects.filter(borrower_student_id__in=sample_students).delete()
+        User.objects.filter(pk__in=sample_students).delete()
         
         # Create comprehensive subjects for Grade 10
         subjects_data = [
@@ -519,6 +545,7 @@ class Command(BaseCommand):
 
         # Bulk create grades (much faster)
         Grade.objects.bulk_create(grades_to_create, ignore_conflicts=True)
+        invalidation.changed(Grade, grades_to_create)
         self.stdout.write(f'✅ Created {len(grades_to_create)} grades in bulk')
 
         # Create attendance records - OPTIMIZED
@@ -551,6 +578,7 @@ class Command(BaseCommand):
 
         # Bulk create attendance (much faster)
         Attendance.objects.bulk_create(attendance_to_create, ignore_conflicts=True)
+        invalidation.changed(Attendance, attendance_to_create)
         self.stdout.write(f'✅ Created {len(attendance_to_create)} attendance records in bulk')
         
         # Show attendance summary for students
@@ -589,6 +617,7 @@ class Command(BaseCommand):
         
         # Bulk create books
         Book.objects.bulk_create(books_to_create, ignore_conflicts=True)
+        invalidation.changed(Book, books_to_create)
         books = Book.objects.all()
         self.stdout.write(f'✅ Created {len(books_to_create)} books in bulk')
 
@@ -627,6 +656,7 @@ class Command(BaseCommand):
 
         # Bulk create library records
         BorrowRecord.objects.bulk_create(borrow_records_to_create, ignore_conflicts=True)
+        invalidation.changed(BorrowRecord, borrow_records_to_create)
         self.stdout.write(f'✅ Created {len(borrow_records_to_create)} library records in bulk')
 
         self.stdout.write(
@@ -727,4 +757,53 @@ class Command(BaseCommand):
             
             self.stdout.write(self.style.SUCCESS('✅ Sample announcements created successfully'))
         
-        self.stdout.write(self.style.SUCCESS('\n🎉 ALL ENHANCED SAMPLE DATA CREATED SUCCESSFULLY!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('\n🎉 ALL ENHANCED SAMPLE DATA CREATED SUCCESSFULLY!'))
+
+    def create_at_scale(self, options):
+        seed, schools = options['seed'], options['schools']
+        if School.objects.filter(code__startswith=f'SD{seed}-').exists():
+            raise CommandError(f'Sample schools for seed {seed} already exist; pick another --seed')
+
+        workers = options['workers'] or os.cpu_count() or 1
+        if workers > 1 and connections['default'].vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows one writer at a time: using 1 worker'))
+            workers = 1
+
+        start = time.perf_counter()
+        shared = sample_data.create_shared(options['years'], seed, options['books'])
+        weredas = sample_data.create_weredas(schools, seed)
+        self.stdout.write(
+            f"Generating {schools} schools x {options['students_per_school']} students, "
+            f"{len(shared['semesters'])} semesters, {workers} workers (seed {seed})"
+        )
+
+        tasks = [
+            (index, seed, weredas[index // sample_data.SCHOOLS_PER_WEREDA], options['students_per_school'],
+             options['attendance_days'], shared)
+            for index in range(schools)
+        ]
+        totals = Counter()
+        if workers == 1:
+            results = (sample_data.create_school(*task) for task in tasks)
+        else:
+            # Forked workers must not inherit open connections.
+            connections.close_all()
+            pool = Pool(workers)
+            results = pool.imap_unordered(sample_data._create_school, tasks)
+        try:
+            for done, counts in enumerate(results, 1):
+                totals.update(counts)
+                rows = sum(totals.values())
+                self.stdout.write(f'  {done}/{schools} schools, {rows:,} rows, {rows / (time.perf_counter() - start):,.0f} rows/s')
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+
+        reconcile()
+        self.stdout.write(', '.join(f'{name}={count:,}' for name, count in sorted(totals.items())))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(totals.values()):,} rows in {time.perf_counter() - start:.0f}s. '
+            f'Every account uses the password {sample_data.DEFAULT_PASSWORD}. Derived tables are not '
+            'filled: run compute_term_results, build_rollups and build_attendance_bitmaps as needed.'
+        ))
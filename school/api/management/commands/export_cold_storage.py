@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import cold_storage
+
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}'; use YYYY-MM.")
+    if not 1 <= month <= 12:
+        raise CommandError(f"Invalid month '{value}'; use YYYY-MM.")
+    return year, month
+
+
+class Command(BaseCommand):
+    help = (
+        'Export closed months of grades, attendance and borrow records to partitioned '
+        'Parquet files under COLD_STORAGE_DIR. Only months after each dataset\'s '
+        'watermark are written, so it is safe to schedule (e.g. nightly from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset', action='append', choices=sorted(cold_storage.DATASETS),
+            help='Dataset to export (repeatable; default: all)',
+        )
+        parser.add_argument('--through', help='Last month to export, YYYY-MM (default: last closed month)')
+        parser.add_argument('--rebuild', action='store_true', help='Re-export every month from the first record')
+
+    def handle(self, *args, **options):
+        if cold_storage.pa is None:
+            raise CommandError('Cold storage needs pyarrow: pip install pyarrow')
+
+        through = cold_storage.last_closed_month()
+        if options['through']:
+            requested = parse_month(options['through'])
+            if requested > through:
+                raise CommandError(
+                    f"{options['through']} is not closed yet; the last closed month is {through[0]:04d}-{through[1]:02d}."
+                )
+            through = requested
+
+        total = 0
+        for dataset in options['dataset'] or list(cold_storage.DATASETS):
+            exported = cold_storage.export_dataset(dataset, through=through, rebuild=options['rebuild'])
+            if not exported:
+                self.stdout.write(f'  {dataset}: up to date')
+            for (year, month), rows in exported:
+                self.stdout.write(f'  {dataset} {year:04d}-{month:02d}: {rows} rows')
+                total += rows
+
+        self.stdout.write(self.style.SUCCESS(f'Exported {total} rows'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import report_cards
+from api.models import ReportCardBatch
+
+
+class Command(BaseCommand):
+    help = (
+        'Render report card batches into zip files. --pending renders every batch queued '
+        'through /api/report-cards/ (safe to run from cron); --batch re-renders given batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, action='append', help='Batch id to render (repeatable)')
+        parser.add_argument('--pending', action='store_true', help='Render all pending batches')
+        parser.add_argument('--workers', type=int, help='Render processes (default: REPORT_CARD_WORKERS or one per CPU)')
+
+    def handle(self, *args, **options):
+        if options['batch']:
+            batches = list(ReportCardBatch.objects.filter(pk__in=options['batch']).select_related('semester'))
+            missing = set(options['batch']) - {batch.pk for batch in batches}
+            if missing:
+                raise CommandError(f"Unknown batch ids: {', '.join(map(str, sorted(missing)))}")
+        elif options['pending']:
+            batches = report_cards.claim_pending()
+        else:
+            raise CommandError('Pass --pending or --batch ID')
+
+        count = failed = 0
+        for batch in batches:
+            start = time.perf_counter()
+            try:
+                cards = report_cards.generate(batch, workers=options['workers'])
+            except Exception as exc:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  batch {batch.pk}: failed: {exc}'))
+                continue
+            count += 1
+            self.stdout.write(f'  batch {batch.pk}: {cards} cards in {time.perf_counter() - start:.1f}s -> {batch.file.name}')
+
+        if failed:
+            raise CommandError(f'{failed} report card batch(es) failed')
+        self.stdout.write(self.style.SUCCESS(f'Rendered {count} report card batches'))
@@ -0,0 +1,100 @@
+import json
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import loadtest, sample_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server (e.g. runserver or gunicorn on another terminal) with '
+        'role-based traffic from the synthetic users of "create_sample_data --schools": '
+        'attendance_burst (teachers), exam_results (students), report_cards (school managers, '
+        'needs run_workers) or mixed. Reports throughput and latency percentiles per window '
+        'and per request type, and fails when a request type\'s error rate is above --max-error-rate.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(loadtest.SCENARIOS))
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--users', type=int, default=50, help='Virtual users, one thread each')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of traffic')
+        parser.add_argument('--ramp-up', type=float, default=0, help='Seconds over which users start (0: all at once)')
+        parser.add_argument('--think', type=float, default=1.0, help='Mean seconds between a user\'s actions (0: none)')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds per reporting window')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+        parser.add_argument('--sample-seed', type=int, help='Only users created with this create_sample_data --seed')
+        parser.add_argument('--password', default=sample_data.DEFAULT_PASSWORD)
+        parser.add_argument('--date', type=date.fromisoformat, help='Attendance date (default today; earlier days follow)')
+        parser.add_argument('--seed', type=int, default=1, help='Seed for user choice and think times')
+        parser.add_argument('--output', help='Write the full report (per window and per request type) as JSON')
+        parser.add_argument('--max-error-rate', type=float, default=1.0,
+                            help='Fail when a request type has more than this percent of errors (default 1)')
+
+    def handle(self, *args, **options):
+        scenario = loadtest.SCENARIOS[options['scenario']](
+            random.Random(options['seed']), options['sample_seed'], options['date'] or timezone.localdate(),
+        )
+        users = scenario.users(options['users'])
+        if not users:
+            raise CommandError('No synthetic users for this scenario; run "create_sample_data --schools N" first')
+        state = scenario.prepare(users)
+        if len(users) < options['users']:
+            self.stdout.write(self.style.WARNING(f"Only {len(users)} suitable users exist"))
+
+        self.stdout.write(
+            f"{options['scenario']}: {len(users)} users against {options['url']} for {options['duration']:g}s "
+            f"(ramp-up {options['ramp_up']:g}s, think {options['think']:g}s)"
+        )
+        self.stdout.write(f"{'t':>6} {'req/s':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+
+        def on_window(index, summary):
+            self.stdout.write(
+                f"{index * options['interval']:>5g}s {summary['rps']:>8.1f} {summary['errors']:>7} "
+                f"{summary['p50_ms']:>6.0f}ms {summary['p95_ms']:>6.0f}ms {summary['p99_ms']:>6.0f}ms"
+            )
+
+        recorder = loadtest.run(
+            scenario, users, state, options['url'], options['password'], options['duration'],
+            ramp_up=options['ramp_up'], think=options['think'], interval=options['interval'],
+            timeout=options['timeout'], seed=options['seed'], on_window=on_window,
+        )
+        elapsed = time.perf_counter() - recorder.started
+        report = recorder.report(elapsed)
+        if recorder.logged_in == 0:
+            raise CommandError(f"No user could log in at {options['url']}: {report['total']['statuses']}")
+
+        self.stdout.write(f"\n{'request':<30} {'count':>7} {'req/s':>7} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+        for label, summary in report['labels'].items():
+            self.stdout.write(
+                f"{label:<30} {summary['requests']:>7} {summary['rps']:>7.1f} {summary['errors']:>7} "
+                f"{summary['p50_ms']:>6.0f}ms {summary['p95_ms']:>6.0f}ms {summary['p99_ms']:>6.0f}ms  {summary['statuses']}"
+            )
+
+        if options['output']:
+            report['meta'] = {
+                key: options[key] for key in ('scenario', 'url', 'users', 'duration', 'ramp_up', 'think', 'interval', 'seed')
+            }
+            report['meta']['logged_in'] = recorder.logged_in
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        total = report['total']
+        failing = loadtest.over_error_rate(report, options['max_error_rate'])
+        if failing:
+            for label, rate in failing.items():
+                self.stderr.write(f"  {label}: {rate:g}% errors {report['labels'][label]['statuses']}")
+            raise CommandError(
+                f"{len(failing)} request types above {options['max_error_rate']:g}% errors "
+                f"({total['errors']} of {total['requests']} requests failed)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['requests']} requests in {elapsed:.1f}s: {total['rps']} req/s, {total['errors']} errors, "
+            f"p50 {total['p50_ms']:.0f}ms p95 {total['p95_ms']:.0f}ms p99 {total['p99_ms']:.0f}ms "
+            f"({recorder.logged_in} users logged in)"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import School
+from api.sharding import shards, shard_for_school, move_school
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a school's grades and attendance to another academic shard. "
+        "With --all, moves every school's rows to its current placement (use "
+        "once after enabling ACADEMIC_SHARDS to split the default database). "
+        "Run while the school is not recording grades or attendance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school', type=int, help='School id to move')
+        parser.add_argument('--to', help='Target shard alias (default: the school\'s placement)')
+        parser.add_argument('--all', action='store_true', help='Move every school to its placement')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not shards():
+            raise CommandError('ACADEMIC_SHARDS is empty; sharding is disabled.')
+        if options['to'] and options['to'] not in shards():
+            raise CommandError(f"Unknown shard '{options['to']}'. Configured: {', '.join(shards())}")
+
+        if options['all']:
+            school_ids = list(School.objects.order_by('id').values_list('id', flat=True))
+        elif options['school']:
+            if not School.objects.filter(pk=options['school']).exists():
+                raise CommandError(f"School {options['school']} does not exist.")
+            school_ids = [options['school']]
+        else:
+            raise CommandError('Pass --school ID or --all.')
+
+        for school_id in school_ids:
+            target = options['to'] or shard_for_school(school_id)
+            moved = move_school(school_id, target, batch_size=options['batch_size'])
+            summary = ', '.join(f'{count} {name}' for name, count in moved.items())
+            self.stdout.write(f'  school {school_id} -> {target}: {summary}')
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {len(school_ids)} schools'))
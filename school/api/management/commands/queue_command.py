@@ -0,0 +1,24 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import enqueue
+from api.tasks import JOB_COMMANDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue a management command as a background job for run_workers, e.g. '
+        '"queue_command compute_term_results --semester 3". Output is stored in the job result.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(JOB_COMMANDS))
+        parser.add_argument('command_args', nargs=argparse.REMAINDER, metavar='args', help='Arguments passed to the command')
+
+    def handle(self, *args, **options):
+        command_args = options['command_args']
+        if command_args[:1] == ['--']:
+            command_args = command_args[1:]
+        job = enqueue('command', name=options['name'], args=command_args)
+        self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}: {options['name']} {' '.join(command_args)}"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount School and Wereda rollup counters from the source tables and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        schools, weredas = reconcile(dry_run=dry_run)
+
+        for school in schools:
+            self.stdout.write(
+                f'  school {school.pk}: students={school.student_count} teachers={school.teacher_count}'
+            )
+        for wereda in weredas:
+            self.stdout.write(
+                f'  wereda {wereda.pk}: schools={wereda.number_of_schools} '
+                f'students={wereda.number_of_students} teachers={wereda.number_of_teachers}'
+            )
+
+        verb = 'would fix' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled counters: {verb} {len(schools)} schools and {len(weredas)} weredas'
+        ))
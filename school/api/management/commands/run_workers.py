@@ -0,0 +1,58 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import jobs
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def _work(once, poll_interval):
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    return jobs.work(once=once, poll_interval=poll_interval, stop=lambda: _stopping)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background job workers (api.jobs). Each worker process claims queued jobs, '
+        'runs them and retries failures with backoff. SIGTERM lets running jobs finish. '
+        'With --once the workers exit when no job is due, for cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes (default 1)')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue has no due job')
+        parser.add_argument('--poll', type=float, default=None, help='Seconds between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 1:
+            count = _work(options['once'], options['poll'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        # Children must open their own connections, not share the parent's.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_work, args=(options['once'], options['poll']), name=f'job-worker-{i}')
+            for i in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Started {len(processes)} job workers')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+        self.stdout.write(self.style.SUCCESS('Job workers stopped'))
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_school_rollup_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('node_type', models.CharField(choices=[('office', 'Education Office'), ('wereda', 'Wereda'), ('school', 'School'), ('section', 'Section')], max_length=10)),
+                ('node_id', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('attendance_present', models.PositiveIntegerField(default=0)),
+                ('attendance_total', models.PositiveIntegerField(default=0)),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('grade_percent_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['node_type', 'node_id', 'date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section_id', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='educationoffice',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Next office up: zone -> regional -> national', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='api.educationoffice'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sections', to='api.school'),
+        ),
+        migrations.AddField(
+            model_name='wereda',
+            name='education_office',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='weredas', to='api.educationoffice'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['section', 'date'], name='api_attenda_section_0f29e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['section', 'date_recorded'], name='api_grade_section_b7c644_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrollup',
+            index=models.Index(fields=['node_type', 'date'], name='api_dailyro_node_ty_6e442a_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyrollup',
+            unique_together={('node_type', 'node_id', 'date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='rollupdirtyday',
+            unique_together={('section_id', 'date')},
+        ),
+    ]
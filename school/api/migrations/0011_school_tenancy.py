@@ -0,0 +1,214 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:02
+
+import logging
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+# Roles that aren't bound to a school (see api.tenancy)
+OFFICE_ROLES = ('national_office', 'regional_office', 'zone_office', 'wereda_office')
+
+
+def backfill_schools(apps, schema_editor):
+    """
+    Give every existing row the school it belongs to. Until now nothing
+    recorded it, so it is pieced together from the links that do exist:
+
+    1. school managers: the school they manage;
+    2. students, teachers and sections, repeatedly until nothing changes:
+       a section from its advisor, name caller or the students in it; a
+       teacher from their staff profile or the sections they run; a student
+       from the section named by their class_section or their grade and
+       attendance rows;
+    3. when the database holds a single school (or a single managed one),
+       whatever is still unplaced belongs to it;
+    4. grades and attendance: their section's school, else the student's.
+
+    Rows still without a school are invisible to school-bound users, so they
+    are reported rather than left to vanish quietly.
+    """
+    Section = apps.get_model('api', 'Section')
+    Teacher = apps.get_model('api', 'Teacher')
+    StudentProfile = apps.get_model('api', 'StudentProfile')
+    StaffProfile = apps.get_model('api', 'StaffProfile')
+    School = apps.get_model('api', 'School')
+    Grade = apps.get_model('api', 'Grade')
+    Attendance = apps.get_model('api', 'Attendance')
+
+    # School managers: the school they manage.
+    StaffProfile.objects.filter(school__isnull=True, user__role='school').update(school_id=Subquery(
+        School.objects.filter(manager_id=OuterRef('user_id')).order_by('id').values('id')[:1]
+    ))
+
+    section_school = dict(Section.objects.values_list('id', 'school_id'))
+    teacher_school = dict(Teacher.objects.values_list('id', 'school_id'))
+    teacher_user = dict(Teacher.objects.values_list('id', 'user_id'))
+    student_school = dict(StudentProfile.objects.values_list('user_id', 'school_id'))
+    staff_school = dict(StaffProfile.objects.filter(school__isnull=False).values_list('user_id', 'school_id'))
+
+    # Links between sections, teachers and students, both ways
+    teacher_by_user = {user_id: teacher_id for teacher_id, user_id in teacher_user.items()}
+    section_teachers, teacher_sections = defaultdict(set), defaultdict(set)
+    for section_id, advisor_id, name_caller_id in Section.objects.values_list('id', 'advisor_id', 'name_caller_id'):
+        for teacher_id in {teacher_by_user.get(advisor_id), name_caller_id} - {None}:
+            section_teachers[section_id].add(teacher_id)
+            teacher_sections[teacher_id].add(section_id)
+    # class_section is "<class group><section>" ("Grade 10A"), as the roster views match it
+    sections_by_label = defaultdict(set)
+    for section_id, group, name in Section.objects.values_list('id', 'class_group__name', 'name'):
+        sections_by_label[f'{group}{name}'].add(section_id)
+    student_sections = {
+        user_id: set(sections_by_label.get(class_section, ()))
+        for user_id, class_section in StudentProfile.objects.values_list('user_id', 'class_section')
+    }
+    for model in (Grade, Attendance):
+        for user_id, section_id in model.objects.values_list('student_id', 'section_id').distinct():
+            if user_id in student_sections:
+                student_sections[user_id].add(section_id)
+    section_students = defaultdict(set)
+    for user_id, section_ids in student_sections.items():
+        for section_id in section_ids:
+            section_students[section_id].add(user_id)
+
+    def only(school_ids):
+        # A row takes a school only when everything it is linked to agrees
+        school_ids = set(school_ids) - {None}
+        return school_ids.pop() if len(school_ids) == 1 else None
+
+    progress = True
+    while progress:
+        progress = False
+        for teacher_id, school_id in teacher_school.items():
+            if school_id is None:
+                found = staff_school.get(teacher_user[teacher_id]) or only(
+                    section_school.get(section_id) for section_id in teacher_sections[teacher_id]
+                )
+                if found:
+                    teacher_school[teacher_id] = found
+                    progress = True
+        for section_id, school_id in section_school.items():
+            if school_id is None:
+                found = only(
+                    [teacher_school[teacher_id] for teacher_id in section_teachers[section_id]]
+                    + [student_school[user_id] for user_id in section_students[section_id]]
+                )
+                if found:
+                    section_school[section_id] = found
+                    progress = True
+        for user_id, school_id in student_school.items():
+            if school_id is None:
+                found = only(section_school.get(section_id) for section_id in student_sections[user_id])
+                if found:
+                    student_school[user_id] = found
+                    progress = True
+
+    # A single-school database: everything unplaced is that school's.
+    school_ids = list(School.objects.values_list('id', flat=True)[:2])
+    if len(school_ids) != 1:
+        school_ids = list(School.objects.filter(manager__isnull=False).values_list('id', flat=True).distinct()[:2])
+    if len(school_ids) == 1:
+        for placed in (teacher_school, section_school, student_school):
+            for key, school_id in placed.items():
+                if school_id is None:
+                    placed[key] = school_ids[0]
+        StaffProfile.objects.filter(school__isnull=True).exclude(
+            user__role__in=OFFICE_ROLES
+        ).update(school_id=school_ids[0])
+
+    for model, field, placed in (
+        (Teacher, 'pk', teacher_school),
+        (Section, 'pk', section_school),
+        (StudentProfile, 'user_id', student_school),
+    ):
+        by_school = defaultdict(list)
+        for key, school_id in placed.items():
+            if school_id is not None:
+                by_school[school_id].append(key)
+        for school_id, keys in by_school.items():
+            model.objects.filter(school__isnull=True, **{f'{field}__in': keys}).update(school_id=school_id)
+
+    # Grades and attendance: the section's school, else the student's.
+    for model in (Grade, Attendance):
+        model.objects.filter(school__isnull=True).update(school_id=Subquery(
+            Section.objects.filter(pk=OuterRef('section_id')).values('school_id')[:1]
+        ))
+        model.objects.filter(school__isnull=True).update(school_id=Subquery(
+            StudentProfile.objects.filter(user_id=OuterRef('student_id')).values('school_id')[:1]
+        ))
+
+    unplaced = {
+        model._meta.verbose_name_plural: queryset.count()
+        for model, queryset in (
+            (StudentProfile, StudentProfile.objects.filter(school__isnull=True)),
+            (Teacher, Teacher.objects.filter(school__isnull=True)),
+            (StaffProfile, StaffProfile.objects.filter(school__isnull=True).exclude(user__role__in=OFFICE_ROLES)),
+            (Section, Section.objects.filter(school__isnull=True)),
+            (Grade, Grade.objects.filter(school__isnull=True)),
+            (Attendance, Attendance.objects.filter(school__isnull=True)),
+        )
+    }
+    unplaced = {name: count for name, count in unplaced.items() if count}
+    if unplaced:
+        logger.warning(
+            "No school could be worked out for %s. School-bound users won't see these rows "
+            "until a school is set on them (the admin edits all of these models).",
+            ', '.join(f'{count} {name}' for name, count in unplaced.items()),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_hierarchy_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance', to='api.school'),
+        ),
+        migrations.AddField(
+            model_name='grade',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grades', to='api.school'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='staff', to='api.school'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['school', 'date'], name='api_attenda_school__bfc3ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['school', 'semester', 'subject'], name='api_grade_school__956669_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['school', 'date_recorded'], name='api_grade_school__c1b4f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['school', 'class_group'], name='api_section_school__a368c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['school', 'department'], name='api_staffpr_school__064861_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', 'class_section'], name='api_student_school__cd0f71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['school', 'department'], name='api_teacher_school__f7b7b6_idx'),
+        ),
+        migrations.RunPython(backfill_schools, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_school_tenancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolShard',
+            fields=[
+                ('school', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='shard', serialize=False, to='api.school')),
+                ('alias', models.CharField(max_length=50)),
+                ('moved_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='school',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance', to='api.school'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='section',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='api.section'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='student',
+            field=models.ForeignKey(db_constraint=False, limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='subject',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.subject'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='taken_by',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taken_attendance', to='api.teacher'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='school',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grades', to='api.school'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='section',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='api.section'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='semester',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='api.semester'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='student',
+            field=models.ForeignKey(db_constraint=False, limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='subject',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='api.subject'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='teacher',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.teacher'),
+        ),
+    ]
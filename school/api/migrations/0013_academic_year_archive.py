@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_academic_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField()),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent')], max_length=10)),
+                ('academic_year', models.CharField(max_length=9)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('school', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.school')),
+                ('section', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.section')),
+                ('student', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.subject')),
+                ('taken_by', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['academic_year', 'student'], name='api_attenda_academi_53f74c_idx'), models.Index(fields=['academic_year', 'school', 'date'], name='api_attenda_academi_0aa3ce_idx'), models.Index(fields=['section', 'date'], name='api_attenda_section_7e67c5_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField()),
+                ('academic_year', models.CharField(max_length=9)),
+                ('grade_type', models.CharField(choices=[('assignment', 'Assignment'), ('quiz', 'Quiz'), ('midterm', 'Midterm Exam'), ('final', 'Final Exam'), ('project', 'Project')], max_length=20)),
+                ('score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('full_mark', models.DecimalField(decimal_places=2, default=100.0, max_digits=5)),
+                ('date_recorded', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('school', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.school')),
+                ('section', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.section')),
+                ('semester', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.semester')),
+                ('student', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.subject')),
+                ('teacher', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['academic_year', 'student'], name='api_gradear_academi_acf1ce_idx'), models.Index(fields=['academic_year', 'school', 'semester'], name='api_gradear_academi_dfbddc_idx'), models.Index(fields=['section', 'date_recorded'], name='api_gradear_section_d36264_idx')],
+            },
+        ),
+    ]
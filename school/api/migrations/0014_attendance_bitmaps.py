@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_academic_year_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('recorded', models.BinaryField(default=bytes)),
+                ('present', models.BinaryField(default=bytes)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.school')),
+                ('section', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.section')),
+                ('semester', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.semester')),
+                ('student', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'semester'], name='api_attenda_school__37aa96_idx'), models.Index(fields=['section', 'semester'], name='api_attenda_section_33f8ad_idx')],
+                'unique_together': {('student', 'section', 'subject', 'semester')},
+            },
+        ),
+    ]
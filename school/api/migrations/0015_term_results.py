@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_attendance_bitmaps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_type', models.CharField(choices=[('assignment', 'Assignment'), ('quiz', 'Quiz'), ('midterm', 'Midterm Exam'), ('final', 'Final Exam'), ('project', 'Project')], max_length=20)),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('semester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assessment_weights', to='api.semester')),
+                ('subject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assessment_weights', to='api.subject')),
+            ],
+            options={
+                'unique_together': {('subject', 'semester', 'grade_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TermResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('percentage', models.FloatField()),
+                ('letter', models.CharField(max_length=2)),
+                ('grade_points', models.FloatField()),
+                ('credit_hours', models.PositiveIntegerField()),
+                ('assessments', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.school')),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.section')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_results', to='api.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_results', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_results', to='api.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'semester'], name='api_termres_school__8634a8_idx')],
+                'unique_together': {('student', 'subject', 'semester')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gpa', models.FloatField()),
+                ('credit_hours', models.PositiveIntegerField()),
+                ('average_percentage', models.FloatField()),
+                ('subjects', models.PositiveIntegerField()),
+                ('class_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.school')),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.section')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='api.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['section', 'semester', 'gpa'], name='api_termsum_section_50c751_idx'), models.Index(fields=['school', 'semester'], name='api_termsum_school__049887_idx')],
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+    ]
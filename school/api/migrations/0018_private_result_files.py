@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+import api.models
+from django.core.files.storage import storages
+from django.db import migrations, models
+
+
+def move_to_private_storage(apps, schema_editor):
+    """Files written before this migration sit under MEDIA_ROOT, which DEBUG serves publicly."""
+    public, private = storages['default'], storages['private']
+    for model, field in (('Job', 'result_file'), ('ReportCardBatch', 'file')):
+        names = apps.get_model('api', model).objects.exclude(**{field: ''}).values_list(field, flat=True)
+        for name in names:
+            if public.exists(name) and not private.exists(name):
+                with public.open(name) as content:
+                    private.save(name, content)
+                public.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='result_file',
+            field=models.FileField(blank=True, storage=api.models.private_storage, upload_to='jobs/'),
+        ),
+        migrations.AlterField(
+            model_name='reportcardbatch',
+            name='file',
+            field=models.FileField(blank=True, storage=api.models.private_storage, upload_to='report_cards/'),
+        ),
+        migrations.RunPython(move_to_private_storage, migrations.RunPython.noop),
+    ]
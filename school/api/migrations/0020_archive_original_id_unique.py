@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:46
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendancearchive',
+            unique_together={('school', 'original_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='gradearchive',
+            unique_together={('school', 'original_id')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:53
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_archive_original_id_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='result',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+    ]
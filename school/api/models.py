@@ -1,9 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import RegexValidator
+from django.utils import timezone
 import datetime
 datetime.datetime.now()
 
+from . import bitsets
+from .tenancy import SchoolScopedQuerySet
+
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -52,6 +58,43 @@ class User(AbstractUser):
         verbose_name_plural = "Users"
 
 
+class ClaimsUser(User):
+    """
+    User built from signed JWT claims without touching the database.
+    Only id and role are known up front; the first access to any other field
+    loads all remaining fields in a single query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        return super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+
+class RevokedToken(models.Model):
+    """
+    Revoked JWTs. A row with a jti revokes that single token; a row without
+    jti revokes every token of `user` issued before `created_at`.
+    """
+    jti = models.CharField(max_length=255, blank=True, db_index=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="revoked_tokens"
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti or f"all tokens of user {self.user_id}"
+
+
 class StudentProfile(models.Model):
     user = models.OneToOneField(
         User,
@@ -60,6 +103,14 @@ class StudentProfile(models.Model):
         limit_choices_to={'role': 'student'}
     )
 
+    school = models.ForeignKey(
+        'School',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="students"
+    )
+
     admission_no = models.CharField(max_length=20, unique=True)
     student_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
 
@@ -89,6 +140,8 @@ class StudentProfile(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SchoolScopedQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.admission_no} - {self.user.get_full_name()}"
 
@@ -96,6 +149,7 @@ class StudentProfile(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Student Profile"
         verbose_name_plural = "Student Profiles"
+        indexes = [models.Index(fields=['school', 'class_section'])]
 
 
 class StaffProfile(models.Model):
@@ -115,6 +169,14 @@ class StaffProfile(models.Model):
         ]}
     )
 
+    school = models.ForeignKey(
+        'School',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="staff"
+    )
+
     department = models.CharField(max_length=100)
     subject = models.CharField(max_length=100, blank=True, null=True)
     hire_date = models.DateField(blank=True, null=True)
@@ -126,6 +188,8 @@ class StaffProfile(models.Model):
     notes = models.TextField(blank=True, null=True)
     staff_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)  # Phone number field
+
+    objects = SchoolScopedQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.user.get_full_name()} ({self.get_status_display()})"
@@ -134,10 +198,28 @@ class StaffProfile(models.Model):
         ordering = ["user__last_name"]
         verbose_name = "Staff Profile"
         verbose_name_plural = "Staff Profiles"
+        indexes = [models.Index(fields=['school', 'department'])]
 
 
+class RollupCountersMixin:
+    """
+    For models whose counter columns are maintained by api.counters with
+    F() updates: a plain save() of an already loaded row leaves those
+    columns alone instead of writing back a possibly stale copy.
+    """
+    counter_fields = ()
 
-class Wereda(models.Model):
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Wereda(RollupCountersMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('inactive', 'Inactive'),
@@ -146,12 +228,21 @@ class Wereda(models.Model):
     name = models.CharField(max_length=100)
     population = models.PositiveIntegerField()
     area = models.FloatField(help_text="Area in km²")
+    # Maintained by api.counters; run reconcile_rollup_counters to repair drift
     number_of_schools = models.PositiveIntegerField(default=0)
     number_of_students = models.PositiveIntegerField(default=0)
     number_of_teachers = models.PositiveIntegerField(default=0)
     literacy_rate = models.FloatField(help_text="Literacy rate in %")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
 
+    counter_fields = ('number_of_schools', 'number_of_students', 'number_of_teachers')
+
+    education_office = models.ForeignKey(
+        'EducationOffice', on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="weredas"
+    )
+
     # Track the user who added this Wereda
     created_by = models.ForeignKey(
         User, on_delete=models.SET_NULL,
@@ -174,7 +265,7 @@ class Wereda(models.Model):
         return self.name
 
 
-class School(models.Model):
+class School(RollupCountersMixin, models.Model):
     LEVEL_CHOICES = [
         ('Primary', 'Primary'),
         ('Secondary', 'Secondary'),
@@ -199,8 +290,10 @@ class School(models.Model):
     )
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    # Maintained by api.counters; run reconcile_rollup_counters to repair drift
     student_count = models.PositiveIntegerField(default=0)
     teacher_count = models.PositiveIntegerField(default=0)
+    counter_fields = ('student_count', 'teacher_count')
     address = models.TextField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
     email = models.EmailField(blank=True)
@@ -248,6 +341,8 @@ class Semester(models.Model):
     academic_year = models.CharField(max_length=9)  # e.g., "2025/26"
     start_date = models.DateField()
     end_date = models.DateField()
+    # Set when the academic year's grades and attendance were moved to the archive tables
+    archived_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"{self.name} - {self.academic_year}"
@@ -284,6 +379,7 @@ class Student(models.Model):
 
 class Teacher(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, limit_choices_to={'role': 'teacher'})
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='teachers')
     employee_id = models.CharField(max_length=20, unique=True)
     department = models.CharField(max_length=100)
     hire_date = models.DateField()
@@ -291,11 +387,17 @@ class Teacher(models.Model):
     
     subjects = models.ManyToManyField('Subject', related_name='teachers', blank=True)
 
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['school', 'department'])]
+
     def __str__(self):
         return f"{self.user.get_full_name()} ({self.academic_rank})"
 
 class Section(models.Model):
     class_group = models.ForeignKey('ClassGroup', on_delete=models.CASCADE, related_name='sections')
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='sections')
     name = models.CharField(max_length=10)  # e.g., A, B, C
     advisor = models.ForeignKey(
         User,
@@ -314,6 +416,11 @@ class Section(models.Model):
         help_text='Teacher responsible for taking attendance and collecting grades'
     )
 
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['school', 'class_group'])]
+
     def __str__(self):
         return f"{self.class_group.name} - Section {self.name}"
 
@@ -334,9 +441,11 @@ class Schedule(models.Model):
 
 
 class Attendance(models.Model):
-    student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'})
-    section = models.ForeignKey('Section', on_delete=models.CASCADE)
-    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, blank=True, null=True)
+    # Rows may live on an academic shard (api.sharding), so no FK constraints.
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='attendance', db_constraint=False)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'}, db_constraint=False)
+    section = models.ForeignKey('Section', on_delete=models.CASCADE, db_constraint=False)
+    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, blank=True, null=True, db_constraint=False)
     date = models.DateField()
     status = models.CharField(max_length=10, choices=[('present', 'Present'), ('absent', 'Absent')])
 
@@ -344,10 +453,23 @@ class Attendance(models.Model):
         'Teacher',
         on_delete=models.SET_NULL,
         null=True,
-        related_name='taken_attendance'
+        related_name='taken_attendance',
+        db_constraint=False
     )
+
+    objects = SchoolScopedQuerySet.as_manager()
+
     class Meta:
         unique_together = ('student', 'section', 'subject', 'date')
+        indexes = [
+            models.Index(fields=['section', 'date']),
+            models.Index(fields=['school', 'date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.school_id is None and self.section_id:
+            self.school_id = self.section.school_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.date} - {self.status}"
@@ -362,24 +484,332 @@ class Grade(models.Model):
         ('project', 'Project'),
     ]
 
-    student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'})
-    subject = models.ForeignKey('Subject', on_delete=models.CASCADE)
-    section = models.ForeignKey('Section', on_delete=models.CASCADE)
-    teacher = models.ForeignKey('Teacher', on_delete=models.SET_NULL, null=True)
-    semester = models.ForeignKey('Semester', on_delete=models.CASCADE)
+    # Rows may live on an academic shard (api.sharding), so no FK constraints.
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='grades', db_constraint=False)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'}, db_constraint=False)
+    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, db_constraint=False)
+    section = models.ForeignKey('Section', on_delete=models.CASCADE, db_constraint=False)
+    teacher = models.ForeignKey('Teacher', on_delete=models.SET_NULL, null=True, db_constraint=False)
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, db_constraint=False)
     academic_year = models.CharField(max_length=9)  # e.g., "2024/2025"
     grade_type = models.CharField(max_length=20, choices=GRADE_TYPE_CHOICES)
     score = models.DecimalField(max_digits=5, decimal_places=2)  # e.g., 87.50
     full_mark = models.DecimalField(max_digits=5, decimal_places=2, default=100.00)
     date_recorded = models.DateTimeField(auto_now_add=True)
 
+    objects = SchoolScopedQuerySet.as_manager()
+
     class Meta:
         unique_together = ('student', 'subject', 'semester', 'grade_type')
+        indexes = [
+            models.Index(fields=['section', 'date_recorded']),
+            models.Index(fields=['school', 'semester', 'subject']),
+            models.Index(fields=['school', 'date_recorded']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.school_id is None and self.section_id:
+            self.school_id = self.section.school_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.subject.name} - {self.grade_type}: {self.score}"
 
 
+class AssessmentWeight(models.Model):
+    """
+    Weight of a grade_type in a term result. Rows may be scoped to a subject,
+    a semester, both or neither; the most specific set that exists for a
+    subject/semester is used (see api.term_results.weights_for).
+    """
+    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, null=True, blank=True, related_name='assessment_weights')
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, null=True, blank=True, related_name='assessment_weights')
+    grade_type = models.CharField(max_length=20, choices=Grade.GRADE_TYPE_CHOICES)
+    weight = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        unique_together = ('subject', 'semester', 'grade_type')
+
+    def __str__(self):
+        scope = ' / '.join(str(x) for x in (self.subject, self.semester) if x) or 'default'
+        return f"{scope}: {self.grade_type} = {self.weight}"
+
+
+# --------------------------------------
+# ARCHIVED ACADEMIC YEARS (see api.archive)
+# --------------------------------------
+class GradeArchive(models.Model):
+    """Grade of a closed academic year; same fields as Grade so serializers can be shared."""
+    original_id = models.PositiveBigIntegerField()
+    school = models.ForeignKey('School', on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    student = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    subject = models.ForeignKey('Subject', on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    section = models.ForeignKey('Section', on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    teacher = models.ForeignKey('Teacher', on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    semester = models.ForeignKey('Semester', on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    academic_year = models.CharField(max_length=9)
+    grade_type = models.CharField(max_length=20, choices=Grade.GRADE_TYPE_CHOICES)
+    score = models.DecimalField(max_digits=5, decimal_places=2)
+    full_mark = models.DecimalField(max_digits=5, decimal_places=2, default=100.00)
+    date_recorded = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        # One archive row per live row, so a rerun move_school_shard can't copy it twice
+        unique_together = ('school', 'original_id')
+        indexes = [
+            models.Index(fields=['academic_year', 'student']),
+            models.Index(fields=['academic_year', 'school', 'semester']),
+            models.Index(fields=['section', 'date_recorded']),
+        ]
+
+    def __str__(self):
+        return f"[{self.academic_year}] {self.student_id} - {self.subject_id} - {self.grade_type}: {self.score}"
+
+
+class AttendanceArchive(models.Model):
+    """Attendance of a closed academic year; same fields as Attendance plus academic_year."""
+    original_id = models.PositiveBigIntegerField()
+    school = models.ForeignKey('School', on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    student = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    section = models.ForeignKey('Section', on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+    subject = models.ForeignKey('Subject', on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=[('present', 'Present'), ('absent', 'Absent')])
+    taken_by = models.ForeignKey('Teacher', on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    academic_year = models.CharField(max_length=9)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('school', 'original_id')
+        indexes = [
+            models.Index(fields=['academic_year', 'student']),
+            models.Index(fields=['academic_year', 'school', 'date']),
+            models.Index(fields=['section', 'date']),
+        ]
+
+    def __str__(self):
+        return f"[{self.academic_year}] {self.student_id} - {self.date} - {self.status}"
+
+
+class AttendanceBitmap(models.Model):
+    """
+    One student's attendance in a section/subject for a whole semester:
+    bit i of `recorded` / `present` is start_date + i days. Maintained from
+    Attendance by api.attendance_bitmaps when ATTENDANCE_BITMAPS is on.
+    """
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', db_constraint=False)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    section = models.ForeignKey('Section', on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, null=True, blank=True, related_name='+', db_constraint=False)
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    start_date = models.DateField()
+    recorded = models.BinaryField(default=bytes)
+    present = models.BinaryField(default=bytes)
+    # Popcounts of the bitmaps, so term statistics aggregate in SQL
+    total_days = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('student', 'section', 'subject', 'semester')
+        indexes = [
+            models.Index(fields=['school', 'semester']),
+            models.Index(fields=['section', 'semester']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.school_id is None and self.section_id:
+            self.school_id = self.section.school_id
+        self.recorded, self.present = bytes(self.recorded), bytes(self.present)
+        self.total_days = bitsets.popcount(self.recorded)
+        self.present_days = bitsets.popcount(self.present)
+        super().save(*args, **kwargs)
+
+    @property
+    def absent_days(self):
+        return self.total_days - self.present_days
+
+    @property
+    def attendance_percentage(self):
+        return round(self.present_days * 100 / self.total_days, 2) if self.total_days else 0
+
+    def _index(self, day):
+        index = (day - self.start_date).days
+        if index < 0:
+            raise ValueError(f"{day} is before the semester start {self.start_date}")
+        return index
+
+    def mark(self, day, status):
+        """Record `status` ('present'/'absent') for a day; None clears it."""
+        index = self._index(day)
+        self.recorded = bitsets.set_bit(bytes(self.recorded), index, status is not None)
+        self.present = bitsets.set_bit(bytes(self.present), index, status == 'present')
+
+    def status_on(self, day):
+        index = self._index(day)
+        if not bitsets.get_bit(bytes(self.recorded), index):
+            return None
+        return 'present' if bitsets.get_bit(bytes(self.present), index) else 'absent'
+
+    def days(self):
+        """[(date, status)] of every recorded day, in order."""
+        present = set(bitsets.indexes(bytes(self.present)))
+        return [
+            (self.start_date + datetime.timedelta(days=i), 'present' if i in present else 'absent')
+            for i in bitsets.indexes(bytes(self.recorded))
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.semester_id}: {self.present_days}/{self.total_days}"
+
+
+# --------------------------------------
+# TERM RESULTS (see api.term_results)
+# --------------------------------------
+class TermResult(models.Model):
+    """A student's weighted result in one subject for a semester, computed from Grade."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='term_results')
+    subject = models.ForeignKey('Subject', on_delete=models.CASCADE, related_name='term_results')
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, related_name='term_results')
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    section = models.ForeignKey('Section', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    percentage = models.FloatField()
+    letter = models.CharField(max_length=2)
+    grade_points = models.FloatField()
+    credit_hours = models.PositiveIntegerField()
+    assessments = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'subject', 'semester')
+        indexes = [models.Index(fields=['school', 'semester'])]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.subject_id} - {self.semester_id}: {self.percentage:.1f} ({self.letter})"
+
+
+class TermSummary(models.Model):
+    """A student's GPA and class rank for a semester, from their TermResults."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='term_summaries')
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, related_name='term_summaries')
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    section = models.ForeignKey('Section', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    gpa = models.FloatField()
+    credit_hours = models.PositiveIntegerField()
+    average_percentage = models.FloatField()
+    subjects = models.PositiveIntegerField()
+    class_rank = models.PositiveIntegerField(null=True, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'semester')
+        indexes = [
+            models.Index(fields=['section', 'semester', 'gpa']),
+            models.Index(fields=['school', 'semester']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.semester_id}: GPA {self.gpa:.2f}"
+
+
+def private_storage():
+    """STORAGES['private']: files handed out only by authenticated download actions, never under MEDIA_URL."""
+    return storages['private']
+
+
+# --------------------------------------
+# REPORT CARDS (see api.report_cards)
+# --------------------------------------
+class ReportCardBatch(models.Model):
+    """One request to render the report cards of a section (or a whole school) for a semester."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [('html', 'HTML'), ('pdf', 'PDF')]
+
+    semester = models.ForeignKey('Semester', on_delete=models.CASCADE, related_name='report_card_batches')
+    school = models.ForeignKey('School', on_delete=models.CASCADE, null=True, blank=True, related_name='report_card_batches')
+    section = models.ForeignKey('Section', on_delete=models.CASCADE, null=True, blank=True, related_name='report_card_batches')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='report_card_batches')
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='html')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='report_cards/', storage=private_storage, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    @property
+    def progress(self):
+        return round(self.completed * 100 / self.total, 1) if self.total else 0
+
+    def __str__(self):
+        return f"Report cards {self.semester_id}/{self.section_id or self.school_id}: {self.status}"
+
+
+# --------------------------------------
+# BACKGROUND JOBS (see api.jobs)
+# --------------------------------------
+class Job(models.Model):
+    """One run of a registered background task, claimed by `manage.py run_workers`."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    progress = models.FloatField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    result_file = models.FileField(upload_to='jobs/', storage=private_storage, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SchoolScopedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['requested_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}: {self.status}"
+
+
 class Librarian(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, limit_choices_to={'role': 'librarian'})
     employee_id = models.CharField(max_length=20, unique=True)
@@ -681,6 +1111,14 @@ class EducationOffice(models.Model):
     name = models.CharField(max_length=200)
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
     location = models.CharField(max_length=100)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='children',
+        help_text="Next office up: zone -> regional -> national"
+    )
     manager = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -726,6 +1164,78 @@ class Institution(models.Model):
         return f"{self.name} ({self.get_type_display()})"
 
 
+# --------------------------------------
+# HIERARCHY ROLLUPS
+# --------------------------------------
+class DailyRollup(models.Model):
+    """
+    Per-day aggregates for one node of the hierarchy, maintained by
+    api.rollups. Sums are stored rather than averages so parents can be
+    built from their children and any date range can be re-aggregated.
+    """
+    NODE_CHOICES = [
+        ('office', 'Education Office'),
+        ('wereda', 'Wereda'),
+        ('school', 'School'),
+        ('section', 'Section'),
+    ]
+
+    node_type = models.CharField(max_length=10, choices=NODE_CHOICES)
+    node_id = models.PositiveIntegerField()
+    date = models.DateField()
+
+    enrolled = models.PositiveIntegerField(default=0)
+    attendance_present = models.PositiveIntegerField(default=0)
+    attendance_total = models.PositiveIntegerField(default=0)
+    grade_count = models.PositiveIntegerField(default=0)
+    grade_percent_sum = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('node_type', 'node_id', 'date')
+        indexes = [models.Index(fields=['node_type', 'date'])]
+        ordering = ['node_type', 'node_id', 'date']
+
+    @property
+    def attendance_rate(self):
+        if not self.attendance_total:
+            return None
+        return round(self.attendance_present * 100 / self.attendance_total, 2)
+
+    @property
+    def grade_average(self):
+        if not self.grade_count:
+            return None
+        return round(self.grade_percent_sum / self.grade_count, 2)
+
+    def __str__(self):
+        return f"{self.node_type} {self.node_id} @ {self.date}"
+
+
+class RollupDirtyDay(models.Model):
+    """A section/day whose rollups must be rebuilt by the next incremental run."""
+    section_id = models.PositiveIntegerField()
+    date = models.DateField()
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('section_id', 'date')
+
+    def __str__(self):
+        return f"section {self.section_id} @ {self.date}"
+
+
+class SchoolShard(models.Model):
+    """Explicit shard placement of a school's academic records (see api.sharding)."""
+    school = models.OneToOneField('School', on_delete=models.CASCADE, primary_key=True, related_name='shard')
+    alias = models.CharField(max_length=50)
+    moved_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.school_id} -> {self.alias}"
+
+
 # Suggested Models for E-Learning
 from django.contrib.auth import get_user_model
 
@@ -0,0 +1,96 @@
+"""
+Reference data behind the teacher forms: subjects, sections, grade types.
+
+Every grade-entry and attendance form loads these lists, and they change a
+few times a term. They live in the `reference` cache namespace until a
+write makes them stale (the depends() declarations below: a Subject or
+ClassGroup change drops every list, a Section change only its school's)
+and are served with an ETag built from the cache key, which embeds the
+versions. A client revalidating an unchanged list gets a 304 before the
+list is even read from the cache.
+
+Sections are per school (a teacher only sees their own school's); subjects
+are shared by every school, so they are cached once.
+
+Imported from ApiConfig.ready() so that the declarations are in place in
+every process, including management commands that write in bulk.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import Namespace
+from .invalidation import depends
+from .models import ClassGroup, Grade, Section, Subject
+
+REFERENCE_DATA_CACHE_TTL = getattr(settings, 'REFERENCE_DATA_CACHE_TTL', 24 * 3600)
+
+reference = Namespace('reference', timeout=REFERENCE_DATA_CACHE_TTL)
+depends(reference, Subject)
+depends(reference, ClassGroup)
+depends(reference, Section, scope='school_id')
+
+GRADE_TYPES = [{'value': value, 'label': label} for value, label in Grade.GRADE_TYPE_CHOICES]
+
+
+# -----------------------------
+# LOADERS
+# -----------------------------
+def subjects():
+    return list(
+        Subject.objects.order_by('name').values('id', 'name', 'code', 'department', 'level')
+    )
+
+
+def sections(school_id):
+    queryset = Section.objects.for_school(school_id).select_related('class_group').order_by('class_group__name', 'name')
+    return [
+        {
+            "id": section.id,
+            "name": f"{section.class_group.name} - Section {section.name}",
+            "class_group": section.class_group.name,
+            "level": section.class_group.level,
+            "program": section.class_group.academic_program
+        } for section in queryset
+    ]
+
+
+# -----------------------------
+# RESPONSES
+# -----------------------------
+def _etag(value):
+    return quote_etag(hashlib.blake2b(value.encode(), digest_size=16).hexdigest())
+
+
+def _not_modified(request, etag):
+    # Weak comparison: CompressionMiddleware hands out W/ versions of the same tag
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = {tag.removeprefix('W/') for tag in parse_etags(header)}
+    return '*' in etags or etag in etags
+
+
+def respond(request, etag, load):
+    """304 when the client has `etag`, else load() with it; clients revalidate every time."""
+    if _not_modified(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(load())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_response(request, parts, load, scope=None):
+    """respond() for a list cached in the reference namespace."""
+    key = reference.key(parts, scope)
+    return respond(request, _etag(key), lambda: reference.fetch(key, load))
+
+
+GRADE_TYPES_ETAG = _etag(repr(GRADE_TYPES))
@@ -0,0 +1,71 @@
+"""
+orjson-backed JSON renderer and parser for DRF.
+
+The heavy responses (grade_management, my_students, the student list) spend
+much of their time in the stdlib json encoder, calling back into Python for
+every Decimal, date and lazy string. ORJSONRenderer encodes in C instead
+and produces the same JSON as DRF's JSONRenderer: values orjson doesn't
+handle natively, including dates (DRF trims datetimes to milliseconds and
+writes UTC as "Z"), go through DRF's own encoder.
+
+Both classes subclass DRF's JSON classes and negotiate the same media type
+and format, so they replace them in REST_FRAMEWORK (see JSON_BACKEND in
+settings). Without the orjson package, or for output orjson can't produce
+(an indent other than 2, UNICODE_JSON or COMPACT_JSON turned off), they
+fall back to the stdlib implementation. `manage.py benchmark_renderers`
+compares the two on the heaviest responses.
+
+One difference: NaN and Infinity are rendered as null instead of raising.
+"""
+
+import codecs
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def available():
+    return orjson is not None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer output, encoded by orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent not in (None, 2) or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_encoder.default, option=options)
+        # Like JSONRenderer, escape the two characters that are valid JSON but not JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser, decoding UTF-8 bodies with orjson"""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
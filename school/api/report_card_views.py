@@ -0,0 +1,95 @@
+"""
+Report card batches (see api.report_cards).
+
+    POST /api/report-cards/                 {"semester": 3, "section": 12}
+                                            {"semester": 3, "school": 7, "format": "pdf"}
+    GET  /api/report-cards/                 batches of the user's school, newest first
+    GET  /api/report-cards/{id}/            status, total, completed, progress
+    GET  /api/report-cards/{id}/download/   the zip, once status is "done"
+
+Creating a batch queues a report_cards.generate job (see api.jobs) whose
+id comes back as job_id; `manage.py generate_report_cards --pending` still
+renders queued batches from cron.
+"""
+
+from django.http import FileResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from . import report_cards
+from .jobs import enqueue
+from .models import ReportCardBatch, Section, Semester
+from .serializers import ReportCardBatchSerializer
+from .tenancy import SchoolScopedViewSetMixin
+
+REPORT_CARD_ROLES = {
+    'national_office', 'regional_office', 'zone_office', 'wereda_office',
+    'school', 'vice_director', 'department_head', 'record_officer',
+}
+
+
+class IsReportCardIssuer(BasePermission):
+    """School leadership, record officers and education offices issue report cards"""
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.role in REPORT_CARD_ROLES or user.is_superuser)
+
+
+class ReportCardViewSet(
+    SchoolScopedViewSetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = ReportCardBatch.objects.select_related('section__class_group')
+    serializer_class = ReportCardBatchSerializer
+    permission_classes = [IsAuthenticated, IsReportCardIssuer]
+
+    def create(self, request, *args, **kwargs):
+        semester_id = str(request.data.get('semester', ''))
+        section_id = str(request.data.get('section') or '')
+        school_id = str(request.data.get('school') or '')
+        fmt = request.data.get('format', 'html')
+
+        if not semester_id.isdigit() or not Semester.objects.filter(pk=semester_id).exists():
+            return Response({"error": "A valid semester is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if fmt not in dict(ReportCardBatch.FORMAT_CHOICES):
+            return Response({"error": "format must be html or pdf"}, status=status.HTTP_400_BAD_REQUEST)
+        if fmt == 'pdf' and not report_cards.pdf_available():
+            return Response({"error": "PDF report cards are not available on this server"}, status=503)
+
+        sections = Section.objects.for_user(request.user)
+        if section_id.isdigit():
+            section = sections.filter(pk=section_id).first()
+            if section is None:
+                return Response({"error": "Section not found"}, status=status.HTTP_404_NOT_FOUND)
+            school_id = section.school_id
+        elif school_id.isdigit():
+            section = None
+            if not sections.filter(school_id=school_id).exists():
+                return Response({"error": "School not found or has no sections"}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            return Response({"error": "section or school is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = ReportCardBatch.objects.create(
+            semester_id=int(semester_id), section=section, school_id=int(school_id) if school_id else None,
+            requested_by=request.user, format=fmt,
+        )
+        job = enqueue('report_cards.generate', user=request.user, school_id=batch.school_id, batch_id=batch.pk)
+        return Response({**self.get_serializer(batch).data, 'job_id': job.pk}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        batch = self.get_object()
+        if batch.status != 'done' or not batch.file:
+            return Response(
+                {"error": f"Report cards are not ready (status: {batch.status})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return FileResponse(
+            batch.file.open('rb'), as_attachment=True,
+            filename=f'report_cards_{batch.semester_id}_{batch.section_id or batch.school_id}.zip',
+        )
@@ -0,0 +1,258 @@
+"""
+Batch report cards.
+
+A ReportCardBatch asks for the cards of one section, or of every section of
+a school, for a semester. generate() runs it in three steps:
+
+1. collect() loads everything the cards show in a fixed number of queries
+   whatever the number of students: the grades (one values() query per
+   academic database), TermResult and TermSummary, attendance totals
+   (AttendanceBitmap when ATTENDANCE_BITMAPS is on), users, profiles and
+   subjects. Each card becomes a plain dict, so it pickles cheaply.
+2. The cards are rendered (templates/report_cards/card.html, or PDF through
+   WeasyPrint) in a process pool of REPORT_CARD_WORKERS processes, which
+   never touch the database.
+3. The rendered files stream into one zip, saved to private storage as the
+   batch's file (only the download action serves it); `completed` is
+   written every PROGRESS_EVERY cards so the API can show progress.
+
+PDF needs weasyprint (optional): pip install weasyprint. HTML cards need
+nothing beyond Django.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import slugify
+
+try:
+    from weasyprint import HTML
+except ImportError:  # pragma: no cover - optional dependency
+    HTML = None
+
+from . import attendance_bitmaps
+from .archive import attendance_for, grades_for
+from .models import (
+    AttendanceBitmap, Grade, ReportCardBatch, Section, StudentProfile, Subject, TermResult, TermSummary, User,
+)
+from .sharding import across_shards
+
+PROGRESS_EVERY = 50
+GRADE_TYPES = [choice for choice, _ in Grade.GRADE_TYPE_CHOICES]
+
+
+def pdf_available():
+    return HTML is not None
+
+
+def default_workers():
+    return getattr(settings, 'REPORT_CARD_WORKERS', None) or os.cpu_count() or 1
+
+
+# -----------------------------
+# COLLECTING
+# -----------------------------
+def _grades(semester, section_ids):
+    """{student_id: {subject_id: {grade_type: [score, full_mark]}}} and each student's section."""
+    grades = grades_for(semester.academic_year).filter(semester_id=semester.pk, section_id__in=section_ids)
+    scores = defaultdict(lambda: defaultdict(dict))
+    student_sections = {}
+    for queryset in across_shards(grades):
+        for student_id, section_id, subject_id, grade_type, score, full_mark in queryset.order_by().values_list(
+            'student_id', 'section_id', 'subject_id', 'grade_type', 'score', 'full_mark',
+        ):
+            totals = scores[student_id][subject_id].setdefault(grade_type, [0, 0])
+            totals[0] += score
+            totals[1] += full_mark
+            student_sections.setdefault(student_id, section_id)
+    return scores, student_sections
+
+
+def _attendance(semester, section_ids):
+    """{student_id: term statistics} over the sections of the batch."""
+    if attendance_bitmaps.enabled():
+        return attendance_bitmaps.by_student(
+            AttendanceBitmap.objects.filter(semester_id=semester.pk, section_id__in=section_ids)
+        )
+    attendance = attendance_for(semester.academic_year).filter(
+        section_id__in=section_ids, date__gte=semester.start_date, date__lte=semester.end_date,
+    )
+    totals = defaultdict(lambda: [0, 0])
+    for queryset in across_shards(attendance):
+        for row in queryset.order_by().values('student_id').annotate(
+            total=Count('id'), present=Count('id', filter=Q(status='present')),
+        ):
+            totals[row['student_id']][0] += row['total']
+            totals[row['student_id']][1] += row['present']
+    return {student_id: attendance_bitmaps._stats(*counts) for student_id, counts in totals.items()}
+
+
+def collect(semester, section_ids):
+    """Card dicts (picklable, no model instances) of every graded student of the sections, by section and name."""
+    sections = {
+        section.pk: section
+        for section in Section.objects.filter(pk__in=section_ids).select_related('class_group', 'school')
+    }
+    scores, student_sections = _grades(semester, list(sections))
+    student_ids = list(scores)
+
+    results = defaultdict(dict)
+    for row in TermResult.objects.filter(semester=semester, student_id__in=student_ids).values(
+        'student_id', 'subject_id', 'percentage', 'letter', 'grade_points',
+    ):
+        results[row['student_id']][row['subject_id']] = row
+    summaries = {
+        row['student_id']: row
+        for row in TermSummary.objects.filter(semester=semester, student_id__in=student_ids).values(
+            'student_id', 'gpa', 'credit_hours', 'average_percentage', 'class_rank',
+        )
+    }
+    class_sizes = dict(
+        TermSummary.objects.filter(semester=semester, section_id__in=list(sections))
+        .values('section_id').annotate(n=Count('id')).values_list('section_id', 'n')
+    )
+    attendance = _attendance(semester, list(sections))
+    users = {row['id']: row for row in User.objects.filter(pk__in=student_ids).values('id', 'first_name', 'last_name')}
+    profiles = {
+        row['user_id']: row
+        for row in StudentProfile.objects.filter(user_id__in=student_ids).values(
+            'user_id', 'admission_no', 'student_id', 'gender', 'extra_activities', 'remarks',
+        )
+    }
+    subjects = {
+        row['id']: row
+        for row in Subject.objects.filter(
+            pk__in={subject_id for per_student in scores.values() for subject_id in per_student}
+        ).values('id', 'name', 'code', 'credit_hours')
+    }
+
+    generated_at = timezone.now().strftime('%Y-%m-%d %H:%M')
+    cards = []
+    for student_id, per_subject in scores.items():
+        section = sections[student_sections[student_id]]
+        user = users.get(student_id, {'first_name': '', 'last_name': str(student_id)})
+        profile = profiles.get(student_id, {})
+        summary = summaries.get(student_id, {})
+        rows = []
+        for subject_id, types in sorted(per_subject.items(), key=lambda item: subjects[item[0]]['name']):
+            result = results[student_id].get(subject_id, {})
+            rows.append({
+                'name': subjects[subject_id]['name'],
+                'code': subjects[subject_id]['code'],
+                'credit_hours': subjects[subject_id]['credit_hours'],
+                'assessments': [
+                    f'{float(types[t][0]):g}/{float(types[t][1]):g}' if t in types else '-' for t in GRADE_TYPES
+                ],
+                'percentage': result.get('percentage'),
+                'letter': result.get('letter', '-'),
+            })
+        cards.append({
+            'student_id': student_id,
+            'name': f"{user['first_name']} {user['last_name']}".strip(),
+            'admission_no': profile.get('admission_no') or '',
+            'student_number': profile.get('student_id') or '',
+            'gender': profile.get('gender') or '',
+            'school': section.school.name if section.school else '',
+            'section': f'{section.class_group.name} {section.name}',
+            'semester': f'{semester.name} {semester.academic_year}',
+            'grade_types': [label for _, label in Grade.GRADE_TYPE_CHOICES],
+            'subjects': rows,
+            'gpa': summary.get('gpa'),
+            'credit_hours': summary.get('credit_hours'),
+            'average_percentage': summary.get('average_percentage'),
+            'class_rank': summary.get('class_rank'),
+            'class_size': class_sizes.get(section.pk),
+            'attendance': attendance.get(student_id, attendance_bitmaps._stats(0, 0)),
+            'extra_activities': profile.get('extra_activities') or '',
+            'remarks': profile.get('remarks') or '',
+            'generated_at': generated_at,
+        })
+    cards.sort(key=lambda card: (card['section'], card['name'], card['student_id']))
+    return cards
+
+
+# -----------------------------
+# RENDERING
+# -----------------------------
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def render_card(card, fmt='html'):
+    """(path inside the zip, file content) of one card; runs in the worker processes."""
+    html = render_to_string('report_cards/card.html', {'card': card})
+    number = card['admission_no'] or card['student_id']
+    name = f"{slugify(card['section'])}/{number}-{slugify(card['name'])}.{fmt}"
+    if fmt == 'pdf':
+        return name, HTML(string=html).write_pdf()
+    return name, html.encode('utf-8')
+
+
+def render_all(cards, fmt='html', workers=None):
+    """Yield rendered cards in order, in a process pool unless one worker is enough."""
+    workers = min(workers or default_workers(), max(len(cards), 1))
+    if workers <= 1:
+        yield from map(render_card, cards, repeat(fmt))
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(render_card, cards, repeat(fmt), chunksize=max(1, len(cards) // (workers * 4)))
+
+
+# -----------------------------
+# BATCHES
+# -----------------------------
+def section_ids_for(batch):
+    if batch.section_id:
+        return [batch.section_id]
+    return list(Section.objects.filter(school_id=batch.school_id).values_list('id', flat=True))
+
+
+def generate(batch, workers=None, progress=None):
+    """Render a batch into its zip file; `progress(done, total)` follows it. Returns the number of cards."""
+    if batch.format == 'pdf' and not pdf_available():
+        raise ImportError('PDF report cards need weasyprint: pip install weasyprint')
+    batches = ReportCardBatch.objects.filter(pk=batch.pk)
+    batch.status, batch.started_at, batch.completed, batch.error = 'running', timezone.now(), 0, ''
+    batch.save(update_fields=['status', 'started_at', 'completed', 'error'])
+    try:
+        cards = collect(batch.semester, section_ids_for(batch))
+        batch.total = len(cards)
+        batches.update(total=batch.total)
+        with tempfile.TemporaryFile() as tmp:
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for done, (name, content) in enumerate(render_all(cards, batch.format, workers), 1):
+                    archive.writestr(name, content)
+                    if done % PROGRESS_EVERY == 0:
+                        batches.update(completed=done)
+                        if progress is not None:
+                            progress(done, batch.total)
+            tmp.seek(0)
+            if batch.file:
+                batch.file.delete(save=False)
+            batch.file.save(f'batch_{batch.pk}.zip', File(tmp), save=False)
+    except Exception as exc:
+        batch.status, batch.error, batch.finished_at = 'failed', str(exc), timezone.now()
+        batch.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+    batch.status, batch.completed, batch.finished_at = 'done', batch.total, timezone.now()
+    batch.save(update_fields=['status', 'total', 'completed', 'file', 'finished_at'])
+    return batch.total
+
+
+def claim_pending():
+    """Pending batches, oldest first, each marked running by exactly one caller."""
+    for batch_id in ReportCardBatch.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True):
+        if ReportCardBatch.objects.filter(pk=batch_id, status='pending').update(status='running'):
+            yield ReportCardBatch.objects.select_related('semester').get(pk=batch_id)
@@ -0,0 +1,151 @@
+"""
+Rollup drill-down API.
+
+Reads only DailyRollup rows (see api.rollups), never Attendance or Grade:
+
+    GET /api/rollups/                                   top-level offices/weredas
+    GET /api/rollups/drilldown/?node_type=wereda&node_id=3
+    GET /api/rollups/series/?node_type=school&node_id=7
+
+All endpoints take optional start/end dates (YYYY-MM-DD); the default is
+the last seven days ending today.
+
+National offices (and superusers) see the whole tree. Everyone else sees
+the nodes they run and what is below them: the offices they manage, the
+weredas they manage, or their own school. The list starts at those nodes,
+and any other node_id answers 404.
+"""
+
+from datetime import date, timedelta
+
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from . import rollups
+from .models import EducationOffice, Wereda
+from .tenancy import user_school_id
+
+DASHBOARD_ROLES = {
+    'national_office', 'regional_office', 'zone_office', 'wereda_office',
+    'school', 'vice_director', 'department_head', 'senate',
+}
+
+
+class IsHierarchyViewer(BasePermission):
+    """Education offices and school leadership can read rollups"""
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.role in DASHBOARD_ROLES or user.is_superuser)
+
+
+class RollupViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated, IsHierarchyViewer]
+
+    def _date_range(self, request):
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=6)
+        except ValueError:
+            return None
+        return (start, end) if start <= end else None
+
+    def _node(self, request):
+        node_type = request.query_params.get('node_type')
+        node_id = request.query_params.get('node_id')
+        if node_type not in rollups.HIERARCHY or not str(node_id).isdigit():
+            return None
+        return node_type, int(node_id)
+
+    def _roots(self, user):
+        """{(node_type, id)} the user may read, with everything below them; None for the whole tree."""
+        if user.is_superuser or user.role == 'national_office':
+            return None
+        if user.role in ('regional_office', 'zone_office'):
+            return {('office', pk) for pk in EducationOffice.objects.filter(manager_id=user.pk).values_list('id', flat=True)}
+        if user.role == 'wereda_office':
+            return {('wereda', pk) for pk in Wereda.objects.filter(manager_id=user.pk).values_list('id', flat=True)}
+        school_id = user_school_id(user)
+        return {('school', school_id)} if school_id is not None else set()
+
+    def _can_read(self, user, node_type, node_id):
+        roots = self._roots(user)
+        return roots is None or bool(roots & rollups.ancestors(node_type, node_id))
+
+    def _children(self, node_type, node_id, start, end, nodes=None):
+        children = []
+        for child_type, ids in nodes if nodes is not None else rollups.children_of(node_type, node_id):
+            ids = list(ids)
+            names = rollups.node_names(child_type, ids)
+            summaries = rollups.summarize(child_type, ids, start, end)
+            for child_id in ids:
+                children.append({
+                    "node_type": child_type,
+                    "node_id": child_id,
+                    "name": names.get(child_id),
+                    **summaries.get(child_id, {}),
+                })
+        return children
+
+    def list(self, request):
+        """Top of the tree: offices without a parent and weredas without an office, or the user's own nodes"""
+        dates = self._date_range(request)
+        if dates is None:
+            return Response({"error": "Invalid start/end date"}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = dates
+        roots = self._roots(request.user)
+        nodes = None
+        if roots is not None:
+            by_type = {}
+            for node_type, node_id in sorted(roots):
+                by_type.setdefault(node_type, []).append(node_id)
+            nodes = list(by_type.items())
+        return Response({
+            "start": start,
+            "end": end,
+            "children": self._children(None, None, start, end, nodes),
+        })
+
+    @action(detail=False, methods=['get'])
+    def drilldown(self, request):
+        """One node's totals for the range plus the totals of each child node"""
+        node = self._node(request)
+        dates = self._date_range(request)
+        if node is None:
+            return Response({"error": "node_type and node_id are required"}, status=status.HTTP_400_BAD_REQUEST)
+        if dates is None:
+            return Response({"error": "Invalid start/end date"}, status=status.HTTP_400_BAD_REQUEST)
+        (node_type, node_id), (start, end) = node, dates
+        if not self._can_read(request.user, node_type, node_id):
+            return Response({"error": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "node_type": node_type,
+            "node_id": node_id,
+            "name": rollups.node_names(node_type, [node_id]).get(node_id),
+            "start": start,
+            "end": end,
+            "summary": rollups.summarize(node_type, [node_id], start, end).get(node_id),
+            "children": self._children(node_type, node_id, start, end),
+        })
+
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """Day-by-day rollups of one node"""
+        node = self._node(request)
+        dates = self._date_range(request)
+        if node is None:
+            return Response({"error": "node_type and node_id are required"}, status=status.HTTP_400_BAD_REQUEST)
+        if dates is None:
+            return Response({"error": "Invalid start/end date"}, status=status.HTTP_400_BAD_REQUEST)
+        (node_type, node_id), (start, end) = node, dates
+        if not self._can_read(request.user, node_type, node_id):
+            return Response({"error": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "node_type": node_type,
+            "node_id": node_id,
+            "days": rollups.series(node_type, node_id, start, end),
+        })
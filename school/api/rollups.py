@@ -0,0 +1,289 @@
+"""
+Hierarchy rollups: EducationOffice -> Wereda -> School -> Section.
+
+DailyRollup keeps one row per node per day with enrollment, attendance and
+grade sums, so dashboards answer "average attendance per wereda this week"
+from a few hundred rollup rows instead of scanning Attendance and Grade.
+
+Rows are kept current in two ways:
+- Incrementally: saving or deleting an Attendance/Grade marks its
+  section/day dirty (RollupDirtyDay); `manage.py build_rollups` rebuilds
+  just those sections and then every ancestor for the affected days.
+- Nightly: `manage.py build_rollups --days N` rebuilds the last N days from
+  scratch, which also picks up re-parented sections/schools/weredas and
+  writes that bypassed signals.
+
+Enrollment is the number of students on the section's roster that day
+(distinct students with attendance) at section level, and the registered
+student counters (School.student_count / Wereda.number_of_students) above.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    Attendance, Grade, AttendanceArchive, GradeArchive,
+    Section, School, Wereda, EducationOffice, DailyRollup, RollupDirtyDay,
+)
+from .sharding import across_shards
+
+SUM_FIELDS = ('enrolled', 'attendance_present', 'attendance_total', 'grade_count', 'grade_percent_sum')
+
+# node_type -> (model, child node_type, FK on the child model pointing up)
+HIERARCHY = {
+    'office': (EducationOffice, 'wereda', 'education_office'),
+    'wereda': (Wereda, 'school', 'wereda'),
+    'school': (School, 'section', 'school'),
+    'section': (Section, None, None),
+}
+
+
+def _empty():
+    return dict.fromkeys(SUM_FIELDS, 0)
+
+
+def _add(target, row):
+    for field in SUM_FIELDS:
+        target[field] += row[field]
+
+
+# -----------------------------
+# DIRTY MARKING
+# -----------------------------
+def mark_dirty(section_id, day):
+    """Queue a section/day for the next incremental build (idempotent)."""
+    if section_id and day:
+        RollupDirtyDay.objects.bulk_create(
+            [RollupDirtyDay(section_id=section_id, date=day)], ignore_conflicts=True
+        )
+
+
+# -----------------------------
+# BUILDING
+# -----------------------------
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _section_rows(day, section_ids=None):
+    """
+    Aggregate raw Attendance/Grade rows of one day per section, on every
+    shard and in the live or archive tables, whichever hold that day.
+    """
+    start, end = _day_bounds(day)
+    attendance_sets, grade_sets = [], []
+    for attendance_model, grade_model in ((Attendance, Grade), (AttendanceArchive, GradeArchive)):
+        attendance = attendance_model.objects.filter(date=day)
+        grades = grade_model.objects.filter(date_recorded__gte=start, date_recorded__lt=end, full_mark__gt=0)
+        if section_ids is not None:
+            attendance = attendance.filter(section_id__in=section_ids)
+            grades = grades.filter(section_id__in=section_ids)
+        attendance_sets.extend(across_shards(attendance))
+        grade_sets.extend(across_shards(grades))
+
+    rows = defaultdict(_empty)
+    for shard_attendance in attendance_sets:
+        for r in shard_attendance.values('section_id').annotate(
+            present=Count('id', filter=Q(status='present')),
+            total=Count('id'),
+            students=Count('student', distinct=True),
+        ):
+            row = rows[r['section_id']]
+            row['attendance_present'] += r['present']
+            row['attendance_total'] += r['total']
+            row['enrolled'] += r['students']
+
+    percent = ExpressionWrapper(F('score') * 100.0 / F('full_mark'), output_field=FloatField())
+    for shard_grades in grade_sets:
+        for r in shard_grades.values('section_id').annotate(n=Count('id'), pct=Sum(percent)):
+            row = rows[r['section_id']]
+            row['grade_count'] += r['n']
+            row['grade_percent_sum'] += r['pct'] or 0
+    return rows
+
+
+def _save(node_type, day, rows, only_ids=None):
+    """Replace the node_type rollups of `day` (restricted to only_ids) with `rows`."""
+    stale = DailyRollup.objects.filter(node_type=node_type, date=day).exclude(node_id__in=list(rows))
+    if only_ids is not None:
+        stale = stale.filter(node_id__in=only_ids)
+    stale.delete()
+    DailyRollup.objects.bulk_create(
+        [DailyRollup(node_type=node_type, node_id=node_id, date=day, **values) for node_id, values in rows.items()],
+        update_conflicts=True,
+        unique_fields=['node_type', 'node_id', 'date'],
+        update_fields=list(SUM_FIELDS) + ['updated_at'],
+        batch_size=500,
+    )
+
+
+def _roll_up(child_rows, parent_of):
+    """Sum child rows into their parents; children without a parent are dropped."""
+    rows = defaultdict(_empty)
+    for child_id, row in child_rows.items():
+        parent_id = parent_of.get(child_id)
+        if parent_id:
+            _add(rows[parent_id], row)
+    return rows
+
+
+def _office_rows(wereda_rows):
+    """Weredas roll into their office and every office above it."""
+    parents = dict(EducationOffice.objects.values_list('id', 'parent_id'))
+    office_of = dict(Wereda.objects.filter(pk__in=list(wereda_rows)).values_list('id', 'education_office_id'))
+    rows = defaultdict(_empty)
+    for wereda_id, row in wereda_rows.items():
+        office_id, seen = office_of.get(wereda_id), set()
+        while office_id and office_id not in seen:
+            seen.add(office_id)
+            _add(rows[office_id], row)
+            office_id = parents.get(office_id)
+    return rows
+
+
+def rebuild_day(day, section_ids=None):
+    """
+    Rebuild the rollups of one day. With section_ids only those sections are
+    re-aggregated from raw rows; every level above is rebuilt from the
+    section rollups either way.
+    """
+    with transaction.atomic():
+        _save('section', day, _section_rows(day, section_ids), only_ids=section_ids)
+
+        sections = {
+            r['node_id']: r for r in
+            DailyRollup.objects.filter(node_type='section', date=day).values('node_id', *SUM_FIELDS)
+        }
+        school_rows = _roll_up(sections, dict(Section.objects.filter(pk__in=list(sections)).values_list('id', 'school_id')))
+        for school_id, students in School.objects.filter(pk__in=list(school_rows)).values_list('id', 'student_count'):
+            school_rows[school_id]['enrolled'] = students
+        _save('school', day, school_rows)
+
+        wereda_rows = _roll_up(school_rows, dict(School.objects.filter(pk__in=list(school_rows)).values_list('id', 'wereda_id')))
+        for wereda_id, students in Wereda.objects.filter(pk__in=list(wereda_rows)).values_list('id', 'number_of_students'):
+            wereda_rows[wereda_id]['enrolled'] = students
+        _save('wereda', day, wereda_rows)
+
+        _save('office', day, _office_rows(wereda_rows))
+
+
+def rebuild_range(start, end):
+    """Full rebuild of every day in [start, end]; returns the number of days."""
+    day, days = start, 0
+    while day <= end:
+        with transaction.atomic():
+            RollupDirtyDay.objects.filter(date=day).delete()
+            rebuild_day(day)
+        day += timedelta(days=1)
+        days += 1
+    return days
+
+
+def process_dirty(limit=None):
+    """Rebuild the section/days marked dirty; returns the number of marks processed."""
+    marks = RollupDirtyDay.objects.order_by('date', 'section_id').values_list('id', 'section_id', 'date')
+    if limit:
+        marks = marks[:limit]
+    by_day = defaultdict(dict)
+    for mark_id, section_id, day in marks:
+        by_day[day][mark_id] = section_id
+
+    for day, day_marks in sorted(by_day.items()):
+        # Claim the marks in the same transaction as the rebuild: writes that
+        # land after this point mark the day again for the next run.
+        with transaction.atomic():
+            RollupDirtyDay.objects.filter(pk__in=list(day_marks)).delete()
+            rebuild_day(day, section_ids=sorted(set(day_marks.values())))
+    return sum(len(m) for m in by_day.values())
+
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def children_of(node_type, node_id):
+    """[(child_type, queryset of ids)] directly below a node; offices have offices and weredas."""
+    if node_type is None:
+        return [
+            ('office', EducationOffice.objects.filter(parent__isnull=True).values_list('id', flat=True)),
+            ('wereda', Wereda.objects.filter(education_office__isnull=True).values_list('id', flat=True)),
+        ]
+    model, child_type, fk = HIERARCHY[node_type]
+    if child_type is None:
+        return []
+    children = [(child_type, HIERARCHY[child_type][0].objects.filter(**{fk: node_id}).values_list('id', flat=True))]
+    if node_type == 'office':
+        children.insert(0, ('office', EducationOffice.objects.filter(parent_id=node_id).values_list('id', flat=True)))
+    return children
+
+
+def ancestors(node_type, node_id):
+    """{(node_type, id)} of the node and every node above it."""
+    chain = {(node_type, node_id)}
+    parents = [('section', Section, 'school', 'school_id'), ('school', School, 'wereda', 'wereda_id'),
+               ('wereda', Wereda, 'office', 'education_office_id')]
+    for child_type, model, parent_type, fk in parents:
+        if node_type != child_type:
+            continue
+        node_id = model.objects.filter(pk=node_id).values_list(fk, flat=True).first()
+        if node_id is None:
+            return chain
+        node_type = parent_type
+        chain.add((node_type, node_id))
+    if node_type == 'office':
+        office_parents = dict(EducationOffice.objects.values_list('id', 'parent_id'))
+        while (node_id := office_parents.get(node_id)) and ('office', node_id) not in chain:
+            chain.add(('office', node_id))
+    return chain
+
+
+def node_names(node_type, ids):
+    model = HIERARCHY[node_type][0]
+    if model is Section:
+        return {s.pk: str(s) for s in Section.objects.filter(pk__in=ids).select_related('class_group')}
+    return dict(model.objects.filter(pk__in=ids).values_list('id', 'name'))
+
+
+def summarize(node_type, ids, start, end):
+    """
+    Aggregate each node's rollups over [start, end]:
+    {node_id: {enrolled, attendance_rate, grade_average, ...}}.
+    """
+    rows = (
+        DailyRollup.objects
+        .filter(node_type=node_type, node_id__in=ids, date__gte=start, date__lte=end)
+        .values('node_id')
+        .annotate(
+            enrolled=Max('enrolled'),
+            attendance_present=Sum('attendance_present'),
+            attendance_total=Sum('attendance_total'),
+            grade_count=Sum('grade_count'),
+            grade_percent_sum=Sum('grade_percent_sum'),
+            days=Count('id'),
+        )
+    )
+    return {r['node_id']: _with_rates(r) for r in rows}
+
+
+def series(node_type, node_id, start, end):
+    """Day-by-day rollups of one node."""
+    rows = (
+        DailyRollup.objects
+        .filter(node_type=node_type, node_id=node_id, date__gte=start, date__lte=end)
+        .order_by('date')
+        .values('date', *SUM_FIELDS)
+    )
+    return [_with_rates(r) for r in rows]
+
+
+def _with_rates(row):
+    row = dict(row)
+    row.pop('node_id', None)
+    total, count = row['attendance_total'], row['grade_count']
+    row['attendance_rate'] = round(row['attendance_present'] * 100 / total, 2) if total else None
+    row['grade_average'] = round(row.pop('grade_percent_sum') / count, 2) if count else None
+    return row
@@ -0,0 +1,317 @@
+"""
+Synthetic data at production scale, for reproducing performance problems.
+
+    manage.py create_sample_data --schools 200 --students-per-school 800 --years 3 --seed 7
+
+builds the whole hierarchy: weredas (10 schools each) with their office
+managers, schools with a manager, teachers, sections per class group,
+weekly schedules, students, and for every academic year two semesters of
+grades (one per subject and grade type), daily attendance, library loans
+and announcements. Subjects, class groups, rooms, semesters and the book
+catalogue are shared and created first.
+
+Each school is generated independently from its own Random seeded with
+(seed, school index), so the same arguments give the same data whatever
+the number of worker processes, and schools are spread over a process
+pool. Rows are written with chunked bulk_create (CHUNK_SIZE), grades and
+attendance to the school's shard when sharding is on. bulk_create skips
+signals: bulk_create() below reports the rows to api.invalidation, rollup
+counters are reconciled at the end; term results, attendance bitmaps and
+rollups are rebuilt with their own commands.
+
+Rough size per school and year: students * 6 subjects * 10 grades plus
+students * 2 * attendance_days attendance rows, i.e. 100 schools x 1000
+students x 3 years is ~18M grades and ~24M attendance rows.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import invalidation
+from .models import (
+    Announcement, Attendance, Book, BorrowRecord, ClassGroup, Grade, Room, Schedule, School,
+    Section, Semester, StudentProfile, Subject, Teacher, User, Wereda,
+)
+from .sharding import shard_for_school, sharding_enabled
+
+CHUNK_SIZE = 5000
+SCHOOLS_PER_WEREDA = 10
+STUDENTS_PER_SECTION = 40
+STUDENTS_PER_TEACHER = 30
+SUBJECTS_PER_SECTION = 6
+DEFAULT_PASSWORD = 'Sample#123'
+
+SUBJECTS = [
+    ('Mathematics', 'MATH', 4), ('English', 'ENG', 3), ('Amharic', 'AMH', 3), ('Physics', 'PHY', 3),
+    ('Chemistry', 'CHEM', 3), ('Biology', 'BIO', 3), ('Geography', 'GEO', 2), ('History', 'HIST', 2),
+    ('Civics', 'CIV', 2), ('ICT', 'ICT', 2),
+]
+CLASS_GROUPS = ['Grade 9', 'Grade 10', 'Grade 11', 'Grade 12']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+FIRST_NAMES = [
+    'Abebe', 'Almaz', 'Bekele', 'Chaltu', 'Dawit', 'Eden', 'Fikir', 'Genet', 'Hana', 'Kebede',
+    'Lensa', 'Meron', 'Nahom', 'Rahel', 'Samuel', 'Selam', 'Tigist', 'Yonas', 'Zewdu', 'Liya',
+]
+LAST_NAMES = [
+    'Alemu', 'Bekele', 'Desta', 'Gebre', 'Haile', 'Kassa', 'Mekonnen', 'Negash', 'Tadesse', 'Tesfaye',
+    'Wolde', 'Yilma', 'Girma', 'Abate', 'Mulugeta', 'Ayele', 'Demissie', 'Fikre', 'Lemma', 'Shiferaw',
+]
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_create(model, objs, using='default'):
+    """model.objects.bulk_create(objs), invalidating the caches built from `model` as saves would."""
+    objs = model.objects.using(using).bulk_create(objs)
+    invalidation.changed(model, objs, using=using)
+    return objs
+
+
+def bulk_insert(model, rows, using='default'):
+    """bulk_create a (possibly lazy) iterable of instances in CHUNK_SIZE batches; returns the count."""
+    count = 0
+    for chunk in chunked(rows):
+        bulk_create(model, chunk, using=using)
+        count += len(chunk)
+    return count
+
+
+def academic_years(years, today=None):
+    """The last `years` academic years ('2024/25'), oldest first; a year starts in September."""
+    today = today or timezone.localdate()
+    current = today.year if today.month >= 9 else today.year - 1
+    return [f'{start}/{(start + 1) % 100:02d}' for start in range(current - years + 1, current + 1)]
+
+
+def school_days(start, end, count, rng):
+    """`count` weekdays between start and end (sorted)."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    days = [day for day in days if day.weekday() < 5]
+    return sorted(rng.sample(days, min(count, len(days))))
+
+
+# -----------------------------
+# SHARED REFERENCE DATA
+# -----------------------------
+def create_shared(years, seed, books=500):
+    """Subjects, class groups, rooms, semesters and books; returns their ids for the school workers."""
+    rng = random.Random(f'{seed}:shared')
+    subjects = []
+    for name, code, credit_hours in SUBJECTS:
+        subject, _ = Subject.objects.get_or_create(
+            code=f'{code}-S', defaults={'name': name, 'credit_hours': credit_hours, 'department': 'General', 'level': 'Secondary'},
+        )
+        subjects.append(subject.pk)
+    groups = [
+        ClassGroup.objects.get_or_create(name=name, level='Secondary', academic_program='General')[0].pk
+        for name in CLASS_GROUPS
+    ]
+    rooms = [
+        Room.objects.get_or_create(name=f'Room {i + 1}', defaults={'building': 'Main', 'capacity': 50})[0].pk
+        for i in range(40)
+    ]
+
+    semesters = []
+    today = timezone.localdate()
+    for year in academic_years(years):
+        start = int(year[:4])
+        for name, first, last in (
+            ('Semester 1', date(start, 9, 1), date(start + 1, 1, 31)),
+            ('Semester 2', date(start + 1, 2, 1), date(start + 1, 6, 30)),
+        ):
+            if first > today:
+                continue
+            semester, _ = Semester.objects.get_or_create(
+                name=name, academic_year=year, defaults={'start_date': first, 'end_date': last},
+            )
+            semesters.append({
+                'id': semester.pk, 'academic_year': year,
+                'start': semester.start_date, 'end': min(semester.end_date, today),
+            })
+
+    existing = Book.objects.filter(isbn__startswith='978000').count()
+    bulk_insert(Book, (
+        Book(
+            isbn=f'978000{i:07d}', title=f'{rng.choice(SUBJECTS)[0]} Volume {i}', author=rng.choice(LAST_NAMES),
+            year_published=rng.randint(1990, 2024), total_copies=1000, available_copies=1000,
+            library_branch='Main',
+        )
+        for i in range(existing, books)
+    ))
+    book_ids = list(Book.objects.filter(isbn__startswith='978000').values_list('id', flat=True)[:books])
+    return {'subjects': subjects, 'groups': groups, 'rooms': rooms, 'semesters': semesters, 'books': book_ids}
+
+
+def create_weredas(schools, seed):
+    """One wereda (with an office manager) per SCHOOLS_PER_WEREDA schools; returns their ids."""
+    rng = random.Random(f'{seed}:weredas')
+    password = make_password(DEFAULT_PASSWORD)
+    count = (schools + SCHOOLS_PER_WEREDA - 1) // SCHOOLS_PER_WEREDA
+    managers = bulk_create(User, [
+        User(
+            username=f'sd{seed}_wereda{i}', email=f'sd{seed}_wereda{i}@sample.local', role='wereda_office',
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            national_id=f'{seed % 1000:03d}{i:07d}', password=password,
+        )
+        for i in range(count)
+    ])
+    weredas = bulk_create(Wereda, [
+        Wereda(
+            name=f'Sample Wereda {seed}-{i}', population=rng.randint(50000, 500000),
+            area=round(rng.uniform(100, 5000), 1), literacy_rate=round(rng.uniform(40, 95), 1), manager=manager,
+        )
+        for i, manager in enumerate(managers)
+    ])
+    return [wereda.pk for wereda in weredas]
+
+
+# -----------------------------
+# ONE SCHOOL
+# -----------------------------
+def create_school(index, seed, wereda_id, students_per_school, attendance_days, shared):
+    """Everything belonging to school `index`; runs in a worker process. Returns row counts."""
+    rng = random.Random(f'{seed}:school:{index}')
+    prefix = f'sd{seed}_{index}'
+    password = make_password(DEFAULT_PASSWORD)
+    counts = {}
+
+    def person(n, role, tag):
+        return User(
+            username=f'{prefix}_{tag}{n}', email=f'{prefix}_{tag}{n}@sample.local', role=role,
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            national_id=f'{rng.randint(10 ** 9, 10 ** 10 - 1)}', password=password,
+        )
+
+    with transaction.atomic():
+        manager = bulk_create(User, [person(0, 'school', 'manager')])[0]
+        school = School.objects.create(
+            name=f'Sample School {seed}-{index}', code=f'SD{seed}-{index}', wereda_id=wereda_id,
+            level='Secondary', type=rng.choice(['Government', 'Government', 'Private', 'NGO', 'Religious']),
+            established=rng.randint(1950, 2020), manager=manager,
+        )
+        alias = shard_for_school(school.pk) if sharding_enabled() else 'default'
+
+        teacher_users = bulk_create(
+            User,
+            [person(n, 'teacher', 'teacher') for n in range(max(5, students_per_school // STUDENTS_PER_TEACHER))]
+        )
+        teachers = bulk_create(Teacher, [
+            Teacher(
+                user=user, school=school, employee_id=f'{prefix}_T{n}', department='General',
+                hire_date=date(rng.randint(2000, 2022), 9, 1), academic_rank='Teacher',
+            )
+            for n, user in enumerate(teacher_users)
+        ])
+
+        per_group = max(1, students_per_school // (STUDENTS_PER_SECTION * len(shared['groups'])))
+        sections = bulk_create(Section, [
+            Section(class_group_id=group_id, school=school, name=chr(ord('A') + n), advisor=rng.choice(teacher_users))
+            for group_id in shared['groups'] for n in range(min(per_group, 26))
+        ])
+
+        # Each section takes SUBJECTS_PER_SECTION subjects, each with a teacher and one slot a weekday.
+        section_subjects = {}
+        schedules = []
+        for section in sections:
+            subjects = rng.sample(shared['subjects'], SUBJECTS_PER_SECTION)
+            section_subjects[section.pk] = [(subject_id, rng.choice(teachers)) for subject_id in subjects]
+            for period, (subject_id, teacher) in enumerate(section_subjects[section.pk]):
+                for day in WEEKDAYS:
+                    schedules.append(Schedule(
+                        section=section, subject_id=subject_id, room_id=rng.choice(shared['rooms']),
+                        teacher_id=teacher.user_id, day_of_week=day,
+                        start_time=f'{8 + period:02d}:00', end_time=f'{8 + period:02d}:50',
+                    ))
+        counts['schedules'] = bulk_insert(Schedule, schedules)
+
+        student_users = []
+        for chunk in chunked(person(n, 'student', 'student') for n in range(students_per_school)):
+            student_users += bulk_create(User, chunk)
+        student_sections = [sections[n % len(sections)] for n in range(len(student_users))]
+        group_names = dict(zip(shared['groups'], CLASS_GROUPS))
+        counts['students'] = bulk_insert(StudentProfile, (
+            StudentProfile(
+                # class_section is "<class group><section>", e.g. "Grade 10A", which the roster views match on
+                user=user, school=school, admission_no=f'{prefix}_{n}', student_id=f'{prefix}_S{n}',
+                class_section=f'{group_names[section.class_group_id]}{section.name}',
+                year=group_names[section.class_group_id],
+                gender=rng.choice(['Male', 'Female']), enrollment_date=date(rng.randint(2018, 2024), 9, 1),
+            )
+            for n, (user, section) in enumerate(zip(student_users, student_sections))
+        ))
+        counts['users'] = 1 + len(teacher_users) + len(student_users)
+
+    # Academic rows go to the school's database, one transaction per semester.
+    ability = [rng.gauss(72, 12) for _ in student_users]
+    counts['grades'] = counts['attendance'] = 0
+    for semester in shared['semesters']:
+        grade_types = [choice for choice, _ in Grade.GRADE_TYPE_CHOICES]
+        days = school_days(semester['start'], semester['end'], attendance_days, rng)
+
+        def grades():
+            for n, (user, section) in enumerate(zip(student_users, student_sections)):
+                for subject_id, teacher in section_subjects[section.pk]:
+                    for grade_type in grade_types:
+                        score = min(100, max(0, rng.gauss(ability[n], 10)))
+                        yield Grade(
+                            school_id=school.pk, student_id=user.pk, subject_id=subject_id, section_id=section.pk,
+                            teacher_id=teacher.pk, semester_id=semester['id'], academic_year=semester['academic_year'],
+                            grade_type=grade_type, score=Decimal(f'{score:.2f}'), full_mark=Decimal(100),
+                        )
+
+        def attendance():
+            for n, (user, section) in enumerate(zip(student_users, student_sections)):
+                present_rate = min(0.99, max(0.5, ability[n] / 85))
+                taken_by = section_subjects[section.pk][0][1].pk
+                for day in days:
+                    yield Attendance(
+                        school_id=school.pk, student_id=user.pk, section_id=section.pk, date=day,
+                        status='present' if rng.random() < present_rate else 'absent', taken_by_id=taken_by,
+                    )
+
+        with transaction.atomic(using=alias):
+            counts['grades'] += bulk_insert(Grade, grades(), using=alias)
+            counts['attendance'] += bulk_insert(Attendance, attendance(), using=alias)
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        loans = []
+        for user in student_users:
+            for _ in range(rng.randint(0, 3)):
+                borrowed = today - timedelta(days=rng.randint(1, 365 * len(shared['semesters']) // 2 or 1))
+                returned = rng.random() < 0.8
+                loans.append(BorrowRecord(
+                    book_id=rng.choice(shared['books']), borrower_type='student', borrower_student=user,
+                    borrow_date=borrowed, expected_return_date=borrowed + timedelta(days=14),
+                    actual_return_date=borrowed + timedelta(days=rng.randint(1, 20)) if returned else None,
+                    returned=returned,
+                ))
+        counts['borrow_records'] = bulk_insert(BorrowRecord, loans)
+        counts['announcements'] = bulk_insert(Announcement, (
+            Announcement(
+                title=f'{school.name} notice {n + 1}', content='Generated sample announcement.',
+                type=rng.choice([choice for choice, _ in Announcement.TYPE_CHOICES]),
+                priority=rng.choice(['low', 'medium', 'high']), author=manager,
+                target_audience=rng.choice(['all', 'students', 'teachers']),
+            )
+            for n in range(rng.randint(3, 10))
+        ))
+    return counts
+
+
+def _create_school(args):
+    # Worker entry point: a fresh connection per process, and none kept open between schools.
+    try:
+        return create_school(*args)
+    finally:
+        connections.close_all()
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.db import transaction
-from .models import School, StaffProfile, StudentProfile, User, Wereda, Teacher, Subject, Grade, Attendance, Section, Schedule
+from .models import School, StaffProfile, StudentProfile, User, Wereda, Teacher, Subject, Grade, Attendance, Section, Schedule, ReportCardBatch
 from django.contrib.auth.hashers import make_password
+from .authentication import get_role_profile
+from .sparse_fields import SparseFieldsMixin
 
 User = get_user_model()
 
@@ -26,6 +28,7 @@ class LoginSerializer(serializers.Serializer):
 class UserSerializer(serializers.ModelSerializer):
     profile_photo = serializers.SerializerMethodField()
     national_id = serializers.CharField(allow_blank=True)
+    method_field_sources = {'profile_photo': ['profile_photo']}
 
     class Meta:
         model = User
@@ -42,13 +45,14 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # ------------------------- STUDENT SERIALIZER -------------------------
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     username = serializers.CharField(source="user.username", read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
     email = serializers.EmailField(source="user.email", read_only=True)
     national_id = serializers.CharField(source="user.national_id", read_only=True)
+    expandable_fields = {'school': ('api.serializers.SchoolSerializer', {})}
 
     class Meta:
         model = StudentProfile
@@ -222,7 +226,11 @@ class WeredaSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
+        read_only_fields = [
+            'created_by', 'created_at', 'updated_at',
+            # Kept up to date by api.counters
+            'number_of_schools', 'number_of_students', 'number_of_teachers',
+        ]
 
 
 
@@ -323,6 +331,8 @@ class SchoolSerializer(serializers.ModelSerializer):
     class Meta:
         model = School
         fields = "__all__"
+        # Kept up to date by api.counters
+        read_only_fields = ['student_count', 'teacher_count']
 
 
 
@@ -540,7 +550,7 @@ class SupervisorRegistrationSerializer(serializers.ModelSerializer):
 
 
 # ------------------------- TEACHER SERIALIZER -------------------------
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     first_name = serializers.CharField(write_only=True, required=True)
     last_name = serializers.CharField(write_only=True, required=True)
@@ -553,11 +563,13 @@ class TeacherSerializer(serializers.ModelSerializer):
     )
     subject_names = serializers.SerializerMethodField(read_only=True)
     password = serializers.CharField(read_only=True)
+    expandable_fields = {'school': ('api.serializers.SchoolSerializer', {})}
+    method_field_sources = {'subject_names': ['subjects']}
 
     class Meta:
         model = Teacher
         fields = [
-            'id', 'user', 'employee_id', 'department', 'hire_date', 
+            'id', 'user', 'school', 'employee_id', 'department', 'hire_date', 
             'academic_rank', 'subjects', 'subject_names',
             'first_name', 'last_name', 'national_id', 'email', 'password'
         ]
@@ -674,8 +686,10 @@ class TeacherGradeSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Set the teacher from the request context
         request = self.context.get('request')
-        if request and hasattr(request.user, 'teacher'):
-            validated_data['teacher'] = request.user.teacher
+        if request:
+            teacher = get_role_profile(request.user)
+            if isinstance(teacher, Teacher):
+                validated_data['teacher'] = teacher
         return super().create(validated_data)
 
 
@@ -695,6 +709,26 @@ class TeacherAttendanceSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Set the teacher from the request context
         request = self.context.get('request')
-        if request and hasattr(request.user, 'teacher'):
-            validated_data['taken_by'] = request.user.teacher
-        return super().create(validated_data)
\ No newline at end of file
+        if request:
+            teacher = get_role_profile(request.user)
+            if isinstance(teacher, Teacher):
+                validated_data['taken_by'] = teacher
+        return super().create(validated_data)
+
+# ------------------------- REPORT CARD BATCHES -------------------------
+class ReportCardBatchSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    section_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportCardBatch
+        fields = [
+            'id', 'semester', 'school', 'section', 'section_name', 'format', 'status',
+            'total', 'completed', 'progress', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'school', 'status', 'total', 'completed', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+
+    def get_section_name(self, obj):
+        return str(obj.section) if obj.section_id else None
@@ -0,0 +1,269 @@
+"""
+Horizontal sharding of academic records (Grade, Attendance, their
+archives and attendance bitmaps) by school.
+
+Sharding is off unless ACADEMIC_SHARDS lists database aliases. When it is on:
+
+- Every school's academic rows live on exactly one shard. The placement is
+  deterministic (school id modulo the number of shards) unless a
+  SchoolShard row on the default database says otherwise; the
+  move_school_shard command writes those rows when it moves a school.
+- AcademicShardRouter sends writes to the shard of the row's school and
+  reads to the shard of the school the request is pinned to. Requests are
+  pinned by the JWT authentication class to the user's school; related
+  lookups (section.grade_set, ...) follow the school of the related row.
+- Everything else (users, sections, rollups, ...) stays on "default".
+  Shard tables keep no FK constraints to it, and joins across databases
+  are impossible: use with_related() (prefetch_related, not
+  select_related) from academic rows to reference tables, and filter on
+  lists of ids rather than subqueries between the two.
+- Reads that are not about one school (rollups, national reports) must
+  visit every shard: see across_shards().
+
+For local testing each shard can be a SQLite file:
+
+    ACADEMIC_SHARDS=shard_0,shard_1 python manage.py migrate --database shard_0
+"""
+
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+
+SHARDED_MODELS = {'grade', 'attendance', 'gradearchive', 'attendancearchive', 'attendancebitmap'}
+
+SHARD_MAP_REFRESH_SECONDS = getattr(settings, 'SHARD_MAP_REFRESH_SECONDS', 30)
+
+_pinned_school = contextvars.ContextVar('academic_pinned_school', default=None)
+
+
+def shards():
+    return list(getattr(settings, 'ACADEMIC_SHARDS', []))
+
+
+def sharding_enabled():
+    return bool(shards())
+
+
+def academic_databases():
+    """Every database alias that may hold academic rows."""
+    return shards() or ['default']
+
+
+def is_sharded(model):
+    return model._meta.app_label == 'api' and model._meta.model_name in SHARDED_MODELS
+
+
+# -----------------------------
+# PLACEMENT
+# -----------------------------
+class PlacementMap:
+    """Explicit SchoolShard placements, reloaded from the default database periodically."""
+
+    def __init__(self, refresh_seconds):
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._placements = {}
+
+    def _reload(self):
+        from .models import SchoolShard
+        self._placements = dict(SchoolShard.objects.using('default').values_list('school_id', 'alias'))
+        self._loaded_at = time.monotonic()
+
+    def get(self, school_id):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self._refresh_seconds:
+            with self._lock:
+                self._reload()
+        return self._placements.get(school_id)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+
+placement_map = PlacementMap(SHARD_MAP_REFRESH_SECONDS)
+
+
+def default_shard_for_school(school_id):
+    """Modulo placement, stable as long as ACADEMIC_SHARDS does not change."""
+    aliases = shards()
+    return aliases[int(school_id) % len(aliases)]
+
+
+def shard_for_school(school_id):
+    """Database alias holding the academic rows of a school."""
+    if not sharding_enabled() or school_id is None:
+        return 'default'
+    alias = placement_map.get(school_id)
+    return alias if alias in shards() else default_shard_for_school(school_id)
+
+
+# -----------------------------
+# REQUEST PINNING
+# -----------------------------
+def pin_school(school_id):
+    _pinned_school.set(school_id)
+
+
+def pinned_school():
+    return _pinned_school.get()
+
+
+def pin_user_school(user):
+    """Pin the current request to the user's school (no-op without sharding)."""
+    if sharding_enabled():
+        from .tenancy import user_school_id
+        pin_school(user_school_id(user))
+
+
+class AcademicShardMiddleware:
+    """Clears the pinned school so nothing leaks from one request to the next."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _pinned_school.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned_school.reset(token)
+
+
+# -----------------------------
+# ROUTER
+# -----------------------------
+class AcademicShardRouter:
+    def _school_from_hints(self, hints):
+        # The row itself (save/delete) or the row a related manager hangs off
+        # (section.attendance_set); Grade/Attendance.save() fill school first.
+        school_id = getattr(hints.get('instance'), 'school_id', None)
+        return school_id if school_id is not None else pinned_school()
+
+    def _route(self, model, **hints):
+        if not sharding_enabled():
+            return None
+        if is_sharded(model):
+            school_id = self._school_from_hints(hints)
+            return shard_for_school(school_id) if school_id is not None else None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in shards():
+            # grade.student etc. when grade came from a shard
+            return 'default'
+        return None
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if sharding_enabled() and (is_sharded(type(obj1)) or is_sharded(type(obj2))):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in shards():
+            return None
+        return app_label == 'api' and model_name in SHARDED_MODELS
+
+
+# -----------------------------
+# CROSS-SHARD READS
+# -----------------------------
+def across_shards(queryset):
+    """Yield `queryset` bound to every database that may hold academic rows."""
+    for alias in academic_databases():
+        yield queryset.using(alias)
+
+
+def with_related(queryset, *fields):
+    """
+    select_related(*fields), except on academic rows while sharding is on:
+    their related rows are on the default database, so they are fetched
+    with prefetch_related instead of a join.
+    """
+    if sharding_enabled() and is_sharded(queryset.model):
+        return queryset.prefetch_related(*fields)
+    return queryset.select_related(*fields)
+
+
+# -----------------------------
+# CROSS-SHARD DELETES
+# -----------------------------
+def delete_dependents(model, pk, using='default'):
+    """
+    Apply on_delete to the shard rows that point at the `model` row `pk`
+    just deleted on `using`. Django's collector only cascades within the
+    database it deletes from, so without this a deleted user's or section's
+    grades and attendance would stay behind on the other shards. Rows are
+    deleted with .delete(), so their own signals (rollups, term results,
+    cache invalidation) still run.
+    """
+    if not sharding_enabled():
+        return
+    from django.apps import apps
+    from django.db import models
+
+    target = model._meta.concrete_model
+    for model_name in sorted(SHARDED_MODELS):
+        sharded = apps.get_model('api', model_name)
+        for field in sharded._meta.concrete_fields:
+            if not field.is_relation or field.related_model._meta.concrete_model is not target:
+                continue
+            on_delete = field.remote_field.on_delete
+            for alias in shards():
+                if alias == using:
+                    continue
+                rows = sharded._base_manager.using(alias).filter(**{field.attname: pk})
+                if on_delete is models.CASCADE:
+                    rows.delete()
+                elif on_delete is models.SET_NULL:
+                    rows.update(**{field.attname: None})
+
+
+# -----------------------------
+# MOVING A SCHOOL
+# -----------------------------
+def move_school(school_id, target, batch_size=1000):
+    """
+    Move every academic row of a school to `target` and record the new
+    placement. Rows are copied in batches (new ids: ids are per database),
+    committed on the target, then deleted from the source. Inserts skip
+    rows that already exist on the target (by each model's natural key,
+    (school, original_id) for the archives), so an interrupted move can be
+    rerun. Neither sends signals, so the cache namespaces built from the
+    moved rows are bumped here (api.invalidation). Rollup counters count
+    students and teachers, not academic rows, and are not affected.
+    Returns {model name: rows moved}.
+    """
+    from django.db import transaction
+    from django.db.models.constants import OnConflict
+    from . import invalidation
+    from .models import Grade, Attendance, GradeArchive, AttendanceArchive, AttendanceBitmap, SchoolShard
+
+    sources = [alias for alias in dict.fromkeys(['default'] + shards()) if alias != target]
+    moved = {}
+    for model in (Grade, Attendance, GradeArchive, AttendanceArchive, AttendanceBitmap):
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        count = 0
+        for source in sources:
+            rows = model._base_manager.using(source).filter(school_id=school_id).order_by('pk')
+            while True:
+                batch = list(rows[:batch_size])
+                if not batch:
+                    break
+                with transaction.atomic(using=target):
+                    # raw=True keeps stored values such as date_recorded (auto_now_add).
+                    model._base_manager.using(target)._insert(
+                        batch, fields=fields, raw=True, using=target, on_conflict=OnConflict.IGNORE,
+                    )
+                # _raw_delete skips the per-row delete signals; the data has
+                # not changed, only where it lives.
+                model._base_manager.using(source).filter(pk__in=[obj.pk for obj in batch])._raw_delete(source)
+                invalidation.changed(model, batch, using=target)
+                count += len(batch)
+        moved[model.__name__] = count
+
+    SchoolShard.objects.using('default').update_or_create(school_id=school_id, defaults={'alias': target})
+    placement_map.invalidate()
+    return moved
@@ -0,0 +1,185 @@
+"""
+Model signal handlers for the api app. Imported from ApiConfig.ready().
+"""
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import User, Teacher, StudentProfile, StaffProfile, School, Section, Semester, Subject, Attendance, Grade
+from . import attendance_bitmaps, counters, rollups, sharding, term_results
+from .authentication import invalidate_role_profile
+from .tokens import revoke_user_tokens
+
+
+# -----------------------------
+# ROLE PROFILE CACHE
+# -----------------------------
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_role_profile(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_of_inactive_user(sender, instance, created, **kwargs):
+    # Stateless tokens never re-read is_active, so disabling an account
+    # has to revoke what was already issued.
+    if not created and not instance.is_active:
+        revoke_user_tokens(instance)
+
+
+@receiver([post_save, post_delete], sender=Teacher)
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=StaffProfile)
+def role_profile_changed(sender, instance, **kwargs):
+    invalidate_role_profile(instance.user_id)
+
+
+# -----------------------------
+# SCHOOL / WEREDA ROLLUP COUNTERS
+# -----------------------------
+def _remember_old(instance, update_fields, field, *extra):
+    """Stash the stored value of `field` (and `extra`) before an update."""
+    instance._counter_old = None
+    if instance._state.adding or (update_fields is not None and field not in update_fields):
+        return
+    instance._counter_old = (
+        type(instance).objects.filter(pk=instance.pk).values_list(f'{field}_id', *extra).first()
+    )
+
+
+@receiver(pre_save, sender=StudentProfile)
+@receiver(pre_save, sender=Teacher)
+def remember_member_school(sender, instance, update_fields=None, **kwargs):
+    _remember_old(instance, update_fields, 'school')
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=Teacher)
+def member_saved(sender, instance, created, update_fields=None, **kwargs):
+    kind = {'students': 1} if sender is StudentProfile else {'teachers': 1}
+    if created:
+        counters.adjust_school(instance.school_id, **kind)
+    elif instance._counter_old is not None:
+        counters.move_member(instance._counter_old[0], instance.school_id, **kind)
+
+
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_delete, sender=Teacher)
+def member_deleted(sender, instance, **kwargs):
+    kind = {'students': -1} if sender is StudentProfile else {'teachers': -1}
+    counters.adjust_school(instance.school_id, **kind)
+
+
+@receiver(pre_save, sender=School)
+def remember_school_wereda(sender, instance, update_fields=None, **kwargs):
+    _remember_old(instance, update_fields, 'wereda', 'student_count', 'teacher_count')
+
+
+@receiver(post_save, sender=School)
+def school_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.move_school(None, instance.wereda_id, instance.student_count, instance.teacher_count)
+    elif instance._counter_old is not None:
+        old_wereda_id, students, teachers = instance._counter_old
+        counters.move_school(old_wereda_id, instance.wereda_id, students, teachers)
+
+
+@receiver(post_delete, sender=School)
+def school_deleted(sender, instance, **kwargs):
+    # Its students and teachers are detached with SET_NULL (no signals), so
+    # the whole school comes off the wereda here.
+    counters.move_school(instance.wereda_id, None, instance.student_count, instance.teacher_count)
+
+
+# -----------------------------
+# ACADEMIC SHARDS
+# -----------------------------
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Semester)
+def academic_parent_deleted(sender, instance, using, **kwargs):
+    # Grades and attendance on other shards are out of the collector's reach
+    pk = instance.pk
+    transaction.on_commit(lambda: sharding.delete_dependents(sender, pk, using), using=using)
+
+
+# -----------------------------
+# HIERARCHY ROLLUPS
+# -----------------------------
+@receiver([post_save, post_delete], sender=Attendance)
+def attendance_changed(sender, instance, **kwargs):
+    rollups.mark_dirty(instance.section_id, instance.date)
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    if instance.date_recorded:
+        rollups.mark_dirty(instance.section_id, timezone.localdate(instance.date_recorded))
+
+
+# -----------------------------
+# ATTENDANCE BITMAPS
+# -----------------------------
+BITMAP_KEY = ('student_id', 'section_id', 'subject_id', 'date')
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_day(sender, instance, **kwargs):
+    instance._bitmap_old = None
+    if attendance_bitmaps.enabled() and not instance._state.adding:
+        instance._bitmap_old = (
+            Attendance._base_manager.using(instance._state.db or 'default')
+            .filter(pk=instance.pk).values_list(*BITMAP_KEY).first()
+        )
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_bitmap_saved(sender, instance, using, **kwargs):
+    if not attendance_bitmaps.enabled():
+        return
+    key = tuple(getattr(instance, field) for field in BITMAP_KEY)
+    old = getattr(instance, '_bitmap_old', None)
+    if old is not None and tuple(old) != key:
+        attendance_bitmaps.record(*old, None, using=using)
+    attendance_bitmaps.record(*key, instance.status, using=using)
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_bitmap_deleted(sender, instance, using, **kwargs):
+    if attendance_bitmaps.enabled():
+        attendance_bitmaps.record(*(getattr(instance, field) for field in BITMAP_KEY), None, using=using)
+
+
+# -----------------------------
+# TERM RESULTS
+# -----------------------------
+TERM_KEY = ('student_id', 'subject_id', 'semester_id')
+
+
+@receiver(pre_save, sender=Grade)
+def remember_grade_term(sender, instance, **kwargs):
+    instance._term_old = None
+    if not instance._state.adding:
+        instance._term_old = (
+            Grade._base_manager.using(instance._state.db or 'default')
+            .filter(pk=instance.pk).values_list(*TERM_KEY).first()
+        )
+
+
+@receiver(post_save, sender=Grade)
+def grade_term_saved(sender, instance, **kwargs):
+    key = tuple(getattr(instance, field) for field in TERM_KEY)
+    old = getattr(instance, '_term_old', None)
+    if old is not None and tuple(old) != key:
+        term_results.grade_changed(*old)
+    term_results.grade_changed(*key)
+
+
+@receiver(post_delete, sender=Grade)
+def grade_term_deleted(sender, instance, **kwargs):
+    term_results.grade_changed(*(getattr(instance, field) for field in TERM_KEY))
@@ -0,0 +1,204 @@
+"""
+Sparse fieldsets: ?fields= and ?expand= on reads of ModelSerializer views.
+
+    GET /api/students/?fields=id,student_id,user.first_name,user.last_name
+    GET /api/students/?expand=school
+
+?fields= keeps only the named fields; a dotted name keeps one field of a
+nested serializer (a bare "user" keeps all of it). ?expand= swaps a related
+field's pk for the nested serializer named in expandable_fields. A ?fields=
+name that matches no field is a 400 naming it, so a typo doesn't read as
+empty data; unknown ?expand= names are ignored. Without either parameter
+nothing changes.
+
+Trimming the output alone would still load every column and join, so
+SparseFieldsViewSetMixin pushes the selection down to the queryset: the
+fields left after trimming are traced back through their sources to model
+fields, which become only(), select_related() and prefetch_related(). A
+SerializerMethodField can read anything, so serializers declare what each
+one reads in method_field_sources. When a kept field can't be traced (an
+undeclared method field, a property in the source) all columns and the
+view's own joins are kept and only the joins found are added: slower, but
+still correct.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import exceptions, serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class UnknownFields(exceptions.APIException):
+    status_code = 400
+    default_code = 'unknown_fields'
+
+    def __init__(self, names):
+        super().__init__({"error": f"Unknown fields: {', '.join(names)}"})
+
+
+def parse_fields(value):
+    """'id,user.first_name,user.email' -> {'id': {}, 'user': {'first_name': {}, 'email': {}}}"""
+    tree = {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def sparse_params(request):
+    """(fields tree or None, set of expanded names) requested for a read, else (None, set())."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = request.query_params.get('fields')
+    expand = request.query_params.get('expand', '')
+    return (parse_fields(fields) if fields else None), {name.strip() for name in expand.split(',') if name.strip()}
+
+
+def prune(fields, tree, prefix=''):
+    """
+    Drop from a serializer's fields everything not in `tree`, recursing into
+    nested serializers. Returns the names in `tree` that match no field,
+    dotted as in ?fields=.
+    """
+    unknown = [prefix + name for name in tree if name not in fields]
+    for name in list(fields):
+        if name not in tree:
+            fields.pop(name)
+            continue
+        nested = fields[name]
+        nested = getattr(nested, 'child', nested)
+        if not tree[name]:
+            continue
+        if isinstance(nested, serializers.BaseSerializer):
+            unknown += prune(nested.fields, tree[name], f'{prefix}{name}.')
+        else:
+            # "school.name" while school is rendered as a pk
+            unknown += [f'{prefix}{name}.{child}' for child in tree[name]]
+    return unknown
+
+
+# -----------------------------
+# SERIALIZERS
+# -----------------------------
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin for ?fields= and ?expand=.
+
+    expandable_fields: {name: (serializer class or its dotted path, kwargs)} rendered nested when expanded
+    method_field_sources: {SerializerMethodField name: [model field paths it reads]}
+    """
+    expandable_fields = {}
+    method_field_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        tree, expand = sparse_params(self.context.get('request'))
+        # Only the outermost serializer (or the child of an outermost many=True list) reads the query string
+        parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        if parent is not None:
+            return fields
+        for name in expand & set(self.expandable_fields):
+            serializer_class, kwargs = self.expandable_fields[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            fields[name] = serializer_class(read_only=True, **kwargs)
+            if tree is not None:
+                tree.setdefault(name, {})
+        if tree is not None:
+            unknown = prune(fields, tree)
+            if unknown:
+                raise UnknownFields(unknown)
+        return fields
+
+
+# -----------------------------
+# QUERYSETS
+# -----------------------------
+def _resolve(model, attrs):
+    """
+    Classify a source path on `model`: ('column', path, joins, last field),
+    ('many', path) for a to-many relation, or None when it isn't a chain of
+    model fields.
+    """
+    joins = []
+    for i, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        path = '__'.join(attrs[:i + 1])
+        if field.many_to_many or field.one_to_many:
+            return 'many', path
+        if i < len(attrs) - 1:
+            if not field.is_relation:
+                return None
+            joins.append(path)
+            model = field.related_model
+    return 'column', '__'.join(attrs), joins, field
+
+
+def query_plan(serializer, model, prefix=''):
+    """
+    (only, select_related, prefetch_related) lookups covering the fields of
+    `serializer`. only is None when some field can't be traced to model
+    fields, so every column has to be loaded.
+    """
+    only, joins, prefetch = [prefix + model._meta.pk.name], [], []
+    traced = True
+    sources = getattr(serializer, 'method_field_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            paths = [path.split('__') for path in sources.get(name, [])]
+            traced = traced and name in sources
+        elif field.source == '*':
+            paths, traced = [], False
+        else:
+            paths = [field.source_attrs]
+
+        for attrs in paths:
+            resolved = _resolve(model, attrs)
+            if resolved is None:
+                traced = False
+                continue
+            if resolved[0] == 'many':
+                prefetch.append(prefix + resolved[1])
+                continue
+            _, path, path_joins, model_field = resolved
+            joins += [prefix + join for join in path_joins]
+            if isinstance(field, serializers.BaseSerializer) and model_field.is_relation:
+                # A nested serializer over a forward relation: join it and select its own fields
+                joins.append(prefix + path)
+                nested_only, nested_joins, nested_prefetch = query_plan(
+                    field, model_field.related_model, f'{prefix}{path}__',
+                )
+                if nested_only is None:
+                    traced = False
+                else:
+                    only += nested_only
+                joins += nested_joins
+                prefetch += nested_prefetch
+            else:
+                only.append(prefix + path)
+    return (only if traced else None), joins, prefetch
+
+
+class SparseFieldsViewSetMixin:
+    """Narrows the queryset of reads to the columns and joins ?fields=/?expand= still render."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        tree, expand = sparse_params(self.request)
+        if tree is None and not expand:
+            return queryset
+        only, joins, prefetch = query_plan(self.get_serializer(), queryset.model)
+        if only is not None:
+            # Everything rendered is known: replace the view's joins with exactly these
+            queryset = queryset.select_related(None).prefetch_related(None).only(*dict.fromkeys(only))
+        if joins:
+            queryset = queryset.select_related(*dict.fromkeys(joins))
+        if prefetch:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch))
+        return queryset
@@ -0,0 +1,85 @@
+"""
+Background tasks run by `manage.py run_workers` (see api.jobs).
+"""
+
+import csv
+import io
+
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.db import transaction
+
+from . import report_cards
+from .jobs import job_progress, save_result_file, task
+from .models import ReportCardBatch, StudentProfile, Teacher, User
+from .teacher_views import TeacherSelfViewSet
+from .views import import_students as import_rows, write_students_csv
+
+PROGRESS_EVERY = 100
+
+# Management commands that may be queued with `manage.py queue_command`
+JOB_COMMANDS = {
+    'archive_academic_year', 'build_attendance_bitmaps', 'build_rollups', 'compute_term_results',
+    'create_sample_data', 'export_cold_storage', 'generate_report_cards', 'reconcile_rollup_counters',
+}
+
+
+@task('students.export_csv')
+def export_students(job, user_id):
+    user = User.objects.get(pk=user_id)
+    students = StudentProfile.objects.for_user(user)
+    if user.role == 'student':
+        students = StudentProfile.objects.filter(user=user)
+    out = io.StringIO()
+    rows = write_students_csv(out, students)
+    save_result_file(job, 'students.csv', out.getvalue())
+    return {'rows': rows}
+
+
+@task('students.import_csv', single_download=True)
+def import_students(job, path, school_id=None):
+    """All or nothing, so a retry after a failure cannot create duplicates."""
+    with storages['private'].open(path) as upload:
+        text = upload.read().decode('utf-8')
+    total = max(text.count('\n') - 1, 1)
+
+    def progress(created):
+        if created % PROGRESS_EVERY == 0:
+            job_progress(job, created, total, f'{created} students imported')
+
+    with transaction.atomic():
+        created, users = import_rows(csv.DictReader(io.StringIO(text)), school_id or job.school_id, progress)
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=['username', 'password'])
+    writer.writeheader()
+    writer.writerows(users)
+    save_result_file(job, 'imported_users.csv', out.getvalue())
+    storages['private'].delete(path)
+    return {'message': f'Imported {created} students successfully', 'created': created}
+
+
+@task('teacher.reports')
+def teacher_report(job, teacher_id, params):
+    return TeacherSelfViewSet().build_report(Teacher.objects.get(pk=teacher_id), params)
+
+
+@task('report_cards.generate', max_attempts=1)
+def generate_report_cards(job, batch_id, workers=None):
+    claimed = ReportCardBatch.objects.filter(pk=batch_id, status__in=('pending', 'failed')).update(status='running')
+    if not claimed:
+        return {'skipped': 'batch is already running or done'}
+    batch = ReportCardBatch.objects.select_related('semester').get(pk=batch_id)
+    cards = report_cards.generate(
+        batch, workers=workers, progress=lambda done, total: job_progress(job, done, total),
+    )
+    return {'batch_id': batch_id, 'cards': cards, 'file': batch.file.name}
+
+
+@task('command', max_attempts=1)
+def run_command(job, name, args=()):
+    if name not in JOB_COMMANDS:
+        raise ValueError(f'{name} cannot be run as a job')
+    out = io.StringIO()
+    call_command(name, *args, stdout=out, stderr=out)
+    return {'command': name, 'args': list(args), 'output': out.getvalue()[-10000:]}
@@ -21,6 +21,13 @@ from collections import defaultdict
 
 from .models import Teacher, Subject, Grade, Attendance, Section, Schedule, User, StudentProfile
 from .serializers import TeacherSerializer, TeacherGradeSerializer, TeacherAttendanceSerializer
+from .authentication import get_teacher
+from .archive import grades_for
+from . import gradebook, reference_data, term_results
+from .jobs import enqueue
+from .job_views import accepted, wants_async
+from .sharding import sharding_enabled, with_related
+from .tenancy import user_school_id
 
 User = get_user_model()
 
@@ -38,8 +45,8 @@ class IsTeacherOwner(BasePermission):
             elif hasattr(obj, 'subject'):
                 # Check if teacher teaches this subject
                 try:
-                    teacher = Teacher.objects.get(user=request.user)
-                    return obj.subject in teacher.subjects.all()
+                    teacher = get_teacher(request.user)
+                    return teacher.subjects.filter(pk=obj.subject_id).exists()
                 except Teacher.DoesNotExist:
                     return False
         return True
@@ -62,7 +69,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_profile(self, request):
         """Get current teacher's complete profile"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             serializer = TeacherSerializer(teacher)
             return Response(serializer.data)
         except Teacher.DoesNotExist:
@@ -72,7 +79,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_subjects(self, request):
         """Get subjects assigned to current teacher with statistics"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             subjects = teacher.subjects.all()
             
             subjects_data = []
@@ -135,7 +142,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_classes(self, request):
         """Get classes/sections assigned to current teacher"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             # Get all sections where teacher is involved
             section_ids = set()
@@ -220,7 +227,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
         POST: Mark attendance for students
         """
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             if request.method == 'GET':
                 # Get attendance records for teacher's subjects
@@ -231,9 +238,9 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 status_filter = request.query_params.get('status')
                 
                 # Filter attendance records
-                attendance = Attendance.objects.filter(
+                attendance = with_related(Attendance.objects.filter(
                     taken_by=teacher
-                ).select_related('student', 'subject', 'section')
+                ), 'student', 'subject', 'section')
                 
                 if date_from:
                     attendance = attendance.filter(date__gte=date_from)
@@ -246,7 +253,10 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 if status_filter:
                     attendance = attendance.filter(status=status_filter)
                 
-                attendance = attendance.order_by('-date', 'student__first_name')
+                # Shard tables can't join to User: order by student id there
+                attendance = attendance.order_by(
+                    '-date', 'student_id' if sharding_enabled() else 'student__first_name'
+                )
                 
                 # Calculate summary statistics before slicing
                 total_records = attendance.count()
@@ -318,7 +328,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
         PUT: Update existing grades
         """
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             if request.method == 'GET':
                 # Get grades for teacher's subjects
@@ -327,11 +337,12 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 section_id = request.query_params.get('section')
                 grade_type = request.query_params.get('grade_type')
                 student_id = request.query_params.get('student')
+                academic_year = request.query_params.get('academic_year')
                 
-                # Filter grades
-                grades = Grade.objects.filter(
+                # Filter grades (archived years come from the archive table)
+                grades = with_related(grades_for(academic_year).filter(
                     teacher=teacher
-                ).select_related('student', 'subject', 'section', 'semester')
+                ), 'student', 'subject', 'section', 'semester')
                 
                 if semester:
                     grades = grades.filter(semester_id=semester)
@@ -346,29 +357,15 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 
                 grades = grades.order_by('-date_recorded')
                 
-                # Calculate statistics before slicing
-                total_grades = grades.count()
-                avg_score = grades.aggregate(avg=models.Avg('score'))['avg'] or 0
-                
-                # Grade distribution - calculate before slicing
-                grade_distribution = {
-                    'A': grades.filter(score__gte=90).count(),
-                    'B': grades.filter(score__gte=80, score__lt=90).count(),
-                    'C': grades.filter(score__gte=70, score__lt=80).count(),
-                    'D': grades.filter(score__gte=60, score__lt=70).count(),
-                    'F': grades.filter(score__lt=60).count()
-                }
+                # Calculate statistics before slicing (count, average and A-F bands in one query)
+                statistics = gradebook.summarize(grades)
                 
                 # Now slice for the response
                 grades = grades[:200]
                 
                 return Response({
                     "grades": TeacherGradeSerializer(grades, many=True).data,
-                    "statistics": {
-                        "total_grades": total_grades,
-                        "average_score": round(avg_score, 2),
-                        "grade_distribution": grade_distribution
-                    }
+                    "statistics": statistics
                 })
             
             elif request.method == 'POST':
@@ -438,31 +435,24 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_students(self, request):
         """Get detailed information about students in teacher's classes"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             subject_id = request.query_params.get('subject')
             section_id = request.query_params.get('section')
             
-            # Get students based on filters
-            students_query = User.objects.filter(role='student')
+            # Get students based on filters (ids first: grades may be on a shard)
+            graded = Grade.objects.filter(teacher=teacher)
             
             if subject_id and section_id:
                 # Get students from specific subject and section
-                students_query = students_query.filter(
-                    grade__subject_id=subject_id,
-                    grade__section_id=section_id,
-                    grade__teacher=teacher
-                ).distinct()
+                graded = graded.filter(subject_id=subject_id, section_id=section_id)
             elif subject_id:
                 # Get students from specific subject
-                students_query = students_query.filter(
-                    grade__subject_id=subject_id,
-                    grade__teacher=teacher
-                ).distinct()
-            else:
-                # Get all students taught by this teacher
-                students_query = students_query.filter(
-                    grade__teacher=teacher
-                ).distinct()
+                graded = graded.filter(subject_id=subject_id)
+            
+            students_query = User.objects.filter(
+                role='student',
+                pk__in=list(graded.values_list('student_id', flat=True).distinct())
+            )
             
             students_data = []
             # Convert to list to avoid query slicing issues
@@ -543,7 +533,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def dashboard_summary(self, request):
         """Get comprehensive dashboard data for teacher"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             # Get basic statistics
             total_subjects = teacher.subjects.count()
@@ -580,8 +570,9 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
             pending_attendance = Schedule.objects.filter(
                 teacher=request.user
             ).exclude(
-                section__attendance__taken_by=teacher,
-                section__attendance__date=today
+                section_id__in=list(Attendance.objects.filter(
+                    taken_by=teacher, date=today
+                ).values_list('section_id', flat=True).distinct())
             ).count()
             
             # Get performance overview
@@ -620,176 +611,269 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
         except Teacher.DoesNotExist:
             return Response({"error": "Teacher profile not found"}, status=404)
     
+    @action(detail=False, methods=['get'])
+    def grade_analytics(self, request):
+        """Term totals, z-scores, percentile ranks and class ranks for one section"""
+        section_id = request.query_params.get('section')
+        if not section_id or not section_id.isdigit():
+            return Response({"error": "A section id is required"}, status=400)
+        if not gradebook.available():
+            return Response({"error": "Grade analytics are not available on this server"}, status=503)
+        try:
+            teacher = get_teacher(request.user)
+        except Teacher.DoesNotExist:
+            return Response({"error": "Teacher profile not found"}, status=404)
+
+        grades = grades_for(request.query_params.get('academic_year')).filter(teacher=teacher, section_id=section_id)
+        if request.query_params.get('subject'):
+            grades = grades.filter(subject_id=request.query_params['subject'])
+        if request.query_params.get('semester'):
+            grades = grades.filter(semester_id=request.query_params['semester'])
+
+        # Subject and semester given: weight grade types by their AssessmentWeight policy
+        weights = gradebook.GRADE_TYPE_WEIGHTS
+        if request.query_params.get('subject', '').isdigit() and request.query_params.get('semester', '').isdigit():
+            subject = int(request.query_params['subject'])
+            weights = term_results.weights_for([subject], int(request.query_params['semester']))[subject]
+
+        book = gradebook.GradeBook.from_queryset(grades)
+        rows = gradebook.section_report(book, weights)
+        names = {u.pk: u.get_full_name() for u in User.objects.filter(pk__in=[r['student_id'] for r in rows])}
+        for row in rows:
+            row['student_name'] = names.get(row['student_id'], '')
+
+        return Response({
+            "section_id": int(section_id),
+            "weights": weights,
+            "statistics": book.summary(),
+            "percentage_distribution": book.distribution(book.percentages),
+            "students": rows
+        })
+
     @action(detail=False, methods=['get'])
     def reports(self, request):
-        """Generate comprehensive reports for teacher"""
+        """Generate comprehensive reports for teacher (?async=1 runs it as a background job)"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
-            report_type = request.query_params.get('type', 'summary')
-            subject_id = request.query_params.get('subject')
-            section_id = request.query_params.get('section')
-            date_from = request.query_params.get('date_from')
-            date_to = request.query_params.get('date_to')
-            
-            if report_type == 'attendance':
-                # Detailed attendance report
-                attendance_data = Attendance.objects.filter(taken_by=teacher)
-                
-                if subject_id:
-                    attendance_data = attendance_data.filter(subject_id=subject_id)
-                if section_id:
-                    attendance_data = attendance_data.filter(section_id=section_id)
-                if date_from:
-                    attendance_data = attendance_data.filter(date__gte=date_from)
-                if date_to:
-                    attendance_data = attendance_data.filter(date__lte=date_to)
-                
-                # Group by student
-                student_attendance = defaultdict(lambda: {'present': 0, 'absent': 0, 'total': 0})
-                
-                for record in attendance_data:
-                    student_name = record.student.get_full_name()
-                    student_attendance[student_name]['total'] += 1
-                    if record.status == 'present':
-                        student_attendance[student_name]['present'] += 1
-                    else:
-                        student_attendance[student_name]['absent'] += 1
-                
-                report_data = []
-                for student, stats in student_attendance.items():
-                    attendance_rate = (stats['present'] / stats['total'] * 100) if stats['total'] > 0 else 0
-                    report_data.append({
-                        'student': student,
-                        'present_days': stats['present'],
-                        'absent_days': stats['absent'],
-                        'total_days': stats['total'],
-                        'attendance_rate': round(attendance_rate, 1)
-                    })
-                
-                # Sort by attendance rate (lowest first for attention)
-                report_data.sort(key=lambda x: x['attendance_rate'])
-                
-                return Response({
-                    'report_type': 'attendance',
-                    'data': report_data,
-                    'summary': {
-                        'total_students': len(report_data),
-                        'avg_attendance_rate': round(sum(r['attendance_rate'] for r in report_data) / len(report_data), 1) if report_data else 0,
-                        'students_below_75': len([r for r in report_data if r['attendance_rate'] < 75])
-                    }
+            teacher = get_teacher(request.user)
+            if wants_async(request):
+                return accepted(enqueue(
+                    'teacher.reports', user=request.user, school_id=teacher.school_id,
+                    teacher_id=teacher.pk, params=request.query_params.dict(),
+                ))
+            return Response(self.build_report(teacher, request.query_params))
+        except Teacher.DoesNotExist:
+            return Response({"error": "Teacher profile not found"}, status=404)
+    
+    def build_report(self, teacher, params):
+        """Report data for `teacher` from query params (type, subject, section, date_from, date_to)"""
+        report_type = params.get('type', 'summary')
+        subject_id = params.get('subject')
+        section_id = params.get('section')
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        
+        if report_type == 'attendance':
+            # Detailed attendance report
+            attendance_data = Attendance.objects.filter(taken_by=teacher)
+            
+            if subject_id:
+                attendance_data = attendance_data.filter(subject_id=subject_id)
+            if section_id:
+                attendance_data = attendance_data.filter(section_id=section_id)
+            if date_from:
+                attendance_data = attendance_data.filter(date__gte=date_from)
+            if date_to:
+                attendance_data = attendance_data.filter(date__lte=date_to)
+            
+            # Group by student
+            student_attendance = defaultdict(lambda: {'present': 0, 'absent': 0, 'total': 0})
+            
+            for record in attendance_data:
+                student_name = record.student.get_full_name()
+                student_attendance[student_name]['total'] += 1
+                if record.status == 'present':
+                    student_attendance[student_name]['present'] += 1
+                else:
+                    student_attendance[student_name]['absent'] += 1
+            
+            report_data = []
+            for student, stats in student_attendance.items():
+                attendance_rate = (stats['present'] / stats['total'] * 100) if stats['total'] > 0 else 0
+                report_data.append({
+                    'student': student,
+                    'present_days': stats['present'],
+                    'absent_days': stats['absent'],
+                    'total_days': stats['total'],
+                    'attendance_rate': round(attendance_rate, 1)
                 })
             
-            elif report_type == 'grades':
-                # Detailed grade report
-                grades_data = Grade.objects.filter(teacher=teacher)
-                
-                if subject_id:
-                    grades_data = grades_data.filter(subject_id=subject_id)
-                if section_id:
-                    grades_data = grades_data.filter(section_id=section_id)
-                if date_from:
-                    grades_data = grades_data.filter(date_recorded__gte=date_from)
-                if date_to:
-                    grades_data = grades_data.filter(date_recorded__lte=date_to)
-                
-                # Group by student
-                student_grades = defaultdict(list)
-                
-                for grade in grades_data:
-                    student_name = grade.student.get_full_name()
-                    student_grades[student_name].append({
-                        'subject': grade.subject.name,
-                        'grade_type': grade.grade_type,
-                        'score': float(grade.score),
-                        'full_mark': float(grade.full_mark),
-                        'percentage': round((float(grade.score) / float(grade.full_mark)) * 100, 1),
-                        'date': grade.date_recorded.strftime('%Y-%m-%d')
-                    })
-                
-                report_data = []
-                for student, grades in student_grades.items():
-                    avg_percentage = sum(g['percentage'] for g in grades) / len(grades) if grades else 0
-                    report_data.append({
-                        'student': student,
-                        'grades': grades,
-                        'average_percentage': round(avg_percentage, 1),
-                        'total_assessments': len(grades),
-                        'highest_score': max(g['percentage'] for g in grades) if grades else 0,
-                        'lowest_score': min(g['percentage'] for g in grades) if grades else 0
-                    })
-                
-                # Sort by average percentage (lowest first for attention)
-                report_data.sort(key=lambda x: x['average_percentage'])
-                
-                return Response({
+            # Sort by attendance rate (lowest first for attention)
+            report_data.sort(key=lambda x: x['attendance_rate'])
+            
+            return {
+                'report_type': 'attendance',
+                'data': report_data,
+                'summary': {
+                    'total_students': len(report_data),
+                    'avg_attendance_rate': round(sum(r['attendance_rate'] for r in report_data) / len(report_data), 1) if report_data else 0,
+                    'students_below_75': len([r for r in report_data if r['attendance_rate'] < 75])
+                }
+            }
+        
+        elif report_type == 'grades':
+            # Detailed grade report
+            grades_data = Grade.objects.filter(teacher=teacher)
+            
+            if subject_id:
+                grades_data = grades_data.filter(subject_id=subject_id)
+            if section_id:
+                grades_data = grades_data.filter(section_id=section_id)
+            if date_from:
+                grades_data = grades_data.filter(date_recorded__gte=date_from)
+            if date_to:
+                grades_data = grades_data.filter(date_recorded__lte=date_to)
+            
+            if gradebook.available():
+                report_data = self._grade_report(grades_data)
+                return {
                     'report_type': 'grades',
                     'data': report_data,
-                    'summary': {
-                        'total_students': len(report_data),
-                        'class_average': round(sum(r['average_percentage'] for r in report_data) / len(report_data), 1) if report_data else 0,
-                        'students_below_60': len([r for r in report_data if r['average_percentage'] < 60]),
-                        'students_above_90': len([r for r in report_data if r['average_percentage'] >= 90])
-                    }
+                    'summary': self._grade_report_summary(report_data)
+                }
+            
+            # Group by student
+            student_grades = defaultdict(list)
+            
+            for grade in grades_data:
+                student_name = grade.student.get_full_name()
+                student_grades[student_name].append({
+                    'subject': grade.subject.name,
+                    'grade_type': grade.grade_type,
+                    'score': float(grade.score),
+                    'full_mark': float(grade.full_mark),
+                    'percentage': round((float(grade.score) / float(grade.full_mark)) * 100, 1),
+                    'date': grade.date_recorded.strftime('%Y-%m-%d')
                 })
             
-            elif report_type == 'performance':
-                # Combined performance report
-                students = User.objects.filter(
-                    role='student',
-                    grade__teacher=teacher
-                ).distinct()
+            report_data = []
+            for student, grades in student_grades.items():
+                avg_percentage = sum(g['percentage'] for g in grades) / len(grades) if grades else 0
+                report_data.append({
+                    'student': student,
+                    'grades': grades,
+                    'average_percentage': round(avg_percentage, 1),
+                    'total_assessments': len(grades),
+                    'highest_score': max(g['percentage'] for g in grades) if grades else 0,
+                    'lowest_score': min(g['percentage'] for g in grades) if grades else 0
+                })
+            
+            # Sort by average percentage (lowest first for attention)
+            report_data.sort(key=lambda x: x['average_percentage'])
+            
+            return {
+                'report_type': 'grades',
+                'data': report_data,
+                'summary': self._grade_report_summary(report_data)
+            }
+        
+        elif report_type == 'performance':
+            # Combined performance report
+            students = User.objects.filter(
+                role='student',
+                pk__in=list(Grade.objects.filter(teacher=teacher).values_list('student_id', flat=True).distinct())
+            )
+            
+            performance_data = []
+            for student in students:
+                grades = Grade.objects.filter(student=student, teacher=teacher)
+                attendance = Attendance.objects.filter(student=student, taken_by=teacher)
                 
-                performance_data = []
-                for student in students:
-                    grades = Grade.objects.filter(student=student, teacher=teacher)
-                    attendance = Attendance.objects.filter(student=student, taken_by=teacher)
-                    
-                    avg_grade = grades.aggregate(avg=models.Avg('score'))['avg'] or 0
-                    total_attendance = attendance.count()
-                    present_count = attendance.filter(status='present').count()
-                    attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0
-                    
-                    performance_data.append({
-                        'student': student.get_full_name(),
-                        'average_grade': round(avg_grade, 2),
-                        'attendance_rate': round(attendance_rate, 1),
-                        'total_assessments': grades.count(),
-                        'performance_status': self._get_performance_status(avg_grade, attendance_rate)
-                    })
+                avg_grade = grades.aggregate(avg=models.Avg('score'))['avg'] or 0
+                total_attendance = attendance.count()
+                present_count = attendance.filter(status='present').count()
+                attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0
                 
-                return Response({
-                    'report_type': 'performance',
-                    'data': performance_data,
-                    'summary': {
-                        'total_students': len(performance_data),
-                        'excellent_performers': len([p for p in performance_data if p['performance_status'] == 'Excellent']),
-                        'at_risk_students': len([p for p in performance_data if p['performance_status'] == 'At Risk'])
-                    }
+                performance_data.append({
+                    'student': student.get_full_name(),
+                    'average_grade': round(float(avg_grade), 2),
+                    'attendance_rate': round(attendance_rate, 1),
+                    'total_assessments': grades.count(),
+                    'performance_status': self._get_performance_status(avg_grade, attendance_rate)
                 })
             
-            else:
-                # Summary report
-                return Response({
-                    'report_type': 'summary',
-                    'subjects_taught': teacher.subjects.count(),
-                    'total_students': Grade.objects.filter(teacher=teacher).values('student').distinct().count(),
-                    'total_grades_entered': Grade.objects.filter(teacher=teacher).count(),
-                    'total_attendance_records': Attendance.objects.filter(taken_by=teacher).count(),
-                    'recent_activity': {
-                        'grades_this_month': Grade.objects.filter(
-                            teacher=teacher,
-                            date_recorded__gte=date.today() - timedelta(days=30)
-                        ).count(),
-                        'attendance_this_month': Attendance.objects.filter(
-                            taken_by=teacher,
-                            date__gte=date.today() - timedelta(days=30)
-                        ).count()
-                    }
-                })
-                
-        except Teacher.DoesNotExist:
-            return Response({"error": "Teacher profile not found"}, status=404)
-    
+            return {
+                'report_type': 'performance',
+                'data': performance_data,
+                'summary': {
+                    'total_students': len(performance_data),
+                    'excellent_performers': len([p for p in performance_data if p['performance_status'] == 'Excellent']),
+                    'at_risk_students': len([p for p in performance_data if p['performance_status'] == 'At Risk'])
+                }
+            }
+        
+        else:
+            # Summary report
+            return {
+                'report_type': 'summary',
+                'subjects_taught': teacher.subjects.count(),
+                'total_students': Grade.objects.filter(teacher=teacher).values('student').distinct().count(),
+                'total_grades_entered': Grade.objects.filter(teacher=teacher).count(),
+                'total_attendance_records': Attendance.objects.filter(taken_by=teacher).count(),
+                'recent_activity': {
+                    'grades_this_month': Grade.objects.filter(
+                        teacher=teacher,
+                        date_recorded__gte=date.today() - timedelta(days=30)
+                    ).count(),
+                    'attendance_this_month': Attendance.objects.filter(
+                        taken_by=teacher,
+                        date__gte=date.today() - timedelta(days=30)
+                    ).count()
+                }
+            }
+
+    def _grade_report(self, grades):
+        """Per-student grade report rows from arrays: one grades query plus one for names."""
+        book = gradebook.GradeBook.from_queryset(grades, extra=('subject_id', 'date_recorded'))
+        percentages = book.percentages.round(1)
+        stats = book.per_student(percentages)
+        names = {u.pk: u.get_full_name() for u in User.objects.filter(pk__in=book.students.tolist())}
+        subjects = dict(Subject.objects.filter(pk__in=set(book.extra.get('subject_id', ()))).values_list('id', 'name'))
+
+        student_index = book.student_index.tolist()
+        student_grades = defaultdict(list)
+        for i, percentage in enumerate(percentages.tolist()):
+            student_grades[student_index[i]].append({
+                'subject': subjects.get(book.extra['subject_id'][i]),
+                'grade_type': book.grade_types[i],
+                'score': float(book.scores[i]),
+                'full_mark': float(book.full_marks[i]),
+                'percentage': percentage,
+                'date': book.extra['date_recorded'][i].strftime('%Y-%m-%d')
+            })
+
+        report_data = [
+            {
+                'student': names.get(int(student_id), ''),
+                'grades': student_grades[i],
+                'average_percentage': round(float(stats['mean'][i]), 1),
+                'total_assessments': int(stats['count'][i]),
+                'highest_score': float(stats['max'][i]),
+                'lowest_score': float(stats['min'][i])
+            }
+            for i, student_id in enumerate(book.students)
+        ]
+        # Sort by average percentage (lowest first for attention)
+        report_data.sort(key=lambda x: x['average_percentage'])
+        return report_data
+
+    def _grade_report_summary(self, report_data):
+        return {
+            'total_students': len(report_data),
+            'class_average': round(sum(r['average_percentage'] for r in report_data) / len(report_data), 1) if report_data else 0,
+            'students_below_60': len([r for r in report_data if r['average_percentage'] < 60]),
+            'students_above_90': len([r for r in report_data if r['average_percentage'] >= 90])
+        }
+
     def _get_performance_status(self, avg_grade, attendance_rate):
         """Helper method to determine student performance status"""
         if avg_grade >= 85 and attendance_rate >= 90:
@@ -812,38 +896,17 @@ class TeacherUtilityViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def available_subjects(self, request):
         """Get all subjects available for assignment"""
-        subjects = Subject.objects.all().order_by('name')
-        return Response([
-            {
-                "id": subject.id,
-                "name": subject.name,
-                "code": subject.code,
-                "department": subject.department,
-                "level": subject.level
-            } for subject in subjects
-        ])
+        return reference_data.cached_response(request, 'subjects', reference_data.subjects)
     
     @action(detail=False, methods=['get'])
     def available_sections(self, request):
-        """Get all sections available for teaching"""
-        sections = Section.objects.all().order_by('class_group__name', 'name')
-        return Response([
-            {
-                "id": section.id,
-                "name": f"{section.class_group.name} - Section {section.name}",
-                "class_group": section.class_group.name,
-                "level": section.class_group.level,
-                "program": section.class_group.academic_program
-            } for section in sections
-        ])
+        """Get the sections of the teacher's school available for teaching"""
+        school_id = user_school_id(request.user)
+        return reference_data.cached_response(
+            request, 'sections', lambda: reference_data.sections(school_id), scope=school_id,
+        )
     
     @action(detail=False, methods=['get'])
     def grade_types(self, request):
         """Get available grade types"""
-        return Response([
-            {"value": "assignment", "label": "Assignment"},
-            {"value": "quiz", "label": "Quiz"},
-            {"value": "midterm", "label": "Midterm Exam"},
-            {"value": "final", "label": "Final Exam"},
-            {"value": "project", "label": "Project"}
-        ])
\ No newline at end of file
+        return reference_data.respond(request, reference_data.GRADE_TYPES_ETAG, lambda: reference_data.GRADE_TYPES)
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Per-school tenancy.
+
+StudentProfile, StaffProfile, Teacher, Section, Grade and Attendance carry a
+`school` FK and use SchoolScopedQuerySet as their manager, so
+`Model.objects.for_user(user)` narrows any of them to what the user may see:
+
+- national, regional and zone offices (and superusers without a school):
+  everything
+- wereda offices: schools of the weredas they manage
+- everyone else: their own school, taken from the token's school claim or
+  their role profile; nothing at all when they have none
+
+SchoolScopedViewSetMixin applies this to a viewset's get_queryset() and keeps
+updates by a school-bound user inside that user's school.
+"""
+
+from django.db import models
+
+from .sharding import is_sharded, sharding_enabled, shard_for_school
+
+UNSCOPED_ROLES = {'national_office', 'regional_office', 'zone_office'}
+
+_NOT_LOADED = object()
+
+
+def user_school_id(user):
+    """School the user belongs to, or None. Resolved at most once per user object."""
+    school_id = getattr(user, '_tenant_school_id', _NOT_LOADED)
+    if school_id is not _NOT_LOADED:
+        return school_id
+    if 'school_id' in user.__dict__:
+        # Set from the JWT claims by StatelessRoleJWTAuthentication.
+        school_id = user.school_id
+    else:
+        # Imported here to avoid a cycle: models import this module.
+        from .authentication import get_role_profile
+        from .tokens import school_id_for
+        school_id = school_id_for(user, get_role_profile(user))
+    user._tenant_school_id = school_id
+    return school_id
+
+
+class SchoolScopedQuerySet(models.QuerySet):
+    def for_school(self, school_id):
+        queryset = self.filter(school_id=school_id)
+        if is_sharded(self.model) and sharding_enabled():
+            queryset = queryset.using(shard_for_school(school_id))
+        return queryset
+
+    def create(self, **kwargs):
+        if self._db is None and is_sharded(self.model) and sharding_enabled():
+            # Let the router place the row by its school rather than sending
+            # it wherever an unbound queryset would go.
+            obj = self.model(**kwargs)
+            obj.save(force_insert=True)
+            return obj
+        return super().create(**kwargs)
+
+    def for_user(self, user):
+        """Rows of the schools `user` is allowed to see."""
+        if not user.is_authenticated:
+            return self.none()
+        if user.role in UNSCOPED_ROLES:
+            return self
+        if user.role == 'wereda_office':
+            if is_sharded(self.model) and sharding_enabled():
+                # No join to School on a shard; resolve the ids on default.
+                from .models import School
+                return self.filter(school_id__in=list(
+                    School.objects.filter(wereda__manager_id=user.pk).values_list('id', flat=True)
+                ))
+            return self.filter(school__wereda__manager_id=user.pk)
+        school_id = user_school_id(user)
+        if school_id is not None:
+            return self.for_school(school_id)
+        # Checked last: on a claims-built user this loads the full row.
+        return self if user.is_superuser else self.none()
+
+
+class SchoolScopedViewSetMixin:
+    """Scopes get_queryset() to the requesting user's school."""
+
+    def get_queryset(self):
+        return super().get_queryset().for_user(self.request.user)
+
+    def own_school_id(self):
+        """School new rows must belong to when the user is bound to a single school."""
+        user = self.request.user
+        if user.role in UNSCOPED_ROLES or user.role == 'wereda_office':
+            return None
+        return user_school_id(user)
+
+    def perform_update(self, serializer):
+        # A school-bound user can edit rows of their school but not move them out of it
+        school_id = self.own_school_id()
+        serializer.save(**({'school_id': school_id} if school_id is not None else {}))
@@ -0,0 +1,282 @@
+"""
+Term results, GPA and class rank.
+
+TermResult holds, per (student, subject, semester), the weighted term
+percentage: the mean percentage of each grade_type, weighted by the
+subject/semester's AssessmentWeight policy and renormalised over the grade
+types the student actually has. Letters use the gradebook bands and
+GRADE_POINTS (A 4.0 ... F 0.0). TermSummary holds the credit-weighted GPA
+of a student's semester (Subject.credit_hours) and their rank in the
+section; Student.gpa is the cumulative GPA over every semester.
+
+- `manage.py compute_term_results` recomputes whole semesters, optionally
+  one school at a time, in one pass: a single grouped aggregate per
+  academic database feeds every result.
+- Saving or deleting a Grade recomputes just that student's result in
+  that subject, their summary, their section's ranks and their Student.gpa
+  (see signals). Inside deferred() the changes are collected and each
+  semester is recomputed once on the way out (after the commit, in a
+  transaction); TermResultsMiddleware does that for every request, so a
+  40-grade POST costs one recompute rather than 40.
+"""
+
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Max, Q, Sum
+
+from .archive import grades_for
+from .gradebook import GRADE_BANDS, GRADE_TYPE_WEIGHTS
+from .models import AssessmentWeight, Semester, Student, Subject, TermResult, TermSummary
+from .sharding import across_shards
+
+GRADE_POINTS = getattr(settings, 'GRADE_POINTS', {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0})
+
+
+def letter_for(percentage):
+    for label, cutoff in GRADE_BANDS:
+        if percentage >= cutoff:
+            return label
+    return 'F'
+
+
+# -----------------------------
+# WEIGHT POLICY
+# -----------------------------
+def weights_for(subject_ids, semester_id):
+    """
+    {subject_id: {grade_type: weight}}. The most specific AssessmentWeight set
+    wins: subject+semester, subject, semester, global, then GRADE_TYPE_WEIGHTS.
+    """
+    rows = AssessmentWeight.objects.filter(
+        Q(subject_id__in=subject_ids) | Q(subject__isnull=True),
+        Q(semester_id=semester_id) | Q(semester__isnull=True),
+    ).values_list('subject_id', 'semester_id', 'grade_type', 'weight')
+    levels = defaultdict(dict)
+    for subject_id, row_semester_id, grade_type, weight in rows:
+        levels[(subject_id, row_semester_id)][grade_type] = float(weight)
+
+    policy = {}
+    for subject_id in subject_ids:
+        for scope in ((subject_id, semester_id), (subject_id, None), (None, semester_id), (None, None)):
+            if scope in levels:
+                policy[subject_id] = levels[scope]
+                break
+        else:
+            policy[subject_id] = GRADE_TYPE_WEIGHTS
+    return policy
+
+
+def weighted_percentage(type_averages, weights):
+    """Weighted mean of {grade_type: average %}; a plain mean when no present type has a weight."""
+    used = {t: weights.get(t, 0) for t in type_averages if weights.get(t, 0) > 0}
+    if not used:
+        return sum(type_averages.values()) / len(type_averages)
+    return sum(type_averages[t] * w for t, w in used.items()) / sum(used.values())
+
+
+# -----------------------------
+# COMPUTATION
+# -----------------------------
+def _scope(model, semester, school_id=None, student_ids=None):
+    queryset = model.objects.filter(semester=semester)
+    if school_id is not None:
+        queryset = queryset.filter(school_id=school_id)
+    if student_ids is not None:
+        queryset = queryset.filter(student_id__in=student_ids)
+    return queryset
+
+
+def _grade_totals(semester, school_id, student_ids, subject_ids):
+    """{(student_id, subject_id): {'types': {grade_type: [percent sum, n]}, school_id, section_id}}"""
+    grades = grades_for(semester.academic_year).filter(semester_id=semester.pk, full_mark__gt=0)
+    if student_ids is not None:
+        grades = grades.filter(student_id__in=student_ids)
+    if subject_ids is not None:
+        grades = grades.filter(subject_id__in=subject_ids)
+    querysets = [grades.for_school(school_id)] if school_id is not None else across_shards(grades)
+
+    percent = ExpressionWrapper(F('score') * 100.0 / F('full_mark'), output_field=FloatField())
+    totals = defaultdict(lambda: {'types': defaultdict(lambda: [0.0, 0]), 'school_id': None, 'section_id': None})
+    for queryset in querysets:
+        for row in queryset.values('student_id', 'subject_id', 'grade_type').annotate(
+            pct=Sum(percent), n=Count('id'), school=Max('school_id'), section=Max('section_id'),
+        ):
+            entry = totals[(row['student_id'], row['subject_id'])]
+            entry['types'][row['grade_type']][0] += row['pct']
+            entry['types'][row['grade_type']][1] += row['n']
+            entry['school_id'] = entry['school_id'] or row['school']
+            entry['section_id'] = entry['section_id'] or row['section']
+    return totals
+
+
+def _results(semester, totals):
+    subject_ids = {subject_id for _, subject_id in totals}
+    credits = dict(Subject.objects.filter(pk__in=subject_ids).values_list('id', 'credit_hours'))
+    policy = weights_for(subject_ids, semester.pk)
+    results = []
+    for (student_id, subject_id), entry in totals.items():
+        averages = {t: pct / n for t, (pct, n) in entry['types'].items()}
+        percentage = weighted_percentage(averages, policy[subject_id])
+        letter = letter_for(percentage)
+        results.append(TermResult(
+            student_id=student_id, subject_id=subject_id, semester=semester,
+            school_id=entry['school_id'], section_id=entry['section_id'],
+            percentage=round(percentage, 2), letter=letter, grade_points=GRADE_POINTS[letter],
+            credit_hours=credits.get(subject_id, 0), assessments=sum(n for _, n in entry['types'].values()),
+        ))
+    return results
+
+
+def _summaries(semester, school_id, student_ids):
+    """Recompute TermSummary from TermResult for the students in scope; returns the section ids touched."""
+    points = ExpressionWrapper(F('grade_points') * F('credit_hours'), output_field=FloatField())
+    rows = _scope(TermResult, semester, school_id, student_ids).values('student_id').annotate(
+        points=Sum(points), credits=Sum('credit_hours'), avg=Avg('percentage'), n=Count('id'),
+        school=Max('school_id'), section=Max('section_id'),
+    )
+    summaries = [
+        TermSummary(
+            student_id=row['student_id'], semester=semester, school_id=row['school'], section_id=row['section'],
+            gpa=round(row['points'] / row['credits'], 2) if row['credits'] else 0.0,
+            credit_hours=row['credits'] or 0, average_percentage=round(row['avg'], 2), subjects=row['n'],
+        )
+        for row in rows
+    ]
+    existing = _scope(TermSummary, semester, school_id, student_ids)
+    # Sections students leave need re-ranking too
+    sections = set(existing.values_list('section_id', flat=True))
+    existing.exclude(student_id__in=[s.student_id for s in summaries]).delete()
+    TermSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['student', 'semester'],
+        update_fields=['school', 'section', 'gpa', 'credit_hours', 'average_percentage', 'subjects', 'computed_at'],
+        batch_size=1000,
+    )
+    return (sections | {s.section_id for s in summaries}) - {None}
+
+
+def _rank(semester, section_ids):
+    """Competition ranks (1, 2, 2, 4) by GPA, then average percentage, within each section."""
+    ranked, previous, rank = [], None, 0
+    summaries = TermSummary.objects.filter(semester=semester, section_id__in=section_ids).order_by(
+        'section_id', '-gpa', '-average_percentage'
+    ).only('id', 'section_id', 'gpa', 'average_percentage', 'class_rank')
+    for position, summary in enumerate(summaries):
+        key = (summary.section_id, summary.gpa, summary.average_percentage)
+        if previous is None or key[0] != previous[0]:
+            start = position
+        if key != previous:
+            rank = position - start + 1
+        previous = key
+        if summary.class_rank != rank:
+            summary.class_rank = rank
+            ranked.append(summary)
+    TermSummary.objects.bulk_update(ranked, ['class_rank'], batch_size=1000)
+
+
+def _cumulative_gpa(student_ids, chunk_size=1000):
+    """Write the credit-weighted GPA over every semester to Student.gpa."""
+    points = ExpressionWrapper(F('grade_points') * F('credit_hours'), output_field=FloatField())
+    for i in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[i:i + chunk_size]
+        gpas = {
+            row['student_id']: round(row['points'] / row['credits'], 2) if row['credits'] else 0.0
+            for row in TermResult.objects.filter(student_id__in=chunk).values('student_id').annotate(
+                points=Sum(points), credits=Sum('credit_hours'),
+            )
+        }
+        students = list(Student.objects.filter(user_id__in=chunk).only('id', 'user_id', 'gpa'))
+        for student in students:
+            student.gpa = gpas.get(student.user_id, 0.0)
+        Student.objects.bulk_update(students, ['gpa'])
+
+
+def compute(semester, school_id=None, student_ids=None, subject_ids=None):
+    """
+    Recompute the TermResults of a semester in scope (a school, some
+    students, some subjects), then the affected students' summaries,
+    section ranks and cumulative GPA. Returns the number of results written.
+    """
+    totals = _grade_totals(semester, school_id, student_ids, subject_ids)
+    results = _results(semester, totals)
+    with transaction.atomic():
+        scope = _scope(TermResult, semester, school_id, student_ids)
+        if subject_ids is not None:
+            scope = scope.filter(subject_id__in=subject_ids)
+        students = set(scope.values_list('student_id', flat=True)) | {r.student_id for r in results}
+        scope.delete()
+        TermResult.objects.bulk_create(results, batch_size=1000)
+
+        summary_students = sorted(students) if student_ids is not None else None
+        _rank(semester, _summaries(semester, school_id, summary_students))
+        _cumulative_gpa(sorted(students))
+    return len(results)
+
+
+# -----------------------------
+# INCREMENTAL UPDATES
+# -----------------------------
+_pending = contextvars.ContextVar('term_results_pending', default=None)
+
+
+def recompute(keys):
+    """Recompute the (student_id, subject_id, semester_id) keys, one compute() per semester."""
+    by_semester = defaultdict(lambda: (set(), set()))
+    for student_id, subject_id, semester_id in keys:
+        students, subjects = by_semester[semester_id]
+        students.add(student_id)
+        subjects.add(subject_id)
+    for semester in Semester.objects.filter(pk__in=by_semester):
+        students, subjects = by_semester[semester.pk]
+        # Pairs that didn't change come out the same; one pass is cheaper than one per pair
+        compute(semester, student_ids=sorted(students), subject_ids=sorted(subjects))
+
+
+def _schedule(keys):
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: recompute(keys))
+    else:
+        recompute(keys)
+
+
+@contextmanager
+def deferred():
+    """Collect grade changes and recompute them once on exit (nested blocks join the outer one)."""
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set(set())
+    try:
+        yield
+    finally:
+        pending = _pending.get()
+        _pending.reset(token)
+        if pending:
+            _schedule(pending)
+
+
+def grade_changed(student_id, subject_id, semester_id):
+    """Incremental update after one grade was saved or deleted."""
+    if not (student_id and subject_id and semester_id):
+        return
+    pending = _pending.get()
+    if pending is not None:
+        pending.add((student_id, subject_id, semester_id))
+    else:
+        _schedule({(student_id, subject_id, semester_id)})
+
+
+class TermResultsMiddleware:
+    """Runs every request in deferred(), so its grade writes cost one recompute."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deferred():
+            return self.get_response(request)
@@ -1,3 +1,2200 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2SHA1PasswordHasher, make_password
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import (
+    archive, attendance_bitmaps, batch_views, benchmarking, bitsets, cold_storage, compression, counters, gradebook,
+    invalidation, jobs, loadtest, renderers, report_cards, rollups, sharding, term_results,
+)
+from .authentication import (
+    StatelessRoleJWTAuthentication, get_teacher, invalidate_role_profile, load_user_with_profile,
+)
+from .batch_views import BatchAPIView
+from .cache import Namespace
+from .compact_serializers import CompactStudentSerializer
+from .hashers import LoginBusy, LoginHashPool, TunedPBKDF2PasswordHasher, login_hash_pool
+from .management.commands import benchmark_endpoints, create_sample_data
+from .models import (
+    Attendance, AttendanceArchive, AttendanceBitmap, ClassGroup, DailyRollup, EducationOffice, Grade, GradeArchive, Job,
+    ReportCardBatch, School, Section, Semester, StaffProfile, Student, StudentProfile, Subject, Teacher, TermResult,
+    TermSummary, User, Wereda,
+)
+from .reference_data import reference
+from .serializers import StudentSerializer
+from .teacher_views import TeacherUtilityViewSet
+from .tokens import PROFILE_ID_CLAIM, ROLE_CLAIM, SCHOOL_ID_CLAIM, SchoolRefreshToken, revocation_list
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+# -----------------------------
+# FIXTURES
+# -----------------------------
+def make_user(username, role, **kwargs):
+    return User.objects.create(username=username, email=f'{username}@example.com', role=role, **kwargs)
+
+
+def make_wereda(name, manager=None):
+    return Wereda.objects.create(name=name, population=1000, area=10.0, literacy_rate=50.0, manager=manager)
+
+
+def make_school(code, wereda, manager=None):
+    return School.objects.create(
+        name=f'School {code}', code=code, wereda=wereda, level='secondary', type='public', manager=manager,
+    )
+
+
+def make_student_profile(username, school, **kwargs):
+    user = make_user(username, 'student', first_name=username.title(), last_name='Test')
+    return StudentProfile.objects.create(
+        user=user, school=school, admission_no=f'ADM-{username}', student_id=f'ID-{username}',
+        class_section='Grade 10A', **kwargs,
+    )
+
+
+def make_teacher(username, school):
+    user = make_user(username, 'teacher')
+    return Teacher.objects.create(
+        user=user, school=school, employee_id=f'EMP-{username}', department='Science',
+        hire_date=date(2020, 9, 1), academic_rank='Teacher',
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def csv_upload(rows, name='students.csv'):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return SimpleUploadedFile(name, out.getvalue().encode('utf-8'), content_type='text/csv')
+
+
+def use_private_storage(test, *fields):
+    """Point STORAGES['private'], and `fields` whose storage was resolved when their model loaded, at a temp dir."""
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    override = override_settings(STORAGES={
+        **settings.STORAGES,
+        'private': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': location}},
+    })
+    override.enable()
+    test.addCleanup(override.disable)
+    for field in fields:
+        test.addCleanup(setattr, field, 'storage', field.storage)
+        field.storage = FileSystemStorage(location=location)
+
+
+class APITestCase(TestCase):
+    """
+    TestCase starting from an empty cache and a revocation list reloaded
+    from its table: both are per process and outlive each test's transaction.
+    """
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.invalidate()
+        self.addCleanup(cache.clear)
+
+
+class TenantFixtures:
+    """Two schools in one wereda, each with its manager and students, and a school in another wereda."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = make_user('officer', 'wereda_office')
+        cls.wereda = make_wereda('North', manager=cls.officer)
+        cls.manager = make_user('manager1', 'school')
+        cls.other_manager = make_user('manager2', 'school')
+        cls.school = make_school('S1', cls.wereda, manager=cls.manager)
+        cls.other_school = make_school('S2', cls.wereda, manager=cls.other_manager)
+        cls.far_school = make_school('S3', make_wereda('South'))
+        cls.students = [make_student_profile(f'alpha{i}', cls.school) for i in range(3)]
+        cls.other_students = [make_student_profile(f'beta{i}', cls.other_school) for i in range(2)]
+        cls.far_students = [make_student_profile(f'gamma{i}', cls.far_school) for i in range(2)]
+
+
+class AcademicFixtures:
+    """A school with one section, a teacher, a student, a subject and a semester of 2025/26."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_user('manager', 'school')
+        cls.school = make_school('S1', make_wereda('North'), manager=cls.manager)
+        cls.teacher = make_teacher('tom', cls.school)
+        cls.student = make_student_profile('alpha', cls.school)
+        cls.subject = Subject.objects.create(
+            name='Mathematics', code='MATH10', credit_hours=3, department='Science', level='Grade 10',
+        )
+        cls.semester = Semester.objects.create(
+            name='Semester 1', academic_year='2025/26', start_date=date(2025, 9, 1), end_date=date(2026, 1, 31),
+        )
+        group = ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General')
+        cls.section = Section.objects.create(class_group=group, school=cls.school, name='A')
+
+    @classmethod
+    def grade(cls, student=None, semester=None, grade_type='quiz', score=18, full_mark=20, **kwargs):
+        semester = semester or cls.semester
+        return Grade.objects.create(
+            student=(student or cls.student).user, subject=kwargs.pop('subject', cls.subject), section=cls.section,
+            teacher=cls.teacher, semester=semester, academic_year=semester.academic_year, grade_type=grade_type,
+            score=score, full_mark=full_mark, **kwargs,
+        )
+
+    @classmethod
+    def attendance(cls, day, status='present', student=None):
+        return Attendance.objects.create(
+            student=(student or cls.student).user, section=cls.section, subject=cls.subject, date=day,
+            status=status, taken_by=cls.teacher,
+        )
+
+
+# -----------------------------
+# BATCH
+# -----------------------------
+def pinned_school_view(self, request):
+    return Response({'pinned': sharding.pinned_school()})
+
+
+def failing_view(self, request):
+    raise RuntimeError('boom')
+
+
+class BatchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_user('manager1', 'school')
+        wereda = make_wereda('North')
+        cls.school = make_school('S1', wereda, manager=cls.manager)
+        cls.other_school = make_school('S2', wereda)
+        cls.teacher = make_teacher('teacher1', cls.school)
+        cls.student = make_student_profile('alpha', cls.school)
+        make_student_profile('beta', cls.other_school)
+        Subject.objects.create(name='Mathematics', code='MATH', credit_hours=4, department='Sci', level='10')
+
+    def batch(self, user, requests):
+        return client_for(user).post('/api/batch/', {'requests': requests}, format='json')
+
+    def test_runs_each_request_and_keeps_the_order(self):
+        response = self.batch(self.teacher.user, [
+            {'id': 'subjects', 'path': '/api/teacher-utils/available_subjects/'},
+            '/api/teacher-utils/grade_types/',
+        ])
+        self.assertEqual(response.status_code, 200)
+        subjects, grade_types = response.json()['responses']
+        self.assertEqual((subjects['id'], subjects['status']), ('subjects', 200))
+        self.assertEqual([s['code'] for s in subjects['body']], ['MATH'])
+        self.assertEqual((grade_types['id'], grade_types['status']), (1, 200))
+        self.assertIn({'value': 'final', 'label': 'Final Exam'}, grade_types['body'])
+
+    def test_sub_requests_run_as_the_caller(self):
+        response = self.batch(self.manager, ['/api/students/?fields=id', '/api/teacher-utils/grade_types/'])
+        students, grade_types = response.json()['responses']
+        self.assertEqual(students['body'], [{'id': self.student.pk}])
+        self.assertEqual(grade_types['status'], 403)
+
+    def test_unknown_and_nested_paths_fail_alone(self):
+        response = self.batch(self.teacher.user, [
+            '/api/nowhere/', '/api/batch/', '/api/teacher-utils/grade_types/',
+        ])
+        self.assertEqual([r['status'] for r in response.json()['responses']], [404, 400, 200])
+
+    def test_failing_sub_request_fails_alone(self):
+        with mock.patch.object(TeacherUtilityViewSet, 'grade_types', failing_view), \
+                self.assertLogs('api.batch_views', 'ERROR'):
+            response = self.batch(self.teacher.user, [
+                '/api/teacher-utils/grade_types/', '/api/teacher-utils/available_subjects/',
+            ])
+        self.assertEqual(response.status_code, 200)
+        failed, subjects = response.json()['responses']
+        self.assertEqual(failed, {'id': 0, 'status': 500, 'body': {'error': 'Internal server error.'}})
+        self.assertEqual(subjects['status'], 200)
+
+    def test_invalid_batches_are_refused(self):
+        too_many = ['/api/teacher-utils/grade_types/'] * (batch_views.BATCH_MAX_REQUESTS + 1)
+        for requests in ([], 'nope', too_many, [{'id': 'x'}], [{'path': '/api/students/', 'method': 'POST'}]):
+            with self.subTest(requests=requests):
+                self.assertEqual(self.batch(self.teacher.user, requests).status_code, 400)
+
+    def test_needs_authentication(self):
+        response = APIClient().post('/api/batch/', {'requests': ['/api/students/']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_worker_threads_run_in_the_callers_context(self):
+        def pinned_initial(view, request, *args, **kwargs):
+            APIView.initial(view, request, *args, **kwargs)
+            sharding.pin_school(self.school.pk)
+
+        with mock.patch.object(BatchAPIView, '_can_run_concurrently', return_value=True), \
+                mock.patch.object(BatchAPIView, 'initial', pinned_initial), \
+                mock.patch.object(TeacherUtilityViewSet, 'grade_types', pinned_school_view), \
+                mock.patch.object(TeacherUtilityViewSet, 'available_sections', failing_view), \
+                self.assertLogs('api.batch_views', 'ERROR'):
+            response = self.batch(self.teacher.user, [
+                '/api/teacher-utils/grade_types/', '/api/teacher-utils/available_sections/',
+                '/api/teacher-utils/grade_types/',
+            ])
+        self.assertEqual(
+            [(r['status'], r['body']) for r in response.json()['responses']],
+            [(200, {'pinned': self.school.pk}), (500, {'error': 'Internal server error.'}),
+             (200, {'pinned': self.school.pk})],
+        )
+
+
+# -----------------------------
+# AUTHENTICATION
+# -----------------------------
+def bearer(token):
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+class RoleProfileCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school('S1', make_wereda('North'))
+        cls.teacher = make_teacher('teacher1', cls.school)
+        cls.officer = make_user('officer', 'record_officer')
+        cls.staff = StaffProfile.objects.create(user=cls.officer, school=cls.school, department='Office')
+
+    def test_profile_model_follows_the_role(self):
+        self.assertEqual(load_user_with_profile(self.teacher.user_id)[1], self.teacher)
+        self.assertEqual(load_user_with_profile(self.officer.pk)[1], self.staff)
+        self.assertIsNone(load_user_with_profile(make_user('national', 'national_office').pk)[1])
+
+    def test_profile_is_loaded_once(self):
+        load_user_with_profile(self.teacher.user_id)
+        with self.assertNumQueries(0):
+            user, profile = load_user_with_profile(self.teacher.user_id)
+            self.assertEqual(get_teacher(user), profile)
+            self.assertEqual(user.teacher, profile)
+
+    def test_saves_make_the_cached_profile_stale(self):
+        load_user_with_profile(self.teacher.user_id)
+        Teacher.objects.filter(pk=self.teacher.pk).update(department='Maths')
+        self.assertEqual(load_user_with_profile(self.teacher.user_id)[1].department, 'Science')
+        self.teacher.department = 'Maths'
+        self.teacher.save()
+        self.assertEqual(load_user_with_profile(self.teacher.user_id)[1].department, 'Maths')
+        self.teacher.user.first_name = 'Renamed'
+        self.teacher.user.save()
+        self.assertEqual(load_user_with_profile(self.teacher.user_id)[0].first_name, 'Renamed')
+
+    def test_get_teacher_refuses_other_roles(self):
+        with self.assertRaises(Teacher.DoesNotExist):
+            get_teacher(self.officer)
+
+    def test_requests_reuse_the_cached_profile(self):
+        # A token without role claims: the user and profile come through the cache
+        token = RefreshToken.for_user(self.teacher.user).access_token
+        client = APIClient()
+        self.assertEqual(client.get('/api/teacher-utils/grade_types/', **bearer(token)).status_code, 200)
+        with self.assertNumQueries(0):
+            response = client.get('/api/teacher-utils/grade_types/', **bearer(token))
+        self.assertEqual(response.status_code, 200)
+
+    def test_inactive_user_is_refused(self):
+        token = RefreshToken.for_user(self.teacher.user).access_token
+        User.objects.filter(pk=self.teacher.user_id).update(is_active=False)
+        invalidate_role_profile(self.teacher.user_id)
+        response = APIClient().get('/api/teacher-utils/grade_types/', **bearer(token))
+        self.assertEqual(response.status_code, 401)
+
+
+class StatelessJWTTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school('S1', make_wereda('North'))
+        cls.teacher = make_teacher('teacher1', cls.school)
+        cls.manager = make_user('manager1', 'school')
+        School.objects.filter(pk=cls.school.pk).update(manager=cls.manager)
+
+    def test_tokens_carry_role_profile_and_school(self):
+        refresh = SchoolRefreshToken.for_user(self.teacher.user)
+        for token in (refresh, refresh.access_token):
+            self.assertEqual(
+                (token[ROLE_CLAIM], token[PROFILE_ID_CLAIM], token[SCHOOL_ID_CLAIM]),
+                ('teacher', self.teacher.pk, self.school.pk),
+            )
+        manager_token = SchoolRefreshToken.for_user(self.manager)
+        self.assertEqual((manager_token[PROFILE_ID_CLAIM], manager_token[SCHOOL_ID_CLAIM]), (None, self.school.pk))
+
+    def test_authentication_needs_no_query(self):
+        token = SchoolRefreshToken.for_user(self.teacher.user).access_token
+        client = APIClient()
+        # The first request loads the revocation list
+        client.get('/api/teacher-utils/grade_types/', **bearer(token))
+        with self.assertNumQueries(0):
+            response = client.get('/api/teacher-utils/grade_types/', **bearer(token))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_is_built_from_the_claims(self):
+        request = APIRequestFactory().get('/', **bearer(SchoolRefreshToken.for_user(self.teacher.user).access_token))
+        revocation_list.is_revoked({})
+        with self.assertNumQueries(0):
+            user, _ = StatelessRoleJWTAuthentication().authenticate(request)
+        self.assertEqual((user.pk, user.role, user.school_id), (self.teacher.user_id, 'teacher', self.school.pk))
+        self.assertEqual(user.email, self.teacher.user.email)
+
+    def test_login_issues_claims(self):
+        user = self.teacher.user
+        with mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 1000):
+            user.set_password('Pass#123')
+            user.save()
+            response = APIClient().post('/api/login/', {'email': user.email, 'password': 'Pass#123'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(AccessToken(response.json()['access_token'])[SCHOOL_ID_CLAIM], self.school.pk)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        refresh = SchoolRefreshToken.for_user(self.teacher.user)
+        access = refresh.access_token
+        client = APIClient()
+        response = client.post('/api/logout/', {'refresh_token': str(refresh)}, format='json', **bearer(access))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/teacher-utils/grade_types/', **bearer(access)).status_code, 401)
+        self.assertTrue(revocation_list.is_revoked(refresh))
+        fresh = SchoolRefreshToken.for_user(self.teacher.user).access_token
+        self.assertEqual(client.get('/api/teacher-utils/grade_types/', **bearer(fresh)).status_code, 200)
+
+    def test_deactivation_revokes_issued_tokens(self):
+        token = SchoolRefreshToken.for_user(self.teacher.user).access_token
+        self.teacher.user.is_active = False
+        self.teacher.user.save()
+        self.assertEqual(APIClient().get('/api/teacher-utils/grade_types/', **bearer(token)).status_code, 401)
+
+
+class CheapPBKDF2SHA1PasswordHasher(PBKDF2SHA1PasswordHasher):
+    iterations = 1000
+
+
+@mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 1000)
+class LoginTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('teacher1', 'teacher')
+
+    def login(self, password='Pass#123', email='teacher1@example.com'):
+        return APIClient().post('/api/login/', {'email': email, 'password': password}, format='json')
+
+    def store_password(self, hasher):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('Pass#123', hasher=hasher))
+
+    def test_outdated_hashes_are_upgraded_on_login(self):
+        # Hashers of Django's defaults still verify, then move to the policy's
+        for hasher in (CheapPBKDF2SHA1PasswordHasher(), 'scrypt'):
+            with self.subTest(hasher):
+                self.store_password(hasher)
+                self.assertEqual(self.login().status_code, 200)
+                self.user.refresh_from_db()
+                self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_weaker_iteration_count_is_upgraded(self):
+        with mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 500):
+            self.store_password('default')
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_wrong_password_keeps_the_hash(self):
+        self.store_password(CheapPBKDF2SHA1PasswordHasher())
+        stored = User.objects.get(pk=self.user.pk).password
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, stored)
+
+    def test_unknown_email_is_hashed_too(self):
+        with mock.patch.object(login_hash_pool, 'run', wraps=login_hash_pool.run) as run:
+            self.assertEqual(self.login(email='nobody@example.com').status_code, 401)
+        run.assert_called_once()
+
+    def test_busy_pool_answers_503(self):
+        self.store_password('default')
+        with mock.patch.object(login_hash_pool, 'run', side_effect=LoginBusy):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+
+class LoginHashPoolTests(TestCase):
+    def test_refuses_work_beyond_workers_and_queue(self):
+        pool = LoginHashPool(workers=1, queue_size=1, timeout=5)
+        release = threading.Event()
+        busy = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+        for thread in busy:
+            thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(LoginBusy):
+            pool.run(lambda: True)
+        release.set()
+        for thread in busy:
+            thread.join()
+        self.assertTrue(pool.run(lambda: True))
+
+    def test_slow_hash_times_out(self):
+        pool = LoginHashPool(workers=1, queue_size=0, timeout=0.05)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with self.assertRaises(LoginBusy):
+            pool.run(release.wait)
+
+
+# -----------------------------
+# TENANCY
+# -----------------------------
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TenancyTests(TenantFixtures, APITestCase):
+    def student_ids(self, user):
+        response = client_for(user).get('/api/students/')
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.json()}
+
+    def test_school_manager_sees_own_school_only(self):
+        self.assertEqual(self.student_ids(self.manager), {s.pk for s in self.students})
+
+    def test_wereda_office_sees_schools_of_its_weredas(self):
+        expected = {s.pk for s in self.students + self.other_students}
+        self.assertEqual(self.student_ids(self.officer), expected)
+
+    def test_national_office_sees_everything(self):
+        national = make_user('national', 'national_office')
+        self.assertEqual(self.student_ids(national), set(StudentProfile.objects.values_list('id', flat=True)))
+
+    def test_user_without_school_sees_nothing(self):
+        self.assertEqual(self.student_ids(make_user('stray', 'vice_director')), set())
+
+    def test_other_school_detail_is_not_found(self):
+        response = client_for(self.manager).get(f'/api/students/{self.other_students[0].pk}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_ignores_school_of_school_bound_user(self):
+        response = client_for(self.manager).post('/api/students/', {
+            'admission_no': 'ADM-new', 'class_section': 'Grade 9B', 'first_name': 'New', 'last_name': 'Pupil',
+            'email': 'new@example.com', 'school': self.other_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(StudentProfile.objects.get(pk=response.json()['id']).school_id, self.school.pk)
+
+    def test_update_keeps_school_of_school_bound_user(self):
+        student = self.students[0]
+        response = client_for(self.manager).patch(f'/api/students/{student.pk}/', {
+            'class_section': 'Grade 11A', 'school': self.other_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        student.refresh_from_db()
+        self.assertEqual((student.class_section, student.school_id), ('Grade 11A', self.school.pk))
+
+    def test_teacher_update_keeps_school_of_school_bound_user(self):
+        teacher = make_teacher('tom', self.school)
+        response = client_for(self.manager).patch(f'/api/teachers/{teacher.pk}/', {
+            'department': 'Maths', 'school': self.far_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        teacher.refresh_from_db()
+        self.assertEqual((teacher.department, teacher.school_id), ('Maths', self.school.pk))
+
+    def test_update_by_office_can_move_school(self):
+        national = make_user('national', 'national_office')
+        student = self.students[0]
+        response = client_for(national).patch(f'/api/students/{student.pk}/', {
+            'school': self.other_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        student.refresh_from_db()
+        self.assertEqual(student.school_id, self.other_school.pk)
+
+    def test_create_by_office_takes_requested_school(self):
+        national = make_user('national', 'national_office')
+        response = client_for(national).post('/api/students/', {
+            'admission_no': 'ADM-new', 'class_section': 'Grade 9B', 'first_name': 'New', 'last_name': 'Pupil',
+            'email': 'new@example.com', 'school': self.other_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(StudentProfile.objects.get(pk=response.json()['id']).school_id, self.other_school.pk)
+
+    def test_staff_create_ignores_school_of_school_bound_user(self):
+        response = client_for(self.manager).post('/api/employees/', {
+            'department': 'Office', 'role': 'record_officer', 'first_name': 'Rec', 'last_name': 'Officer',
+            'phone': '0911000000', 'email': 'rec@example.com', 'school': self.other_school.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(StaffProfile.objects.get(user__email='rec@example.com').school_id, self.school.pk)
+
+    def test_import_puts_rows_in_importers_school(self):
+        upload = csv_upload([
+            {'admission_no': 'ADM-i1', 'class_section': 'Grade 10A', 'first_name': 'Imp', 'last_name': 'One',
+             'email': 'imp1@example.com', 'school': self.other_school.pk, 'dob': ''},
+            {'admission_no': 'ADM-i2', 'class_section': 'Grade 10A', 'first_name': 'Imp', 'last_name': 'Two',
+             'email': 'imp2@example.com', 'school': '', 'dob': '01/02/2010'},
+        ])
+        response = client_for(self.manager).post('/api/students/import_csv/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        imported = StudentProfile.objects.filter(admission_no__in=['ADM-i1', 'ADM-i2'])
+        self.assertEqual(sorted(imported.values_list('school_id', flat=True)), [self.school.pk] * 2)
+        self.assertEqual(imported.get(admission_no='ADM-i2').dob, date(2010, 2, 1))
+
+    def test_failed_import_leaves_nothing_behind(self):
+        users = User.objects.count()
+        upload = csv_upload([
+            {'admission_no': 'ADM-i1', 'class_section': 'Grade 10A', 'first_name': 'Imp', 'last_name': 'One',
+             'email': 'imp1@example.com'},
+            # Taken admission number: the second row fails after the first was written
+            {'admission_no': self.students[0].admission_no, 'class_section': 'Grade 10A', 'first_name': 'Imp',
+             'last_name': 'Two', 'email': 'imp2@example.com'},
+        ])
+        response = client_for(self.manager).post('/api/students/import_csv/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Nothing was imported', response.json()['error'])
+        self.assertEqual(User.objects.count(), users)
+
+    def test_export_can_be_imported_again(self):
+        exported = client_for(self.manager).get('/api/students/export_csv/')
+        self.assertEqual(exported.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(exported.content.decode('utf-8'))))
+        self.assertEqual({row['school'] for row in rows}, {str(self.school.pk)})
+        self.assertEqual(len(rows), len(self.students))
+        # The export carries the profile columns only; re-import one row into the other school
+        row = rows[0]
+        StudentProfile.objects.filter(admission_no=row['admission_no']).delete()
+        upload = csv_upload([row])
+        response = client_for(self.other_manager).post('/api/students/import_csv/', {'file': upload},
+                                                        format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(StudentProfile.objects.get(admission_no=row['admission_no']).school_id, self.other_school.pk)
+
+
+# -----------------------------
+# ROLLUP COUNTERS
+# -----------------------------
+class RollupCounterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.north = make_wereda('North')
+        self.south = make_wereda('South')
+        self.s1 = make_school('S1', self.north)
+        self.s2 = make_school('S2', self.north)
+        self.s3 = make_school('S3', self.south)
+
+    def assertCounts(self, obj, *expected):
+        obj.refresh_from_db()
+        if isinstance(obj, School):
+            actual = (obj.student_count, obj.teacher_count)
+        else:
+            actual = (obj.number_of_schools, obj.number_of_students, obj.number_of_teachers)
+        self.assertEqual(actual, expected)
+
+    def test_create_and_delete_members_adjust_school_and_wereda(self):
+        student = make_student_profile('alpha', self.s1)
+        make_student_profile('beta', self.s1)
+        teacher = make_teacher('tom', self.s1)
+        self.assertCounts(self.s1, 2, 1)
+        self.assertCounts(self.north, 2, 2, 1)
+
+        student.delete()
+        teacher.delete()
+        self.assertCounts(self.s1, 1, 0)
+        self.assertCounts(self.north, 2, 1, 0)
+
+    def test_moving_a_member_moves_the_count(self):
+        student = make_student_profile('alpha', self.s1)
+        student.school = self.s3
+        student.save()
+        self.assertCounts(self.s1, 0, 0)
+        self.assertCounts(self.s3, 1, 0)
+        self.assertCounts(self.north, 2, 0, 0)
+        self.assertCounts(self.south, 1, 1, 0)
+
+    def test_saving_other_fields_leaves_counts_alone(self):
+        student = make_student_profile('alpha', self.s1)
+        student.class_section = 'Grade 11A'
+        student.save(update_fields=['class_section'])
+        student.save()
+        self.assertCounts(self.s1, 1, 0)
+
+    def test_counts_never_go_below_zero(self):
+        counters.adjust_school(self.s1.pk, students=-5, teachers=-1)
+        self.assertCounts(self.s1, 0, 0)
+        self.assertCounts(self.north, 2, 0, 0)
+
+    def test_school_moving_wereda_takes_its_counts(self):
+        make_student_profile('alpha', self.s1)
+        make_teacher('tom', self.s1)
+        school = School.objects.get(pk=self.s1.pk)
+        school.wereda = self.south
+        school.save()
+        self.assertCounts(self.north, 1, 0, 0)
+        self.assertCounts(self.south, 2, 1, 1)
+
+        school.delete()
+        self.assertCounts(self.south, 1, 0, 0)
+
+    def test_save_of_a_stale_row_keeps_the_counters(self):
+        stale = School.objects.get(pk=self.s1.pk)
+        make_student_profile('alpha', self.s1)
+        stale.phone = '555-0100'
+        stale.save()
+        self.assertCounts(self.s1, 1, 0)
+        self.assertEqual(School.objects.get(pk=self.s1.pk).phone, '555-0100')
+
+    def test_reconcile_repairs_drift(self):
+        make_student_profile('alpha', self.s1)
+        make_teacher('tom', self.s2)
+        School.objects.filter(pk=self.s1.pk).update(student_count=7)
+        Wereda.objects.filter(pk=self.south.pk).update(number_of_schools=0, number_of_teachers=3)
+
+        out = StringIO()
+        call_command('reconcile_rollup_counters', '--dry-run', stdout=out)
+        self.assertIn('would fix 1 schools and 1 weredas', out.getvalue())
+        self.assertCounts(self.s1, 7, 0)
+
+        call_command('reconcile_rollup_counters', stdout=StringIO())
+        self.assertCounts(self.s1, 1, 0)
+        self.assertCounts(self.north, 2, 1, 1)
+        self.assertCounts(self.south, 1, 0, 0)
+
+
+# -----------------------------
+# ROLLUPS
+# -----------------------------
+class RollupTests(APITestCase):
+    day = date(2025, 3, 3)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.regional = EducationOffice.objects.create(name='Region', level='regional', location='R')
+        cls.zone_officer = make_user('zone', 'zone_office')
+        cls.zone = EducationOffice.objects.create(
+            name='Zone', level='zone', location='Z', parent=cls.regional, manager=cls.zone_officer,
+        )
+        cls.wereda_officer = make_user('officer', 'wereda_office')
+        cls.north = make_wereda('North', manager=cls.wereda_officer)
+        cls.north.education_office = cls.zone
+        cls.north.save()
+        cls.south = make_wereda('South')
+        cls.manager = make_user('manager', 'school')
+        cls.s1 = make_school('S1', cls.north, manager=cls.manager)
+        cls.s2 = make_school('S2', cls.north)
+        cls.s3 = make_school('S3', cls.south)
+
+        group = ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General')
+        cls.section = Section.objects.create(class_group=group, school=cls.s1, name='A')
+        for n, status in enumerate(['present', 'present', 'absent']):
+            student = make_student_profile(f'alpha{n}', cls.s1)
+            Attendance.objects.create(
+                school=cls.s1, student=student.user, section=cls.section, date=cls.day, status=status,
+            )
+        rollups.rebuild_day(cls.day)
+
+    def get(self, user, path, **params):
+        params.setdefault('start', self.day.isoformat())
+        params.setdefault('end', self.day.isoformat())
+        return client_for(user).get(f'/api/rollups/{path}', params)
+
+    def test_rebuild_rolls_sections_up_to_every_office(self):
+        rows = {
+            (r.node_type, r.node_id): (r.attendance_present, r.attendance_total)
+            for r in DailyRollup.objects.filter(date=self.day)
+        }
+        for node in [('section', self.section.pk), ('school', self.s1.pk), ('wereda', self.north.pk),
+                     ('office', self.zone.pk), ('office', self.regional.pk)]:
+            self.assertEqual(rows[node], (2, 3), node)
+        self.assertNotIn(('wereda', self.south.pk), rows)
+
+    def test_school_manager_sees_only_their_school(self):
+        response = self.get(self.manager, '')
+        self.assertEqual(
+            [(c['node_type'], c['node_id']) for c in response.data['children']], [('school', self.s1.pk)],
+        )
+
+        response = self.get(self.manager, 'drilldown/', node_type='school', node_id=self.s1.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['attendance_rate'], 66.67)
+        self.assertEqual([c['node_id'] for c in response.data['children']], [self.section.pk])
+        self.assertEqual(
+            self.get(self.manager, 'drilldown/', node_type='section', node_id=self.section.pk).status_code, 200,
+        )
+
+        for node_type, node_id in [('school', self.s2.pk), ('wereda', self.north.pk), ('office', self.zone.pk)]:
+            self.assertEqual(self.get(self.manager, 'drilldown/', node_type=node_type, node_id=node_id).status_code, 404)
+            self.assertEqual(self.get(self.manager, 'series/', node_type=node_type, node_id=node_id).status_code, 404)
+
+    def test_wereda_officer_reads_below_their_wereda(self):
+        self.assertEqual(self.get(self.wereda_officer, 'drilldown/', node_type='school', node_id=self.s2.pk).status_code, 200)
+        self.assertEqual(self.get(self.wereda_officer, 'series/', node_type='school', node_id=self.s3.pk).status_code, 404)
+        self.assertEqual(self.get(self.wereda_officer, 'drilldown/', node_type='office', node_id=self.zone.pk).status_code, 404)
+
+    def test_office_manager_reads_below_their_office(self):
+        response = self.get(self.zone_officer, 'series/', node_type='wereda', node_id=self.north.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d['attendance_present'] for d in response.data['days']], [2])
+        self.assertEqual(self.get(self.zone_officer, 'drilldown/', node_type='wereda', node_id=self.south.pk).status_code, 404)
+        self.assertEqual(self.get(self.zone_officer, 'drilldown/', node_type='office', node_id=self.regional.pk).status_code, 404)
+
+    def test_national_office_reads_everything(self):
+        national = make_user('national', 'national_office')
+        response = self.get(national, '')
+        self.assertIn(('office', self.regional.pk), [(c['node_type'], c['node_id']) for c in response.data['children']])
+        self.assertIn(('wereda', self.south.pk), [(c['node_type'], c['node_id']) for c in response.data['children']])
+        self.assertEqual(self.get(national, 'drilldown/', node_type='school', node_id=self.s3.pk).status_code, 200)
+
+    def test_other_roles_are_refused(self):
+        teacher = make_teacher('tom', self.s1).user
+        self.assertEqual(self.get(teacher, 'drilldown/', node_type='school', node_id=self.s1.pk).status_code, 403)
+
+
+# -----------------------------
+# ACADEMIC SHARDS
+# -----------------------------
+@override_settings(ACADEMIC_SHARDS=settings.TEST_ACADEMIC_SHARDS)
+class ShardingTests(APITestCase):
+    databases = {'default', *settings.TEST_ACADEMIC_SHARDS}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school('S1', make_wereda('North'))
+        cls.teacher = make_teacher('tom', cls.school)
+        cls.student = make_student_profile('alpha', cls.school)
+        cls.subject = Subject.objects.create(
+            name='Mathematics', code='MATH10', credit_hours=3, department='Science', level='Grade 10',
+        )
+        cls.semester = Semester.objects.create(
+            name='Semester 1', academic_year='2025/26', start_date=date(2025, 9, 1), end_date=date(2026, 1, 31),
+        )
+        group = ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General')
+        cls.section = Section.objects.create(class_group=group, school=cls.school, name='A')
+
+    def setUp(self):
+        super().setUp()
+        sharding.placement_map.invalidate()
+        self.addCleanup(sharding.placement_map.invalidate)
+        self.home = sharding.shard_for_school(self.school.pk)
+        self.other = next(alias for alias in settings.TEST_ACADEMIC_SHARDS if alias != self.home)
+        self.grade = Grade.objects.create(
+            student=self.student.user, subject=self.subject, section=self.section, teacher=self.teacher,
+            semester=self.semester, academic_year='2025/26', grade_type='quiz', score=18, full_mark=20,
+        )
+        Attendance.objects.create(
+            student=self.student.user, section=self.section, subject=self.subject, date=date(2025, 9, 8),
+            status='present', taken_by=self.teacher,
+        )
+
+    def get(self, user, path):
+        token = SchoolRefreshToken.for_user(user).access_token
+        response = APIClient().get(path, **bearer(token))
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_rows_are_written_to_the_school_shard(self):
+        self.assertEqual(self.grade._state.db, self.home)
+        self.assertEqual(Grade.objects.using(self.home).count(), 1)
+        self.assertEqual(Grade.objects.using(self.other).count(), 0)
+        self.assertEqual(Attendance.objects.using(self.home).count(), 1)
+
+    def test_teacher_views_load_related_rows_from_default(self):
+        grades = self.get(self.teacher.user, '/api/teacher-self/grade_management/')['grades']
+        self.assertEqual(
+            [(g['student_name'], g['subject_name'], g['section_name']) for g in grades],
+            [('Alpha Test', 'Mathematics', 'A')],
+        )
+        records = self.get(self.teacher.user, '/api/teacher-self/attendance_management/')['attendance_records']
+        self.assertEqual([(r['student_name'], r['status']) for r in records], [('Alpha Test', 'present')])
+
+    def test_student_record_loads_related_rows_from_default(self):
+        manager = make_user('manager', 'school')
+        School.objects.filter(pk=self.school.pk).update(manager=manager)
+        record = self.get(manager, f'/api/students/{self.student.pk}/academic_record/')
+        self.assertEqual([g['subject_name'] for g in record['grades']], ['Mathematics'])
+
+        subjects = self.get(self.student.user, '/api/student-self/my_subjects/')
+        self.assertEqual([(s['name'], s['average_score'], s['total_grades']) for s in subjects], [('Mathematics', 18, 1)])
+
+    def test_move_school_can_be_rerun(self):
+        archived = GradeArchive.objects.create(
+            original_id=999, school=self.school, student=self.student.user, subject=self.subject,
+            section=self.section, semester=self.semester, academic_year='2024/25', grade_type='final',
+            score=70, date_recorded=timezone.now(),
+        )
+        # An earlier run copied the archive row to the target and stopped before deleting it here
+        GradeArchive.objects.using(self.other).create(
+            **{f.attname: getattr(archived, f.attname) for f in GradeArchive._meta.concrete_fields if not f.primary_key}
+        )
+
+        with mock.patch.object(counters, 'reconcile') as reconcile:
+            call_command('move_school_shard', '--school', self.school.pk, '--to', self.other, stdout=StringIO())
+        reconcile.assert_not_called()
+
+        self.assertEqual(sharding.shard_for_school(self.school.pk), self.other)
+        for model in (Grade, Attendance, GradeArchive):
+            self.assertEqual(model.objects.using(self.home).count(), 0, model)
+            self.assertEqual(model.objects.using(self.other).count(), 1, model)
+
+        self.assertEqual(sharding.move_school(self.school.pk, self.other)['Grade'], 0)
+        grades = self.get(self.teacher.user, '/api/teacher-self/grade_management/')['grades']
+        self.assertEqual([g['subject_name'] for g in grades], ['Mathematics'])
+
+
+# -----------------------------
+# ARCHIVED ACADEMIC YEARS
+# -----------------------------
+class ArchiveTests(AcademicFixtures, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.old_semester = Semester.objects.create(
+            name='Semester 1', academic_year='2024/25', start_date=date(2024, 9, 1), end_date=date(2025, 1, 31),
+        )
+        Semester.objects.filter(pk=cls.semester.pk).update(end_date=timezone.localdate() + timedelta(days=30))
+
+    def setUp(self):
+        super().setUp()
+        self.old_grade = self.grade(semester=self.old_semester, grade_type='final', score=15)
+        self.new_grade = self.grade()
+        self.attendance(date(2024, 10, 1), 'absent')
+        self.attendance(date(2025, 10, 1))
+
+    def test_only_ended_years_are_closed(self):
+        self.assertEqual(archive.closed_years(), ['2024/25'])
+        out = StringIO()
+        call_command('archive_academic_year', '--dry-run', stdout=out)
+        self.assertIn('would archive 2024/25', out.getvalue())
+        self.assertFalse(GradeArchive.objects.exists())
+
+    def test_archive_moves_the_year(self):
+        self.assertEqual(archive.archive_year('2024/25'), (1, 1))
+        self.assertEqual(list(Grade.objects.values_list('pk', flat=True)), [self.new_grade.pk])
+        self.assertEqual(list(Attendance.objects.values_list('date', flat=True)), [date(2025, 10, 1)])
+        archived = GradeArchive.objects.get()
+        self.assertEqual((archived.original_id, archived.score, archived.school_id), (self.old_grade.pk, 15, self.school.pk))
+        self.assertEqual(AttendanceArchive.objects.get().academic_year, '2024/25')
+        self.assertIsNotNone(Semester.objects.get(pk=self.old_semester.pk).archived_at)
+        self.assertEqual(archive.closed_years(), [])
+
+    def test_reads_follow_the_year(self):
+        self.assertIs(archive.grades_for('2024/25').model, Grade)
+        archive.archive_year('2024/25')
+        self.assertTrue(archive.is_archived('2024/25'))
+        self.assertIs(archive.grades_for('2024/25').model, GradeArchive)
+        self.assertIs(archive.attendance_for('2024/25').model, AttendanceArchive)
+        self.assertEqual(list(archive.grades_for('2025/26').values_list('pk', flat=True)), [self.new_grade.pk])
+        self.assertEqual(archive.attendance_for('2025/26').get().date, date(2025, 10, 1))
+        self.assertFalse(archive.attendance_for('1999/00').exists())
+
+    def test_endpoints_read_archived_years(self):
+        archive.archive_year('2024/25')
+        client = client_for(self.teacher.user)
+        grades = client.get('/api/teacher-self/grade_management/', {'academic_year': '2024/25'}).json()['grades']
+        self.assertEqual([(g['grade_type'], g['subject_name']) for g in grades], [('final', 'Mathematics')])
+        grades = client.get('/api/teacher-self/grade_management/').json()['grades']
+        self.assertEqual([g['id'] for g in grades], [self.new_grade.pk])
+
+    def test_archived_year_cannot_be_archived_again(self):
+        call_command('archive_academic_year', '--year', '2024/25', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'already archived'):
+            call_command('archive_academic_year', '--year', '2024/25', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'open semester'):
+            call_command('archive_academic_year', '--year', '2025/26', stdout=StringIO())
+
+
+# -----------------------------
+# COLD STORAGE
+# -----------------------------
+@skipUnless(cold_storage.pa, 'pyarrow is not installed')
+class ColdStorageTests(AcademicFixtures, APITestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        patcher = mock.patch.object(cold_storage, 'COLD_STORAGE_DIR', Path(root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.march = self.recorded(self.grade(grade_type='quiz', score=18), date(2025, 3, 14))
+        self.april = self.recorded(self.grade(grade_type='midterm', score=14), date(2025, 4, 2))
+        self.attendance(date(2025, 3, 10))
+
+    def recorded(self, grade, day):
+        Grade.objects.filter(pk=grade.pk).update(date_recorded=timezone.make_aware(datetime(day.year, day.month, day.day, 10)))
+        return grade
+
+    def test_months_close_after_the_grace_period(self):
+        self.assertEqual(cold_storage.last_closed_month(date(2025, 4, 5)), (2025, 2))
+        self.assertEqual(cold_storage.last_closed_month(date(2025, 4, 10)), (2025, 3))
+        self.assertEqual(cold_storage.last_closed_month(date(2025, 1, 20)), (2024, 12))
+
+    def test_export_advances_the_watermark(self):
+        self.assertIsNone(cold_storage.read_watermark('grades'))
+        self.assertEqual(cold_storage.export_dataset('grades', through=(2025, 3)), [((2025, 3), 1)])
+        self.assertEqual(cold_storage.read_watermark('grades'), (2025, 3))
+        self.assertTrue((cold_storage.partition_dir('grades', (2025, 3)) / 'data.parquet').exists())
+
+        # Nothing new below the watermark; the next run starts after it
+        self.assertEqual(cold_storage.export_dataset('grades', through=(2025, 3)), [])
+        self.assertEqual(cold_storage.export_dataset('grades', through=(2025, 5)), [((2025, 4), 1), ((2025, 5), 0)])
+        self.assertEqual(cold_storage.read_watermark('grades'), (2025, 5))
+
+    def test_rebuild_reexports_from_the_first_record(self):
+        cold_storage.export_dataset('grades', through=(2025, 4))
+        Grade.objects.filter(pk=self.march.pk).update(score=20)
+        self.assertEqual(cold_storage.export_dataset('grades', through=(2025, 4)), [])
+        self.assertEqual(cold_storage.export_dataset('grades', through=(2025, 4), rebuild=True),
+                         [((2025, 3), 1), ((2025, 4), 1)])
+        self.assertEqual(cold_storage.load('grades', columns=['score']).column('score').to_pylist(), [20.0, 14.0])
+
+    def test_load_reads_the_requested_range(self):
+        cold_storage.export_dataset('grades', through=(2025, 4))
+        table = cold_storage.load('grades', start=date(2025, 4, 1), end=date(2025, 4, 30))
+        self.assertEqual(table.column('record_id').to_pylist(), [self.april.pk])
+        self.assertEqual(table.column('grade_type').to_pylist(), ['midterm'])
+        table = cold_storage.load(
+            'grades', filter=cold_storage.pa_dataset.field('score') > 15, columns=['record_id'],
+        )
+        self.assertEqual(table.column('record_id').to_pylist(), [self.march.pk])
+        self.assertEqual(cold_storage.load('grades', start=date(2026, 1, 1)).num_rows, 0)
+
+    def test_archived_rows_keep_their_original_id(self):
+        Semester.objects.filter(pk=self.semester.pk).update(end_date=date(2025, 6, 30))
+        archive.archive_year('2025/26')
+        self.assertFalse(Grade.objects.exists())
+        cold_storage.export_dataset('grades', through=(2025, 4))
+        cold_storage.export_dataset('attendance', through=(2025, 4))
+        self.assertEqual(cold_storage.load('grades').column('record_id').to_pylist(), [self.march.pk, self.april.pk])
+        self.assertEqual(cold_storage.load('attendance').column('status').to_pylist(), ['present'])
+
+    def test_command_refuses_open_months(self):
+        with mock.patch.object(cold_storage, 'last_closed_month', return_value=(2025, 4)):
+            with self.assertRaisesMessage(CommandError, 'not closed yet'):
+                call_command('export_cold_storage', '--through', '2025-05', stdout=StringIO())
+            out = StringIO()
+            call_command('export_cold_storage', '--dataset', 'attendance', stdout=out)
+        self.assertIn('attendance 2025-03: 1 rows', out.getvalue())
+        self.assertEqual(cold_storage.read_watermark('attendance'), (2025, 4))
+
+
+# -----------------------------
+# ATTENDANCE BITMAPS
+# -----------------------------
+class BitsetTests(TestCase):
+    def check_round_trips(self):
+        days = [0, 3, 7, 8, 149]
+        data = bitsets.pack(days)
+        self.assertEqual(len(data), 19)
+        self.assertEqual(bitsets.popcount(data), 5)
+        self.assertEqual(bitsets.indexes(data), days)
+        self.assertEqual([i for i, bit in enumerate(bitsets.unpack(data, 152)) if bit], days)
+        self.assertEqual(len(bitsets.unpack(data, 4)), 4)
+        self.assertEqual([bitsets.get_bit(data, i) for i in (2, 3, 200)], [False, True, False])
+
+        grown = bitsets.set_bit(data, 160, True)
+        self.assertEqual(bitsets.indexes(grown), days + [160])
+        # Clearing the highest bits trims the trailing zero bytes again
+        self.assertEqual(bitsets.set_bit(bitsets.set_bit(grown, 160, False), 149, False), bitsets.pack(days[:-1]))
+        self.assertEqual(bitsets.set_bit(b'', 40, False), b'')
+
+        sums = bitsets.column_sums([bitsets.pack([0, 2]), bitsets.pack([2, 5]), b''], 4)
+        self.assertEqual(list(sums), [1, 0, 2, 0])
+        self.assertEqual(list(bitsets.column_sums([], 3)), [0, 0, 0])
+
+    @skipUnless(bitsets.np, 'NumPy is not installed')
+    def test_round_trips_with_numpy(self):
+        self.check_round_trips()
+
+    def test_round_trips_without_numpy(self):
+        with mock.patch.object(bitsets, 'np', None):
+            self.check_round_trips()
+
+
+@override_settings(ATTENDANCE_BITMAPS=True)
+class AttendanceBitmapTests(AcademicFixtures, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = make_student_profile('beta', self.school)
+        self.attendance(date(2025, 9, 1))
+        self.attendance(date(2025, 9, 2), 'absent')
+        self.late = self.attendance(date(2025, 9, 10))
+        self.attendance(date(2025, 9, 2), 'absent', student=self.other)
+
+    def bitmap(self, student=None):
+        return AttendanceBitmap.objects.get(student=(student or self.student).user, semester=self.semester)
+
+    def test_signals_keep_the_bitmap_in_step(self):
+        bitmap = self.bitmap()
+        self.assertEqual((bitmap.total_days, bitmap.present_days), (3, 2))
+        self.assertEqual(bitmap.days(), [
+            (date(2025, 9, 1), 'present'), (date(2025, 9, 2), 'absent'), (date(2025, 9, 10), 'present'),
+        ])
+
+        self.late.status = 'absent'
+        self.late.save()
+        self.assertEqual(self.bitmap().status_on(date(2025, 9, 10)), 'absent')
+        self.late.delete()
+        bitmap = self.bitmap()
+        self.assertIsNone(bitmap.status_on(date(2025, 9, 10)))
+        self.assertEqual((bitmap.total_days, bitmap.present_days), (2, 1))
+
+    def test_rebuild_matches_the_signals(self):
+        expected = {
+            b.student_id: (bytes(b.recorded), bytes(b.present), b.total_days, b.present_days)
+            for b in AttendanceBitmap.objects.all()
+        }
+        AttendanceBitmap.objects.all().delete()
+        self.assertEqual(attendance_bitmaps.rebuild(self.semester), 2)
+        self.assertEqual({
+            b.student_id: (bytes(b.recorded), bytes(b.present), b.total_days, b.present_days)
+            for b in AttendanceBitmap.objects.all()
+        }, expected)
+
+    def test_statistics_match_the_attendance_rows(self):
+        bitmaps = AttendanceBitmap.objects.filter(semester=self.semester)
+        self.assertEqual(attendance_bitmaps.summary(bitmaps), {
+            'total_days': 4, 'present_days': 2, 'absent_days': 2, 'attendance_percentage': 50.0,
+        })
+        self.assertEqual(attendance_bitmaps.by_student(bitmaps)[self.other.user_id]['absent_days'], 1)
+        self.assertEqual(attendance_bitmaps.daily_counts(self.semester, bitmaps), [
+            {'date': date(2025, 9, 1), 'present': 1, 'total': 1},
+            {'date': date(2025, 9, 2), 'present': 0, 'total': 2},
+            {'date': date(2025, 9, 10), 'present': 1, 'total': 1},
+        ])
+
+        response = client_for(self.student.user).get('/api/student-self/my_attendance/', {'semester': self.semester.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['statistics']['attendance_percentage'], 66.67)
+        self.assertEqual(len(response.json()['attendance']), 3)
+
+
+# -----------------------------
+# GRADEBOOK ANALYTICS
+# -----------------------------
+@skipUnless(gradebook.available(), 'NumPy is not installed')
+class GradebookTests(AcademicFixtures, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.beta = make_student_profile('beta', self.school)
+        self.gamma = make_student_profile('gamma', self.school)
+        # alpha: 50% midterm, 100% final; beta: 90% on both; gamma: a midterm only
+        self.grade(grade_type='midterm', score=50, full_mark=100)
+        self.grade(grade_type='final', score=40, full_mark=40)
+        self.grade(student=self.beta, grade_type='midterm', score=90, full_mark=100)
+        self.grade(student=self.beta, grade_type='final', score=36, full_mark=40)
+        self.grade(student=self.gamma, grade_type='midterm', score=72, full_mark=100)
+
+    def test_summary_matches_the_sql_aggregate(self):
+        grades = Grade.objects.all()
+        book = gradebook.GradeBook.from_queryset(grades)
+        summary = book.summary()
+        totals = gradebook.summarize(grades)
+        self.assertEqual(float(totals.pop('average_score')), summary['average_score'])
+        self.assertEqual(totals, {key: summary[key] for key in ('total_grades', 'grade_distribution')})
+        self.assertEqual(summary['grade_distribution'], {'A': 1, 'B': 0, 'C': 1, 'D': 0, 'F': 3})
+        self.assertEqual((summary['highest_score'], summary['lowest_score']), (90.0, 36.0))
+        self.assertEqual(book.distribution(book.percentages), {'A': 3, 'B': 0, 'C': 1, 'D': 0, 'F': 1})
+
+    def test_empty_book(self):
+        book = gradebook.GradeBook.from_queryset(Grade.objects.none())
+        self.assertEqual(book.summary()['total_grades'], 0)
+        self.assertEqual(gradebook.section_report(book), [])
+
+    def test_weighted_totals_renormalise_missing_types(self):
+        book = gradebook.GradeBook.from_queryset(Grade.objects.all())
+        totals = dict(zip(book.students.tolist(), book.weighted_totals({'midterm': 30, 'final': 40}).round(2)))
+        self.assertEqual(totals, {self.student.user_id: 78.57, self.beta.user_id: 90.0, self.gamma.user_id: 72.0})
+
+    def test_ranking_helpers(self):
+        self.assertEqual(gradebook.class_ranks([80, 90, 80, 70]).tolist(), [2, 1, 2, 4])
+        self.assertEqual(gradebook.percentile_ranks([10, 20, 20, 30]).tolist(), [12.5, 50.0, 50.0, 87.5])
+        self.assertEqual(gradebook.zscores([5, 5, 5]).tolist(), [0, 0, 0])
+        self.assertEqual(gradebook.zscores([1, 3]).tolist(), [-1, 1])
+
+    def test_section_analytics_endpoint(self):
+        client = client_for(self.teacher.user)
+        response = client.get('/api/teacher-self/grade_analytics/', {
+            'section': self.section.pk, 'subject': self.subject.pk, 'semester': self.semester.pk,
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        rows = response.json()['students']
+        self.assertEqual(
+            [(r['student_name'], r['class_rank'], r['weighted_total']) for r in rows],
+            [('Beta Test', 1, 90.0), ('Alpha Test', 2, 78.57), ('Gamma Test', 3, 72.0)],
+        )
+        self.assertEqual(rows[1]['assessments'], 2)
+        self.assertEqual(response.json()['statistics']['total_grades'], 5)
+
+        self.assertEqual(client.get('/api/teacher-self/grade_analytics/').status_code, 400)
+        with mock.patch.object(gradebook, 'np', None):
+            response = client.get('/api/teacher-self/grade_analytics/', {'section': self.section.pk})
+        self.assertEqual(response.status_code, 503)
+
+
+# -----------------------------
+# TERM RESULTS
+# -----------------------------
+class TermResultTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school('S1', make_wereda('North'))
+        cls.section = Section.objects.create(
+            class_group=ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General'),
+            school=cls.school, name='A',
+        )
+        cls.semester = Semester.objects.create(
+            name='Semester 1', academic_year='2025/26', start_date=date(2025, 9, 1), end_date=date(2026, 1, 31),
+        )
+        cls.math = Subject.objects.create(name='Mathematics', code='MATH', credit_hours=4, department='Sci', level='10')
+        cls.biology = Subject.objects.create(name='Biology', code='BIO', credit_hours=2, department='Sci', level='10')
+        cls.users = {}
+        for name in ('ana', 'ben', 'dan', 'cal'):
+            user = cls.users[name] = make_user(name, 'student')
+            Student.objects.create(
+                user=user, student_id=f'ID-{name}', enrollment_year=2025, program='General', level='Secondary',
+                current_semester='1',
+            )
+
+    def grade(self, name, subject, score, grade_type='final', full_mark=100):
+        return Grade.objects.create(
+            student=self.users[name], subject=subject, section=self.section, school=self.school,
+            semester=self.semester, academic_year=self.semester.academic_year, grade_type=grade_type,
+            score=score, full_mark=full_mark,
+        )
+
+    def grade_all(self):
+        self.grade('ana', self.math, 95)
+        self.grade('ana', self.biology, 85)
+        self.grade('ben', self.math, 85)
+        self.grade('ben', self.biology, 95)
+        self.grade('dan', self.math, 85)
+        self.grade('dan', self.biology, 95)
+        # midterm 100% (weight 30) and final 60% (weight 40): 77.14, a C
+        self.grade('cal', self.math, 50, grade_type='midterm', full_mark=50)
+        self.grade('cal', self.math, 30, full_mark=50)
+        self.grade('cal', self.biology, 95)
+
+    def results(self):
+        return {
+            (r.student.username, r.subject.code): (r.percentage, r.letter, r.grade_points)
+            for r in TermResult.objects.filter(semester=self.semester).select_related('student', 'subject')
+        }
+
+    def summaries(self):
+        return {
+            s.student.username: (s.gpa, s.average_percentage, s.class_rank)
+            for s in TermSummary.objects.filter(semester=self.semester).select_related('student')
+        }
+
+    def test_percentages_letters_and_points(self):
+        self.grade_all()
+        self.assertEqual(term_results.compute(self.semester), 8)
+        results = self.results()
+        self.assertEqual(results['ana', 'MATH'], (95.0, 'A', 4.0))
+        self.assertEqual(results['ana', 'BIO'], (85.0, 'B', 3.0))
+        self.assertEqual(results['cal', 'MATH'], (77.14, 'C', 2.0))
+
+    def test_gpa_and_competition_ranks(self):
+        self.grade_all()
+        term_results.compute(self.semester)
+        self.assertEqual(self.summaries(), {
+            'ana': (3.67, 90.0, 1),
+            'ben': (3.33, 90.0, 2),
+            'dan': (3.33, 90.0, 2),
+            'cal': (2.67, 86.07, 4),
+        })
+        self.assertEqual(Student.objects.get(user=self.users['ana']).gpa, 3.67)
+
+    def test_grade_change_updates_after_commit(self):
+        self.grade_all()
+        term_results.compute(self.semester)
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(student=self.users['cal'], subject=self.math).delete()
+            self.grade('cal', self.math, 99)
+        self.assertEqual(self.results()['cal', 'MATH'], (99.0, 'A', 4.0))
+        self.assertEqual(self.summaries()['cal'], (4.0, 97.0, 1))
+        self.assertEqual(self.summaries()['ana'][2], 2)
+
+    def test_deferred_recomputes_once(self):
+        with mock.patch.object(term_results, 'compute', wraps=term_results.compute) as compute:
+            with self.captureOnCommitCallbacks(execute=True):
+                with term_results.deferred():
+                    self.grade_all()
+            self.assertEqual(compute.call_count, 1)
+        incremental = self.results(), self.summaries()
+
+        term_results.compute(self.semester)
+        self.assertEqual((self.results(), self.summaries()), incremental)
+
+
+# -----------------------------
+# REPORT CARDS
+# -----------------------------
+class ReportCardTests(AcademicFixtures, APITestCase):
+    def setUp(self):
+        super().setUp()
+        use_private_storage(self, ReportCardBatch._meta.get_field('file'))
+        self.beta = make_student_profile('beta', self.school)
+        self.grade(grade_type='midterm', score=45, full_mark=50)
+        self.grade(grade_type='final', score=36, full_mark=40)
+        self.grade(student=self.beta, grade_type='final', score=20, full_mark=40)
+        self.attendance(date(2025, 9, 1))
+        self.attendance(date(2025, 9, 2), 'absent')
+        term_results.compute(self.semester)
+
+    def zip_names(self, batch):
+        batch.refresh_from_db()
+        with batch.file.open('rb') as f, zipfile.ZipFile(f) as archive:
+            return {name: archive.read(name).decode() for name in archive.namelist()}
+
+    def test_collect_builds_one_card_per_graded_student(self):
+        cards = report_cards.collect(self.semester, [self.section.pk])
+        self.assertEqual([card['name'] for card in cards], ['Alpha Test', 'Beta Test'])
+        alpha = cards[0]
+        self.assertEqual(alpha['subjects'][0]['assessments'], ['-', '-', '45/50', '36/40', '-'])
+        self.assertEqual((alpha['subjects'][0]['letter'], alpha['class_rank'], alpha['class_size']), ('A', 1, 2))
+        self.assertEqual((alpha['attendance']['present_days'], alpha['attendance']['absent_days']), (1, 1))
+        self.assertEqual((alpha['section'], alpha['school']), ('Grade 10 A', 'School S1'))
+        self.assertEqual(pickle.loads(pickle.dumps(cards)), cards)
+
+    def test_collect_queries_do_not_grow_with_students(self):
+        with CaptureQueriesContext(connection) as two:
+            report_cards.collect(self.semester, [self.section.pk])
+        for name in ('gamma', 'delta', 'eps'):
+            self.grade(student=make_student_profile(name, self.school), grade_type='final', score=30, full_mark=40)
+        with CaptureQueriesContext(connection) as five:
+            self.assertEqual(len(report_cards.collect(self.semester, [self.section.pk])), 5)
+        self.assertEqual(len(five), len(two))
+
+    def test_process_pool_renders_the_same_cards(self):
+        cards = report_cards.collect(self.semester, [self.section.pk])
+        pooled = list(report_cards.render_all(cards, workers=2))
+        self.assertEqual(pooled, list(report_cards.render_all(cards, workers=1)))
+
+    def test_generate_writes_the_zip(self):
+        batch = ReportCardBatch.objects.create(semester=self.semester, section=self.section, school=self.school)
+        progress = []
+        with mock.patch.object(report_cards, 'PROGRESS_EVERY', 1):
+            self.assertEqual(report_cards.generate(batch, workers=1, progress=lambda *p: progress.append(p)), 2)
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        self.assertEqual((batch.status, batch.completed, batch.progress), ('done', 2, 100.0))
+        cards = self.zip_names(batch)
+        self.assertEqual(sorted(cards), ['grade-10-a/ADM-alpha-alpha-test.html', 'grade-10-a/ADM-beta-beta-test.html'])
+        self.assertIn('Mathematics', cards['grade-10-a/ADM-alpha-alpha-test.html'])
+
+    def test_api_queues_a_job_and_serves_the_zip(self):
+        client = client_for(self.manager)
+        response = client.post('/api/report-cards/', {'semester': self.semester.pk, 'section': self.section.pk})
+        self.assertEqual(response.status_code, 201, response.content)
+        batch_id = response.json()['id']
+        self.assertEqual(client.get(f'/api/report-cards/{batch_id}/download/').status_code, 409)
+
+        job = jobs.claim('worker-1')
+        self.assertEqual(job.pk, response.json()['job_id'])
+        with override_settings(REPORT_CARD_WORKERS=1):
+            self.assertEqual(jobs.run(job), 'succeeded')
+        download = client.get(f'/api/report-cards/{batch_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download['Content-Type'], 'application/zip')
+
+        outsider = make_user('manager2', 'school')
+        make_school('S2', make_wereda('South'), manager=outsider)
+        self.assertEqual(client_for(outsider).get(f'/api/report-cards/{batch_id}/').status_code, 404)
+        response = client_for(outsider).post(
+            '/api/report-cards/', {'semester': self.semester.pk, 'section': self.section.pk},
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_pdf_needs_weasyprint(self):
+        with mock.patch.object(report_cards, 'HTML', None):
+            response = client_for(self.manager).post('/api/report-cards/', {
+                'semester': self.semester.pk, 'section': self.section.pk, 'format': 'pdf',
+            })
+        self.assertEqual(response.status_code, 503)
+
+
+# -----------------------------
+# BACKGROUND JOBS
+# -----------------------------
+_flaky_calls = []
+
+
+@jobs.task('tests.flaky', max_attempts=2)
+def flaky_task(job, fail):
+    _flaky_calls.append(job.pk)
+    if fail:
+        raise RuntimeError('boom')
+    return {'ok': True}
+
+
+@jobs.task('tests.pinned')
+def pinned_task(job):
+    return {'pinned': sharding.pinned_school()}
+
+
+@jobs.task('tests.unserializable', max_attempts=1)
+def unserializable_task(job):
+    return {'value': object()}
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        _flaky_calls.clear()
+        self.user = make_user('requester', 'school')
+
+    def test_claim_hands_a_job_to_one_worker(self):
+        job = jobs.enqueue('tests.flaky', user=self.user, fail=False)
+        claimed = jobs.claim('worker-1')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.status, claimed.worker), ('running', 'worker-1'))
+        self.assertIsNone(jobs.claim('worker-2'))
+
+    def test_claim_skips_jobs_not_due(self):
+        jobs.enqueue('tests.flaky', fail=False, run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    def test_unknown_task_is_refused(self):
+        with self.assertRaises(jobs.UnknownTask):
+            jobs.enqueue('tests.missing')
+
+    def test_success_records_result(self):
+        jobs.enqueue('tests.flaky', fail=False)
+        job = jobs.claim('worker-1')
+        self.assertEqual(jobs.run(job), 'succeeded')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.progress, job.attempts), ('succeeded', {'ok': True}, 100.0, 1))
+
+    def test_unstorable_result_fails_the_job(self):
+        jobs.enqueue('tests.unserializable')
+        job = jobs.claim('worker-1')
+        with self.assertLogs('api.jobs', 'WARNING'):
+            self.assertEqual(jobs.run(job), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('TypeError', job.error)
+
+    def test_job_runs_pinned_to_its_school(self):
+        school = make_school('S1', make_wereda('North'))
+        jobs.enqueue('tests.pinned', school_id=school.pk)
+        jobs.run(jobs.claim('worker-1'))
+        self.assertEqual(Job.objects.get().result, {'pinned': school.pk})
+        self.assertIsNone(sharding.pinned_school())
+
+    def test_failure_is_retried_with_backoff_then_fails(self):
+        jobs.enqueue('tests.flaky', fail=True)
+        job = jobs.claim('worker-1')
+        before = timezone.now()
+        with self.assertLogs('api.jobs', 'WARNING'):
+            self.assertEqual(jobs.run(job), 'queued')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=jobs.JOB_RETRY_DELAY))
+        self.assertIn('boom', job.error)
+        self.assertIsNone(jobs.claim('worker-1'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = jobs.claim('worker-1')
+        with self.assertLogs('api.jobs', 'WARNING'):
+            self.assertEqual(jobs.run(job), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(len(_flaky_calls), 2)
+
+    def test_stale_running_job_is_requeued(self):
+        job = jobs.enqueue('tests.flaky', fail=False)
+        jobs.claim('worker-1')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim('worker-2').pk, job.pk)
+
+    def test_cancel_queued_job(self):
+        job = jobs.enqueue('tests.flaky', user=self.user, fail=False)
+        response = client_for(self.user).post(f'/api/jobs/{job.pk}/cancel/')
+        self.assertEqual(response.status_code, 200, response.content)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    def test_cancel_running_job_conflicts(self):
+        job = jobs.enqueue('tests.flaky', user=self.user, fail=False)
+        jobs.claim('worker-1')
+        response = client_for(self.user).post(f'/api/jobs/{job.pk}/cancel/')
+        self.assertEqual(response.status_code, 409)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+    def test_other_users_job_is_not_found(self):
+        job = jobs.enqueue('tests.flaky', user=self.user, fail=False)
+        response = client_for(make_user('intruder', 'school')).post(f'/api/jobs/{job.pk}/cancel/')
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncReportTests(AcademicFixtures, TestCase):
+    def test_performance_report_runs_as_a_job(self):
+        self.grade(score=17)
+        self.attendance(date(2025, 9, 1))
+        response = client_for(self.teacher.user).get('/api/teacher-self/reports/?type=performance&async=1')
+        self.assertEqual(response.status_code, 202, response.content)
+        job = jobs.claim('worker-1')
+        self.assertEqual(jobs.run(job), 'succeeded')
+        job.refresh_from_db()
+        self.assertEqual(job.result['data'][0]['average_grade'], 17.0)
+        self.assertEqual(job.result['summary']['total_students'], 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AsyncImportTests(TenantFixtures, TestCase):
+    def setUp(self):
+        use_private_storage(self, Job._meta.get_field('result_file'))
+
+    def test_passwords_can_be_downloaded_once(self):
+        client = client_for(self.manager)
+        upload = csv_upload([
+            {'admission_no': 'ADM-a1', 'class_section': 'Grade 10A', 'first_name': 'Async', 'last_name': 'One',
+             'email': 'async1@example.com', 'school': self.other_school.pk},
+        ])
+        response = client.post('/api/students/import_csv/?async=1', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202, response.content)
+        job = jobs.claim('worker-1')
+        self.assertEqual(jobs.run(job), 'succeeded')
+        self.assertEqual(StudentProfile.objects.get(admission_no='ADM-a1').school_id, self.school.pk)
+
+        download = client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertIn(b'Async', b''.join(download.streaming_content).title())
+        self.assertEqual(client.get(f'/api/jobs/{job.pk}/download/').status_code, 410)
+
+
+# -----------------------------
+# SAMPLE DATA
+# -----------------------------
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SampleDataTests(AcademicFixtures, TestCase):
+    def test_rerun_only_replaces_its_own_students(self):
+        # The command looks its subjects up by name
+        Subject.objects.filter(pk=self.subject.pk).update(name='Algebra')
+        self.grade(semester=Semester.objects.create(
+            name='Semester 1', academic_year='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 1, 31),
+        ))
+        self.attendance(date(2024, 10, 1))
+        call_command('create_sample_data', stdout=StringIO())
+        call_command('create_sample_data', stdout=StringIO())
+        self.assertTrue(User.objects.filter(pk=self.student.user_id).exists())
+        self.assertEqual(Grade.objects.filter(student=self.student.user).count(), 1)
+        self.assertEqual(Attendance.objects.filter(student=self.student.user).count(), 1)
+        self.assertEqual(
+            set(User.objects.filter(role='student').values_list('username', flat=True)),
+            {'alpha', *create_sample_data.SAMPLE_STUDENTS},
+        )
+
+    def test_scale_mode_builds_seeded_schools_once(self):
+        args = [
+            '--schools', '2', '--students-per-school', '5', '--attendance-days', '2', '--books', '5', '--workers', '1',
+        ]
+        call_command('create_sample_data', *args, stdout=StringIO())
+        schools = School.objects.filter(code__startswith='SD1-')
+        self.assertEqual(schools.count(), 2)
+        self.assertEqual(StudentProfile.objects.filter(school__in=schools).count(), 10)
+        self.assertTrue(Grade.objects.filter(student__student_profile__school__in=schools).exists())
+        with self.assertRaises(CommandError):
+            call_command('create_sample_data', *args, stdout=StringIO())
+
+
+# -----------------------------
+# BENCHMARKS
+# -----------------------------
+class BenchmarkTests(TestCase):
+    def result(self, status=200, p50=10.0, queries=3):
+        return {'status': status, 'p50_ms': p50, 'p95_ms': p50, 'queries': queries, 'peak_kib': 1.0}
+
+    def check(self, old, new, threshold=20.0, min_delta=2.0):
+        command = benchmark_endpoints.Command(stdout=StringIO(), stderr=StringIO())
+        dataset = {'meta': {'dataset': {'schools': 1}}}
+        command.check_regressions({**dataset, 'results': old}, {**dataset, 'results': new}, threshold, min_delta)
+        return command.stdout.getvalue(), command.stderr.getvalue()
+
+    def test_percentiles(self):
+        timings = [float(ms) for ms in range(1, 101)]
+        self.assertEqual(benchmarking.percentile(timings, 50), 51.0)
+        self.assertEqual(benchmarking.percentile([], 95), 0)
+        self.assertEqual(
+            benchmarking.latency_summary(timings), {'p50_ms': 51.0, 'p95_ms': 95.0, 'p99_ms': 99.0, 'max_ms': 100.0},
+        )
+
+    def test_routes_cover_list_and_detail_gets(self):
+        routes = {name: (params, basename) for name, params, basename in benchmark_endpoints.api_routes()}
+        self.assertEqual(routes['student-self-my-grades'], ([], 'student-self'))
+        self.assertEqual(routes['students-detail'], (['pk'], 'students'))
+        self.assertNotIn('login', routes)
+
+    def test_unchanged_run_passes(self):
+        out, _ = self.check({'a [student]': self.result()}, {'a [student]': self.result(p50=11.0)})
+        self.assertIn('No regressions in 1 endpoint/role pairs', out)
+
+    def test_small_slowdowns_are_noise(self):
+        self.check({'a [student]': self.result(p50=1.0)}, {'a [student]': self.result(p50=2.5)})
+
+    def test_regressions_fail_the_run(self):
+        old = {key: self.result() for key in ('slow', 'queries', 'status', 'gone')}
+        new = {
+            'slow': self.result(p50=20.0), 'queries': self.result(queries=4), 'status': self.result(status=500),
+            'added': self.result(),
+        }
+        with self.assertRaisesMessage(CommandError, '3 endpoint regressions'):
+            self.check(old, new)
+
+
+# -----------------------------
+# LOAD TESTS
+# -----------------------------
+class LoadTestTests(AcademicFixtures, TestCase):
+    def recorder(self, samples):
+        recorder = loadtest.Recorder()
+        for label, status in samples:
+            recorder.record(label, status, 5.0)
+        return recorder
+
+    def test_exam_results_endpoints_answer(self):
+        subjects = [self.subject] + [
+            Subject.objects.create(
+                name=f'Subject {i}', code=f'SUB{i}', credit_hours=2, department='Science', level='Grade 10',
+            )
+            for i in range(10)
+        ]
+        for subject in subjects:
+            for grade_type, _ in Grade.GRADE_TYPE_CHOICES:
+                self.grade(subject=subject, grade_type=grade_type, score=12 if subject == self.subject else 10)
+        term_results.compute(self.semester)
+        client = client_for(self.student.user)
+        for name, _ in loadtest.ExamResults.ENDPOINTS:
+            self.assertEqual(client.get(f'/api/student-self/{name}/').status_code, 200, name)
+        data = client.get('/api/student-self/my_grades/').json()
+        self.assertEqual(len(data['grades']), 50)
+        self.assertEqual(data['statistics'], {'total_grades': 55, 'average_score': 10.18, 'subjects_count': 11})
+
+    def test_error_rate_per_request_type(self):
+        recorder = self.recorder([('GET my_grades', 500), ('GET my_grades', 200), ('GET my_results', 200)])
+        report = recorder.report(1)
+        self.assertEqual(loadtest.over_error_rate(report, 1.0), {'GET my_grades': 50.0})
+        self.assertEqual(loadtest.over_error_rate(report, 50.0), {})
+
+    def test_errors_fail_the_run(self):
+        User.objects.create(username='sd1_student', email='sd1_student@sample.local', role='student')
+        recorder = self.recorder([('POST login', 200), ('GET my_grades', 500)])
+        recorder.logged_in = 1
+        with mock.patch.object(loadtest, 'run', return_value=recorder):
+            with self.assertRaisesMessage(CommandError, '1 request types above 1% errors'):
+                call_command('loadtest', 'exam_results', '--users', '1', stdout=StringIO(), stderr=StringIO())
+            call_command(
+                'loadtest', 'exam_results', '--users', '1', '--max-error-rate', '100', stdout=StringIO(),
+            )
+
+
+# -----------------------------
+# JSON RENDERING
+# -----------------------------
+@skipUnless(renderers.available(), 'orjson is not installed')
+class ORJSONRendererTests(TestCase):
+    payload = {
+        'decimal': Decimal('87.50'),
+        'aware': datetime(2025, 9, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'offset': datetime(2025, 9, 1, 8, 30, tzinfo=dt_timezone(timedelta(hours=3))),
+        'naive': datetime(2025, 9, 1, 8, 30, 15, 999),
+        'date': date(2025, 9, 1),
+        'time': datetime(2025, 9, 1, 7, 45, 30, 250000).time(),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Teacher'),
+        'unicode': 'Ādīs Ābebā — ተማሪ',
+        'separators': 'line\u2028paragraph\u2029end',
+        'nested': [{'id': 1, 'scores': (Decimal('1.5'), 2, 3.25)}, None, True, False],
+        'int_keys': {1: 'one', 2: 'two'},
+        'empty': [],
+    }
+
+    def assertSameBytes(self, data, accepted_media_type=None, renderer_context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, renderer_context)
+        actual = renderers.ORJSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(actual, expected)
+
+    def test_same_bytes_as_drf(self):
+        self.assertSameBytes(self.payload)
+
+    def test_same_bytes_indented(self):
+        self.assertSameBytes(self.payload, 'application/json; indent=2')
+
+    def test_other_indent_falls_back(self):
+        self.assertSameBytes(self.payload, 'application/json; indent=4')
+
+    def test_same_bytes_for_serializer_output(self):
+        school = make_school('S1', make_wereda('North'))
+        make_student_profile('ana', school, dob=date(2010, 2, 1), remarks='Élève modèle')
+        make_student_profile('ben', school)
+        data = StudentSerializer(StudentProfile.objects.select_related('user'), many=True).data
+        self.assertSameBytes(data)
+
+    def test_none_renders_empty(self):
+        self.assertEqual(renderers.ORJSONRenderer().render(None), b'')
+
+    def test_parser_round_trip(self):
+        body = renderers.ORJSONRenderer().render({'name': 'ተማሪ', 'scores': [1, 2.5]})
+        parsed = renderers.ORJSONParser().parse(io.BytesIO(body))
+        self.assertEqual(parsed, {'name': 'ተማሪ', 'scores': [1, 2.5]})
+
+
+# -----------------------------
+# COMPACT LISTS
+# -----------------------------
+class CompactListTests(TenantFixtures, TestCase):
+    def test_compact_students_match_the_full_rows(self):
+        client = client_for(self.manager)
+        client.get('/api/students/')  # resolves the user's school
+        with self.assertNumQueries(1):
+            compact = client.get('/api/students/?view=compact').json()
+        full = {row['id']: row for row in client.get('/api/students/').json()}
+        self.assertEqual(sorted(row['id'] for row in compact), sorted(s.pk for s in self.students))
+        for row in compact:
+            self.assertEqual(set(row), set(CompactStudentSerializer.fields))
+            for key in ('admission_no', 'student_id', 'class_section', 'school', 'first_name', 'email'):
+                self.assertEqual(row[key], full[row['id']][key], key)
+
+    def test_compact_teachers_read_subjects_in_one_query(self):
+        subjects = [
+            Subject.objects.create(
+                name=name, code=name[:4].upper(), credit_hours=3, department='Science', level='Grade 10',
+            )
+            for name in ('Physics', 'Chemistry')
+        ]
+        for i in range(3):
+            make_teacher(f'tom{i}', self.school).subjects.set(subjects[:i])
+        make_teacher('ted', self.other_school)
+        client = client_for(self.manager)
+        client.get('/api/teachers/')
+        with self.assertNumQueries(2):
+            rows = client.get('/api/teachers/?view=compact').json()
+        self.assertEqual(
+            sorted(sorted(row['subject_names']) for row in rows), [[], ['Chemistry', 'Physics'], ['Physics']],
+        )
+
+    def test_other_views_keep_the_full_serializer(self):
+        rows = client_for(self.manager).get('/api/students/?view=full').json()
+        self.assertIn('user', rows[0])
+        self.assertIsInstance(rows[0]['user'], dict)
+
+
+# -----------------------------
+# SPARSE FIELDSETS
+# -----------------------------
+class SparseFieldsTests(TenantFixtures, TestCase):
+    def get(self, url):
+        client = client_for(self.manager)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        return response, queries
+
+    def test_only_requested_fields_are_returned(self):
+        response, _ = self.get('/api/students/?fields=id,student_id,first_name,user.email')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(len(rows), len(self.students))
+        for row in rows:
+            self.assertEqual(set(row), {'id', 'student_id', 'first_name', 'user'})
+            self.assertEqual(set(row['user']), {'email'})
+
+    def test_only_requested_columns_are_loaded(self):
+        response, queries = self.get('/api/students/?fields=id,student_id,first_name,last_name')
+        self.assertEqual(response.status_code, 200)
+        sql = next(q['sql'] for q in queries.captured_queries if 'api_studentprofile' in q['sql'])
+        self.assertIn('"api_user"."first_name"', sql)
+        self.assertNotIn('"api_studentprofile"."address"', sql)
+        self.assertNotIn('"api_user"."password"', sql)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        client = client_for(self.manager)
+        url = '/api/students/?fields=id,student_id,first_name,last_name,school'
+        # The first request resolves the user's school; later ones are one query
+        client.get(url)
+        with self.assertNumQueries(1):
+            client.get(url)
+        for i in range(5):
+            make_student_profile(f'delta{i}', self.school)
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(len(response.json()), len(self.students) + 5)
+
+    def test_expand_replaces_pk_with_object(self):
+        response, _ = self.get('/api/students/?fields=id,school.name&expand=school')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['school']['name'] for row in response.json()}, {self.school.name})
+
+    def test_unknown_fields_are_rejected_before_any_query(self):
+        client = client_for(self.manager)
+        client.get('/api/students/?fields=id')
+        with self.assertNumQueries(0):
+            response = client.get('/api/students/?fields=id,bogus,user.nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: bogus, user.nope'})
+
+    def test_nested_field_needs_expand(self):
+        response, _ = self.get('/api/students/?fields=id,school.name')
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_and_writes(self):
+        student = self.students[0]
+        client = client_for(self.manager)
+        response = client.get(f'/api/students/{student.pk}/?fields=id,admission_no')
+        self.assertEqual(response.json(), {'id': student.pk, 'admission_no': student.admission_no})
+        # Writes ignore ?fields= and answer the full representation
+        response = client.patch(f'/api/students/{student.pk}/?fields=id', {'remarks': 'Prefect'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['remarks'], 'Prefect')
+
+
+# -----------------------------
+# COMPRESSION
+# -----------------------------
+class CompressionTests(TestCase):
+    body = json.dumps([{'id': i, 'name': f'Student {i}', 'class_section': 'Grade 10A'} for i in range(200)]).encode()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def respond(self, response, path='/api/students/', accept='gzip, deflate'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept)
+        return compression.CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **headers):
+        return HttpResponse(self.body if body is None else body, content_type='application/json', headers=headers)
+
+    def test_choose_encoding(self):
+        self.assertEqual(compression.choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(compression.choose_encoding('*'), compression.encodings()[0])
+        self.assertIsNone(compression.choose_encoding('gzip;q=0, deflate'))
+        self.assertIsNone(compression.choose_encoding('identity'))
+        self.assertIsNone(compression.choose_encoding(''))
+
+    def test_large_json_is_gzipped(self):
+        response = self.respond(self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(self.body) / 5)
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_uncompressed_answers_still_vary(self):
+        response = self.respond(self.json_response(), accept='')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_small_and_compressed_types_are_left_alone(self):
+        for response in (
+            self.json_response(b'{"ok": true}'),
+            HttpResponse(self.body, content_type='application/pdf'),
+            self.json_response(**{'Content-Encoding': 'identity'}),
+        ):
+            with self.subTest(content_type=response['Content-Type']):
+                self.assertNotEqual(self.respond(response).get('Content-Encoding'), 'gzip')
+
+    def test_strong_etag_becomes_weak(self):
+        response = self.respond(self.json_response(ETag='"abc"'))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(self.respond(self.json_response(ETag='W/"abc"'))['ETag'], 'W/"abc"')
+
+    def test_cacheable_bodies_are_compressed_once(self):
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            first = self.respond(self.json_response(ETag='"abc"'))
+            second = self.respond(self.json_response(ETag='"abc"'))
+            self.respond(self.json_response())
+        self.assertEqual(compress.call_count, 2)
+        self.assertEqual(first.content, second.content)
+
+    def test_streaming_is_compressed_per_chunk(self):
+        chunks = [self.body[i:i + 2000] for i in range(0, len(self.body), 2000)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    @skipUnless(compression.available(), 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        response = self.respond(self.json_response(), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), self.body)
+
+
+# -----------------------------
+# CACHE NAMESPACES
+# -----------------------------
+class NamespaceTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.namespace = Namespace('tests', timeout=3600)
+
+    def test_scoped_invalidation_leaves_other_scopes(self):
+        one, two = self.namespace.key('list', scope=1), self.namespace.key('list', scope=2)
+        self.namespace.invalidate(scope=1)
+        self.assertNotEqual(self.namespace.key('list', scope=1), one)
+        self.assertEqual(self.namespace.key('list', scope=2), two)
+
+    def test_namespace_invalidation_reaches_every_scope(self):
+        keys = [self.namespace.key('list'), self.namespace.key('list', scope=1)]
+        self.namespace.invalidate()
+        self.assertNotEqual(self.namespace.key('list'), keys[0])
+        self.assertNotEqual(self.namespace.key('list', scope=1), keys[1])
+
+    def test_get_or_set_computes_until_invalidated(self):
+        compute = mock.Mock(side_effect=['first', 'second'])
+        self.assertEqual(self.namespace.get_or_set('value', compute, scope='Grade 10A'), 'first')
+        self.assertEqual(self.namespace.get_or_set('value', compute, scope='Grade 10A'), 'first')
+        self.namespace.invalidate(scope='Grade 10A')
+        self.assertEqual(self.namespace.get_or_set('value', compute, scope='Grade 10A'), 'second')
+        self.assertEqual(compute.call_count, 2)
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        self.namespace.set('value', 'old', scope=1)
+        self.namespace.cache.delete_many(self.namespace._version_keys(1))
+        # Versions restart from the clock in milliseconds
+        time.sleep(0.002)
+        self.assertIsNone(self.namespace.get('value', scope=1))
+
+    def test_local_memory_is_the_default_and_entries_are_short_lived(self):
+        self.assertIsInstance(self.namespace.cache, LocMemCache)
+        self.assertEqual(self.namespace._timeout(3600), 60)
+        self.assertEqual(self.namespace._timeout(None), 60)
+        self.assertEqual(self.namespace._timeout(5), 5)
+
+
+class RedisStandIn:
+    """
+    In-memory stand-in for a Redis server, in the shape of the `redis`
+    module: the client calls Django's RedisCache makes, with every client
+    of a URL talking to the same server.
+    """
+
+    def __init__(self):
+        self.servers = {}
+        self.module = types.ModuleType('redis')
+        self.module.ConnectionPool = self._pool_class()
+        self.module.Redis = self._client_class()
+        self.module.connection = types.SimpleNamespace(DefaultParser=object)
+
+    def _pool_class(self):
+        servers = self.servers
+
+        class ConnectionPool:
+            def __init__(self, url):
+                self.server = servers.setdefault(url, {})
+
+            @classmethod
+            def from_url(cls, url, **options):
+                return cls(url)
+
+        return ConnectionPool
+
+    @staticmethod
+    def _client_class():
+        class Redis:
+            def __init__(self, connection_pool):
+                self.data = connection_pool.server
+
+            def _live(self, key):
+                entry = self.data.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                    del self.data[key]
+                    entry = None
+                return entry
+
+            def get(self, key):
+                entry = self._live(key)
+                return None if entry is None else entry[0]
+
+            def mget(self, keys):
+                return [self.get(key) for key in keys]
+
+            def set(self, key, value, ex=None, nx=False):
+                if nx and self._live(key) is not None:
+                    return None
+                value = str(value).encode() if isinstance(value, int) else value
+                self.data[key] = (value, None if ex is None else time.monotonic() + ex)
+                return True
+
+            def exists(self, key):
+                return int(self._live(key) is not None)
+
+            def incr(self, key, amount=1):
+                value, expires = self._live(key) or (b'0', None)
+                value = int(value) + amount
+                self.data[key] = (str(value).encode(), expires)
+                return value
+
+            def delete(self, *keys):
+                return sum(self.data.pop(key, None) is not None for key in keys)
+
+            def ttl(self, key):
+                entry = self._live(key)
+                if entry is None:
+                    return -2
+                return -1 if entry[1] is None else round(entry[1] - time.monotonic())
+
+            def flushdb(self):
+                self.data.clear()
+                return True
+
+        return Redis
+
+
+REDIS_CACHES = {
+    # Two aliases on one server: two worker processes sharing Redis
+    alias: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://stand-in:6379/0',
+        'KEY_PREFIX': 'school',
+    }
+    for alias in ('default', 'other')
+}
+
+
+class RedisNamespaceTests(TestCase):
+    """Namespace on the production backend, against a fresh RedisStandIn per test."""
+
+    def setUp(self):
+        patcher = mock.patch.dict(sys.modules, {'redis': RedisStandIn().module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        redis_caches = override_settings(CACHES=REDIS_CACHES)
+        redis_caches.enable()
+        self.addCleanup(redis_caches.disable)
+        self.namespace = Namespace('tests', timeout=3600)
+        self.other = Namespace('tests', timeout=3600, alias='other')
+
+    def test_backend_is_shared(self):
+        caches['default'].set('probe', {'a': 1})
+        self.assertEqual(caches['other'].get('probe'), {'a': 1})
+
+    def test_invalidation_is_seen_by_other_processes(self):
+        self.namespace.set('value', 'old', scope=1)
+        self.assertEqual(self.other.get('value', scope=1), 'old')
+        self.other.invalidate(scope=1)
+        self.assertIsNone(self.namespace.get('value', scope=1))
+        self.other.set('value', 'new', scope=1)
+        self.assertEqual(self.namespace.get('value', scope=1), 'new')
+
+    def test_invalidation_is_one_incr(self):
+        self.namespace.key('list')
+        version = caches['other'].get('cache_version:tests')
+        self.other.invalidate()
+        self.assertEqual(caches['default'].get('cache_version:tests'), version + 1)
+
+    def test_timeouts_are_kept(self):
+        self.assertEqual(self.namespace._timeout(3600), 3600)
+        self.assertIsNone(self.namespace._timeout(None))
+        self.namespace.set('value', 'kept')
+        backend = caches['default']
+        key = backend.make_key(self.namespace.key('value'))
+        self.assertEqual(backend._cache.get_client(key).ttl(key), 3600)
+
+    def test_waits_for_the_lock_holder_in_another_process(self):
+        key = self.namespace.key('value')
+        self.assertTrue(caches['other'].add(f'{key}:lock', 1, 10))
+        store = threading.Timer(0.1, caches['other'].set, (key, 'from other', 3600))
+        store.start()
+        self.addCleanup(store.join)
+        compute = mock.Mock(return_value='computed here')
+        self.assertEqual(self.namespace.get_or_set('value', compute), 'from other')
+        compute.assert_not_called()
+
+    def test_other_processes_reuse_the_value(self):
+        compute = mock.Mock(return_value='computed')
+        self.assertEqual(self.namespace.get_or_set('value', compute), 'computed')
+        self.assertEqual(self.other.get_or_set('value', compute), 'computed')
+        compute.assert_called_once_with()
+        self.assertFalse(caches['other'].has_key(f"{self.namespace.key('value')}:lock"))
+
+
+# -----------------------------
+# CACHE INVALIDATION
+# -----------------------------
+# Links of a teacher to subjects, scoped by teacher, to cover the m2m hooks
+teaching = Namespace('tests-teaching')
+invalidation.depends(teaching, Teacher.subjects.through, scope='teacher_id')
+
+
+class InvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        wereda = make_wereda('North')
+        cls.school = make_school('S1', wereda)
+        cls.other_school = make_school('S2', wereda)
+        cls.group = ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General')
+
+    def versions(self):
+        return reference.version(self.school.pk), reference.version(self.other_school.pk)
+
+    def test_save_bumps_the_rows_scope(self):
+        own, other = self.versions()
+        Section.objects.create(class_group=self.group, school=self.school, name='A')
+        self.assertNotEqual(reference.version(self.school.pk), own)
+        self.assertEqual(reference.version(self.other_school.pk), other)
+
+    def test_moving_a_row_bumps_old_and_new_scope(self):
+        section = Section.objects.create(class_group=self.group, school=self.school, name='A')
+        own, other = self.versions()
+        section.school = self.other_school
+        section.save()
+        new_own, new_other = self.versions()
+        self.assertNotEqual(new_own, own)
+        self.assertNotEqual(new_other, other)
+
+    def test_delete_bumps_the_rows_scope(self):
+        section = Section.objects.create(class_group=self.group, school=self.school, name='A')
+        own, other = self.versions()
+        section.delete()
+        self.assertNotEqual(reference.version(self.school.pk), own)
+        self.assertEqual(reference.version(self.other_school.pk), other)
+
+    def test_unscoped_dependency_bumps_whole_namespace(self):
+        own, other = self.versions()
+        Subject.objects.create(name='Physics', code='PHY', credit_hours=3, department='Sci', level='10')
+        new_own, new_other = self.versions()
+        self.assertNotEqual(new_own, own)
+        self.assertNotEqual(new_other, other)
+
+    def test_changed_bumps_scopes_of_bulk_writes(self):
+        sections = Section.objects.bulk_create([Section(class_group=self.group, school=self.school, name='B')])
+        own, other = self.versions()
+        invalidation.changed(Section, sections)
+        self.assertNotEqual(reference.version(self.school.pk), own)
+        self.assertEqual(reference.version(self.other_school.pk), other)
+
+    def test_batch_bumps_each_scope_once(self):
+        with mock.patch.object(reference, 'invalidate', wraps=reference.invalidate) as invalidate:
+            with invalidation.batch():
+                for name in 'ABC':
+                    Section.objects.create(class_group=self.group, school=self.school, name=name)
+                invalidate.assert_not_called()
+        invalidate.assert_called_once_with(str(self.school.pk))
+
+    def test_bump_repeats_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Section.objects.create(class_group=self.group, school=self.school, name='A')
+        version = reference.version(self.school.pk)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(reference.version(self.school.pk), version)
+
+
+    def test_m2m_changes_bump_each_linked_scope(self):
+        teacher, other = make_teacher('tom', self.school), make_teacher('ted', self.school)
+        subjects = [
+            Subject.objects.create(name=name, code=name[:3].upper(), credit_hours=3, department='Sci', level='10')
+            for name in ('Physics', 'Chemistry')
+        ]
+        for change in (
+            lambda: teacher.subjects.add(*subjects),
+            lambda: teacher.subjects.remove(subjects[0]),
+            lambda: teacher.subjects.clear(),
+            lambda: subjects[1].teachers.add(teacher),
+        ):
+            own, unrelated = teaching.version(teacher.pk), teaching.version(other.pk)
+            change()
+            self.assertNotEqual(teaching.version(teacher.pk), own)
+            self.assertEqual(teaching.version(other.pk), unrelated)
+
+
+# -----------------------------
+# REFERENCE DATA ETAGS
+# -----------------------------
+class ReferenceDataETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        wereda = make_wereda('North')
+        cls.school = make_school('S1', wereda)
+        cls.other_school = make_school('S2', wereda)
+        cls.group = ClassGroup.objects.create(name='Grade 10', level='Secondary', academic_program='General')
+        Section.objects.create(class_group=cls.group, school=cls.school, name='A')
+        Section.objects.create(class_group=cls.group, school=cls.other_school, name='B')
+        Subject.objects.create(name='Mathematics', code='MATH', credit_hours=4, department='Sci', level='10')
+        cls.teacher = make_teacher('teacher1', cls.school)
+
+    def setUp(self):
+        # Cached lists outlive the rolled-back rows of earlier tests
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = client_for(self.teacher.user)
+
+    def test_unchanged_list_answers_304(self):
+        for path in ('available_subjects', 'available_sections', 'grade_types'):
+            with self.subTest(path):
+                url = f'/api/teacher-utils/{path}/'
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('no-cache', response['Cache-Control'])
+                revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.content, b'')
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.client.get('/api/teacher-utils/available_subjects/')['ETag']
+        for header in (f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header):
+                response = self.client.get('/api/teacher-utils/available_subjects/', HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+
+    def test_stale_etag_gets_the_list(self):
+        response = self.client.get('/api/teacher-utils/available_subjects/', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['code'] for s in response.json()], ['MATH'])
+
+    def test_subject_change_changes_etag(self):
+        etag = self.client.get('/api/teacher-utils/available_subjects/')['ETag']
+        Subject.objects.filter(code='MATH').get().save()
+        response = self.client.get('/api/teacher-utils/available_subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_sections_are_the_teachers_school_only(self):
+        response = self.client.get('/api/teacher-utils/available_sections/')
+        self.assertEqual([s['name'] for s in response.json()], ['Grade 10 - Section A'])
+
+    def test_section_change_only_changes_its_schools_etag(self):
+        etag = self.client.get('/api/teacher-utils/available_sections/')['ETag']
+        Section.objects.create(class_group=self.group, school=self.other_school, name='C')
+        response = self.client.get('/api/teacher-utils/available_sections/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Section.objects.create(class_group=self.group, school=self.school, name='D')
+        response = self.client.get('/api/teacher-utils/available_sections/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Grade 10 - Section D', [s['name'] for s in response.json()])
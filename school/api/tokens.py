@@ -0,0 +1,132 @@
+"""
+JWT tokens with role claims and the in-memory revocation list.
+
+SchoolRefreshToken embeds role, profile_id and school_id as signed claims so
+StatelessRoleJWTAuthentication (see authentication.py) can build the request
+user without loading it from the database.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RevokedToken
+
+ROLE_CLAIM = 'role'
+PROFILE_ID_CLAIM = 'profile_id'
+SCHOOL_ID_CLAIM = 'school_id'
+
+TOKEN_REVOCATION_REFRESH_SECONDS = getattr(settings, 'TOKEN_REVOCATION_REFRESH_SECONDS', 30)
+
+
+def school_id_for(user, profile):
+    """School the user belongs to, or None for office-level and unassigned users."""
+    school_id = getattr(profile, 'school_id', None)
+    if school_id is None and user.role == 'school':
+        school_id = user.managed_schools.values_list('id', flat=True).first()
+    return school_id
+
+
+class SchoolRefreshToken(RefreshToken):
+    """RefreshToken carrying role, profile_id and school_id; access tokens inherit them."""
+
+    @classmethod
+    def for_user(cls, user):
+        # Imported here to avoid a cycle: authentication imports this module.
+        from .authentication import get_role_profile
+
+        token = super().for_user(user)
+        profile = get_role_profile(user)
+        token[ROLE_CLAIM] = user.role
+        token[PROFILE_ID_CLAIM] = profile.pk if profile is not None else None
+        token[SCHOOL_ID_CLAIM] = school_id_for(user, profile)
+        return token
+
+
+# -----------------------------
+# REVOCATION LIST
+# -----------------------------
+class RevocationList:
+    """
+    Process-local copy of the RevokedToken table, reloaded at most every
+    TOKEN_REVOCATION_REFRESH_SECONDS so checking a token costs no query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = set()
+        self._user_cutoffs = {}
+        self._loaded_at = None
+
+    def _reload(self):
+        jtis = set()
+        user_cutoffs = {}
+        for jti, user_id, created_at in RevokedToken.objects.filter(
+            expires_at__gt=timezone.now()
+        ).values_list('jti', 'user_id', 'created_at'):
+            if jti:
+                jtis.add(jti)
+            elif user_id is not None:
+                user_cutoffs[user_id] = max(created_at, user_cutoffs.get(user_id, created_at))
+        self._jtis = jtis
+        self._user_cutoffs = user_cutoffs
+        self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > TOKEN_REVOCATION_REFRESH_SECONDS:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > TOKEN_REVOCATION_REFRESH_SECONDS:
+                    self._reload()
+
+    def is_revoked(self, token):
+        self._ensure_fresh()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(_user_id(token))
+        if cutoff is not None:
+            issued_at = datetime.fromtimestamp(token.get('iat', 0), tz=dt_timezone.utc)
+            return issued_at <= cutoff
+        return False
+
+    def invalidate(self):
+        self._loaded_at = None
+
+
+revocation_list = RevocationList()
+
+
+def _user_id(token):
+    try:
+        return int(token.get(api_settings.USER_ID_CLAIM))
+    except (TypeError, ValueError):
+        return None
+
+
+def _expiry(token):
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def revoke_token(token):
+    """Revoke a single access or refresh token."""
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={'user_id': _user_id(token), 'expires_at': _expiry(token)}
+    )
+    revocation_list.invalidate()
+
+
+def revoke_user_tokens(user):
+    """Revoke every token issued to `user` so far (e.g. after deactivation)."""
+    RevokedToken.objects.filter(Q(expires_at__lte=timezone.now()) | Q(user=user, jti='')).delete()
+    RevokedToken.objects.create(
+        user=user,
+        expires_at=timezone.now() + api_settings.REFRESH_TOKEN_LIFETIME,
+    )
+    revocation_list.invalidate()
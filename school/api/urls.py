@@ -1,11 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    LoginAPIView, StaffViewSet, UserDetailAPIView, SchoolViewSet, StudentViewSet,
+    LoginAPIView, LogoutAPIView, StaffViewSet, UserDetailAPIView, SchoolViewSet, StudentViewSet,
     SchoolManagerRegistrationViewSet, SupervisorRegistrationViewSet, WeredaManagerViewSet, 
     WeredaViewSet, StudentSelfViewSet, TeacherViewSet, student_announcements, mark_announcement_read
 )
 from .teacher_views import TeacherSelfViewSet, TeacherUtilityViewSet
+from .batch_views import BatchAPIView
+from .rollup_views import RollupViewSet
+from .report_card_views import ReportCardViewSet
+from .job_views import JobViewSet
 
 router = DefaultRouter()
 router.register("students", StudentViewSet, basename="students")
@@ -19,10 +23,15 @@ router.register(r'schools', SchoolViewSet, basename='school')
 router.register(r'register_schools_supervisor', SupervisorRegistrationViewSet, basename='register_schools_supervisor')
 router.register(r'register_school_manager', SchoolManagerRegistrationViewSet, basename='register_school_manager')
 router.register(r'wereda/officer', WeredaManagerViewSet, basename='wereda_office')
+router.register(r'rollups', RollupViewSet, basename='rollups')
+router.register(r'report-cards', ReportCardViewSet, basename='report-cards')
+router.register(r'jobs', JobViewSet, basename='jobs')
 
 urlpatterns = [
     path('login/', LoginAPIView.as_view(), name='login'),
+    path('logout/', LogoutAPIView.as_view(), name='logout'),
     path('user/', UserDetailAPIView.as_view(), name='user-detail'),
+    path('batch/', BatchAPIView.as_view(), name='batch'),
     path('announcements/', student_announcements, name='student-announcements'),
     path('announcements/<int:announcement_id>/read/', mark_announcement_read, name='mark-announcement-read'),
     path("", include(router.urls)),
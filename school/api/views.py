@@ -4,18 +4,20 @@ from rest_framework.permissions import IsAuthenticated, BasePermission, AllowAny
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import check_password
-from django.db import transaction, models
+from django.db import IntegrityError, transaction, models
+from django.core.files.storage import storages
 from django.http import HttpResponse
 from datetime import datetime
 import csv
 import io
+import uuid
 
 from .models import (
     School, StaffProfile, StudentProfile, Wereda, Grade, Attendance, 
     Subject, Semester, BorrowRecord, Book, Teacher, Section, Schedule, 
-    Announcement, AnnouncementRead
+    Announcement, AnnouncementRead, AttendanceBitmap, Student, TermResult, TermSummary
 )
 from .serializers import (
     SchoolManagerRegistrationSerializer, SchoolSerializer, StaffSerializer, 
@@ -24,6 +26,17 @@ from .serializers import (
     TeacherGradeSerializer, TeacherAttendanceSerializer
 )
 from .record_serializers import GradeSerializer, AttendanceSerializer
+from .authentication import get_teacher
+from .tokens import SchoolRefreshToken, revoke_token
+from .hashers import verify_login_password, LoginBusy
+from .tenancy import SchoolScopedViewSetMixin
+from .compact_serializers import CompactListMixin, CompactStudentSerializer, CompactTeacherSerializer
+from .sparse_fields import SparseFieldsViewSetMixin
+from .archive import grades_for, attendance_for
+from .sharding import with_related
+from . import attendance_bitmaps
+from .jobs import enqueue
+from .job_views import accepted, wants_async
 
 User = get_user_model()
 
@@ -76,13 +89,15 @@ class LoginAPIView(APIView):
         elif not password:
             return Response({"error": "Password is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2️⃣ Check if user exists and verify password
+        # 2️⃣ Check if user exists and verify password (on the bounded hashing pool)
+        user = User.objects.filter(email=email).first()
         try:
-            user = User.objects.get(email=email)
-            if not check_password(password, user.password):
+            if not verify_login_password(user, password):
                 return Response({"error": "Invalid email or password."}, status=status.HTTP_401_UNAUTHORIZED)
-        except User.DoesNotExist:
-            return Response({"error": "Invalid email or password."}, status=status.HTTP_401_UNAUTHORIZED)
+        except LoginBusy:
+            response = Response({"error": "Too many logins right now, please retry shortly."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response["Retry-After"] = "5"
+            return response
 
         # 3️⃣ Check if user is active
         if not user.is_active:
@@ -90,7 +105,7 @@ class LoginAPIView(APIView):
 
         # 4️⃣ Generate JWT tokens
         try:
-            refresh = RefreshToken.for_user(user)
+            refresh = SchoolRefreshToken.for_user(user)
         except Exception as e:
             return Response({"error": "Failed to generate token.", "details": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -100,6 +115,32 @@ class LoginAPIView(APIView):
             "access_token": str(refresh.access_token),
             "refresh_token": str(refresh)
         }, status=status.HTTP_200_OK)
+
+
+# -----------------------------
+# LOGOUT API
+# -----------------------------
+class LogoutAPIView(APIView):
+    """
+    Revoke the access token used for this request and, when given,
+    the refresh token in the body.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.auth is not None:
+            revoke_token(request.auth)
+
+        raw_refresh = request.data.get("refresh_token")
+        if raw_refresh:
+            try:
+                revoke_token(RefreshToken(raw_refresh))
+            except TokenError as e:
+                return Response({"error": "Invalid refresh token.", "details": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"message": "Logged out."}, status=status.HTTP_200_OK)
+
+
 # USER DETAIL API
 # -----------------------------
 class UserDetailAPIView(APIView):
@@ -109,18 +150,90 @@ class UserDetailAPIView(APIView):
         return Response(UserSerializer(request.user).data)
 
 
+# -----------------------------
+# STUDENT CSV (shared by the viewset and the background jobs in api.tasks)
+def write_students_csv(stream, queryset):
+    writer = csv.writer(stream)
+    fields = [f.name for f in StudentProfile._meta.fields]
+    writer.writerow(fields)
+    count = 0
+    for student in queryset.select_related("user"):
+        # The school as its id, which is what import_students() reads back
+        writer.writerow([getattr(student, "school_id" if f == "school" else f) for f in fields])
+        count += 1
+    return count
+
+
+def import_students(reader, school_id=None, progress=None):
+    """Create users and profiles from CSV rows; returns (created_count, [{username, password}])."""
+    created_count = 0
+    imported_users = []
+
+    # id and created_at are in the CSV export_csv writes, but belong to the exported rows
+    valid_fields = {f.name for f in StudentProfile._meta.fields} - {"user", "id", "created_at"}
+    user_fields = ["first_name", "last_name", "email", "role", "profile_photo"]
+
+    for row in reader:
+        if row.get("admission_no") and row.get("class_section"):
+            # Clean first_name / last_name
+            first_name = (row.get("first_name") or "").strip()
+            last_name = (row.get("last_name") or "").strip()
+
+            # fallback if first_name missing
+            first_name_clean = first_name.lower() if first_name else "student"
+
+            # Auto-generate student_id if missing
+            student_id = row.get("student_id") or f"STUD{str(created_count+1).zfill(4)}"
+            nat_part = student_id[-4:]
+
+            # Auto-generate username
+            username = f"{first_name_clean}{nat_part}"
+            base_username = username
+            counter = 1
+            while User.objects.filter(username=username).exists():
+                username = f"{base_username}{counter}"
+                counter += 1
+
+            # Create user
+            user_data = {k: row[k] for k in user_fields if k in row}
+            user = User.objects.create(username=username, **user_data)
+            user.role = "student"
+            raw_password = (last_name or "Student").capitalize() + "#123"
+            user.set_password(raw_password)
+            user.save()
+
+            # Create student profile
+            student_data = {k: v for k, v in row.items() if k in valid_fields and v != ""}
+            student_data["student_id"] = student_id
+            school = student_data.pop("school", None) or None
+            student_data["school_id"] = school_id or school
+
+            for date_field in ["dob", "enrollment_date"]:
+                if student_data.get(date_field):
+                    student_data[date_field] = StudentViewSet.parse_date(student_data[date_field])
+
+            StudentProfile.objects.create(user=user, **student_data)
+            created_count += 1
+            imported_users.append({"username": username, "password": raw_password})
+            if progress is not None:
+                progress(created_count)
+
+    return created_count, imported_users
+
+
 # -----------------------------
 # STUDENT CRUD
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(CompactListMixin, SparseFieldsViewSetMixin, SchoolScopedViewSetMixin, viewsets.ModelViewSet):
     queryset = StudentProfile.objects.select_related('user').order_by("-id")
     serializer_class = StudentSerializer
+    compact_serializer_class = CompactStudentSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        """Students can only see their own profile"""
+        """Students can only see their own profile, staff only their school's students"""
         if self.request.user.role == 'student':
             return StudentProfile.objects.filter(user=self.request.user)
-        return StudentProfile.objects.all().order_by("-id")
+        return super().get_queryset()
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -164,6 +277,8 @@ class StudentViewSet(viewsets.ModelViewSet):
             valid_fields = {f.name for f in StudentProfile._meta.fields} - {"user", "student_id"}
             student_data = {k: v for k, v in data.items() if k in valid_fields}
             student_data["student_id"] = student_id
+            school = student_data.pop("school", None) or None
+            student_data["school_id"] = self.own_school_id() or school
 
             # Parse date fields
             for date_field in ["dob", "enrollment_date"]:
@@ -193,14 +308,13 @@ class StudentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def export_csv(self, request):
+        if wants_async(request):
+            return accepted(enqueue('students.export_csv', user=request.user, school_id=self.own_school_id(),
+                                    user_id=request.user.pk))
+
         response = HttpResponse(content_type="text/csv")
         response["Content-Disposition"] = 'attachment; filename="students.csv"'
-        writer = csv.writer(response)
-
-        fields = [f.name for f in StudentProfile._meta.fields]
-        writer.writerow(fields)
-        for student in StudentProfile.objects.all():
-            writer.writerow([getattr(student, f) for f in fields])
+        write_students_csv(response, self.get_queryset())
         return response
 
     @action(detail=False, methods=["post"])
@@ -209,56 +323,20 @@ class StudentViewSet(viewsets.ModelViewSet):
         if not file:
             return Response({"error": "No file uploaded"}, status=400)
 
+        if wants_async(request):
+            path = storages["private"].save(f"jobs/uploads/{uuid.uuid4().hex}.csv", file)
+            return accepted(enqueue('students.import_csv', user=request.user, school_id=self.own_school_id(),
+                                    path=path))
+
         decoded_file = file.read().decode("utf-8")
-        io_string = io.StringIO(decoded_file)
-        reader = csv.DictReader(io_string)
-
-        created_count = 0
-        imported_users = []
-
-        valid_fields = {f.name for f in StudentProfile._meta.fields} - {"user"}
-        user_fields = ["first_name", "last_name", "email", "role", "profile_photo"]
-
-        for row in reader:
-            if row.get("admission_no") and row.get("class_section"):
-                # Clean first_name / last_name
-                first_name = (row.get("first_name") or "").strip()
-                last_name = (row.get("last_name") or "").strip()
-
-                # fallback if first_name missing
-                first_name_clean = first_name.lower() if first_name else "student"
-
-                # Auto-generate student_id if missing
-                student_id = row.get("student_id") or f"STUD{str(created_count+1).zfill(4)}"
-                nat_part = student_id[-4:]
-
-                # Auto-generate username
-                username = f"{first_name_clean}{nat_part}"
-                base_username = username
-                counter = 1
-                while User.objects.filter(username=username).exists():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-
-                # Create user
-                user_data = {k: row[k] for k in user_fields if k in row}
-                user = User.objects.create(username=username, **user_data)
-                user.role = "student"
-                raw_password = (last_name or "Student").capitalize() + "#123"
-                user.set_password(raw_password)
-                user.save()
-
-                # Create student profile
-                student_data = {k: v for k, v in row.items() if k in valid_fields}
-                student_data["student_id"] = student_id
-
-                for date_field in ["dob", "enrollment_date"]:
-                    if student_data.get(date_field):
-                        student_data[date_field] = self.parse_date(student_data[date_field])
-
-                StudentProfile.objects.create(user=user, **student_data)
-                created_count += 1
-                imported_users.append({"username": username, "password": raw_password})
+        # All or nothing, like the job: a bad row must not leave accounts without profiles behind
+        try:
+            with transaction.atomic():
+                created_count, imported_users = import_students(
+                    csv.DictReader(io.StringIO(decoded_file)), self.own_school_id()
+                )
+        except IntegrityError as exc:
+            return Response({"error": f"Nothing was imported: {exc}"}, status=400)
 
         return Response({
             "message": f"Imported {created_count} students successfully",
@@ -273,8 +351,8 @@ class StudentViewSet(viewsets.ModelViewSet):
         student_profile = self.get_object()
         user = student_profile.user
         
-        grades = Grade.objects.filter(student=user).select_related('subject', 'semester').order_by('-date_recorded')
-        attendance = Attendance.objects.filter(student=user).select_related('subject').order_by('-date')
+        grades = with_related(Grade.objects.filter(student=user), 'subject', 'semester').order_by('-date_recorded')
+        attendance = with_related(Attendance.objects.filter(student=user), 'subject').order_by('-date')
 
         return Response({
             "student": f"{user.first_name} {user.last_name}",
@@ -313,28 +391,26 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
         subject = request.query_params.get('subject')
         academic_year = request.query_params.get('academic_year')
         
-        # Use select_related to reduce database queries
-        grades = Grade.objects.filter(student=request.user).select_related('subject', 'semester')
+        # Archived years are read from the archive table
+        grades = with_related(grades_for(academic_year).filter(student=request.user), 'subject', 'semester')
         
         if semester:
             grades = grades.filter(semester_id=semester)
         if subject:
             grades = grades.filter(subject_id=subject)
-        if academic_year:
-            grades = grades.filter(academic_year=academic_year)
             
+        # Statistics over every matching grade, in one query (DISTINCT can't follow a slice)
+        stats = grades.aggregate(
+            total=models.Count('id'), avg=models.Avg('score'), subjects=models.Count('subject', distinct=True),
+        )
         grades = grades.order_by('-date_recorded')[:50]  # Limit to 50 most recent
         
-        # Calculate statistics efficiently
-        total_grades = grades.count()
-        avg_score = grades.aggregate(avg=models.Avg('score'))['avg'] or 0
-        
         return Response({
             "grades": GradeSerializer(grades, many=True).data,
             "statistics": {
-                "total_grades": total_grades,
-                "average_score": round(avg_score, 2),
-                "subjects_count": grades.values('subject').distinct().count()
+                "total_grades": stats['total'],
+                "average_score": round(stats['avg'] or 0, 2),
+                "subjects_count": stats['subjects']
             }
         })
     
@@ -344,10 +420,15 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         subject = request.query_params.get('subject')
+        academic_year = request.query_params.get('academic_year')
+        semester_id = request.query_params.get('semester')
         
-        # Use select_related and limit results
-        attendance = Attendance.objects.filter(student=request.user).select_related('subject')
+        # Archived years are read from the archive table
+        attendance = with_related(attendance_for(academic_year).filter(student=request.user), 'subject')
         
+        semester = Semester.objects.filter(pk=semester_id).first() if semester_id else None
+        if semester:
+            attendance = attendance.filter(date__gte=semester.start_date, date__lte=semester.end_date)
         if date_from:
             attendance = attendance.filter(date__gte=date_from)
         if date_to:
@@ -355,25 +436,36 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
         if subject:
             attendance = attendance.filter(subject_id=subject)
             
+        if semester and not (date_from or date_to) and attendance_bitmaps.enabled():
+            # Whole-term statistics from the packed bitmaps instead of counting rows
+            bitmaps = AttendanceBitmap.objects.filter(student=request.user, semester=semester)
+            if subject:
+                bitmaps = bitmaps.filter(subject_id=subject)
+            statistics = attendance_bitmaps.summary(bitmaps)
+        else:
+            statistics = None
+            
         attendance = attendance.order_by('-date')[:100]  # Limit to 100 most recent
         
-        # Calculate statistics efficiently using aggregation
-        stats = attendance.aggregate(
-            total_days=models.Count('id'),
-            present_days=models.Count('id', filter=models.Q(status='present')),
-            absent_days=models.Count('id', filter=models.Q(status='absent'))
-        )
-        
-        attendance_percentage = (stats['present_days'] / stats['total_days'] * 100) if stats['total_days'] > 0 else 0
-        
-        return Response({
-            "attendance": AttendanceSerializer(attendance, many=True).data,
-            "statistics": {
+        if statistics is None:
+            # Calculate statistics efficiently using aggregation
+            stats = attendance.aggregate(
+                total_days=models.Count('id'),
+                present_days=models.Count('id', filter=models.Q(status='present')),
+                absent_days=models.Count('id', filter=models.Q(status='absent'))
+            )
+            
+            attendance_percentage = (stats['present_days'] / stats['total_days'] * 100) if stats['total_days'] > 0 else 0
+            statistics = {
                 "total_days": stats['total_days'],
                 "present_days": stats['present_days'],
                 "absent_days": stats['absent_days'],
                 "attendance_percentage": round(attendance_percentage, 2)
             }
+        
+        return Response({
+            "attendance": AttendanceSerializer(attendance, many=True).data,
+            "statistics": statistics
         })
     
     @action(detail=False, methods=['get'])
@@ -382,23 +474,27 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             profile = StudentProfile.objects.get(user=request.user)
             
-            # Get subjects efficiently with aggregated data
-            subjects_data = Subject.objects.filter(
-                grade__student=request.user
-            ).annotate(
-                average_score=models.Avg('grade__score'),
-                total_grades=models.Count('grade')
-            ).distinct()
+            # Aggregate per subject on the grade rows (they may be on a shard), then load the subjects
+            subjects_data = Grade.objects.filter(
+                student=request.user
+            ).values('subject_id').annotate(
+                average_score=models.Avg('score'),
+                total_grades=models.Count('id')
+            ).order_by()
+            subjects = Subject.objects.in_bulk([row['subject_id'] for row in subjects_data])
             
             subjects_list = []
-            for subject in subjects_data:
+            for row in subjects_data:
+                subject = subjects.get(row['subject_id'])
+                if subject is None:
+                    continue
                 subjects_list.append({
                     "id": subject.id,
                     "name": subject.name,
                     "code": subject.code,
                     "credit_hours": subject.credit_hours,
-                    "average_score": round(subject.average_score or 0, 2),
-                    "total_grades": subject.total_grades
+                    "average_score": round(row['average_score'] or 0, 2),
+                    "total_grades": row['total_grades']
                 })
             
             return Response(subjects_list)
@@ -429,6 +525,37 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
         
         return Response(records_data)
     
+    @action(detail=False, methods=['get'])
+    def my_results(self, request):
+        """Get current student's term results, GPA and class rank (latest semester by default)"""
+        summaries = TermSummary.objects.filter(student=request.user).select_related('semester')
+        semester_id = request.query_params.get('semester')
+        summary = (summaries.filter(semester_id=semester_id) if semester_id else summaries.order_by('-semester__start_date')).first()
+        if summary is None:
+            return Response({"error": "No term results yet"}, status=404)
+        
+        results = TermResult.objects.filter(student=request.user, semester=summary.semester).select_related('subject').order_by('subject__name')
+        return Response({
+            "semester": str(summary.semester),
+            "gpa": summary.gpa,
+            "credit_hours": summary.credit_hours,
+            "average_percentage": summary.average_percentage,
+            "class_rank": summary.class_rank,
+            "class_size": TermSummary.objects.filter(semester=summary.semester, section_id=summary.section_id).count() if summary.section_id else None,
+            "cumulative_gpa": Student.objects.filter(user=request.user).values_list('gpa', flat=True).first(),
+            "subjects": [
+                {
+                    "subject": result.subject.name,
+                    "subject_code": result.subject.code,
+                    "credit_hours": result.credit_hours,
+                    "percentage": result.percentage,
+                    "letter": result.letter,
+                    "grade_points": result.grade_points,
+                    "assessments": result.assessments
+                } for result in results
+            ]
+        })
+    
     @action(detail=False, methods=['get'])
     def academic_summary(self, request):
         """Get comprehensive academic summary - OPTIMIZED"""
@@ -449,21 +576,25 @@ class StudentSelfViewSet(viewsets.ReadOnlyModelViewSet):
             
             attendance_percentage = (attendance_stats['present_days'] / attendance_stats['total_days'] * 100) if attendance_stats['total_days'] > 0 else 0
             
-            # Get top 5 subject performances efficiently
-            subjects_performance = Subject.objects.filter(
-                grade__student=request.user
-            ).annotate(
-                average_score=models.Avg('grade__score'),
-                total_assessments=models.Count('grade')
-            ).distinct().order_by('-average_score')[:5]
+            # Get top 5 subject performances efficiently (aggregated on the grade rows, which may be on a shard)
+            subjects_performance = list(Grade.objects.filter(
+                student=request.user
+            ).values('subject_id').annotate(
+                average_score=models.Avg('score'),
+                total_assessments=models.Count('id')
+            ).order_by('-average_score')[:5])
+            subjects = Subject.objects.in_bulk([row['subject_id'] for row in subjects_performance])
             
             subjects_list = []
-            for subject in subjects_performance:
+            for row in subjects_performance:
+                subject = subjects.get(row['subject_id'])
+                if subject is None:
+                    continue
                 subjects_list.append({
                     "subject_name": subject.name,
                     "subject_code": subject.code,
-                    "average_score": round(subject.average_score or 0, 2),
-                    "total_assessments": subject.total_assessments
+                    "average_score": round(row['average_score'] or 0, 2),
+                    "total_assessments": row['total_assessments']
                 })
             
             return Response({
@@ -569,7 +700,7 @@ ROLE_CHOICES = [
     ('dormitory_manager', 'Dormitory Manager'),
 ]
 
-class StaffViewSet(viewsets.ModelViewSet):
+class StaffViewSet(SchoolScopedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for StaffProfile with restricted roles.
     Supports list, retrieve, create, update, delete.
@@ -579,7 +710,9 @@ class StaffViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Only show staff with roles in ROLE_CHOICES
         allowed_roles = [role[0] for role in ROLE_CHOICES]
-        return StaffProfile.objects.filter(user__role__in=allowed_roles).select_related('user').order_by("-id")
+        return StaffProfile.objects.for_user(self.request.user).filter(
+            user__role__in=allowed_roles
+        ).select_related('user').order_by("-id")
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -625,6 +758,8 @@ class StaffViewSet(viewsets.ModelViewSet):
             valid_fields = {f.name for f in StaffProfile._meta.fields} - {"user", "staff_id"}
             staff_data = {k: v for k, v in data.items() if k in valid_fields}
             staff_data["staff_id"] = staff_id
+            school = staff_data.pop("school", None) or None
+            staff_data["school_id"] = self.own_school_id() or school
             staff_profile = StaffProfile.objects.create(user=user, **staff_data)
 
         serializer = self.get_serializer(staff_profile)
@@ -645,7 +780,7 @@ class StaffViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(staff_instance, data=data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class WeredaViewSet(viewsets.ModelViewSet):
@@ -800,7 +935,7 @@ def mark_announcement_read(request, announcement_id):
 # -----------------------------
 # TEACHER CRUD & SELF-SERVICE
 # -----------------------------
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(SchoolScopedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Teacher management.
     Supports list, retrieve, create, update, delete.
@@ -818,7 +953,8 @@ class TeacherViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        teacher = serializer.save()
+        school_id = self.own_school_id()
+        teacher = serializer.save(**({"school": School.objects.get(pk=school_id)} if school_id else {}))
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -837,7 +973,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_profile(self, request):
         """Get current teacher's complete profile"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             serializer = TeacherSerializer(teacher)
             return Response(serializer.data)
         except Teacher.DoesNotExist:
@@ -847,7 +983,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_subjects(self, request):
         """Get subjects taught by current teacher"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             subjects = teacher.subjects.all()
             
             subjects_data = []
@@ -881,7 +1017,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_classes(self, request):
         """Get classes/sections taught by current teacher"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             # Get schedules for this teacher
             schedules = Schedule.objects.filter(teacher=request.user).select_related(
@@ -916,7 +1052,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def grades(self, request):
         """Get or create grades for teacher's students"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             if request.method == 'GET':
                 # Get filters
@@ -925,10 +1061,10 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 grade_type = request.query_params.get('grade_type')
                 
                 # Get grades for teacher's subjects
-                grades = Grade.objects.filter(
+                grades = with_related(Grade.objects.filter(
                     teacher=teacher,
-                    subject__in=teacher.subjects.all()
-                ).select_related('student', 'subject', 'section')
+                    subject_id__in=list(teacher.subjects.values_list('id', flat=True))
+                ), 'student', 'subject', 'section')
                 
                 if subject_id:
                     grades = grades.filter(subject_id=subject_id)
@@ -960,7 +1096,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def attendance(self, request):
         """Get or record attendance for teacher's students"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             if request.method == 'GET':
                 # Get filters
@@ -969,10 +1105,10 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                 date = request.query_params.get('date')
                 
                 # Get attendance records for teacher's subjects
-                attendance = Attendance.objects.filter(
+                attendance = with_related(Attendance.objects.filter(
                     taken_by=teacher,
-                    subject__in=teacher.subjects.all()
-                ).select_related('student', 'subject', 'section')
+                    subject_id__in=list(teacher.subjects.values_list('id', flat=True))
+                ), 'student', 'subject', 'section')
                 
                 if subject_id:
                     attendance = attendance.filter(subject_id=subject_id)
@@ -1004,12 +1140,13 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def my_students(self, request):
         """Get students in teacher's classes"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             # Get sections taught by this teacher
             sections = Section.objects.filter(
                 schedule__teacher=request.user
             ).distinct()
+            subject_ids = list(teacher.subjects.values_list('id', flat=True))
             
             students_data = []
             for section in sections:
@@ -1024,7 +1161,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
                     recent_grades = Grade.objects.filter(
                         student=student,
                         teacher=teacher,
-                        subject__in=teacher.subjects.all()
+                        subject_id__in=subject_ids
                     ).order_by('-date_recorded')[:3]
                     
                     # Get attendance percentage
@@ -1066,7 +1203,7 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
     def dashboard_stats(self, request):
         """Get dashboard statistics for teacher"""
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = get_teacher(request.user)
             
             # Get basic counts
             total_subjects = teacher.subjects.count()
@@ -1116,13 +1253,14 @@ class TeacherSelfViewSet(viewsets.ReadOnlyModelViewSet):
 # -----------------------------
 # TEACHER CRUD & MANAGEMENT
 # -----------------------------
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(CompactListMixin, SparseFieldsViewSetMixin, SchoolScopedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Teacher management.
     Supports list, retrieve, create, update, delete.
     """
-    queryset = Teacher.objects.all().order_by("-id")
+    queryset = Teacher.objects.select_related('user').prefetch_related('subjects').order_by("-id")
     serializer_class = TeacherSerializer
+    compact_serializer_class = CompactTeacherSerializer
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
@@ -1134,6 +1272,7 @@ class TeacherViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        teacher = serializer.save()
+        school_id = self.own_school_id()
+        teacher = serializer.save(**({"school": School.objects.get(pk=school_id)} if school_id else {}))
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 from datetime import timedelta
+import os
+import sys
 
 from pathlib import Path
 
+from django.conf import global_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,12 +51,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.sharding.AcademicShardMiddleware',
+    'api.term_results.TermResultsMiddleware',
 ]
 
 ROOT_URLCONF = 'school.urls'
@@ -86,6 +93,27 @@ DATABASES = {
     }
 }
 
+# Academic record shards (Grade, Attendance), off when empty. Each alias
+# needs a DATABASES entry; missing ones default to a local SQLite file so
+# sharding can be tried locally. Migrate each with `migrate --database <alias>`.
+ACADEMIC_SHARDS = [alias for alias in os.environ.get('ACADEMIC_SHARDS', '').split(',') if alias]
+for _alias in ACADEMIC_SHARDS:
+    DATABASES.setdefault(_alias, {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{_alias}.sqlite3',
+    })
+# Two spare SQLite databases for the sharded tests, which turn sharding on
+# with override_settings(ACADEMIC_SHARDS=TEST_ACADEMIC_SHARDS). The test
+# runner only creates them for the tests that use them.
+TEST_ACADEMIC_SHARDS = ['test_shard_0', 'test_shard_1']
+if sys.argv[1:2] == ['test']:
+    for _alias in TEST_ACADEMIC_SHARDS:
+        DATABASES.setdefault(_alias, {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / f'{_alias}.sqlite3',
+        })
+DATABASE_ROUTERS = ['api.sharding.AcademicShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -105,6 +133,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing policy. New hashes use the policy's hasher; older hashes
+# still verify and are upgraded on the user's next successful login.
+# 'argon2' needs the argon2-cffi package.
+PASSWORD_HASHER_POLICY = os.environ.get('PASSWORD_HASHER_POLICY', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+PASSWORD_ARGON2_PARAMS = {
+    'time_cost': 2,
+    'memory_cost': 65536,  # KiB
+    'parallelism': 2,
+}
+
+_PASSWORD_HASHERS_BY_POLICY = {
+    'pbkdf2': 'api.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'api.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS_BY_POLICY[PASSWORD_HASHER_POLICY]] + [
+    hasher for hasher in _PASSWORD_HASHERS_BY_POLICY.values()
+    if hasher != _PASSWORD_HASHERS_BY_POLICY[PASSWORD_HASHER_POLICY]
+] + [
+    # Django's own defaults, so hashes in any format Django writes keep verifying
+    hasher for hasher in global_settings.PASSWORD_HASHERS
+    if hasher not in _PASSWORD_HASHERS_BY_POLICY.values()
+]
+
+# Login password checks run on a bounded pool: LOGIN_HASH_WORKERS hashes at
+# a time, up to LOGIN_HASH_QUEUE_SIZE waiting, the rest get 503 right away.
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', 4))
+LOGIN_HASH_QUEUE_SIZE = int(os.environ.get('LOGIN_HASH_QUEUE_SIZE', 64))
+LOGIN_HASH_TIMEOUT = 10  # seconds a login may wait for its hash
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -127,15 +185,48 @@ STATIC_URL = 'static/'
 # Media files (uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Job results and report card zips (passwords, student records). Kept out of
+# MEDIA_ROOT, which DEBUG serves to anyone: the only way to them is the
+# authenticated download actions of /api/jobs/ and /api/report-cards/.
+PRIVATE_MEDIA_ROOT = Path(os.environ.get('PRIVATE_MEDIA_ROOT', BASE_DIR / 'private_media'))
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'private': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_MEDIA_ROOT},
+    },
+}
 from datetime import timedelta
 
+# JSON encoding of responses and request bodies. 'orjson' uses the renderer
+# and parser in api.renderers (same output, much faster on large lists; they
+# fall back to the stdlib encoder when orjson isn't installed), 'stdlib' keeps
+# DRF's own classes.
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson')
+_JSON_CLASSES_BY_BACKEND = {
+    'orjson': ('api.renderers.ORJSONRenderer', 'api.renderers.ORJSONParser'),
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+_JSON_RENDERER, _JSON_PARSER = _JSON_CLASSES_BY_BACKEND[JSON_BACKEND]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessRoleJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',  # Require login by default
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        _JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        _JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -146,6 +237,72 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),                # Authorization header type
 }
 
+# Seconds a resolved user + role profile (Teacher/StudentProfile/StaffProfile)
+# stays cached between requests. Saves invalidate it immediately.
+ROLE_PROFILE_CACHE_TTL = 60
+
+# How often (seconds) each process reloads the revoked-token list.
+TOKEN_REVOCATION_REFRESH_SECONDS = 30
+
+# Keep AttendanceBitmap (one packed row per student/section/subject/semester)
+# in sync with Attendance for fast term statistics. Run build_attendance_bitmaps
+# once after turning it on.
+ATTENDANCE_BITMAPS = os.environ.get('ATTENDANCE_BITMAPS', '').lower() in ('1', 'true', 'yes')
+
+# Processes rendering report cards (api.report_cards); empty = one per CPU.
+REPORT_CARD_WORKERS = int(os.environ.get('REPORT_CARD_WORKERS', '0')) or None
+
+# Shared cache (api.cache). Without CACHE_URL every process keeps its own
+# local-memory cache, which is enough for runserver: it never sees other
+# processes' invalidations, so namespaced entries expire within
+# LOCAL_CACHE_MAX_TTL seconds. In production set CACHE_URL=redis://host:6379/0
+# (needs the redis package) so that all workers share entries, key versions
+# and stampede locks. CACHE_URL=db:// shares them through a table in the
+# default database (created by migration 0019) where Redis isn't available,
+# at the cost of a query per cache read.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'school',
+        },
+    }
+elif CACHE_URL.startswith('db://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'school',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+LOCAL_CACHE_MAX_TTL = 60
+
+# Seconds one caller may spend recomputing an expired key while the others
+# wait for it, and how often each process adds its hit/miss counts to the
+# shared ones (manage.py cache_stats).
+CACHE_LOCK_TIMEOUT = 10
+CACHE_METRICS_FLUSH_SECONDS = 10
+
+# Response compression (api.compression): gzip, or brotli when installed.
+# Smaller bodies go out as they are. The compressed bodies of these paths
+# (and of responses with an ETag) are cached, so each version is compressed once.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CACHE_PATHS = (
+    '/api/announcements/',
+    '/api/student-self/announcements/',
+    '/api/teacher-utils/',
+)
+
 
 
 CORS_ALLOWED_ORIGINS = [